@@ -0,0 +1,145 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .inference import BatchPredictor
+
+
+class MicroBatchInference(object):
+    """Asyncio request batcher for detectors.
+
+    Images submitted by concurrent callers of :meth:`infer` are preprocessed
+    in a thread pool and queued. A background task collects queued images for
+    up to ``max_wait_ms`` milliseconds or ``max_batch_size`` images, whichever
+    comes first, runs a single batched forward pass and fans the results back
+    to the awaiting callers.
+
+    The forward pass runs in a dedicated thread so that the event loop keeps
+    accepting requests meanwhile. Both GPU and CPU-only models are supported,
+    the device is taken from the model.
+
+    Args:
+        model (nn.Module): The loaded detector.
+        max_batch_size (int): Maximum number of images forwarded at once.
+            Default: 8.
+        max_wait_ms (float): Maximum time in milliseconds the first image of
+            a batch waits for more images to arrive. Default: 10.
+        num_workers (int): Number of threads used for preprocessing.
+            Default: 4.
+
+    Example:
+        >>> async def main():
+        >>>     model = init_detector(config_file, checkpoint_file)
+        >>>     async with MicroBatchInference(model) as server:
+        >>>         results = await asyncio.gather(
+        >>>             *[server.infer(img) for img in imgs])
+    """
+
+    def __init__(self, model, max_batch_size=8, max_wait_ms=10, num_workers=4):
+        assert max_batch_size >= 1
+        assert max_wait_ms >= 0
+        self.predictor = BatchPredictor(model, num_workers=num_workers)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        # a single thread keeps the forward passes sequential
+        self._forward_executor = ThreadPoolExecutor(max_workers=1)
+        self._queue = None
+        self._task = None
+        # sizes of the forwarded batches, useful to tune the parameters
+        self.batch_sizes = []
+
+    async def start(self):
+        """Start the batching task on the running event loop."""
+        assert self._task is None, 'the batching task is already running'
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._batch_loop())
+
+    async def stop(self):
+        """Stop the batching task.
+
+        Requests that are still queued are cancelled.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+
+    def close(self):
+        """Shut down the preprocessing and forward threads."""
+        self.predictor.close()
+        self._forward_executor.shutdown()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def infer(self, img):
+        """Inference an image with the detector.
+
+        Args:
+            img (str or np.ndarray): Image filename or loaded image.
+
+        Returns:
+            Awaitable detection result of the image.
+        """
+        assert self._task is not None, 'call start() before infer()'
+        loop = asyncio.get_event_loop()
+        data = await loop.run_in_executor(self.predictor.executor,
+                                          self.predictor.preprocess, img)
+        future = loop.create_future()
+        self._queue.put_nowait((data, future))
+        return await future
+
+    async def _collect(self):
+        """Wait for a batch of queued requests."""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(),
+                                                    timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = await self._collect()
+            # callers that gave up do not need to be forwarded
+            batch = [(data, fut) for data, fut in batch if not fut.done()]
+            if not batch:
+                continue
+            datas = [data for data, _ in batch]
+            self.batch_sizes.append(len(datas))
+            try:
+                results = await loop.run_in_executor(
+                    self._forward_executor, self.predictor.forward, datas)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -1,4 +1,6 @@
+import copy
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 import matplotlib.pyplot as plt
 import mmcv
@@ -124,6 +126,136 @@ def inference_detector(model, img):
     return result
 
 
+def _batchable_pipeline(pipeline):
+    """Make a test pipeline whose images can be padded into one batch.
+
+    ``ImageToTensor`` outputs plain tensors that ``collate`` can only stack
+    when all images are of the same size. It is replaced by
+    ``DefaultFormatBundle`` so that the images are wrapped into stackable
+    DataContainers and zero padded to the largest image of the batch.
+    """
+    pipeline = copy.deepcopy(pipeline)
+    for transform in pipeline:
+        if transform['type'] == 'ImageToTensor':
+            transform.clear()
+            transform['type'] = 'DefaultFormatBundle'
+        elif 'transforms' in transform:
+            transform['transforms'] = _batchable_pipeline(
+                transform['transforms'])
+    return pipeline
+
+
+class BatchPredictor(object):
+    """Batched detector inference with a cached test pipeline.
+
+    Unlike :func:`inference_detector`, the test pipelines are built only once
+    at construction. Each call preprocesses the images in a thread pool,
+    collates them into a single zero padded batch and runs one forward pass.
+
+    Args:
+        model (nn.Module): The loaded detector.
+        num_workers (int): Number of threads used for preprocessing.
+            Default: 4.
+
+    Example:
+        >>> model = init_detector(config_file, checkpoint_file)
+        >>> predictor = BatchPredictor(model)
+        >>> results = predictor(['demo/demo.jpg', 'demo/demo.jpg'])
+    """
+
+    def __init__(self, model, num_workers=4):
+        self.model = model
+        self.device = next(model.parameters()).device
+        pipeline = _batchable_pipeline(model.cfg.data.test.pipeline)
+        self.file_pipeline = Compose(pipeline)
+        pipeline[0]['type'] = 'LoadImageFromWebcam'
+        self.array_pipeline = Compose(pipeline)
+        self.executor = ThreadPoolExecutor(max_workers=num_workers)
+        if not self.device.type == 'cuda':
+            # Use torchvision ops for CPU mode instead
+            for m in model.modules():
+                if isinstance(m, (RoIPool, RoIAlign)):
+                    if not m.aligned:
+                        # aligned=False is not implemented on CPU
+                        m.use_torchvision = True
+            warnings.warn('We set use_torchvision=True in CPU mode.')
+
+    def preprocess(self, img):
+        """Run the cached test pipeline on a single image.
+
+        Args:
+            img (str or np.ndarray): Image filename or loaded image.
+
+        Returns:
+            dict: The output of the test pipeline.
+        """
+        if isinstance(img, np.ndarray):
+            return self.array_pipeline(dict(img=img))
+        return self.file_pipeline(
+            dict(img_info=dict(filename=img), img_prefix=None))
+
+    def collate(self, datas):
+        """Collate preprocessed images into a batch on the model device.
+
+        Args:
+            datas (list[dict]): Outputs of :meth:`preprocess`.
+
+        Returns:
+            dict: Keyword arguments of the forward function of the model.
+        """
+        data = collate(datas, samples_per_gpu=len(datas))
+        if self.device.type == 'cuda':
+            return scatter(data, [self.device])[0]
+        # just get the actual data from DataContainer
+        return {
+            key: [item.data[0] for item in value]
+            for key, value in data.items()
+        }
+
+    def forward(self, datas):
+        """Run the detector on preprocessed images.
+
+        Images are forwarded in one batch. Test time augmentation only
+        supports a batch of one image, so in that case images are forwarded
+        one by one.
+
+        Args:
+            datas (list[dict]): Outputs of :meth:`preprocess`.
+
+        Returns:
+            list: Detection results of each image.
+        """
+        if len(datas[0]['img']) > 1:
+            return [self.forward([data])[0] for data in datas]
+        data = self.collate(datas)
+        with torch.no_grad():
+            return self.model(return_loss=False, rescale=True, **data)
+
+    def __call__(self, imgs):
+        """Inference image(s) with the detector.
+
+        Args:
+            imgs (str/ndarray or list[str/ndarray]): Either image files or
+                loaded images.
+
+        Returns:
+            If imgs is a list, a list of detection results of each image will
+            be returned, otherwise the detection result of the image.
+        """
+        is_batch = isinstance(imgs, (list, tuple))
+        if not is_batch:
+            imgs = [imgs]
+        if len(imgs) == 0:
+            return []
+        datas = list(self.executor.map(self.preprocess, imgs))
+        results = self.forward(datas)
+        return results if is_batch else results[0]
+
+    def close(self):
+        """Shut down the preprocessing threads."""
+        self.executor.shutdown()
+
+
 async def async_inference_detector(model, img):
     """Async inference image(s) with the detector.
 
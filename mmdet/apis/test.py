@@ -3,6 +3,7 @@ import pickle
 import shutil
 import tempfile
 import time
+from collections.abc import Sequence
 
 import mmcv
 import torch
@@ -62,7 +63,11 @@ def single_gpu_test(model,
     return results
 
 
-def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
+def multi_gpu_test(model,
+                   data_loader,
+                   tmpdir=None,
+                   gpu_collect=False,
+                   shard_size=None):
     """Test model with multiple gpus.
 
     This method tests model with multiple gpus and collects the results
@@ -71,22 +76,35 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
     collection. On cpu mode it saves the results on different gpus to 'tmpdir'
     and collects them by the rank 0 worker.
 
+    If ``shard_size`` is given, each gpu instead dumps its results to 'tmpdir'
+    in shards of ``shard_size`` results as soon as they are produced, and the
+    rank 0 worker gets a :obj:`ShardedResults` that loads them lazily in
+    dataset order. The memory of the results is then bounded by
+    ``shard_size * world_size`` instead of the size of the dataset.
+
     Args:
         model (nn.Module): Model to be tested.
         data_loader (nn.Dataloader): Pytorch data loader.
         tmpdir (str): Path of directory to save the temporary results from
             different gpus under cpu mode.
         gpu_collect (bool): Option to use either gpu or cpu to collect results.
+        shard_size (int | None): Number of results of a gpu per shard. None
+            means the results are not sharded. Default: None.
 
     Returns:
-        list: The prediction results.
+        list | :obj:`ShardedResults`: The prediction results.
     """
+    assert shard_size is None or (shard_size > 0 and not gpu_collect), \
+        'shard_size must be positive and cannot be used with gpu_collect'
     model.eval()
     results = []
     dataset = data_loader.dataset
     rank, world_size = get_dist_info()
     if rank == 0:
         prog_bar = mmcv.ProgressBar(len(dataset))
+    if shard_size is not None:
+        tmpdir = get_tmpdir(tmpdir)
+        num_shards = 0
     time.sleep(2)  # This line can prevent deadlock problem in some cases.
     for i, data in enumerate(data_loader):
         with torch.no_grad():
@@ -96,6 +114,11 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
                 result = [(bbox_results, encode_mask_results(mask_results))
                           for bbox_results, mask_results in result]
         results.extend(result)
+        while shard_size is not None and len(results) >= shard_size:
+            mmcv.dump(results[:shard_size],
+                      osp.join(tmpdir, f'part_{rank}_{num_shards}.pkl'))
+            results = results[shard_size:]
+            num_shards += 1
 
         if rank == 0:
             batch_size = len(result)
@@ -103,15 +126,105 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
                 prog_bar.update()
 
     # collect results from all ranks
-    if gpu_collect:
+    if shard_size is not None:
+        if results:
+            mmcv.dump(results, osp.join(tmpdir,
+                                        f'part_{rank}_{num_shards}.pkl'))
+        dist.barrier()
+        if rank != 0:
+            return None
+        return ShardedResults(tmpdir, len(dataset), shard_size, world_size)
+    elif gpu_collect:
         results = collect_results_gpu(results, len(dataset))
     else:
         results = collect_results_cpu(results, len(dataset), tmpdir)
     return results
 
 
-def collect_results_cpu(result_part, size, tmpdir=None):
-    rank, world_size = get_dist_info()
+class ShardedResults(Sequence):
+    """Results of :func:`multi_gpu_test` stored in shards on the disk.
+
+    The shards of all the gpus are loaded lazily, one shard per gpu at a
+    time, and interleaved back to the dataset order. Iterating over the
+    results or indexing them in ascending order therefore only keeps
+    ``shard_size * world_size`` results in memory.
+
+    Args:
+        tmpdir (str): Directory of the shards ``part_{rank}_{shard_id}.pkl``.
+        size (int): Number of results, the padded samples of the dataloader
+            are dropped.
+        shard_size (int): Number of results of a gpu per shard.
+        world_size (int): Number of gpus.
+    """
+
+    def __init__(self, tmpdir, size, shard_size, world_size):
+        self.tmpdir = tmpdir
+        self.size = size
+        self.shard_size = shard_size
+        self.world_size = world_size
+        self._shard_id = None
+        self._shard_results = None
+
+    def __len__(self):
+        return self.size
+
+    def load_shard(self, shard_id):
+        """Load a shard of all gpus.
+
+        Args:
+            shard_id (int): Index of the shard.
+
+        Returns:
+            list: The results of the shard in dataset order.
+        """
+        part_list = []
+        for i in range(self.world_size):
+            part_file = osp.join(self.tmpdir, f'part_{i}_{shard_id}.pkl')
+            part_list.append(mmcv.load(part_file))
+        # sort the results
+        ordered_results = []
+        for res in zip(*part_list):
+            ordered_results.extend(list(res))
+        return ordered_results
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self.size))]
+        if idx < 0:
+            idx += self.size
+        if not 0 <= idx < self.size:
+            raise IndexError('result index out of range')
+        num_per_shard = self.shard_size * self.world_size
+        shard_id = idx // num_per_shard
+        if shard_id != self._shard_id:
+            self._shard_results = self.load_shard(shard_id)
+            self._shard_id = shard_id
+        return self._shard_results[idx - shard_id * num_per_shard]
+
+    def __iter__(self):
+        num_per_shard = self.shard_size * self.world_size
+        for start in range(0, self.size, num_per_shard):
+            shard_results = self.load_shard(start // num_per_shard)
+            yield from shard_results[:self.size - start]
+
+    def cleanup(self):
+        """Remove the shards from the disk."""
+        self._shard_id = None
+        self._shard_results = None
+        shutil.rmtree(self.tmpdir)
+
+
+def get_tmpdir(tmpdir=None):
+    """Get a temporary directory shared by all the ranks.
+
+    Args:
+        tmpdir (str | None): The directory to use. If None, rank 0 creates
+            one and broadcasts its path to the other ranks.
+
+    Returns:
+        str: Path of the directory.
+    """
+    rank, _ = get_dist_info()
     # create a tmp dir if it is not specified
     if tmpdir is None:
         MAX_LEN = 512
@@ -129,6 +242,12 @@ def collect_results_cpu(result_part, size, tmpdir=None):
         tmpdir = dir_tensor.cpu().numpy().tobytes().decode().rstrip()
     else:
         mmcv.mkdir_or_exist(tmpdir)
+    return tmpdir
+
+
+def collect_results_cpu(result_part, size, tmpdir=None):
+    rank, world_size = get_dist_info()
+    tmpdir = get_tmpdir(tmpdir)
     # dump the part result to the dir
     mmcv.dump(result_part, osp.join(tmpdir, f'part_{rank}.pkl'))
     dist.barrier()
@@ -64,7 +64,8 @@ def train_detector(model,
             # cfg.gpus will be ignored if distributed
             len(cfg.gpu_ids),
             dist=distributed,
-            seed=cfg.seed) for ds in dataset
+            seed=cfg.seed,
+            bucket_cfg=cfg.data.get('bucket_sampler')) for ds in dataset
     ]
 
     # put model on gpus
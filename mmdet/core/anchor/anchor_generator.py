@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import mmcv
 import numpy as np
 import torch
@@ -6,6 +8,62 @@ from torch.nn.modules.utils import _pair
 from .builder import ANCHOR_GENERATORS
 
 
+class AnchorCache(object):
+    """A bounded LRU cache of generated anchors with hit-rate counters.
+
+    Args:
+        max_size (int): Maximum number of cached entries, 0 disables the
+            cache. Default: 16.
+    """
+
+    def __init__(self, max_size=16):
+        assert max_size >= 0
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def hit_rate(self):
+        """float: fraction of lookups served from the cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.
+
+    def get(self, key, generate_func):
+        """Get the cached value of ``key`` or generate and cache it.
+
+        Args:
+            key (hashable): Key of the value.
+            generate_func (callable): Function called without arguments to
+                generate the value on a cache miss.
+
+        Returns:
+            list[torch.Tensor]: A new list of the cached tensors. The tensors
+                are shared between lookups and must not be modified in place.
+        """
+        # keys built from traced tensors would freeze their values
+        if self.max_size == 0 or torch._C._get_tracing_state():
+            return generate_func()
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+        else:
+            self.misses += 1
+            self._cache[key] = generate_func()
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return list(self._cache[key])
+
+    def clear(self):
+        """Remove all the cached entries and reset the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 @ANCHOR_GENERATORS.register_module()
 class AnchorGenerator(object):
     """Standard anchor generator for 2D anchor-based detectors.
@@ -35,6 +93,9 @@ class AnchorGenerator(object):
             float is given, they will be used to shift the centers of anchors.
         center_offset (float): The offset of center in proportion to anchors'
             width and height. By default it is 0 in V2.0.
+        cache_size (int): Maximum number of cached multi-level anchors and
+            valid flags, each keyed by the feature map sizes. 0 disables the
+            caches. Default: 16.
 
     Examples:
         >>> from mmdet.core import AnchorGenerator
@@ -64,7 +125,8 @@ class AnchorGenerator(object):
                  octave_base_scale=None,
                  scales_per_octave=None,
                  centers=None,
-                 center_offset=0.):
+                 center_offset=0.,
+                 cache_size=16):
         # check center and center_offset
         if center_offset != 0:
             assert centers is None, 'center cannot be set when center_offset' \
@@ -108,6 +170,27 @@ class AnchorGenerator(object):
         self.centers = centers
         self.center_offset = center_offset
         self.base_anchors = self.gen_base_anchors()
+        self.init_caches(cache_size)
+
+    def init_caches(self, cache_size=16):
+        """Initialize the caches of grid anchors and valid flags.
+
+        Args:
+            cache_size (int): Maximum number of entries of each cache.
+                Default: 16.
+        """
+        self.anchor_cache = AnchorCache(cache_size)
+        self.flag_cache = AnchorCache(cache_size)
+
+    def cache_info(self):
+        """dict: hits, misses and hit rates of the anchor and flag caches"""
+        info = dict()
+        for name in ['anchor', 'flag']:
+            cache = getattr(self, f'{name}_cache')
+            info[f'{name}_hits'] = cache.hits
+            info[f'{name}_misses'] = cache.misses
+            info[f'{name}_hit_rate'] = cache.hit_rate
+        return info
 
     @property
     def num_base_anchors(self):
@@ -203,13 +286,18 @@ class AnchorGenerator(object):
         else:
             return yy, xx
 
-    def grid_anchors(self, featmap_sizes, device='cuda'):
+    def grid_anchors(self, featmap_sizes, device='cuda', dtype=torch.float32):
         """Generate grid anchors in multiple feature levels.
 
+        The anchors are cached by the feature map sizes, device and dtype, so
+        the returned tensors must not be modified in place.
+
         Args:
             featmap_sizes (list[tuple]): List of feature map sizes in
                 multiple feature levels.
             device (str): Device where the anchors will be put on.
+            dtype (torch.dtype): Data type of the anchors.
+                Default: torch.float32.
 
         Return:
             list[torch.Tensor]: Anchors in multiple feature levels. \
@@ -219,10 +307,19 @@ class AnchorGenerator(object):
                 num_base_anchors is the number of anchors for that level.
         """
         assert self.num_levels == len(featmap_sizes)
+        key = (self._featmap_key(featmap_sizes), torch.device(device), dtype)
+        return self.anchor_cache.get(
+            key, lambda: self._grid_anchors(featmap_sizes, device, dtype))
+
+    @staticmethod
+    def _featmap_key(featmap_sizes):
+        return tuple((int(h), int(w)) for h, w in featmap_sizes)
+
+    def _grid_anchors(self, featmap_sizes, device, dtype):
         multi_level_anchors = []
         for i in range(self.num_levels):
             anchors = self.single_level_grid_anchors(
-                self.base_anchors[i].to(device),
+                self.base_anchors[i].to(device=device, dtype=dtype),
                 featmap_sizes[i],
                 self.strides[i],
                 device=device)
@@ -273,6 +370,9 @@ class AnchorGenerator(object):
     def valid_flags(self, featmap_sizes, pad_shape, device='cuda'):
         """Generate valid flags of anchors in multiple feature levels.
 
+        The flags are cached by the feature map sizes, padded shape and
+        device, so the returned tensors must not be modified in place.
+
         Args:
             featmap_sizes (list(tuple)): List of feature map sizes in
                 multiple feature levels.
@@ -283,6 +383,12 @@ class AnchorGenerator(object):
             list(torch.Tensor): Valid flags of anchors in multiple levels.
         """
         assert self.num_levels == len(featmap_sizes)
+        key = (self._featmap_key(featmap_sizes), tuple(pad_shape[:2]),
+               torch.device(device))
+        return self.flag_cache.get(
+            key, lambda: self._valid_flags(featmap_sizes, pad_shape, device))
+
+    def _valid_flags(self, featmap_sizes, pad_shape, device):
         multi_level_flags = []
         for i in range(self.num_levels):
             anchor_stride = self.strides[i]
@@ -362,6 +468,8 @@ class SSDAnchorGenerator(AnchorGenerator):
         scale_major (bool): Whether to multiply scales first when generating
             base anchors. If true, the anchors in the same row will have the
             same scales. It is always set to be False in SSD.
+        cache_size (int): Maximum number of cached multi-level anchors and
+            valid flags. Default: 16.
     """
 
     def __init__(self,
@@ -369,7 +477,8 @@ class SSDAnchorGenerator(AnchorGenerator):
                  ratios,
                  basesize_ratio_range,
                  input_size=300,
-                 scale_major=True):
+                 scale_major=True,
+                 cache_size=16):
         assert len(strides) == len(ratios)
         assert mmcv.is_tuple_of(basesize_ratio_range, float)
 
@@ -432,6 +541,7 @@ class SSDAnchorGenerator(AnchorGenerator):
         self.scale_major = scale_major
         self.center_offset = 0
         self.base_anchors = self.gen_base_anchors()
+        self.init_caches(cache_size)
 
     def gen_base_anchors(self):
         """Generate base anchors.
@@ -583,10 +693,11 @@ class LegacySSDAnchorGenerator(SSDAnchorGenerator, LegacyAnchorGenerator):
                  ratios,
                  basesize_ratio_range,
                  input_size=300,
-                 scale_major=True):
+                 scale_major=True,
+                 cache_size=16):
         super(LegacySSDAnchorGenerator,
               self).__init__(strides, ratios, basesize_ratio_range, input_size,
-                             scale_major)
+                             scale_major, cache_size)
         self.centers = [((stride - 1) / 2., (stride - 1) / 2.)
                         for stride in strides]
         self.base_anchors = self.gen_base_anchors()
@@ -601,9 +712,11 @@ class YOLOAnchorGenerator(AnchorGenerator):
             in multiple feature levels.
         base_sizes (list[list[tuple[int, int]]]): The basic sizes
             of anchors in multiple levels.
+        cache_size (int): Maximum number of cached multi-level anchors and
+            valid flags. Default: 16.
     """
 
-    def __init__(self, strides, base_sizes):
+    def __init__(self, strides, base_sizes, cache_size=16):
         self.strides = [_pair(stride) for stride in strides]
         self.centers = [(stride[0] / 2., stride[1] / 2.)
                         for stride in self.strides]
@@ -614,6 +727,7 @@ class YOLOAnchorGenerator(AnchorGenerator):
             self.base_sizes.append(
                 [_pair(base_size) for base_size in base_sizes_per_level])
         self.base_anchors = self.gen_base_anchors()
+        self.init_caches(cache_size)
 
     @property
     def num_levels(self):
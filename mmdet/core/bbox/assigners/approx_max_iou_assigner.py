@@ -34,6 +34,9 @@ class ApproxMaxIoUAssigner(MaxIoUAssigner):
         gpu_assign_thr (int): The upper bound of the number of GT for GPU
             assign. When the number of gt is above this threshold, will assign
             on CPU device. Negative values mean not assign on CPU.
+        chunk_size (int, optional): If given, the overlaps are computed for
+            the approxs of at most ``chunk_size`` squares at a time, which
+            bounds the memory of crowded images. Default: None.
     """
 
     def __init__(self,
@@ -45,7 +48,9 @@ class ApproxMaxIoUAssigner(MaxIoUAssigner):
                  ignore_wrt_candidates=True,
                  match_low_quality=True,
                  gpu_assign_thr=-1,
-                 iou_calculator=dict(type='BboxOverlaps2D')):
+                 iou_calculator=dict(type='BboxOverlaps2D'),
+                 chunk_size=None):
+        assert chunk_size is None or chunk_size > 0
         self.pos_iou_thr = pos_iou_thr
         self.neg_iou_thr = neg_iou_thr
         self.min_pos_iou = min_pos_iou
@@ -55,6 +60,7 @@ class ApproxMaxIoUAssigner(MaxIoUAssigner):
         self.gpu_assign_thr = gpu_assign_thr
         self.match_low_quality = match_low_quality
         self.iou_calculator = build_iou_calculator(iou_calculator)
+        self.chunk_size = chunk_size
 
     def assign(self,
                approxs,
@@ -103,25 +109,62 @@ class ApproxMaxIoUAssigner(MaxIoUAssigner):
             assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
             return assign_result
 
-        # re-organize anchors by approxs_per_octave x num_squares
-        approxs = torch.transpose(
-            approxs.view(num_squares, approxs_per_octave, 4), 0,
-            1).contiguous().view(-1, 4)
+        # group the approxs of each square
+        approxs = approxs.view(num_squares, approxs_per_octave, 4)
         assign_on_cpu = True if (self.gpu_assign_thr > 0) and (
             num_gts > self.gpu_assign_thr) else False
         # compute overlap and assign gt on CPU when number of GT is large
         if assign_on_cpu:
             device = approxs.device
             approxs = approxs.cpu()
+            squares = squares.cpu()
             gt_bboxes = gt_bboxes.cpu()
             if gt_bboxes_ignore is not None:
                 gt_bboxes_ignore = gt_bboxes_ignore.cpu()
             if gt_labels is not None:
                 gt_labels = gt_labels.cpu()
-        all_overlaps = self.iou_calculator(approxs, gt_bboxes)
 
-        overlaps, _ = all_overlaps.view(approxs_per_octave, num_squares,
-                                        num_gts).max(dim=0)
+        if self.chunk_size is not None and num_squares > self.chunk_size:
+            assign_result = self.assign_wrt_overlaps_chunked(
+                lambda start, end: self._approx_overlaps(
+                    approxs[start:end], squares[start:end], gt_bboxes,
+                    gt_bboxes_ignore), num_gts, num_squares, gt_labels)
+        else:
+            overlaps = self._approx_overlaps(approxs, squares, gt_bboxes,
+                                             gt_bboxes_ignore)
+            assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
+        if assign_on_cpu:
+            assign_result.gt_inds = assign_result.gt_inds.to(device)
+            assign_result.max_overlaps = assign_result.max_overlaps.to(device)
+            if assign_result.labels is not None:
+                assign_result.labels = assign_result.labels.to(device)
+        return assign_result
+
+    def _approx_overlaps(self,
+                         approxs,
+                         squares,
+                         gt_bboxes,
+                         gt_bboxes_ignore=None):
+        """Compute the overlaps of gts with squares, -1 for ignored ones.
+
+        The overlap of a square with a gt is the max overlap of its approxs
+        with the gt.
+
+        Args:
+            approxs (Tensor): Approxs of each square, shape
+                (n, approxs_per_octave, 4).
+            squares (Tensor): Squares, shape (n, 4).
+            gt_bboxes (Tensor): Groundtruth boxes, shape (k, 4).
+            gt_bboxes_ignore (Tensor, optional): Ignored groundtruth boxes.
+
+        Returns:
+            Tensor: The overlaps, shape (k, n).
+        """
+        num_squares, approxs_per_octave = approxs.shape[:2]
+        all_overlaps = self.iou_calculator(approxs.reshape(-1, 4), gt_bboxes)
+
+        overlaps, _ = all_overlaps.view(num_squares, approxs_per_octave,
+                                        -1).max(dim=1)
         overlaps = torch.transpose(overlaps, 0, 1)
 
         if (self.ignore_iof_thr > 0 and gt_bboxes_ignore is not None
@@ -135,11 +178,4 @@ class ApproxMaxIoUAssigner(MaxIoUAssigner):
                     gt_bboxes_ignore, squares, mode='iof')
                 ignore_max_overlaps, _ = ignore_overlaps.max(dim=0)
             overlaps[:, ignore_max_overlaps > self.ignore_iof_thr] = -1
-
-        assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
-        if assign_on_cpu:
-            assign_result.gt_inds = assign_result.gt_inds.to(device)
-            assign_result.max_overlaps = assign_result.max_overlaps.to(device)
-            if assign_result.labels is not None:
-                assign_result.labels = assign_result.labels.to(device)
-        return assign_result
+        return overlaps
@@ -3,7 +3,7 @@ import torch
 from ..builder import BBOX_ASSIGNERS
 from ..iou_calculators import build_iou_calculator
 from .assign_result import AssignResult
-from .base_assigner import BaseAssigner
+from .base_assigner import BaseAssigner, stack_padded_bboxes
 
 
 @BBOX_ASSIGNERS.register_module()
@@ -18,15 +18,23 @@ class ATSSAssigner(BaseAssigner):
 
     Args:
         topk (float): number of bbox selected in each level
+        chunk_size (int, optional): If given, the center distances of at most
+            ``chunk_size`` bboxes are computed at a time and the ious are only
+            computed for the candidates, which bounds the memory of crowded
+            images. None means computing them for all bboxes at once.
+            Default: None.
     """
 
     def __init__(self,
                  topk,
                  iou_calculator=dict(type='BboxOverlaps2D'),
-                 ignore_iof_thr=-1):
+                 ignore_iof_thr=-1,
+                 chunk_size=None):
+        assert chunk_size is None or chunk_size > 0
         self.topk = topk
         self.iou_calculator = build_iou_calculator(iou_calculator)
         self.ignore_iof_thr = ignore_iof_thr
+        self.chunk_size = chunk_size
 
     # https://github.com/sfzhang15/ATSS/blob/master/atss_core/modeling/rpn/atss/loss.py
 
@@ -67,6 +75,11 @@ class ATSSAssigner(BaseAssigner):
         bboxes = bboxes[:, :4]
         num_gt, num_bboxes = gt_bboxes.size(0), bboxes.size(0)
 
+        if (self.chunk_size is not None and num_gt > 0
+                and num_bboxes > self.chunk_size):
+            return self._assign_chunked(bboxes, num_level_bboxes, gt_bboxes,
+                                        gt_bboxes_ignore, gt_labels)
+
         # compute iou between all bbox and gt
         overlaps = self.iou_calculator(bboxes, gt_bboxes)
 
@@ -176,3 +189,305 @@ class ATSSAssigner(BaseAssigner):
             assigned_labels = None
         return AssignResult(
             num_gt, assigned_gt_inds, max_overlaps, labels=assigned_labels)
+
+    def _assign_chunked(self,
+                        bboxes,
+                        num_level_bboxes,
+                        gt_bboxes,
+                        gt_bboxes_ignore=None,
+                        gt_labels=None):
+        """Assign gt to bboxes with O(num_gt * chunk_size) memory.
+
+        The steps are the same as :meth:`assign`, but the center distances
+        are computed for ``chunk_size`` bboxes at a time while keeping the
+        running topk candidates of each level, and the ious are only computed
+        for the candidates. Candidates with exactly the same center distance
+        to a gt may be selected differently than by :meth:`assign`, since
+        topk does not order ties.
+        """
+        INF = 100000000
+        num_gt, num_bboxes = gt_bboxes.size(0), bboxes.size(0)
+
+        # assign 0 by default
+        assigned_gt_inds = bboxes.new_full((num_bboxes, ), 0, dtype=torch.long)
+
+        gt_cx = (gt_bboxes[:, 0] + gt_bboxes[:, 2]) / 2.0
+        gt_cy = (gt_bboxes[:, 1] + gt_bboxes[:, 3]) / 2.0
+        gt_points = torch.stack((gt_cx, gt_cy), dim=1)
+
+        bboxes_cx = (bboxes[:, 0] + bboxes[:, 2]) / 2.0
+        bboxes_cy = (bboxes[:, 1] + bboxes[:, 3]) / 2.0
+        bboxes_points = torch.stack((bboxes_cx, bboxes_cy), dim=1)
+
+        with_ignore = (
+            self.ignore_iof_thr > 0 and gt_bboxes_ignore is not None
+            and gt_bboxes_ignore.numel() > 0)
+
+        # Selecting candidates based on the center distance, chunk by chunk
+        candidate_idxs = []
+        start_idx = 0
+        for bboxes_per_level in num_level_bboxes:
+            end_idx = start_idx + bboxes_per_level
+            topk_dists = topk_idxs = None
+            for start in range(start_idx, end_idx, self.chunk_size):
+                end = min(start + self.chunk_size, end_idx)
+                distances = (bboxes_points[start:end, None, :] -
+                             gt_points[None, :, :]).pow(2).sum(-1).sqrt()
+                if with_ignore:
+                    ignore_overlaps = self.iou_calculator(
+                        bboxes[start:end], gt_bboxes_ignore, mode='iof')
+                    ignore_max_overlaps, _ = ignore_overlaps.max(dim=1)
+                    ignore_idxs = ignore_max_overlaps > self.ignore_iof_thr
+                    distances[ignore_idxs, :] = INF
+                    assigned_gt_inds[start:end][ignore_idxs] = -1
+                chunk_dists, chunk_idxs = distances.topk(
+                    min(self.topk, end - start), dim=0, largest=False)
+                chunk_idxs += start
+                if topk_dists is not None:
+                    # merge with the candidates of the previous chunks
+                    chunk_dists = torch.cat([topk_dists, chunk_dists])
+                    chunk_idxs = torch.cat([topk_idxs, chunk_idxs])
+                    topk_dists, inds = chunk_dists.topk(
+                        min(self.topk, chunk_dists.size(0)),
+                        dim=0,
+                        largest=False)
+                    topk_idxs = chunk_idxs.gather(0, inds)
+                else:
+                    topk_dists, topk_idxs = chunk_dists, chunk_idxs
+            if topk_idxs is not None:
+                candidate_idxs.append(topk_idxs)
+            start_idx = end_idx
+        candidate_idxs = torch.cat(candidate_idxs, dim=0)
+        num_candidates = candidate_idxs.size(0)
+
+        # compute the ious of the candidates only, and compute the mean and
+        # std, set mean + std as the iou threshold
+        candidate_overlaps = self.iou_calculator(
+            bboxes[candidate_idxs.view(-1)],
+            gt_bboxes.repeat(num_candidates, 1),
+            is_aligned=True).view(num_candidates, num_gt)
+        overlaps_mean_per_gt = candidate_overlaps.mean(0)
+        overlaps_std_per_gt = candidate_overlaps.std(0)
+        overlaps_thr_per_gt = overlaps_mean_per_gt + overlaps_std_per_gt
+
+        is_pos = candidate_overlaps >= overlaps_thr_per_gt[None, :]
+
+        # limit the positive sample's center in gt
+        candidate_cx = bboxes_cx[candidate_idxs]
+        candidate_cy = bboxes_cy[candidate_idxs]
+        l_ = candidate_cx - gt_bboxes[:, 0]
+        t_ = candidate_cy - gt_bboxes[:, 1]
+        r_ = gt_bboxes[:, 2] - candidate_cx
+        b_ = gt_bboxes[:, 3] - candidate_cy
+        is_in_gts = torch.stack([l_, t_, r_, b_], dim=1).min(dim=1)[0] > 0.01
+        is_pos = is_pos & is_in_gts
+
+        # if an anchor box is assigned to multiple gts,
+        # the one with the highest IoU will be selected.
+        pos_bbox_inds = candidate_idxs[is_pos]
+        pos_gt_inds = torch.nonzero(is_pos, as_tuple=False)[:, 1]
+        pos_overlaps = candidate_overlaps[is_pos]
+        max_overlaps = candidate_overlaps.new_full((num_bboxes, ), -INF)
+        argmax_overlaps = assigned_gt_inds.new_zeros((num_bboxes, ))
+        for start in range(0, num_bboxes, self.chunk_size):
+            end = min(start + self.chunk_size, num_bboxes)
+            in_chunk = (pos_bbox_inds >= start) & (pos_bbox_inds < end)
+            if not in_chunk.any():
+                continue
+            overlaps_inf = candidate_overlaps.new_full((end - start, num_gt),
+                                                       -INF)
+            overlaps_inf[pos_bbox_inds[in_chunk] - start,
+                         pos_gt_inds[in_chunk]] = pos_overlaps[in_chunk]
+            chunk_max_overlaps, chunk_argmax_overlaps = overlaps_inf.max(dim=1)
+            max_overlaps[start:end] = chunk_max_overlaps
+            argmax_overlaps[start:end] = chunk_argmax_overlaps
+        assigned_gt_inds[
+            max_overlaps != -INF] = argmax_overlaps[max_overlaps != -INF] + 1
+
+        if gt_labels is not None:
+            assigned_labels = assigned_gt_inds.new_full((num_bboxes, ), -1)
+            pos_inds = assigned_gt_inds > 0
+            assigned_labels[pos_inds] = gt_labels[
+                assigned_gt_inds[pos_inds] - 1]
+        else:
+            assigned_labels = None
+        return AssignResult(
+            num_gt, assigned_gt_inds, max_overlaps, labels=assigned_labels)
+
+    def assign_batch(self,
+                     bboxes,
+                     num_level_bboxes,
+                     gt_bboxes_list,
+                     gt_bboxes_ignore_list=None,
+                     gt_labels_list=None,
+                     valid_flags=None):
+        """Assign gt to the bboxes of multiple images at once.
+
+        This is equivalent to calling :meth:`assign` for each image, but the
+        gts of all images are padded to the same number and the candidate
+        selection, the statistics of the candidate ious and the resolution of
+        bboxes matched by several gts are vectorized over the whole batch.
+
+        Args:
+            bboxes (Tensor): Bounding boxes of all images, shape (B, n, 4).
+            num_level_bboxes (List): num of bboxes in each level, the same for
+                all images.
+            gt_bboxes_list (list[Tensor]): Groundtruth boxes of each image,
+                each of shape (k_i, 4).
+            gt_bboxes_ignore_list (list[Tensor], optional): Ground truth
+                bboxes of each image that are labelled as `ignored`.
+            gt_labels_list (list[Tensor], optional): Label of gt_bboxes of
+                each image.
+            valid_flags (Tensor, optional): Flags of the bboxes that take part
+                in the assignment, shape (B, n). The result of the i-th image
+                is the same as assigning ``bboxes[i][valid_flags[i]]`` with
+                the numbers of valid bboxes in each level.
+
+        Returns:
+            list[:obj:`AssignResult`]: The assign result of each image, over
+                its valid bboxes.
+        """
+        INF = 100000000
+        bboxes = bboxes[..., :4]
+        num_imgs, num_bboxes = bboxes.size(0), bboxes.size(1)
+        if gt_bboxes_ignore_list is None:
+            gt_bboxes_ignore_list = [None] * num_imgs
+        if gt_labels_list is None:
+            gt_labels_list = [None] * num_imgs
+        if valid_flags is None:
+            valid_flags = bboxes.new_ones(bboxes.shape[:2], dtype=torch.bool)
+        num_gts_list = [gt_bboxes.size(0) for gt_bboxes in gt_bboxes_list]
+        if (max(num_gts_list) == 0 or num_bboxes == 0
+                or self.chunk_size is not None):
+            return [
+                self.assign(img_bboxes[flags], [
+                    int(level_flags.sum())
+                    for level_flags in flags.split(num_level_bboxes)
+                ], gt_bboxes, gt_bboxes_ignore, gt_labels)
+                for img_bboxes, flags, gt_bboxes, gt_bboxes_ignore, gt_labels
+                in zip(bboxes, valid_flags, gt_bboxes_list,
+                       gt_bboxes_ignore_list, gt_labels_list)
+            ]
+
+        gt_bboxes, gt_valid = stack_padded_bboxes(gt_bboxes_list, bboxes)
+        num_gt = gt_bboxes.size(1)
+
+        # compute iou between all bbox and gt
+        overlaps = self.iou_calculator(bboxes, gt_bboxes)
+
+        # assign 0 by default
+        assigned_gt_inds = overlaps.new_full((num_imgs, num_bboxes),
+                                             0,
+                                             dtype=torch.long)
+
+        # compute center distance between all bbox and gt
+        gt_cx = (gt_bboxes[..., 0] + gt_bboxes[..., 2]) / 2.0
+        gt_cy = (gt_bboxes[..., 1] + gt_bboxes[..., 3]) / 2.0
+        gt_points = torch.stack((gt_cx, gt_cy), dim=-1)
+
+        bboxes_cx = (bboxes[..., 0] + bboxes[..., 2]) / 2.0
+        bboxes_cy = (bboxes[..., 1] + bboxes[..., 3]) / 2.0
+        bboxes_points = torch.stack((bboxes_cx, bboxes_cy), dim=-1)
+
+        distances = (bboxes_points[:, :, None, :] -
+                     gt_points[:, None, :, :]).pow(2).sum(-1).sqrt()
+
+        if self.ignore_iof_thr > 0 and any(
+                gt_bboxes_ignore is not None and gt_bboxes_ignore.numel() > 0
+                for gt_bboxes_ignore in gt_bboxes_ignore_list):
+            # padded ignored gts are empty boxes, whose iof is always 0
+            gt_bboxes_ignore, _ = stack_padded_bboxes(gt_bboxes_ignore_list,
+                                                      bboxes)
+            ignore_overlaps = self.iou_calculator(
+                bboxes, gt_bboxes_ignore, mode='iof')
+            ignore_max_overlaps, _ = ignore_overlaps.max(dim=2)
+            ignore_idxs = ignore_max_overlaps > self.ignore_iof_thr
+            distances[ignore_idxs] = INF
+            assigned_gt_inds[ignore_idxs] = -1
+        # invalid bboxes are farther than any valid one, so they are only
+        # selected when a level has less than topk valid bboxes
+        distances[~valid_flags] = float('inf')
+
+        # Selecting candidates based on the center distance
+        candidate_idxs = []
+        start_idx = 0
+        for level, bboxes_per_level in enumerate(num_level_bboxes):
+            # on each pyramid level, for each gt,
+            # select k bbox whose center are closest to the gt center
+            end_idx = start_idx + bboxes_per_level
+            distances_per_level = distances[:, start_idx:end_idx, :]
+            selectable_k = min(self.topk, bboxes_per_level)
+            _, topk_idxs_per_level = distances_per_level.topk(
+                selectable_k, dim=1, largest=False)
+            candidate_idxs.append(topk_idxs_per_level + start_idx)
+            start_idx = end_idx
+        candidate_idxs = torch.cat(candidate_idxs, dim=1)
+        candidate_valid = valid_flags.gather(
+            1, candidate_idxs.view(num_imgs, -1)).view_as(candidate_idxs)
+        num_candidates = candidate_valid.sum(dim=1)
+
+        # get corresponding iou for the these candidates, and compute the
+        # mean and std of the valid ones, set mean + std as the iou threshold
+        candidate_overlaps = overlaps.gather(1, candidate_idxs)
+        valid_overlaps = candidate_overlaps * candidate_valid
+        overlaps_mean_per_gt = valid_overlaps.sum(1) / num_candidates
+        overlaps_dev = candidate_overlaps - overlaps_mean_per_gt[:, None, :]
+        overlaps_var_per_gt = (overlaps_dev.pow(2) * candidate_valid).sum(1)
+        overlaps_std_per_gt = (overlaps_var_per_gt /
+                               (num_candidates - 1)).sqrt()
+        overlaps_thr_per_gt = overlaps_mean_per_gt + overlaps_std_per_gt
+
+        is_pos = candidate_overlaps >= overlaps_thr_per_gt[:, None, :]
+        is_pos &= candidate_valid & gt_valid[:, None, :]
+
+        # limit the positive sample's center in gt
+        flat_candidate_idxs = candidate_idxs.view(num_imgs, -1)
+        candidate_cx = bboxes_cx.gather(
+            1, flat_candidate_idxs).view_as(candidate_idxs)
+        candidate_cy = bboxes_cy.gather(
+            1, flat_candidate_idxs).view_as(candidate_idxs)
+
+        # calculate the left, top, right, bottom distance between positive
+        # bbox center and gt side
+        l_ = candidate_cx - gt_bboxes[:, None, :, 0]
+        t_ = candidate_cy - gt_bboxes[:, None, :, 1]
+        r_ = gt_bboxes[:, None, :, 2] - candidate_cx
+        b_ = gt_bboxes[:, None, :, 3] - candidate_cy
+        is_in_gts = torch.stack([l_, t_, r_, b_], dim=-1).min(dim=-1)[0] > 0.01
+        is_pos &= is_in_gts
+
+        # if an anchor box is assigned to multiple gts,
+        # the one with the highest IoU will be selected.
+        overlaps_inf = torch.full_like(overlaps, -INF)
+        overlaps_inf.scatter_(
+            1, candidate_idxs,
+            torch.where(is_pos, candidate_overlaps,
+                        torch.full_like(candidate_overlaps, -INF)))
+
+        max_overlaps, argmax_overlaps = overlaps_inf.max(dim=2)
+        assigned_gt_inds[
+            max_overlaps != -INF] = argmax_overlaps[max_overlaps != -INF] + 1
+
+        assign_results = []
+        for i in range(num_imgs):
+            num_gt = num_gts_list[i]
+            flags = valid_flags[i]
+            gt_labels = gt_labels_list[i]
+            num_valid = int(flags.sum())
+            if num_gt == 0:
+                # No truth, assign everything to background
+                img_gt_inds = assigned_gt_inds.new_zeros((num_valid, ))
+                img_max_overlaps = overlaps.new_zeros((num_valid, ))
+            else:
+                img_gt_inds = assigned_gt_inds[i][flags]
+                img_max_overlaps = max_overlaps[i][flags]
+            if gt_labels is not None:
+                img_labels = torch.full_like(img_gt_inds, -1)
+                pos_inds = img_gt_inds > 0
+                img_labels[pos_inds] = gt_labels[img_gt_inds[pos_inds] - 1]
+            else:
+                img_labels = None
+            assign_results.append(
+                AssignResult(
+                    num_gt, img_gt_inds, img_max_overlaps, labels=img_labels))
+        return assign_results
@@ -1,5 +1,7 @@
 from abc import ABCMeta, abstractmethod
 
+import torch
+
 
 class BaseAssigner(metaclass=ABCMeta):
     """Base assigner that assigns boxes to ground truth boxes."""
@@ -8,3 +10,28 @@ class BaseAssigner(metaclass=ABCMeta):
     def assign(self, bboxes, gt_bboxes, gt_bboxes_ignore=None, gt_labels=None):
         """Assign boxes to either a ground truth boxe or a negative boxes."""
         pass
+
+
+def stack_padded_bboxes(bboxes_list, ref):
+    """Stack bboxes of different images into a zero padded batch.
+
+    Args:
+        bboxes_list (list[Tensor | None]): Bboxes of each image, each of shape
+            (k_i, 4). None is treated as no bboxes.
+        ref (Tensor): Tensor whose dtype and device are used for the output.
+
+    Returns:
+        tuple[Tensor]: The padded bboxes of shape (B, max(k_i), 4) and the
+            valid mask of shape (B, max(k_i)).
+    """
+    nums = [0 if b is None else b.size(0) for b in bboxes_list]
+    num_max = max(nums) if nums else 0
+    padded = ref.new_zeros((len(bboxes_list), num_max, 4))
+    valid = torch.zeros((len(bboxes_list), num_max),
+                        dtype=torch.bool,
+                        device=ref.device)
+    for i, (bboxes, num) in enumerate(zip(bboxes_list, nums)):
+        if num > 0:
+            padded[i, :num] = bboxes[:, :4]
+            valid[i, :num] = True
+    return padded, valid
@@ -3,7 +3,7 @@ import torch
 from ..builder import BBOX_ASSIGNERS
 from ..iou_calculators import build_iou_calculator
 from .assign_result import AssignResult
-from .base_assigner import BaseAssigner
+from .base_assigner import BaseAssigner, stack_padded_bboxes
 
 
 @BBOX_ASSIGNERS.register_module()
@@ -35,6 +35,10 @@ class MaxIoUAssigner(BaseAssigner):
         gpu_assign_thr (int): The upper bound of the number of GT for GPU
             assign. When the number of gt is above this threshold, will assign
             on CPU device. Negative values mean not assign on CPU.
+        chunk_size (int, optional): If given, the overlaps are computed for
+            at most ``chunk_size`` bboxes at a time, which bounds the memory
+            of crowded images with many gts and bboxes. None means computing
+            the overlaps of all bboxes at once. Default: None.
     """
 
     def __init__(self,
@@ -46,7 +50,9 @@ class MaxIoUAssigner(BaseAssigner):
                  ignore_wrt_candidates=True,
                  match_low_quality=True,
                  gpu_assign_thr=-1,
-                 iou_calculator=dict(type='BboxOverlaps2D')):
+                 iou_calculator=dict(type='BboxOverlaps2D'),
+                 chunk_size=None):
+        assert chunk_size is None or chunk_size > 0
         self.pos_iou_thr = pos_iou_thr
         self.neg_iou_thr = neg_iou_thr
         self.min_pos_iou = min_pos_iou
@@ -56,6 +62,7 @@ class MaxIoUAssigner(BaseAssigner):
         self.gpu_assign_thr = gpu_assign_thr
         self.match_low_quality = match_low_quality
         self.iou_calculator = build_iou_calculator(iou_calculator)
+        self.chunk_size = chunk_size
 
     def assign(self, bboxes, gt_bboxes, gt_bboxes_ignore=None, gt_labels=None):
         """Assign gt to bboxes.
@@ -102,6 +109,23 @@ class MaxIoUAssigner(BaseAssigner):
             if gt_labels is not None:
                 gt_labels = gt_labels.cpu()
 
+        if self.chunk_size is not None and bboxes.size(0) > self.chunk_size:
+            assign_result = self.assign_wrt_overlaps_chunked(
+                lambda start, end: self._overlaps(bboxes[start:end],
+                                                  gt_bboxes, gt_bboxes_ignore),
+                gt_bboxes.size(0), bboxes.size(0), gt_labels)
+        else:
+            overlaps = self._overlaps(bboxes, gt_bboxes, gt_bboxes_ignore)
+            assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
+        if assign_on_cpu:
+            assign_result.gt_inds = assign_result.gt_inds.to(device)
+            assign_result.max_overlaps = assign_result.max_overlaps.to(device)
+            if assign_result.labels is not None:
+                assign_result.labels = assign_result.labels.to(device)
+        return assign_result
+
+    def _overlaps(self, bboxes, gt_bboxes, gt_bboxes_ignore=None):
+        """Compute the overlaps of gts with bboxes, -1 for ignored bboxes."""
         overlaps = self.iou_calculator(gt_bboxes, bboxes)
 
         if (self.ignore_iof_thr > 0 and gt_bboxes_ignore is not None
@@ -115,14 +139,7 @@ class MaxIoUAssigner(BaseAssigner):
                     gt_bboxes_ignore, bboxes, mode='iof')
                 ignore_max_overlaps, _ = ignore_overlaps.max(dim=0)
             overlaps[:, ignore_max_overlaps > self.ignore_iof_thr] = -1
-
-        assign_result = self.assign_wrt_overlaps(overlaps, gt_labels)
-        if assign_on_cpu:
-            assign_result.gt_inds = assign_result.gt_inds.to(device)
-            assign_result.max_overlaps = assign_result.max_overlaps.to(device)
-            if assign_result.labels is not None:
-                assign_result.labels = assign_result.labels.to(device)
-        return assign_result
+        return overlaps
 
     def assign_wrt_overlaps(self, overlaps, gt_labels=None):
         """Assign w.r.t. the overlaps of bboxes with gts.
@@ -137,13 +154,11 @@ class MaxIoUAssigner(BaseAssigner):
         """
         num_gts, num_bboxes = overlaps.size(0), overlaps.size(1)
 
-        # 1. assign -1 by default
-        assigned_gt_inds = overlaps.new_full((num_bboxes, ),
-                                             -1,
-                                             dtype=torch.long)
-
         if num_gts == 0 or num_bboxes == 0:
             # No ground truth or boxes, return empty assignment
+            assigned_gt_inds = overlaps.new_full((num_bboxes, ),
+                                                 -1,
+                                                 dtype=torch.long)
             max_overlaps = overlaps.new_zeros((num_bboxes, ))
             if num_gts == 0:
                 # No truth, assign everything to background
@@ -160,12 +175,106 @@ class MaxIoUAssigner(BaseAssigner):
                 max_overlaps,
                 labels=assigned_labels)
 
-        # for each anchor, which gt best overlaps with it
-        # for each anchor, the max iou of all gts
-        max_overlaps, argmax_overlaps = overlaps.max(dim=0)
-        # for each gt, which anchor best overlaps with it
-        # for each gt, the max iou of all proposals
-        gt_max_overlaps, gt_argmax_overlaps = overlaps.max(dim=1)
+        assigned_gt_inds, max_overlaps = self._assign_gt_inds(overlaps)
+
+        return AssignResult(
+            num_gts,
+            assigned_gt_inds,
+            max_overlaps,
+            labels=self._assigned_labels(assigned_gt_inds, gt_labels))
+
+    def assign_wrt_overlaps_chunked(self,
+                                    overlaps_func,
+                                    num_gts,
+                                    num_bboxes,
+                                    gt_labels=None):
+        """Assign w.r.t. overlaps that are computed chunk by chunk.
+
+        The result is the same as :meth:`assign_wrt_overlaps` on the whole
+        overlaps, but only the overlaps of ``chunk_size`` bboxes are kept in
+        memory at a time, together with the max overlaps of each bbox and the
+        running max overlaps of each gt. The peak memory is thus
+        O(num_gts * chunk_size) instead of O(num_gts * num_bboxes). With
+        ``gt_max_assign_all`` the overlaps are computed twice, since the
+        bboxes reaching the max overlap of a gt are only known after the
+        first pass.
+
+        Args:
+            overlaps_func (callable): Function taking the start and end
+                indices of a chunk of bboxes and returning the overlaps
+                between the gts and the chunk, shape (num_gts, end - start).
+            num_gts (int): Number of gts.
+            num_bboxes (int): Number of bboxes.
+            gt_labels (Tensor, optional): Labels of the gts, shape (k, ).
+
+        Returns:
+            :obj:`AssignResult`: The assign result.
+        """
+        if num_gts == 0 or num_bboxes == 0:
+            return self.assign_wrt_overlaps(
+                overlaps_func(0, num_bboxes), gt_labels)
+        chunk_size = self.chunk_size or num_bboxes
+        chunks = [(start, min(start + chunk_size, num_bboxes))
+                  for start in range(0, num_bboxes, chunk_size)]
+
+        max_overlaps = []
+        argmax_overlaps = []
+        gt_max_overlaps = gt_argmax_overlaps = None
+        for start, end in chunks:
+            overlaps = overlaps_func(start, end)
+            chunk_max_overlaps, chunk_argmax_overlaps = overlaps.max(dim=0)
+            max_overlaps.append(chunk_max_overlaps)
+            argmax_overlaps.append(chunk_argmax_overlaps)
+            chunk_gt_max_overlaps, chunk_gt_argmax_overlaps = overlaps.max(
+                dim=1)
+            chunk_gt_argmax_overlaps += start
+            if gt_max_overlaps is None:
+                gt_max_overlaps = chunk_gt_max_overlaps
+                gt_argmax_overlaps = chunk_gt_argmax_overlaps
+            else:
+                # keep the first bbox with the max overlap, as max() does
+                update = chunk_gt_max_overlaps > gt_max_overlaps
+                gt_max_overlaps = torch.where(update, chunk_gt_max_overlaps,
+                                              gt_max_overlaps)
+                gt_argmax_overlaps = torch.where(update,
+                                                 chunk_gt_argmax_overlaps,
+                                                 gt_argmax_overlaps)
+        max_overlaps = torch.cat(max_overlaps)
+        assigned_gt_inds = self._assign_wrt_max_overlaps(
+            max_overlaps, torch.cat(argmax_overlaps))
+
+        if self.match_low_quality:
+            low_quality = gt_max_overlaps >= self.min_pos_iou
+            for start, end in chunks:
+                # the overlaps are only needed to find all the max overlaps
+                overlaps = overlaps_func(
+                    start, end) if self.gt_max_assign_all else None
+                assigned_gt_inds[start:end] = self._match_low_quality(
+                    assigned_gt_inds[start:end], low_quality, overlaps,
+                    gt_max_overlaps, gt_argmax_overlaps, start)
+
+        return AssignResult(
+            num_gts,
+            assigned_gt_inds,
+            max_overlaps,
+            labels=self._assigned_labels(assigned_gt_inds, gt_labels))
+
+    def _assigned_labels(self, assigned_gt_inds, gt_labels=None):
+        """Get the labels of the assigned gts, -1 for the other bboxes."""
+        if gt_labels is None:
+            return None
+        assigned_labels = torch.full_like(assigned_gt_inds, -1)
+        pos_inds = assigned_gt_inds > 0
+        assigned_labels[pos_inds] = gt_labels[assigned_gt_inds[pos_inds] - 1]
+        return assigned_labels
+
+    def _assign_wrt_max_overlaps(self, max_overlaps, argmax_overlaps):
+        """Assign gt indices w.r.t. the max overlaps of each bbox.
+
+        This performs the steps 1 to 3 of the assignment.
+        """
+        # 1. assign -1 by default
+        assigned_gt_inds = torch.full_like(argmax_overlaps, -1)
 
         # 2. assign negative: below
         # the negative inds are set to be 0
@@ -180,6 +289,75 @@ class MaxIoUAssigner(BaseAssigner):
         # 3. assign positive: above positive IoU threshold
         pos_inds = max_overlaps >= self.pos_iou_thr
         assigned_gt_inds[pos_inds] = argmax_overlaps[pos_inds] + 1
+        return assigned_gt_inds
+
+    def _match_low_quality(self,
+                           assigned_gt_inds,
+                           low_quality,
+                           overlaps,
+                           gt_max_overlaps,
+                           gt_argmax_overlaps,
+                           start=0):
+        """Assign each gt to the bboxes with its max overlap (step 4).
+
+        Args:
+            assigned_gt_inds (Tensor): Assigned gt indices of the bboxes,
+                shape (..., n).
+            low_quality (Tensor): Mask of the gts to be matched, shape
+                (..., k).
+            overlaps (Tensor | None): Overlaps of the gts with the bboxes,
+                shape (..., k, n). Only used if ``gt_max_assign_all``.
+            gt_max_overlaps (Tensor): Max overlap of each gt, shape (..., k).
+            gt_argmax_overlaps (Tensor): Index of the bbox with the max
+                overlap of each gt, shape (..., k).
+            start (int): Index of the first bbox, when the bboxes are a chunk
+                of all the bboxes. Default: 0.
+
+        Returns:
+            Tensor: The updated assigned gt indices.
+        """
+        if self.gt_max_assign_all:
+            matches = overlaps == gt_max_overlaps[..., None]
+        else:
+            bbox_inds = torch.arange(
+                start,
+                start + assigned_gt_inds.size(-1),
+                device=assigned_gt_inds.device)
+            matches = gt_argmax_overlaps[..., None] == bbox_inds
+        matches &= low_quality[..., None]
+        # a bbox matched by several gts goes to the last one of them, as if
+        # the gts were matched one after another
+        gt_inds = torch.arange(
+            1,
+            matches.size(-2) + 1,
+            dtype=torch.int32,
+            device=matches.device)
+        matched_gt_inds, _ = (matches * gt_inds[:, None]).max(dim=-2)
+        return torch.where(matched_gt_inds > 0, matched_gt_inds.long(),
+                           assigned_gt_inds)
+
+    def _assign_gt_inds(self, overlaps, gt_valid=None):
+        """Assign gt indices w.r.t. non-empty overlaps.
+
+        Args:
+            overlaps (Tensor): Overlaps between k gt_bboxes and n bboxes,
+                shape (..., k, n). Leading dimensions are treated as a batch.
+            gt_valid (Tensor, optional): Mask of the gts that are not padding,
+                shape (..., k).
+
+        Returns:
+            tuple[Tensor]: The assigned gt indices and the max overlaps of
+                the bboxes, both of shape (..., n).
+        """
+        # for each anchor, which gt best overlaps with it
+        # for each anchor, the max iou of all gts
+        max_overlaps, argmax_overlaps = overlaps.max(dim=-2)
+        # for each gt, which anchor best overlaps with it
+        # for each gt, the max iou of all proposals
+        gt_max_overlaps, gt_argmax_overlaps = overlaps.max(dim=-1)
+
+        assigned_gt_inds = self._assign_wrt_max_overlaps(
+            max_overlaps, argmax_overlaps)
 
         if self.match_low_quality:
             # Low-quality matching will overwirte the assigned_gt_inds assigned
@@ -190,23 +368,105 @@ class MaxIoUAssigner(BaseAssigner):
             # However, if GT bbox 2's gt_argmax_overlaps = A, bbox A's
             # assigned_gt_inds will be overwritten to be bbox B.
             # This might be the reason that it is not used in ROI Heads.
-            for i in range(num_gts):
-                if gt_max_overlaps[i] >= self.min_pos_iou:
-                    if self.gt_max_assign_all:
-                        max_iou_inds = overlaps[i, :] == gt_max_overlaps[i]
-                        assigned_gt_inds[max_iou_inds] = i + 1
-                    else:
-                        assigned_gt_inds[gt_argmax_overlaps[i]] = i + 1
-
-        if gt_labels is not None:
-            assigned_labels = assigned_gt_inds.new_full((num_bboxes, ), -1)
-            pos_inds = torch.nonzero(
-                assigned_gt_inds > 0, as_tuple=False).squeeze()
-            if pos_inds.numel() > 0:
-                assigned_labels[pos_inds] = gt_labels[
-                    assigned_gt_inds[pos_inds] - 1]
-        else:
-            assigned_labels = None
+            low_quality = gt_max_overlaps >= self.min_pos_iou
+            if gt_valid is not None:
+                low_quality &= gt_valid
+            assigned_gt_inds = self._match_low_quality(
+                assigned_gt_inds, low_quality, overlaps, gt_max_overlaps,
+                gt_argmax_overlaps)
+        return assigned_gt_inds, max_overlaps
 
-        return AssignResult(
-            num_gts, assigned_gt_inds, max_overlaps, labels=assigned_labels)
+    def assign_batch(self,
+                     bboxes,
+                     gt_bboxes_list,
+                     gt_bboxes_ignore_list=None,
+                     gt_labels_list=None,
+                     valid_flags=None):
+        """Assign gt to the bboxes of multiple images at once.
+
+        This is equivalent to calling :meth:`assign` for each image, but the
+        gts of all images are padded to the same number, so that the overlaps
+        of the whole batch are computed in a single call and the assignment
+        is vectorized over the images.
+
+        Args:
+            bboxes (Tensor): Bounding boxes of all images, shape (B, n, 4).
+            gt_bboxes_list (list[Tensor]): Groundtruth boxes of each image,
+                each of shape (k_i, 4).
+            gt_bboxes_ignore_list (list[Tensor], optional): Ground truth
+                bboxes of each image that are labelled as `ignored`.
+            gt_labels_list (list[Tensor], optional): Label of gt_bboxes of
+                each image.
+            valid_flags (Tensor, optional): Flags of the bboxes that take part
+                in the assignment, shape (B, n). The result of the i-th image
+                is the same as assigning ``bboxes[i][valid_flags[i]]``.
+
+        Returns:
+            list[:obj:`AssignResult`]: The assign result of each image, over
+                its valid bboxes.
+        """
+        num_imgs = bboxes.size(0)
+        if gt_bboxes_ignore_list is None:
+            gt_bboxes_ignore_list = [None] * num_imgs
+        if gt_labels_list is None:
+            gt_labels_list = [None] * num_imgs
+        if valid_flags is None:
+            valid_flags = bboxes.new_ones(bboxes.shape[:2], dtype=torch.bool)
+        num_gts_list = [gt_bboxes.size(0) for gt_bboxes in gt_bboxes_list]
+        num_gts_max = max(num_gts_list)
+        if (num_gts_max == 0 or bboxes.size(1) == 0
+                or 0 < self.gpu_assign_thr < num_gts_max
+                or self.chunk_size is not None):
+            # nothing to batch, too many gts to be assigned on GPU, or the
+            # overlaps of each image must be computed chunk by chunk
+            return [
+                self.assign(*args) for args in zip([
+                    img_bboxes[flags]
+                    for img_bboxes, flags in zip(bboxes, valid_flags)
+                ], gt_bboxes_list, gt_bboxes_ignore_list, gt_labels_list)
+            ]
+
+        gt_bboxes, gt_valid = stack_padded_bboxes(gt_bboxes_list, bboxes)
+        overlaps = self.iou_calculator(gt_bboxes, bboxes)
+
+        if self.ignore_iof_thr > 0 and any(
+                gt_bboxes_ignore is not None and gt_bboxes_ignore.numel() > 0
+                for gt_bboxes_ignore in gt_bboxes_ignore_list):
+            # padded ignored gts are empty boxes, whose iof is always 0
+            gt_bboxes_ignore, _ = stack_padded_bboxes(gt_bboxes_ignore_list,
+                                                      bboxes)
+            if self.ignore_wrt_candidates:
+                ignore_overlaps = self.iou_calculator(
+                    bboxes, gt_bboxes_ignore, mode='iof')
+                ignore_max_overlaps, _ = ignore_overlaps.max(dim=2)
+            else:
+                ignore_overlaps = self.iou_calculator(
+                    gt_bboxes_ignore, bboxes, mode='iof')
+                ignore_max_overlaps, _ = ignore_overlaps.max(dim=1)
+            overlaps.masked_fill_(
+                (ignore_max_overlaps > self.ignore_iof_thr)[:, None, :], -1)
+        # invalid bboxes and padded gts must not be matched by any gt
+        overlaps.masked_fill_(~valid_flags[:, None, :], -1)
+        overlaps.masked_fill_(~gt_valid[:, :, None], -1)
+
+        assigned_gt_inds, max_overlaps = self._assign_gt_inds(
+            overlaps, gt_valid)
+
+        assign_results = []
+        for i in range(num_imgs):
+            num_gts = num_gts_list[i]
+            flags = valid_flags[i]
+            gt_labels = gt_labels_list[i]
+            if num_gts == 0:
+                assign_results.append(
+                    self.assign_wrt_overlaps(
+                        overlaps.new_zeros((0, int(flags.sum()))), gt_labels))
+                continue
+            img_gt_inds = assigned_gt_inds[i][flags]
+            assign_results.append(
+                AssignResult(
+                    num_gts,
+                    img_gt_inds,
+                    max_overlaps[i][flags],
+                    labels=self._assigned_labels(img_gt_inds, gt_labels)))
+        return assign_results
@@ -13,6 +13,7 @@ class BboxOverlaps2D(object):
         Args:
             bboxes1 (Tensor): bboxes have shape (m, 4) in <x1, y1, x2, y2>
                 format, or shape (m, 5) in <x1, y1, x2, y2, score> format.
+                A batch of bboxes of shape (B, m, 4) is also accepted.
             bboxes2 (Tensor): bboxes have shape (m, 4) in <x1, y1, x2, y2>
                 format, shape (m, 5) in <x1, y1, x2, y2, score> format, or be
                 empty. If is_aligned is ``True``, then m and n must be equal.
@@ -21,6 +22,7 @@ class BboxOverlaps2D(object):
 
         Returns:
             ious(Tensor): shape (m, n) if is_aligned == False else shape (m, 1)
+                (or with the leading batch dimension of the inputs)
         """
         assert bboxes1.size(-1) in [0, 4, 5]
         assert bboxes2.size(-1) in [0, 4, 5]
@@ -50,8 +52,13 @@ def bbox_overlaps(bboxes1, bboxes2, mode='iou', is_aligned=False, eps=1e-6):
         mode (str): "iou" (intersection over union) or iof (intersection over
             foreground).
 
+    Both bboxes1 and bboxes2 may have the same leading batch dimension, e.g.
+    shapes (B, m, 4) and (B, n, 4), in which case the ious of each pair of
+    bbox sets are computed at once.
+
     Returns:
         ious(Tensor): shape (m, n) if is_aligned == False else shape (m, 1)
+            (or (B, m, n) and (B, m) for batched inputs)
 
     Example:
         >>> bboxes1 = torch.FloatTensor([
@@ -68,6 +75,9 @@ def bbox_overlaps(bboxes1, bboxes2, mode='iou', is_aligned=False, eps=1e-6):
         tensor([[0.5000, 0.0000, 0.0000],
                 [0.0000, 0.0000, 1.0000],
                 [0.0000, 0.0000, 0.0000]])
+        >>> assert bbox_overlaps(
+        >>>     bboxes1[None].repeat(2, 1, 1),
+        >>>     bboxes2[None].repeat(2, 1, 1)).shape == (2, 3, 3)
 
     Example:
         >>> empty = torch.FloatTensor([])
@@ -84,44 +94,55 @@ def bbox_overlaps(bboxes1, bboxes2, mode='iou', is_aligned=False, eps=1e-6):
     assert (bboxes1.size(-1) == 4 or bboxes1.size(0) == 0)
     assert (bboxes2.size(-1) == 4 or bboxes2.size(0) == 0)
 
-    rows = bboxes1.size(0)
-    cols = bboxes2.size(0)
+    if bboxes1.dim() > 2 and bboxes2.dim() > 2:
+        assert bboxes1.shape[:-2] == bboxes2.shape[:-2]
+        batch_shape = bboxes1.shape[:-2]
+        rows = bboxes1.size(-2)
+        cols = bboxes2.size(-2)
+    else:
+        batch_shape = ()
+        rows = bboxes1.size(0)
+        cols = bboxes2.size(0)
     if is_aligned:
         assert rows == cols
 
     if rows * cols == 0:
-        return bboxes1.new(rows, 1) if is_aligned else bboxes1.new(rows, cols)
+        if is_aligned:
+            return bboxes1.new(*batch_shape, rows, 1)
+        return bboxes1.new(*batch_shape, rows, cols)
 
     if is_aligned:
-        lt = torch.max(bboxes1[:, :2], bboxes2[:, :2])  # [rows, 2]
-        rb = torch.min(bboxes1[:, 2:], bboxes2[:, 2:])  # [rows, 2]
+        lt = torch.max(bboxes1[..., :2], bboxes2[..., :2])  # [rows, 2]
+        rb = torch.min(bboxes1[..., 2:], bboxes2[..., 2:])  # [rows, 2]
 
         wh = (rb - lt).clamp(min=0)  # [rows, 2]
-        overlap = wh[:, 0] * wh[:, 1]
-        area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (
-            bboxes1[:, 3] - bboxes1[:, 1])
+        overlap = wh[..., 0] * wh[..., 1]
+        area1 = (bboxes1[..., 2] - bboxes1[..., 0]) * (
+            bboxes1[..., 3] - bboxes1[..., 1])
 
         if mode == 'iou':
-            area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (
-                bboxes2[:, 3] - bboxes2[:, 1])
+            area2 = (bboxes2[..., 2] - bboxes2[..., 0]) * (
+                bboxes2[..., 3] - bboxes2[..., 1])
             union = area1 + area2 - overlap
         else:
             union = area1
     else:
-        lt = torch.max(bboxes1[:, None, :2], bboxes2[:, :2])  # [rows, cols, 2]
-        rb = torch.min(bboxes1[:, None, 2:], bboxes2[:, 2:])  # [rows, cols, 2]
+        lt = torch.max(bboxes1[..., :, None, :2],
+                       bboxes2[..., None, :, :2])  # [rows, cols, 2]
+        rb = torch.min(bboxes1[..., :, None, 2:],
+                       bboxes2[..., None, :, 2:])  # [rows, cols, 2]
 
         wh = (rb - lt).clamp(min=0)  # [rows, cols, 2]
-        overlap = wh[:, :, 0] * wh[:, :, 1]
-        area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (
-            bboxes1[:, 3] - bboxes1[:, 1])
+        overlap = wh[..., 0] * wh[..., 1]
+        area1 = (bboxes1[..., 2] - bboxes1[..., 0]) * (
+            bboxes1[..., 3] - bboxes1[..., 1])
 
         if mode == 'iou':
-            area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (
-                bboxes2[:, 3] - bboxes2[:, 1])
-            union = area1[:, None] + area2 - overlap
+            area2 = (bboxes2[..., 2] - bboxes2[..., 0]) * (
+                bboxes2[..., 3] - bboxes2[..., 1])
+            union = area1[..., None] + area2[..., None, :] - overlap
         else:
-            union = area1[:, None]
+            union = area1[..., None]
 
     eps = union.new_tensor([eps])
     union = torch.max(union, eps)
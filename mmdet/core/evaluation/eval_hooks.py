@@ -99,6 +99,9 @@ class DistEvalHook(EvalHook):
             processes. Default: None.
         gpu_collect (bool): Whether to use gpu or cpu to collect results.
             Default: False.
+        shard_size (int | None): If given, results are collected on cpu in
+            shards of this size per process, which bounds the memory of
+            the evaluation. Default: None.
         **eval_kwargs: Evaluation arguments fed into the evaluate function of
             the dataset.
     """
@@ -109,11 +112,13 @@ class DistEvalHook(EvalHook):
                  interval=1,
                  tmpdir=None,
                  gpu_collect=False,
+                 shard_size=None,
                  **eval_kwargs):
         super().__init__(
             dataloader, start=start, interval=interval, **eval_kwargs)
         self.tmpdir = tmpdir
         self.gpu_collect = gpu_collect
+        self.shard_size = shard_size
 
     def after_train_epoch(self, runner):
         if not self.evaluation_flag(runner):
@@ -126,7 +131,10 @@ class DistEvalHook(EvalHook):
             runner.model,
             self.dataloader,
             tmpdir=tmpdir,
-            gpu_collect=self.gpu_collect)
+            gpu_collect=self.gpu_collect,
+            shard_size=self.shard_size)
         if runner.rank == 0:
             print('\n')
             self.evaluate(runner, results)
+            if self.shard_size is not None:
+                results.cleanup()
@@ -237,6 +237,207 @@ def tpfp_default(det_bboxes,
     return tp, fp
 
 
+def _segment_max(values, seg_starts, seg_lens):
+    """Max and first argmax of consecutive segments of a flat array.
+
+    Args:
+        values (ndarray): Flat array that is a concatenation of segments.
+        seg_starts (ndarray): Start offset of each segment, shape (n, ).
+        seg_lens (ndarray): Length of each segment, shape (n, ).
+
+    Returns:
+        tuple[np.ndarray]: (max, argmax) of each segment, argmax is the
+            index inside the segment. Empty segments get (-inf, -1).
+    """
+    num_segs = seg_lens.shape[0]
+    seg_max = np.full(num_segs, -np.inf, dtype=np.float32)
+    seg_argmax = np.full(num_segs, -1, dtype=np.int64)
+    nonempty = seg_lens > 0
+    if not nonempty.any():
+        return seg_max, seg_argmax
+    starts = seg_starts[nonempty]
+    seg_max[nonempty] = np.maximum.reduceat(values, starts)
+    # the first position in each segment that reaches the segment max, which
+    # is the same element np.argmax() would return for that row
+    owners = np.repeat(np.arange(num_segs), seg_lens)
+    positions = np.arange(values.shape[0])
+    candidates = np.where(values == seg_max[owners], positions,
+                          values.shape[0])
+    seg_argmax[nonempty] = np.minimum.reduceat(candidates, starts) - starts
+    return seg_max, seg_argmax
+
+
+def tpfp_batched(cls_dets,
+                 cls_gts,
+                 cls_gts_ignore,
+                 iou_thr=0.5,
+                 area_ranges=None,
+                 imagenet=False):
+    """Check tp and fp of the detections of one class in all images at once.
+
+    This is a vectorized equivalent of calling :func:`tpfp_default` (or
+    :func:`tpfp_imagenet` if ``imagenet`` is True) on every image and
+    concatenating the outputs. Instead of a dense IoU matrix per image, the
+    ious of all (det, gt) pairs that belong to the same image are computed
+    in one pass over a flat pair list, and the greedy assignment is done
+    with segment reductions over that list. Detections with exactly the same
+    score in one image are visited in their input order.
+
+    Args:
+        cls_dets (list[ndarray]): Detected bboxes of each image, each of
+            shape (m, 5).
+        cls_gts (list[ndarray]): GT bboxes of each image, each of shape
+            (n, 4).
+        cls_gts_ignore (list[ndarray]): Ignored gt bboxes of each image,
+            each of shape (k, 4).
+        iou_thr (float): IoU threshold to be considered as matched. For the
+            ImageNet rule it is the threshold of medium and large bboxes.
+            Default: 0.5.
+        area_ranges (list[tuple] | None): Range of bbox areas to be evaluated,
+            in the format [(min1, max1), (min2, max2), ...]. Default: None.
+        imagenet (bool): Whether to use the matching rule of
+            :func:`tpfp_imagenet`. Default: False.
+
+    Returns:
+        tuple[np.ndarray]: (tp, fp) whose elements are 0 and 1. The shape of
+            each array is (num_scales, total number of dets).
+    """
+    num_imgs = len(cls_dets)
+    if area_ranges is None:
+        area_ranges = [(None, None)]
+    num_scales = len(area_ranges)
+
+    det_bboxes = np.vstack(cls_dets)
+    num_dets = det_bboxes.shape[0]
+    det_counts = np.array([det.shape[0] for det in cls_dets], dtype=np.int64)
+    det_img_inds = np.repeat(np.arange(num_imgs), det_counts)
+
+    # gts and ignored gts are stacked per image in the same order as in
+    # tpfp_default, i.e. [gts of img0, ignored gts of img0, gts of img1, ...]
+    gt_list = []
+    for gts, gts_ignore in zip(cls_gts, cls_gts_ignore):
+        gt_list.extend([gts, gts_ignore])
+    gt_bboxes = np.vstack(gt_list)
+    gt_list_counts = np.array([gts.shape[0] for gts in gt_list],
+                              dtype=np.int64)
+    gt_ignore_inds = np.repeat(
+        np.tile(np.array([False, True]), num_imgs), gt_list_counts)
+    gt_counts = gt_list_counts[0::2] + gt_list_counts[1::2]
+    gt_starts = np.cumsum(gt_counts) - gt_counts
+
+    tp = np.zeros((num_scales, num_dets), dtype=np.float32)
+    fp = np.zeros((num_scales, num_dets), dtype=np.float32)
+    if num_dets == 0:
+        return tp, fp
+
+    # sort dets by image and then by score in descending order
+    scores = det_bboxes[:, -1]
+    sort_inds = np.lexsort((-scores, det_img_inds))
+    if imagenet:
+        # rank of each det inside its image; dets are visited rank by rank so
+        # that the dets of step r in all images form a contiguous block
+        det_starts = np.cumsum(det_counts) - det_counts
+        det_ranks = np.empty(num_dets, dtype=np.int64)
+        det_ranks[sort_inds] = np.arange(num_dets) - det_starts[
+            det_img_inds[sort_inds]]
+        sort_inds = np.lexsort((det_img_inds, det_ranks))
+    det_img_inds = det_img_inds[sort_inds]
+
+    # build the flat list of (det, gt) pairs in the same image
+    pair_lens = gt_counts[det_img_inds]
+    pair_starts = np.cumsum(pair_lens) - pair_lens
+    num_pairs = int(pair_lens.sum())
+    pair_dets = np.repeat(sort_inds, pair_lens)
+    pair_gts = np.arange(num_pairs) + np.repeat(
+        gt_starts[det_img_inds] - pair_starts, pair_lens)
+
+    # same arithmetic as bbox_overlaps() so that ious are bit-identical
+    bboxes1 = det_bboxes[pair_dets, :4].astype(np.float32)
+    if imagenet:
+        bboxes2 = (gt_bboxes[pair_gts] - 1).astype(np.float32)
+    else:
+        bboxes2 = gt_bboxes[pair_gts].astype(np.float32)
+    area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+    area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (bboxes2[:, 3] - bboxes2[:, 1])
+    overlap = np.maximum(
+        np.minimum(bboxes1[:, 2], bboxes2[:, 2]) -
+        np.maximum(bboxes1[:, 0], bboxes2[:, 0]), 0) * np.maximum(
+            np.minimum(bboxes1[:, 3], bboxes2[:, 3]) -
+            np.maximum(bboxes1[:, 1], bboxes2[:, 1]), 0)
+    union = np.maximum(area1 + area2 - overlap, 1e-6)
+    ious = overlap / union
+
+    gt_w = gt_bboxes[:, 2] - gt_bboxes[:, 0]
+    gt_h = gt_bboxes[:, 3] - gt_bboxes[:, 1]
+    gt_areas = gt_w * gt_h
+    if imagenet:
+        iou_thrs = np.minimum((gt_w * gt_h) / ((gt_w + 10.0) *
+                                               (gt_h + 10.0)), iou_thr)
+        # greedy matching to the best available gt, processed for the r-th
+        # det of all images simultaneously
+        gt_covered = np.zeros(gt_bboxes.shape[0], dtype=bool)
+        matched_gts = np.full(num_dets, -1, dtype=np.int64)
+        step_ranks = det_ranks[sort_inds]
+        step_bounds = np.flatnonzero(np.diff(np.r_[-1, step_ranks, -1]))
+        for start, end in zip(step_bounds[:-1], step_bounds[1:]):
+            if pair_lens[start:end].sum() == 0:
+                continue
+            pair_slice = slice(pair_starts[start],
+                               pair_starts[end - 1] + pair_lens[end - 1])
+            step_gts = pair_gts[pair_slice]
+            step_ious = ious[pair_slice]
+            valid = (step_ious >= iou_thrs[step_gts]) & ~gt_covered[step_gts]
+            step_max, step_argmax = _segment_max(
+                np.where(valid, step_ious, -np.inf).astype(np.float32),
+                pair_starts[start:end] - pair_starts[start],
+                pair_lens[start:end])
+            is_matched = step_max > -np.inf
+            step_matched = (gt_starts[det_img_inds[start:end]] +
+                            step_argmax)[is_matched]
+            matched_gts[sort_inds[start:end][is_matched]] = step_matched
+            gt_covered[step_matched] = True
+        first_match = matched_gts >= 0
+    else:
+        ious_max, ious_argmax = _segment_max(ious, pair_starts, pair_lens)
+        is_matched = ious_max >= iou_thr
+        matched_gts = np.full(num_dets, -1, dtype=np.int64)
+        matched_gts[sort_inds[is_matched]] = (
+            gt_starts[det_img_inds] + ious_argmax)[is_matched]
+        # only the highest scored det matched to a gt covers it, and the
+        # dets are already sorted, so it is the first occurrence of the gt
+        first_match = np.zeros(num_dets, dtype=bool)
+        sorted_matched = matched_gts[sort_inds]
+        _, first_inds = np.unique(sorted_matched, return_index=True)
+        first_match[sort_inds[first_inds]] = True
+        first_match &= matched_gts >= 0
+
+    is_matched = matched_gts >= 0
+    matched_ignore = np.zeros(num_dets, dtype=bool)
+    matched_ignore[is_matched] = gt_ignore_inds[matched_gts[is_matched]]
+    det_areas = (det_bboxes[:, 2] - det_bboxes[:, 0]) * (
+        det_bboxes[:, 3] - det_bboxes[:, 1])
+    for k, (min_area, max_area) in enumerate(area_ranges):
+        # there are 4 cases for a det bbox, see tpfp_default / tpfp_imagenet
+        ignored = matched_ignore.copy()
+        if min_area is not None:
+            gt_area_ignore = (gt_areas < min_area) | (gt_areas >= max_area)
+            ignored[is_matched] |= gt_area_ignore[matched_gts[is_matched]]
+        tp[k] = first_match & ~ignored
+        if imagenet:
+            # dets matched to an already covered gt do not exist here, since
+            # covered gts can not be matched again
+            matched_fp = np.zeros(num_dets, dtype=bool)
+        else:
+            matched_fp = is_matched & ~ignored & ~first_match
+        if min_area is None:
+            unmatched_fp = ~is_matched
+        else:
+            unmatched_fp = ~is_matched & (det_areas >= min_area) & (
+                det_areas < max_area)
+        fp[k] = matched_fp | unmatched_fp
+    return tp, fp
+
+
 def get_cls_results(det_results, annotations, class_id):
     """Get det results and gt information of a certain class.
 
@@ -270,7 +471,8 @@ def eval_map(det_results,
              iou_thr=0.5,
              dataset=None,
              logger=None,
-             nproc=4):
+             nproc=4,
+             backend='pool'):
     """Evaluate mAP of a dataset.
 
     Args:
@@ -297,11 +499,20 @@ def eval_map(det_results,
             summary. See `mmdet.utils.print_log()` for details. Default: None.
         nproc (int): Processes used for computing TP and FP.
             Default: 4.
+        backend (str): How TP and FP are computed. 'pool' calls the per-image
+            tpfp functions in a process pool of `nproc` workers, 'batched'
+            matches all images of a class at once with
+            :func:`tpfp_batched` in the current process. Both give the same
+            results. Default: 'pool'.
 
     Returns:
         tuple: (mAP, [dict, dict, ...])
     """
     assert len(det_results) == len(annotations)
+    if backend not in ['pool', 'batched']:
+        raise ValueError(
+            f'Unrecognized backend {backend}, only "pool" and "batched" '
+            'are supported')
 
     num_imgs = len(det_results)
     num_scales = len(scale_ranges) if scale_ranges is not None else 1
@@ -309,24 +520,38 @@ def eval_map(det_results,
     area_ranges = ([(rg[0]**2, rg[1]**2) for rg in scale_ranges]
                    if scale_ranges is not None else None)
 
-    pool = Pool(nproc)
+    if backend == 'pool':
+        pool = Pool(nproc)
     eval_results = []
     for i in range(num_classes):
         # get gt and det bboxes of this class
         cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
             det_results, annotations, i)
-        # choose proper function according to datasets to compute tp and fp
-        if dataset in ['det', 'vid']:
-            tpfp_func = tpfp_imagenet
+        if backend == 'batched':
+            # compute tp and fp for all images of this class at once
+            tp, fp = tpfp_batched(
+                cls_dets,
+                cls_gts,
+                cls_gts_ignore,
+                iou_thr,
+                area_ranges,
+                imagenet=dataset in ['det', 'vid'])
         else:
-            tpfp_func = tpfp_default
-        # compute tp and fp for each image with multiple processes
-        tpfp = pool.starmap(
-            tpfp_func,
-            zip(cls_dets, cls_gts, cls_gts_ignore,
-                [iou_thr for _ in range(num_imgs)],
-                [area_ranges for _ in range(num_imgs)]))
-        tp, fp = tuple(zip(*tpfp))
+            # choose proper function according to datasets to compute tp
+            # and fp
+            if dataset in ['det', 'vid']:
+                tpfp_func = tpfp_imagenet
+            else:
+                tpfp_func = tpfp_default
+            # compute tp and fp for each image with multiple processes
+            tpfp = pool.starmap(
+                tpfp_func,
+                zip(cls_dets, cls_gts, cls_gts_ignore,
+                    [iou_thr for _ in range(num_imgs)],
+                    [area_ranges for _ in range(num_imgs)]))
+            tp, fp = tuple(zip(*tpfp))
+            tp = np.hstack(tp)
+            fp = np.hstack(fp)
         # calculate gt number of each scale
         # ignored gts or gts beyond the specific scale are not counted
         num_gts = np.zeros(num_scales, dtype=int)
@@ -343,8 +568,8 @@ def eval_map(det_results,
         cls_dets = np.vstack(cls_dets)
         num_dets = cls_dets.shape[0]
         sort_inds = np.argsort(-cls_dets[:, -1])
-        tp = np.hstack(tp)[:, sort_inds]
-        fp = np.hstack(fp)[:, sort_inds]
+        tp = tp[:, sort_inds]
+        fp = fp[:, sort_inds]
         # calculate recall and precision with tp and fp
         tp = np.cumsum(tp, axis=1)
         fp = np.cumsum(fp, axis=1)
@@ -365,7 +590,8 @@ def eval_map(det_results,
             'precision': precisions,
             'ap': ap
         })
-    pool.close()
+    if backend == 'pool':
+        pool.close()
     if scale_ranges is not None:
         # shape (num_classes, num_scales)
         all_ap = np.vstack([cls_result['ap'] for cls_result in eval_results])
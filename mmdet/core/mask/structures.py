@@ -558,6 +558,97 @@ class PolygonMasks(BaseInstanceMasks):
         return torch.tensor(ndarray_masks, dtype=dtype, device=device)
 
 
+class CroppedMask(object):
+    """Mask of a single instance stored as the crop of its bounding region.
+
+    Masks of detection results are mostly empty outside of their boxes, so
+    only the box-local crop and its offset in the image are kept. Use
+    :meth:`to_ndarray` to get the full-image bitmap and :meth:`encode` to get
+    the RLE code of the full-image bitmap without building it.
+
+    Args:
+        mask (ndarray): The cropped mask of shape (h, w).
+        offset (tuple[int]): Position (x, y) of the top-left corner of the
+            crop in the image.
+        img_shape (tuple[int]): Shape (height, width) of the image.
+
+    Example:
+        >>> mask = np.zeros((4, 6), dtype=bool)
+        >>> mask[1:3, 2:5] = True
+        >>> cropped = CroppedMask(mask[1:3, 2:5], (2, 1), (4, 6))
+        >>> assert np.array_equal(cropped.to_ndarray(), mask)
+        >>> rle = maskUtils.encode(np.asfortranarray(mask.astype(np.uint8)))
+        >>> assert cropped.encode() == rle
+    """
+
+    def __init__(self, mask, offset, img_shape):
+        assert mask.ndim == 2
+        x, y = offset
+        img_h, img_w = img_shape[:2]
+        assert x >= 0 and y >= 0 and x + mask.shape[1] <= img_w \
+            and y + mask.shape[0] <= img_h, 'the crop is out of the image'
+        self.mask = mask
+        self.offset = (int(x), int(y))
+        self.img_shape = (int(img_h), int(img_w))
+
+    def __repr__(self):
+        s = self.__class__.__name__ + '('
+        s += f'crop_shape={self.mask.shape}, '
+        s += f'offset={self.offset}, '
+        s += f'img_shape={self.img_shape})'
+        return s
+
+    @property
+    def shape(self):
+        """tuple[int]: shape of the full-image mask"""
+        return self.img_shape
+
+    @property
+    def dtype(self):
+        """numpy.dtype: data type of the mask"""
+        return self.mask.dtype
+
+    def to_ndarray(self):
+        """Paste the crop to a full-image bitmap."""
+        x, y = self.offset
+        h, w = self.mask.shape
+        full_mask = np.zeros(self.img_shape, dtype=self.mask.dtype)
+        full_mask[y:y + h, x:x + w] = self.mask
+        return full_mask
+
+    def __array__(self, dtype=None):
+        full_mask = self.to_ndarray()
+        return full_mask if dtype is None else full_mask.astype(dtype)
+
+    def encode(self):
+        """Encode the full-image mask to RLE.
+
+        The run lengths are computed from the foreground pixels of the crop,
+        the result is the same as ``pycocotools.mask.encode``.
+
+        Returns:
+            dict: The RLE code.
+        """
+        img_h, img_w = self.img_shape
+        x, y = self.offset
+        # column-major (Fortran) indices of the foreground pixels
+        cols, rows = np.nonzero(self.mask.T)
+        inds = (cols + x).astype(np.int64) * img_h + rows + y
+        if len(inds) == 0:
+            counts = [img_h * img_w]
+        else:
+            breaks = np.nonzero(np.diff(inds) != 1)[0] + 1
+            starts = inds[np.concatenate([[0], breaks])]
+            ends = inds[np.concatenate([breaks - 1, [len(inds) - 1]])] + 1
+            edges = np.stack([starts, ends], axis=1).ravel()
+            counts = np.diff(np.concatenate([[0], edges, [img_h * img_w]]))
+            if counts[-1] == 0:
+                counts = counts[:-1]
+            counts = counts.tolist()
+        return maskUtils.frPyObjects(
+            dict(counts=counts, size=[img_h, img_w]), img_h, img_w)
+
+
 def polygon_to_bitmap(polygons, height, width):
     """Convert masks from the form of polygons to bitmaps.
 
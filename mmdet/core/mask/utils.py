@@ -2,6 +2,8 @@ import mmcv
 import numpy as np
 import pycocotools.mask as mask_util
 
+from .structures import CroppedMask
+
 
 def split_combined_polys(polys, poly_lens, polys_per_mask):
     """Split the combined 1-D polys into masks.
@@ -37,7 +39,8 @@ def encode_mask_results(mask_results):
     """Encode bitmap mask to RLE code.
 
     Args:
-        mask_results (list | tuple[list]): bitmap mask results.
+        mask_results (list | tuple[list]): bitmap mask results, each mask is
+            an ndarray or a :obj:`CroppedMask`.
             In mask scoring rcnn, mask_results is a tuple of (segm_results,
             segm_cls_score).
 
@@ -52,6 +55,10 @@ def encode_mask_results(mask_results):
     encoded_mask_results = [[] for _ in range(num_classes)]
     for i in range(len(cls_segms)):
         for cls_segm in cls_segms[i]:
+            if isinstance(cls_segm, CroppedMask):
+                # encoded without pasting the mask to the whole image
+                encoded_mask_results[i].append(cls_segm.encode())
+                continue
             encoded_mask_results[i].append(
                 mask_util.encode(
                     np.array(
@@ -1,3 +1,5 @@
+import math
+
 import torch
 from mmcv.ops.nms import batched_nms
 
@@ -67,3 +69,128 @@ def multiclass_nms(multi_bboxes,
         keep = keep[:max_num]
 
     return dets, labels[keep]
+
+
+def multi_image_nms(bboxes, scores, img_inds, idxs, num_imgs, nms_cfg):
+    """Performs NMS on boxes of multiple images with few NMS calls.
+
+    Like :func:`mmcv.ops.batched_nms`, boxes of different (image, idx)
+    clusters are shifted by offsets so that they never overlap and a single
+    NMS is enough for all of them. The offsets are laid out on a 2D grid
+    instead of along the diagonal, which keeps the shifted coordinates small
+    enough for float32 even with thousands of clusters. Images are processed
+    in groups of at most ``split_thr`` boxes (unless a single image is
+    larger), which bounds the memory of the NMS kernel.
+
+    Args:
+        bboxes (Tensor): shape (n, 4).
+        scores (Tensor): shape (n, ).
+        img_inds (Tensor): Image index of each box, shape (n, ). It must be
+            sorted in ascending order.
+        idxs (Tensor): Cluster index of each box inside its image, e.g., the
+            label, shape (n, ). NMS is not applied between boxes of
+            different clusters.
+        num_imgs (int): Number of images.
+        nms_cfg (dict): NMS config as used by :func:`batched_nms`.
+
+    Returns:
+        list[tuple[Tensor, Tensor]]: For each image, the kept dets of shape
+            (k, 5) sorted by descending score, and their indices in the
+            inputs.
+    """
+    nms_cfg_ = nms_cfg.copy()
+    split_thr = nms_cfg_.pop('split_thr', 10000)
+    if nms_cfg_.pop('class_agnostic', False):
+        idxs = torch.zeros_like(idxs)
+    # a single NMS call handles each group of images
+    nms_cfg_['split_thr'] = float('inf')
+    nms_cfg_['class_agnostic'] = True
+
+    num_boxes = torch.bincount(img_inds, minlength=num_imgs).tolist()
+    results = []
+    start_img = start = 0
+    group_size = 0
+    for img_id in range(num_imgs + 1):
+        if img_id == num_imgs or (group_size > 0 and
+                                  group_size + num_boxes[img_id] > split_thr):
+            results.extend(
+                _grid_offset_nms(
+                    bboxes[start:start + group_size],
+                    scores[start:start + group_size],
+                    img_inds[start:start + group_size] - start_img,
+                    idxs[start:start + group_size], img_id - start_img,
+                    nms_cfg_, start))
+            start += group_size
+            start_img = img_id
+            group_size = 0
+        if img_id < num_imgs:
+            group_size += num_boxes[img_id]
+    return results
+
+
+def _grid_offset_nms(bboxes, scores, img_inds, idxs, num_imgs, nms_cfg, start):
+    """NMS of a group of images, see :func:`multi_image_nms`."""
+    if bboxes.numel() == 0:
+        return [(bboxes.new_zeros((0, 5)), img_inds.new_zeros((0, )))
+                for _ in range(num_imgs)]
+    num_idxs = int(idxs.max()) + 1
+    clusters = img_inds * num_idxs + idxs
+    grid_size = int(math.ceil(math.sqrt(num_imgs * num_idxs)))
+    span = bboxes.max() - bboxes.min() + 1
+    offsets = torch.stack([clusters % grid_size, clusters // grid_size],
+                          dim=-1).to(bboxes) * span
+    bboxes_for_nms = bboxes + offsets.repeat(1, 2)
+    dets, keep = batched_nms(bboxes_for_nms, scores, clusters, nms_cfg)
+    dets = torch.cat([bboxes[keep], dets[:, -1:]], dim=-1)
+
+    # group the kept boxes by image and keep the score order inside images
+    kept_imgs = img_inds[keep]
+    order = torch.argsort(kept_imgs * keep.numel() +
+                          torch.arange(keep.numel(), device=keep.device))
+    counts = torch.bincount(kept_imgs, minlength=num_imgs).tolist()
+    return list(
+        zip(dets[order].split(counts), (keep[order] + start).split(counts)))
+
+
+def batched_multiclass_nms(multi_bboxes,
+                           multi_scores,
+                           score_thr,
+                           nms_cfg,
+                           max_num=-1):
+    """Batched version of :func:`multiclass_nms` for multiple images.
+
+    Args:
+        multi_bboxes (Tensor): shape (N, n, #class*4) or (N, n, 4), where N
+            is the number of images.
+        multi_scores (Tensor): shape (N, n, #class), where the last column
+            contains scores of the background class, but this will be ignored.
+        score_thr (float): bbox threshold, bboxes with scores lower than it
+            will not be considered.
+        nms_cfg (dict): NMS config, see :func:`multi_image_nms`.
+        max_num (int): if there are more than max_num bboxes after NMS,
+            only top max_num will be kept.
+
+    Returns:
+        list[tuple]: (bboxes, labels) of each image, tensors of shape (k, 5)
+            and (k, ). Labels are 0-based.
+    """
+    num_imgs = multi_scores.size(0)
+    num_classes = multi_scores.size(2) - 1
+    scores = multi_scores[..., :-1]
+    valid_mask = scores > score_thr
+    img_inds, box_inds, labels = valid_mask.nonzero(as_tuple=True)
+    if multi_bboxes.size(-1) > 4:
+        bboxes = multi_bboxes.view(num_imgs, -1, num_classes,
+                                   4)[img_inds, box_inds, labels]
+    else:
+        bboxes = multi_bboxes[img_inds, box_inds]
+    scores = scores[img_inds, box_inds, labels]
+
+    results = []
+    for dets, keep in multi_image_nms(bboxes, scores, img_inds, labels,
+                                      num_imgs, nms_cfg):
+        if max_num > 0:
+            dets = dets[:max_num]
+            keep = keep[:max_num]
+        results.append((dets, labels[keep]))
+    return results
@@ -0,0 +1,293 @@
+import json
+import os
+import os.path as osp
+import shutil
+import tempfile
+
+import numpy as np
+
+
+class AnnotationIndex(object):
+    """Columnar index of the annotations of a detection dataset.
+
+    The annotations of all images are stored as flat arrays, e.g. the bboxes
+    of all images are concatenated in a single (n, 4) array and the bboxes of
+    an image are a slice of it given by an array of offsets. The index is
+    saved as a directory of ``.npy`` files which are memory-mapped when
+    loaded, so that the dataloader workers share the pages of the index and
+    getting the annotations of an image is a few O(1) slices instead of
+    parsing an annotation file.
+
+    The following fields of the annotation dicts returned by
+    ``get_ann_info()`` are supported:
+
+    - ndarrays whose first axis is the object axis, e.g. ``bboxes``.
+    - lists of the polygons (or None) of each object, e.g. the COCO
+      ``masks``.
+    - strings, e.g. the COCO ``seg_map``.
+
+    Besides, the index stores the scalar fields of the image infos and the
+    category ids of each image given by ``get_cat_ids()``.
+
+    Args:
+        arrays (dict[str, ndarray]): The columns of the index.
+        meta (dict): The description of the columns.
+    """
+
+    VERSION = 1
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+
+    def __len__(self):
+        return len(self.arrays['keys'])
+
+    @classmethod
+    def build(cls, keys, data_infos, ann_infos, cat_ids, signature=None):
+        """Build the index of a dataset.
+
+        Args:
+            keys (list[int | str]): Unique key of each image, used to find
+                the images in the index.
+            data_infos (list[dict]): Info of each image.
+            ann_infos (list[dict]): Annotation info of each image.
+            cat_ids (list[list[int]]): Category ids of each image.
+            signature (dict, optional): Description of what the annotations
+                depend on, saved along with the index. Default: None.
+
+        Returns:
+            :obj:`AnnotationIndex`: The index.
+        """
+        assert len(keys) == len(data_infos) == len(ann_infos) == len(cat_ids)
+        arrays = dict(keys=np.array(keys))
+        arrays['key_order'] = np.argsort(arrays['keys'], kind='stable')
+
+        # scalar fields present in all the image infos
+        first_info = data_infos[0] if data_infos else {}
+        info_fields = [
+            key for key, value in first_info.items()
+            if isinstance(value, (int, float, str)) and all(
+                key in info for info in data_infos)
+        ]
+        for key in info_fields:
+            arrays[f'info.{key}'] = np.array(
+                [info[key] for info in data_infos])
+
+        ann_fields = {}
+        if any(ann_info.keys() != ann_infos[0].keys()
+               for ann_info in ann_infos):
+            raise ValueError('All the annotation infos of the index must '
+                             'have the same fields')
+        for key, value in (ann_infos[0] if ann_infos else {}).items():
+            values = [ann_info[key] for ann_info in ann_infos]
+            if isinstance(value, np.ndarray):
+                ann_fields[key] = 'array'
+                arrays.update(cls._build_array_field(key, values))
+            elif isinstance(value, list):
+                ann_fields[key] = 'polygons'
+                arrays.update(cls._build_polygons_field(key, values))
+            elif isinstance(value, str):
+                ann_fields[key] = 'str'
+                arrays[f'ann.{key}'] = np.array(values)
+            else:
+                raise TypeError(f'Unsupported type {type(value)} of the '
+                                f'annotation field "{key}"')
+
+        arrays['cat_ids.offsets'] = _offsets([len(ids) for ids in cat_ids])
+        arrays['cat_ids.data'] = np.array(
+            [cat_id for ids in cat_ids for cat_id in ids], dtype=np.int64)
+
+        meta = dict(
+            version=cls.VERSION,
+            signature=signature,
+            info_fields=info_fields,
+            ann_fields=ann_fields)
+        return cls(arrays, meta)
+
+    @staticmethod
+    def _build_array_field(key, values):
+        return {
+            f'ann.{key}.offsets': _offsets([len(value) for value in values]),
+            f'ann.{key}.data': np.concatenate(values)
+        }
+
+    @staticmethod
+    def _build_polygons_field(key, values):
+        """Polygons are stored with an offset per image, per object and per
+        polygon."""
+        num_objs, num_polys, num_coords, coords, is_none = [], [], [], [], []
+        for objs in values:
+            num_objs.append(len(objs))
+            for polys in objs:
+                is_none.append(polys is None)
+                if polys is None:
+                    polys = []
+                elif not isinstance(polys, list):
+                    raise TypeError(
+                        f'Only polygons are supported in the annotation '
+                        f'field "{key}", got {type(polys)}')
+                num_polys.append(len(polys))
+                for poly in polys:
+                    num_coords.append(len(poly))
+                    coords.extend(poly)
+        return {
+            f'ann.{key}.offsets': _offsets(num_objs),
+            f'ann.{key}.obj_offsets': _offsets(num_polys),
+            f'ann.{key}.poly_offsets': _offsets(num_coords),
+            f'ann.{key}.is_none': np.array(is_none, dtype=np.bool_),
+            f'ann.{key}.data': np.array(coords, dtype=np.float64)
+        }
+
+    def save(self, path):
+        """Save the index to a directory.
+
+        The index is written to a temporary directory first and then renamed,
+        so that concurrent processes never see a partial index. If ``path``
+        already exists, it is kept.
+
+        Args:
+            path (str): Directory of the index.
+        """
+        parent = osp.dirname(osp.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent)
+        try:
+            for name, array in self.arrays.items():
+                np.save(osp.join(tmp_dir, f'{name}.npy'), array)
+            with open(osp.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump(
+                    dict(self.meta, arrays=list(self.arrays)), f, indent=2)
+            os.rename(tmp_dir, path)
+        except OSError:
+            if not osp.isdir(path):
+                raise
+        finally:
+            if osp.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load an index saved by :meth:`save`.
+
+        Args:
+            path (str): Directory of the index.
+            mmap (bool): Whether to memory-map the arrays. Default: True.
+
+        Returns:
+            :obj:`AnnotationIndex`: The index.
+        """
+        with open(osp.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != cls.VERSION:
+            raise ValueError(f'Unsupported version {meta.get("version")} of '
+                             f'the annotation index {path}')
+        mmap_mode = 'r' if mmap else None
+        arrays = {
+            name: np.load(osp.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in meta.pop('arrays')
+        }
+        return cls(arrays, meta)
+
+    def find(self, keys):
+        """Find the rows of images in the index.
+
+        Args:
+            keys (list[int | str]): Keys of the images.
+
+        Returns:
+            ndarray: The row of each image.
+        """
+        keys = np.asarray(keys)
+        key_order = self.arrays['key_order']
+        sorted_keys = self.arrays['keys'][key_order]
+        inds = np.searchsorted(sorted_keys, keys)
+        found = inds < len(sorted_keys)
+        found[found] = sorted_keys[inds[found]] == keys[found]
+        if not found.all():
+            raise KeyError(f'Images {keys[~found][:5].tolist()} are not in '
+                           'the annotation index')
+        return np.asarray(key_order[inds], dtype=np.int64)
+
+    def get_data_info(self, row):
+        """Get the scalar fields of the info of an image.
+
+        Args:
+            row (int): Row of the image.
+
+        Returns:
+            dict: Image info.
+        """
+        return {
+            key: self.arrays[f'info.{key}'][row].item()
+            for key in self.meta['info_fields']
+        }
+
+    def get_ann_info(self, row):
+        """Get the annotation of an image.
+
+        The arrays of the annotation are read-only views of the index.
+
+        Args:
+            row (int): Row of the image.
+
+        Returns:
+            dict: Annotation info of the image.
+        """
+        ann = {}
+        for key, kind in self.meta['ann_fields'].items():
+            if kind == 'array':
+                start, end = self.arrays[f'ann.{key}.offsets'][row:row + 2]
+                ann[key] = self.arrays[f'ann.{key}.data'][start:end]
+            elif kind == 'polygons':
+                ann[key] = self._get_polygons(key, row)
+            else:
+                ann[key] = self.arrays[f'ann.{key}'][row].item()
+        return ann
+
+    def _get_polygons(self, key, row):
+        offsets = self.arrays[f'ann.{key}.offsets']
+        obj_offsets = self.arrays[f'ann.{key}.obj_offsets']
+        poly_offsets = self.arrays[f'ann.{key}.poly_offsets']
+        is_none = self.arrays[f'ann.{key}.is_none']
+        data = self.arrays[f'ann.{key}.data']
+        objs = []
+        for obj in range(offsets[row], offsets[row + 1]):
+            if is_none[obj]:
+                objs.append(None)
+                continue
+            objs.append([
+                data[poly_offsets[poly]:poly_offsets[poly + 1]].tolist()
+                for poly in range(obj_offsets[obj], obj_offsets[obj + 1])
+            ])
+        return objs
+
+    def get_cat_ids(self, row):
+        """Get the category ids of an image.
+
+        Args:
+            row (int): Row of the image.
+
+        Returns:
+            list[int]: All categories in the image.
+        """
+        start, end = self.arrays['cat_ids.offsets'][row:row + 2]
+        return self.arrays['cat_ids.data'][start:end].tolist()
+
+    def num_cat_ids(self, rows):
+        """Get the number of category ids of images.
+
+        Args:
+            rows (ndarray): Rows of the images.
+
+        Returns:
+            ndarray: The number of category ids of each image.
+        """
+        offsets = self.arrays['cat_ids.offsets']
+        return offsets[rows + 1] - offsets[rows]
+
+
+def _offsets(sizes):
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    return offsets
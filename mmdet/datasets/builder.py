@@ -9,7 +9,8 @@ from mmcv.runner import get_dist_info
 from mmcv.utils import Registry, build_from_cfg
 from torch.utils.data import DataLoader
 
-from .samplers import DistributedGroupSampler, DistributedSampler, GroupSampler
+from .samplers import (AspectRatioBucketSampler, DistributedGroupSampler,
+                       DistributedSampler, GroupSampler)
 
 if platform.system() != 'Windows':
     # https://github.com/pytorch/pytorch/issues/973
@@ -80,6 +81,7 @@ def build_dataloader(dataset,
                      dist=True,
                      shuffle=True,
                      seed=None,
+                     bucket_cfg=None,
                      **kwargs):
     """Build PyTorch DataLoader.
 
@@ -96,13 +98,29 @@ def build_dataloader(dataset,
         dist (bool): Distributed training/test or not. Default: True.
         shuffle (bool): Whether to shuffle the data at every epoch.
             Default: True.
+        seed (int, optional): Seed of the dataloader workers and of the
+            bucketing sampler. Default: None.
+        bucket_cfg (dict, optional): If specified, the images are batched by
+            :class:`AspectRatioBucketSampler` built with these arguments
+            instead of grouped by :class:`GroupSampler`. Only used when
+            ``shuffle`` is True. Default: None.
         kwargs: any keyword argument to be used to initialize DataLoader
 
     Returns:
         DataLoader: A PyTorch dataloader.
     """
     rank, world_size = get_dist_info()
-    if dist:
+    if shuffle and bucket_cfg is not None:
+        sampler = AspectRatioBucketSampler(
+            dataset,
+            samples_per_gpu,
+            num_replicas=world_size if dist else 1,
+            rank=rank if dist else 0,
+            seed=seed,
+            **bucket_cfg)
+        batch_size = samples_per_gpu if dist else num_gpus * samples_per_gpu
+        num_workers = workers_per_gpu if dist else num_gpus * workers_per_gpu
+    elif dist:
         # DistributedGroupSampler will definitely shuffle the data to satisfy
         # that images on each GPU are in the same group
         if shuffle:
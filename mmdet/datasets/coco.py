@@ -2,6 +2,7 @@ import itertools
 import logging
 import os.path as osp
 import tempfile
+from collections.abc import Sequence
 
 import mmcv
 import numpy as np
@@ -10,7 +11,7 @@ from pycocotools.coco import COCO
 from pycocotools.cocoeval import COCOeval
 from terminaltables import AsciiTable
 
-from mmdet.core import eval_recalls
+from mmdet.core import CroppedMask, eval_recalls
 from .builder import DATASETS
 from .custom import CustomDataset
 
@@ -64,6 +65,8 @@ class CocoDataset(CustomDataset):
             dict: Annotation info of specified index.
         """
 
+        if self.ann_index is not None:
+            return self.ann_index.get_ann_info(self.ann_index_rows[idx])
         img_id = self.data_infos[idx]['id']
         ann_ids = self.coco.get_ann_ids(img_ids=[img_id])
         ann_info = self.coco.load_anns(ann_ids)
@@ -79,6 +82,8 @@ class CocoDataset(CustomDataset):
             list[int]: All categories in the image of specified index.
         """
 
+        if self.ann_index is not None:
+            return self.ann_index.get_cat_ids(self.ann_index_rows[idx])
         img_id = self.data_infos[idx]['id']
         ann_ids = self.coco.get_ann_ids(img_ids=[img_id])
         ann_info = self.coco.load_anns(ann_ids)
@@ -263,6 +268,8 @@ class CocoDataset(CustomDataset):
                     data['bbox'] = self.xyxy2xywh(bboxes[i])
                     data['score'] = float(mask_score[i])
                     data['category_id'] = self.cat_ids[label]
+                    if isinstance(segms[i], CroppedMask):
+                        segms[i] = segms[i].encode()
                     if isinstance(segms[i]['counts'], bytes):
                         segms[i]['counts'] = segms[i]['counts'].decode()
                     data['segmentation'] = segms[i]
@@ -337,7 +344,7 @@ class CocoDataset(CustomDataset):
         """Format the results to json (standard format for COCO evaluation).
 
         Args:
-            results (list[tuple | numpy.ndarray]): Testing results of the
+            results (Sequence[tuple | numpy.ndarray]): Testing results of the
                 dataset.
             jsonfile_prefix (str | None): The prefix of json files. It includes
                 the file path and the prefix of filename, e.g., "a/b/prefix".
@@ -348,7 +355,7 @@ class CocoDataset(CustomDataset):
                 the json filepaths, tmp_dir is the temporal directory created \
                 for saving json files when jsonfile_prefix is not specified.
         """
-        assert isinstance(results, list), 'results must be a list'
+        assert isinstance(results, Sequence), 'results must be a sequence'
         assert len(results) == len(self), (
             'The length of results is not equal to the dataset len: {} != {}'.
             format(len(results), len(self)))
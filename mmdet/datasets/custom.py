@@ -1,10 +1,15 @@
+import hashlib
+import json
+import os
 import os.path as osp
 
 import mmcv
 import numpy as np
+from mmcv.utils import print_log
 from torch.utils.data import Dataset
 
 from mmdet.core import eval_map, eval_recalls
+from .ann_index import AnnotationIndex
 from .builder import DATASETS
 from .pipelines import Compose
 
@@ -43,6 +48,12 @@ class CustomDataset(Dataset):
         test_mode (bool, optional): If set True, annotation will not be loaded.
         filter_empty_gt (bool, optional): If set true, images without bounding
             boxes will be filtered out.
+        ann_index_dir (str, optional): Directory of the compiled annotation
+            indices. If specified, the annotations of all images are compiled
+            once into an :obj:`AnnotationIndex` saved in this directory, and
+            ``get_ann_info()`` and ``get_cat_ids()`` are served from the
+            memory-mapped index afterwards. The index is rebuilt when the
+            annotation file changes. Default: None.
     """
 
     CLASSES = None
@@ -56,7 +67,8 @@ class CustomDataset(Dataset):
                  seg_prefix=None,
                  proposal_file=None,
                  test_mode=False,
-                 filter_empty_gt=True):
+                 filter_empty_gt=True,
+                 ann_index_dir=None):
         self.ann_file = ann_file
         self.data_root = data_root
         self.img_prefix = img_prefix
@@ -64,6 +76,7 @@ class CustomDataset(Dataset):
         self.proposal_file = proposal_file
         self.test_mode = test_mode
         self.filter_empty_gt = filter_empty_gt
+        self.ann_index_dir = ann_index_dir
         self.CLASSES = self.get_classes(classes)
 
         # join paths if data_root is specified
@@ -78,8 +91,14 @@ class CustomDataset(Dataset):
                     or osp.isabs(self.proposal_file)):
                 self.proposal_file = osp.join(self.data_root,
                                               self.proposal_file)
+        # load the annotation index if it is already compiled
+        self.ann_index = None
+        if self.ann_index_dir is not None:
+            self.ann_index = self.load_ann_index()
         # load annotations (and proposals)
         self.data_infos = self.load_annotations(self.ann_file)
+        if self.ann_index_dir is not None and self.ann_index is None:
+            self.ann_index = self.build_ann_index()
         # filter data infos if classes are customized
         if self.custom_classes:
             self.data_infos = self.get_subset_by_classes()
@@ -94,6 +113,9 @@ class CustomDataset(Dataset):
             self.data_infos = [self.data_infos[i] for i in valid_inds]
             if self.proposals is not None:
                 self.proposals = [self.proposals[i] for i in valid_inds]
+        if self.ann_index is not None:
+            self.ann_index_rows = self.ann_index.find(
+                [self._ann_index_key(info) for info in self.data_infos])
         # set group flag for the sampler
         if not self.test_mode:
             self._set_group_flag()
@@ -122,6 +144,8 @@ class CustomDataset(Dataset):
             dict: Annotation info of specified index.
         """
 
+        if self.ann_index is not None:
+            return self.ann_index.get_ann_info(self.ann_index_rows[idx])
         return self.data_infos[idx]['ann']
 
     def get_cat_ids(self, idx):
@@ -134,8 +158,65 @@ class CustomDataset(Dataset):
             list[int]: All categories in the image of specified index.
         """
 
+        if self.ann_index is not None:
+            return self.ann_index.get_cat_ids(self.ann_index_rows[idx])
         return self.data_infos[idx]['ann']['labels'].astype(np.int).tolist()
 
+    def _ann_index_key(self, img_info):
+        """Key of an image in the annotation index."""
+        return img_info['id'] if 'id' in img_info else img_info['filename']
+
+    def _ann_index_signature(self):
+        """Everything the compiled annotations depend on.
+
+        The index is rebuilt when the signature changes.
+        """
+        stat = os.stat(self.ann_file)
+        return dict(
+            type=type(self).__name__,
+            ann_file=osp.abspath(self.ann_file),
+            mtime=stat.st_mtime_ns,
+            size=stat.st_size,
+            classes=list(self.CLASSES) if self.CLASSES else None)
+
+    def _ann_index_path(self):
+        """Path of the annotation index of the dataset."""
+        signature = json.dumps(self._ann_index_signature(), sort_keys=True)
+        digest = hashlib.md5(signature.encode()).hexdigest()[:16]
+        return osp.join(self.ann_index_dir,
+                        f'{osp.basename(self.ann_file)}.{digest}')
+
+    def load_ann_index(self):
+        """Load the annotation index of the dataset.
+
+        Returns:
+            :obj:`AnnotationIndex` | None: The index, None if it has not been
+                built yet.
+        """
+        path = self._ann_index_path()
+        if not osp.isdir(path):
+            return None
+        return AnnotationIndex.load(path)
+
+    def build_ann_index(self):
+        """Compile the annotations of all images into an index and save it.
+
+        Returns:
+            :obj:`AnnotationIndex`: The index.
+        """
+        path = self._ann_index_path()
+        print_log(f'Building the annotation index {path}', logger='root')
+        keys = [self._ann_index_key(info) for info in self.data_infos]
+        ann_infos = [self.get_ann_info(i) for i in range(len(self))]
+        cat_ids = [self.get_cat_ids(i) for i in range(len(self))]
+        AnnotationIndex.build(
+            keys,
+            self.data_infos,
+            ann_infos,
+            cat_ids,
+            signature=self._ann_index_signature()).save(path)
+        return AnnotationIndex.load(path)
+
     def pre_pipeline(self, results):
         """Prepare results dict for pipeline."""
         results['img_prefix'] = self.img_prefix
@@ -241,12 +241,15 @@ class ClassBalancedDataset(object):
         #   that contain it: f(c)
         category_freq = defaultdict(int)
         num_images = len(dataset)
+        # the category ids of each image are got once for both steps
+        img_cat_ids = []
         for idx in range(num_images):
             cat_ids = set(self.dataset.get_cat_ids(idx))
             if len(cat_ids) == 0 and not self.filter_empty_gt:
                 cat_ids = set([len(self.CLASSES)])
             for cat_id in cat_ids:
                 category_freq[cat_id] += 1
+            img_cat_ids.append(cat_ids)
         for k, v in category_freq.items():
             category_freq[k] = v / num_images
 
@@ -260,10 +263,7 @@ class ClassBalancedDataset(object):
         # 3. For each image I, compute the image-level repeat factor:
         #    r(I) = max_{c in I} r(c)
         repeat_factors = []
-        for idx in range(num_images):
-            cat_ids = set(self.dataset.get_cat_ids(idx))
-            if len(cat_ids) == 0 and not self.filter_empty_gt:
-                cat_ids = set([len(self.CLASSES)])
+        for cat_ids in img_cat_ids:
             repeat_factor = 1
             if len(cat_ids) > 0:
                 repeat_factor = max(
@@ -2,6 +2,7 @@ import itertools
 import logging
 import os.path as osp
 import tempfile
+from collections.abc import Sequence
 
 import numpy as np
 from mmcv.utils import print_log
@@ -332,7 +333,7 @@ class LVISV05Dataset(CocoDataset):
         except ImportError:
             raise ImportError('Please follow config/lvis/README.md to '
                               'install open-mmlab forked lvis first.')
-        assert isinstance(results, list), 'results must be a list'
+        assert isinstance(results, Sequence), 'results must be a sequence'
         assert len(results) == len(self), (
             'The length of results is not equal to the dataset len: {} != {}'.
             format(len(results), len(self)))
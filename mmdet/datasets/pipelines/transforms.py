@@ -989,78 +989,105 @@ class MinIoURandomCrop(object):
         boxes = [results[key] for key in results['bbox_fields']]
         boxes = np.concatenate(boxes, 0)
         h, w, c = img.shape
+        patch = self._sample_patch(boxes, h, w)
+        if patch is None:
+            return results
+
+        # only adjust boxes and instance masks when the gt is not empty
+        if len(boxes) > 0:
+            self._crop_anns(results, patch)
+        # adjust the img no matter whether the gt is empty before crop
+        img = img[patch[1]:patch[3], patch[0]:patch[2]]
+        results['img'] = img
+        results['img_shape'] = img.shape
+
+        # seg fields
+        for key in results.get('seg_fields', []):
+            results[key] = results[key][patch[1]:patch[3], patch[0]:patch[2]]
+        return results
+
+    @staticmethod
+    def _is_center_of_bboxes_in_patch(boxes, patch):
+        """Check whether the centers of boxes are in a patch.
+
+        Args:
+            boxes (ndarray): (n, 4) boxes.
+            patch (ndarray): (4, ) patch, or (k, 4) patches to check the
+                boxes against all of them.
+
+        Returns:
+            ndarray: (n, ) or (k, n) mask of the boxes in the patches.
+        """
+        center = (boxes[:, :2] + boxes[:, 2:]) / 2
+        if patch.ndim == 2:
+            patch = patch.T[..., None]
+        mask = ((center[:, 0] > patch[0]) * (center[:, 1] > patch[1]) *
+                (center[:, 0] < patch[2]) * (center[:, 1] < patch[3]))
+        return mask
+
+    def _sample_patch(self, boxes, h, w):
+        """Sample a crop patch of a (h, w) image with boxes.
+
+        Args:
+            boxes (ndarray): All the boxes of the image.
+            h (int): Height of the image.
+            w (int): Width of the image.
+
+        Returns:
+            ndarray | None: The patch (x1, y1, x2, y2), None if the image is
+                not cropped.
+        """
         while True:
             mode = random.choice(self.sample_mode)
             self.mode = mode
             if mode == 1:
-                return results
+                return None
 
             min_iou = mode
-            for i in range(50):
-                new_w = random.uniform(self.min_crop_size * w, w)
-                new_h = random.uniform(self.min_crop_size * h, h)
-
-                # h / w in [0.5, 2]
-                if new_h / new_w < 0.5 or new_h / new_w > 2:
-                    continue
-
-                left = random.uniform(w - new_w)
-                top = random.uniform(h - new_h)
+            # sample all the candidate patches at once and take the first
+            # valid one, which is the same as trying them one by one
+            new_w = random.uniform(self.min_crop_size * w, w, 50)
+            new_h = random.uniform(self.min_crop_size * h, h, 50)
+            left = random.uniform(w - new_w)
+            top = random.uniform(h - new_h)
+            patches = np.stack((left, top, left + new_w, top + new_h),
+                               axis=1).astype(np.int64)
+
+            # h / w in [0.5, 2]
+            valid = (new_h / new_w >= 0.5) & (new_h / new_w <= 2)
+            # Line or point crop is not allowed
+            valid &= (patches[:, 2] != patches[:, 0]) & (
+                patches[:, 3] != patches[:, 1])
+            if len(boxes) > 0:
+                overlaps = bbox_overlaps(patches, boxes.reshape(-1, 4))
+                valid &= overlaps.min(axis=1) >= min_iou
+                # center of boxes should inside the crop img
+                valid &= self._is_center_of_bboxes_in_patch(
+                    boxes, patches).any(axis=1)
+            if valid.any():
+                return patches[valid.argmax()]
 
-                patch = np.array(
-                    (int(left), int(top), int(left + new_w), int(top + new_h)))
-                # Line or point crop is not allowed
-                if patch[2] == patch[0] or patch[3] == patch[1]:
-                    continue
-                overlaps = bbox_overlaps(
-                    patch.reshape(-1, 4), boxes.reshape(-1, 4)).reshape(-1)
-                if len(overlaps) > 0 and overlaps.min() < min_iou:
-                    continue
+    def _crop_anns(self, results, patch):
+        """Crop the boxes, labels and masks of results to a patch."""
+        for key in results.get('bbox_fields', []):
+            boxes = results[key].copy()
+            mask = self._is_center_of_bboxes_in_patch(boxes, patch)
+            boxes = boxes[mask]
+            boxes[:, 2:] = boxes[:, 2:].clip(max=patch[2:])
+            boxes[:, :2] = boxes[:, :2].clip(min=patch[:2])
+            boxes -= np.tile(patch[:2], 2)
+
+            results[key] = boxes
+            # labels
+            label_key = self.bbox2label.get(key)
+            if label_key in results:
+                results[label_key] = results[label_key][mask]
 
-                # center of boxes should inside the crop img
-                # only adjust boxes and instance masks when the gt is not empty
-                if len(overlaps) > 0:
-                    # adjust boxes
-                    def is_center_of_bboxes_in_patch(boxes, patch):
-                        center = (boxes[:, :2] + boxes[:, 2:]) / 2
-                        mask = ((center[:, 0] > patch[0]) *
-                                (center[:, 1] > patch[1]) *
-                                (center[:, 0] < patch[2]) *
-                                (center[:, 1] < patch[3]))
-                        return mask
-
-                    mask = is_center_of_bboxes_in_patch(boxes, patch)
-                    if not mask.any():
-                        continue
-                    for key in results.get('bbox_fields', []):
-                        boxes = results[key].copy()
-                        mask = is_center_of_bboxes_in_patch(boxes, patch)
-                        boxes = boxes[mask]
-                        boxes[:, 2:] = boxes[:, 2:].clip(max=patch[2:])
-                        boxes[:, :2] = boxes[:, :2].clip(min=patch[:2])
-                        boxes -= np.tile(patch[:2], 2)
-
-                        results[key] = boxes
-                        # labels
-                        label_key = self.bbox2label.get(key)
-                        if label_key in results:
-                            results[label_key] = results[label_key][mask]
-
-                        # mask fields
-                        mask_key = self.bbox2mask.get(key)
-                        if mask_key in results:
-                            results[mask_key] = results[mask_key][
-                                mask.nonzero()[0]].crop(patch)
-                # adjust the img no matter whether the gt is empty before crop
-                img = img[patch[1]:patch[3], patch[0]:patch[2]]
-                results['img'] = img
-                results['img_shape'] = img.shape
-
-                # seg fields
-                for key in results.get('seg_fields', []):
-                    results[key] = results[key][patch[1]:patch[3],
-                                                patch[0]:patch[2]]
-                return results
+            # mask fields
+            mask_key = self.bbox2mask.get(key)
+            if mask_key in results:
+                results[mask_key] = results[mask_key][mask.nonzero()[0]].crop(
+                    patch)
 
     def __repr__(self):
         repr_str = self.__class__.__name__
@@ -1069,6 +1096,139 @@ class MinIoURandomCrop(object):
         return repr_str
 
 
+@PIPELINES.register_module()
+class ExpandMinIoURandomCrop(object):
+    """Fused :obj:`Expand` and :obj:`MinIoURandomCrop`.
+
+    ``Expand`` allocates a canvas up to ``max_ratio`` x ``max_ratio`` the
+    image size, of which ``MinIoURandomCrop`` usually keeps a small patch.
+    This transform samples the expansion and the patch exactly as the two
+    transforms do, but only allocates the patch of the canvas. Given the same
+    random state, the results are identical to those of ``Expand`` followed
+    by ``MinIoURandomCrop``.
+
+    Instance masks are still expanded and then cropped.
+
+    Args:
+        mean (tuple): mean value of dataset.
+        to_rgb (bool): if need to convert the order of mean to align with RGB.
+        ratio_range (tuple): range of expand ratio.
+        seg_ignore_label (int, optional): Label of the expanded area of the
+            segmentation maps. Default: None.
+        prob (float): probability of expanding the image. Default: 0.5.
+        min_ious (tuple): minimum IoU threshold for all intersections with
+            bounding boxes.
+        min_crop_size (float): minimum crop's size (i.e. h,w := a*h, a*w,
+            where a >= min_crop_size).
+    """
+
+    def __init__(self,
+                 mean=(0, 0, 0),
+                 to_rgb=True,
+                 ratio_range=(1, 4),
+                 seg_ignore_label=None,
+                 prob=0.5,
+                 min_ious=(0.1, 0.3, 0.5, 0.7, 0.9),
+                 min_crop_size=0.3):
+        self.expand = Expand(mean, to_rgb, ratio_range, seg_ignore_label, prob)
+        self.crop = MinIoURandomCrop(min_ious, min_crop_size)
+
+    @staticmethod
+    def _crop_canvas(img, canvas_shape, offset, patch, fill):
+        """Crop a patch of an image placed on a canvas filled with ``fill``.
+
+        Only the patch is allocated, the canvas is never materialized.
+
+        Args:
+            img (ndarray): The image.
+            canvas_shape (tuple[int]): (h, w) of the canvas.
+            offset (tuple[int]): (left, top) of the image on the canvas.
+            patch (ndarray | None): (x1, y1, x2, y2) of the patch, None means
+                the whole canvas.
+            fill (float | tuple): Value of the canvas.
+
+        Returns:
+            ndarray: The patch.
+        """
+        if patch is None:
+            patch = (0, 0, canvas_shape[1], canvas_shape[0])
+        x1, y1, x2, y2 = patch
+        cropped = np.full((y2 - y1, x2 - x1, *img.shape[2:]),
+                          fill,
+                          dtype=img.dtype)
+        left, top = offset
+        h, w = img.shape[:2]
+        # intersection of the image and the patch in canvas coordinates
+        ix1, iy1 = max(x1, left), max(y1, top)
+        ix2, iy2 = min(x2, left + w), min(y2, top + h)
+        if ix2 > ix1 and iy2 > iy1:
+            cropped[iy1 - y1:iy2 - y1, ix1 - x1:ix2 - x1] = \
+                img[iy1 - top:iy2 - top, ix1 - left:ix2 - left]
+        return cropped
+
+    def __call__(self, results):
+        """Call function to expand and crop images, bounding boxes.
+
+        Args:
+            results (dict): Result dict from loading pipeline.
+
+        Returns:
+            dict: Result dict with images and bounding boxes expanded and
+                cropped, 'img_shape' key is updated if cropped.
+        """
+
+        if random.uniform(0, 1) > self.expand.prob:
+            return self.crop(results)
+
+        if 'img_fields' in results:
+            assert results['img_fields'] == ['img'], \
+                'Only single img_fields is allowed'
+        img = results['img']
+
+        # same random draws as Expand
+        h, w, c = img.shape
+        ratio = random.uniform(self.expand.min_ratio, self.expand.max_ratio)
+        canvas_shape = (int(h * ratio), int(w * ratio))
+        left = int(random.uniform(0, w * ratio - w))
+        top = int(random.uniform(0, h * ratio - h))
+
+        for key in results.get('bbox_fields', []):
+            results[key] = results[key] + np.tile(
+                (left, top), 2).astype(results[key].dtype)
+        for key in results.get('mask_fields', []):
+            results[key] = results[key].expand(*canvas_shape, top, left)
+
+        # same random draws as MinIoURandomCrop on the expanded image
+        assert 'bbox_fields' in results
+        boxes = [results[key] for key in results['bbox_fields']]
+        boxes = np.concatenate(boxes, 0)
+        patch = self.crop._sample_patch(boxes, *canvas_shape)
+        if patch is not None and len(boxes) > 0:
+            self.crop._crop_anns(results, patch)
+
+        img = self._crop_canvas(img, canvas_shape, (left, top), patch,
+                                self.expand.mean)
+        results['img'] = img
+        if patch is not None:
+            results['img_shape'] = img.shape
+        for key in results.get('seg_fields', []):
+            results[key] = self._crop_canvas(results[key], canvas_shape,
+                                             (left, top), patch,
+                                             self.expand.seg_ignore_label)
+        return results
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += f'(mean={self.expand.mean}, '
+        repr_str += f'to_rgb={self.expand.to_rgb}, '
+        repr_str += f'ratio_range={self.expand.ratio_range}, '
+        repr_str += f'seg_ignore_label={self.expand.seg_ignore_label}, '
+        repr_str += f'prob={self.expand.prob}, '
+        repr_str += f'min_ious={self.crop.min_ious}, '
+        repr_str += f'min_crop_size={self.crop.min_crop_size})'
+        return repr_str
+
+
 @PIPELINES.register_module()
 class Corrupt(object):
     """Corruption augmentation.
@@ -1459,13 +1619,18 @@ class RandomCenterCropPad(object):
         """Check whether the center of each box is in the patch.
 
         Args:
-            patch (list[int]): The cropped area, [left, top, right, bottom].
+            patch (list[int] | numpy array, (K x 4)): The cropped area,
+                [left, top, right, bottom], or K cropped areas to check the
+                boxes against all of them.
             boxes (numpy array, (N x 4)): Ground truth boxes.
 
         Returns:
-            mask (numpy array, (N,)): Each box is inside or outside the patch.
+            mask (numpy array, (N,) or (K x N)): Each box is inside or outside
+                the patch.
         """
         center = (boxes[:, :2] + boxes[:, 2:]) / 2
+        if isinstance(patch, np.ndarray) and patch.ndim == 2:
+            patch = patch.T[..., None]
         mask = (center[:, 0] > patch[0]) * (center[:, 1] > patch[1]) * (
             center[:, 0] < patch[2]) * (
                 center[:, 1] < patch[3])
@@ -1541,53 +1706,65 @@ class RandomCenterCropPad(object):
             h_border = self._get_border(self.border, h)
             w_border = self._get_border(self.border, w)
 
-            for i in range(50):
-                center_x = random.randint(low=w_border, high=w - w_border)
-                center_y = random.randint(low=h_border, high=h - h_border)
+            # sample all the candidate centers at once and take the first
+            # valid one, which is the same as trying them one by one
+            center_xs = random.randint(
+                low=w_border, high=w - w_border, size=50)
+            center_ys = random.randint(
+                low=h_border, high=h - h_border, size=50)
+            ind = 0
+            # if image do not have valid bbox, any crop patch is valid.
+            if len(boxes) > 0:
+                # same patches as computed by _crop_image_and_paste
+                centers = np.stack([center_xs, center_ys], axis=1)
+                half_size = np.array([new_w // 2, new_h // 2])
+                top_left = np.maximum(centers - half_size, 0)
+                bottom_right = np.minimum(centers + half_size, [w, h])
+                patches = np.concatenate([top_left, bottom_right], axis=1)
+                valid = self._filter_boxes(patches, boxes).any(axis=1)
+                if not valid.any():
+                    continue
+                ind = valid.argmax()
+            center_x, center_y = int(center_xs[ind]), int(center_ys[ind])
 
-                cropped_img, border, patch = self._crop_image_and_paste(
-                    img, [center_y, center_x], [new_h, new_w])
+            cropped_img, border, patch = self._crop_image_and_paste(
+                img, [center_y, center_x], [new_h, new_w])
 
-                mask = self._filter_boxes(patch, boxes)
-                # if image do not have valid bbox, any crop patch is valid.
-                if not mask.any() and len(boxes) > 0:
-                    continue
+            results['img'] = cropped_img
+            results['img_shape'] = cropped_img.shape
+            results['pad_shape'] = cropped_img.shape
 
-                results['img'] = cropped_img
-                results['img_shape'] = cropped_img.shape
-                results['pad_shape'] = cropped_img.shape
-
-                x0, y0, x1, y1 = patch
-
-                left_w, top_h = center_x - x0, center_y - y0
-                cropped_center_x, cropped_center_y = new_w // 2, new_h // 2
-
-                # crop bboxes accordingly and clip to the image boundary
-                for key in results.get('bbox_fields', []):
-                    mask = self._filter_boxes(patch, results[key])
-                    bboxes = results[key][mask]
-                    bboxes[:, 0:4:2] += cropped_center_x - left_w - x0
-                    bboxes[:, 1:4:2] += cropped_center_y - top_h - y0
-                    bboxes[:, 0:4:2] = np.clip(bboxes[:, 0:4:2], 0, new_w)
-                    bboxes[:, 1:4:2] = np.clip(bboxes[:, 1:4:2], 0, new_h)
-                    keep = (bboxes[:, 2] > bboxes[:, 0]) & (
-                        bboxes[:, 3] > bboxes[:, 1])
-                    bboxes = bboxes[keep]
-                    results[key] = bboxes
-                    if key in ['gt_bboxes']:
-                        if 'gt_labels' in results:
-                            labels = results['gt_labels'][mask]
-                            labels = labels[keep]
-                            results['gt_labels'] = labels
-                        if 'gt_masks' in results:
-                            raise NotImplementedError(
-                                'RandomCenterCropPad only supports bbox.')
-
-                # crop semantic seg
-                for key in results.get('seg_fields', []):
-                    raise NotImplementedError(
-                        'RandomCenterCropPad only supports bbox.')
-                return results
+            x0, y0, x1, y1 = patch
+
+            left_w, top_h = center_x - x0, center_y - y0
+            cropped_center_x, cropped_center_y = new_w // 2, new_h // 2
+
+            # crop bboxes accordingly and clip to the image boundary
+            for key in results.get('bbox_fields', []):
+                mask = self._filter_boxes(patch, results[key])
+                bboxes = results[key][mask]
+                bboxes[:, 0:4:2] += cropped_center_x - left_w - x0
+                bboxes[:, 1:4:2] += cropped_center_y - top_h - y0
+                bboxes[:, 0:4:2] = np.clip(bboxes[:, 0:4:2], 0, new_w)
+                bboxes[:, 1:4:2] = np.clip(bboxes[:, 1:4:2], 0, new_h)
+                keep = (bboxes[:, 2] > bboxes[:, 0]) & (
+                    bboxes[:, 3] > bboxes[:, 1])
+                bboxes = bboxes[keep]
+                results[key] = bboxes
+                if key in ['gt_bboxes']:
+                    if 'gt_labels' in results:
+                        labels = results['gt_labels'][mask]
+                        labels = labels[keep]
+                        results['gt_labels'] = labels
+                    if 'gt_masks' in results:
+                        raise NotImplementedError(
+                            'RandomCenterCropPad only supports bbox.')
+
+            # crop semantic seg
+            for key in results.get('seg_fields', []):
+                raise NotImplementedError(
+                    'RandomCenterCropPad only supports bbox.')
+            return results
 
     def _test_aug(self, results):
         """Around padding the original image without cropping.
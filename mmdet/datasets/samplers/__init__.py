@@ -1,4 +1,8 @@
+from .bucket_sampler import AspectRatioBucketSampler, get_img_shapes
 from .distributed_sampler import DistributedSampler
 from .group_sampler import DistributedGroupSampler, GroupSampler
 
-__all__ = ['DistributedSampler', 'DistributedGroupSampler', 'GroupSampler']
+__all__ = [
+    'DistributedSampler', 'DistributedGroupSampler', 'GroupSampler',
+    'AspectRatioBucketSampler', 'get_img_shapes'
+]
@@ -0,0 +1,183 @@
+import math
+
+import numpy as np
+import torch
+from mmcv.runner import get_dist_info
+from mmcv.utils import print_log
+from torch.utils.data import Sampler
+
+from mmdet.utils import get_root_logger
+
+
+def get_img_shapes(dataset):
+    """Get the (h, w) of the images of a dataset.
+
+    The dataset wrappers are unfolded, the shapes are read from the image
+    infos of the wrapped :obj:`CustomDataset`.
+
+    Args:
+        dataset (Dataset): The dataset.
+
+    Returns:
+        ndarray: (n, 2) array of the image shapes.
+    """
+    if hasattr(dataset, 'datasets'):  # ConcatDataset
+        return np.concatenate([get_img_shapes(ds) for ds in dataset.datasets])
+    if hasattr(dataset, 'repeat_indices'):  # ClassBalancedDataset
+        return get_img_shapes(dataset.dataset)[dataset.repeat_indices]
+    if hasattr(dataset, 'times'):  # RepeatDataset
+        return np.tile(get_img_shapes(dataset.dataset), (dataset.times, 1))
+    assert hasattr(dataset, 'data_infos'), \
+        f'{type(dataset).__name__} does not provide the image shapes'
+    return np.array([[info['height'], info['width']]
+                     for info in dataset.data_infos],
+                    dtype=np.float64).reshape(-1, 2)
+
+
+class AspectRatioBucketSampler(Sampler):
+    """Sampler that batches images of similar aspect ratios.
+
+    :class:`GroupSampler` only splits the images into landscape and portrait
+    ones, so a batch may still mix 4:3 and 21:9 images and most of the padded
+    batch is wasted. This sampler splits the images into finer buckets of
+    aspect ratios, and optionally of sizes, and only forms the batches of each
+    GPU from the images of a bucket. Finer buckets waste less padding but
+    shuffle less, since the images of a batch are drawn from fewer images.
+
+    The sampler works for both distributed and non-distributed training. The
+    order only depends on ``seed`` and the epoch, so all the processes agree
+    on it. Each bucket is padded to a multiple of ``samples_per_gpu`` by
+    repeating some of its images, and the batches are padded to a multiple
+    of ``num_replicas`` by repeating the first batches.
+
+    The epoch is increased after each epoch is sampled, unless it is set by
+    :meth:`set_epoch`. The fraction of the padded area of the batches of this
+    process is logged for each epoch and stored in ``padding_fraction``.
+
+    Args:
+        dataset (Dataset): Dataset used for sampling.
+        samples_per_gpu (int): Batch size of each GPU. Default: 1.
+        num_replicas (int, optional): Number of processes participating in
+            distributed training. Default: world size.
+        rank (int, optional): Rank of the current process. Default: the rank
+            of the current process.
+        ratio_bounds (Sequence[float]): Boundaries of the buckets of the
+            aspect ratio w / h. Default: (0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2).
+        size_bounds (Sequence[float], optional): Boundaries of the buckets of
+            the longer side of the images. None means no size bucket.
+            Default: None.
+        img_scale (tuple[int], optional): If given, the image shapes are
+            rescaled to this scale keeping the ratio, as done by ``Resize``
+            with ``keep_ratio=True``, before bucketing them by size and
+            measuring the padding. Default: None.
+        shuffle (bool): Whether to shuffle the images of each bucket and the
+            batches. Default: True.
+        seed (int): Seed of the shuffling. Default: 0.
+    """
+
+    def __init__(self,
+                 dataset,
+                 samples_per_gpu=1,
+                 num_replicas=None,
+                 rank=None,
+                 ratio_bounds=(0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0),
+                 size_bounds=None,
+                 img_scale=None,
+                 shuffle=True,
+                 seed=0):
+        _rank, _num_replicas = get_dist_info()
+        if num_replicas is None:
+            num_replicas = _num_replicas
+        if rank is None:
+            rank = _rank
+        self.dataset = dataset
+        self.samples_per_gpu = samples_per_gpu
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.shuffle = shuffle
+        self.seed = seed if seed is not None else 0
+        self.epoch = 0
+        self.padding_fraction = None
+
+        img_shapes = get_img_shapes(dataset)
+        assert len(img_shapes) == len(dataset)
+        if img_scale is not None:
+            # same as mmcv.rescale_size
+            long_edge, short_edge = max(img_scale), min(img_scale)
+            scale = np.minimum(long_edge / img_shapes.max(axis=1),
+                               short_edge / img_shapes.min(axis=1))
+            img_shapes = np.floor(img_shapes * scale[:, None] + 0.5)
+        self.img_shapes = img_shapes
+
+        ratios = img_shapes[:, 1] / img_shapes[:, 0]
+        self.flag = np.digitize(ratios, sorted(ratio_bounds))
+        if size_bounds is not None:
+            size_flag = np.digitize(
+                img_shapes.max(axis=1), sorted(size_bounds))
+            self.flag = self.flag * (len(size_bounds) + 1) + size_flag
+        self.group_sizes = np.bincount(self.flag)
+
+        num_batches = int(
+            np.ceil(self.group_sizes / self.samples_per_gpu).sum())
+        self.num_batches = int(math.ceil(
+            num_batches / self.num_replicas)) * self.num_replicas
+        self.num_samples = (
+            self.num_batches // self.num_replicas * self.samples_per_gpu)
+        self.total_size = self.num_samples * self.num_replicas
+
+    def __iter__(self):
+        # deterministically shuffle based on the seed and the epoch
+        g = torch.Generator()
+        g.manual_seed(self.seed + self.epoch)
+
+        batches = []
+        for i, size in enumerate(self.group_sizes):
+            if size == 0:
+                continue
+            indice = np.where(self.flag == i)[0]
+            if self.shuffle:
+                indice = indice[torch.randperm(int(size), generator=g).numpy()]
+            num_extra = int(np.ceil(
+                size / self.samples_per_gpu)) * self.samples_per_gpu - size
+            indice = np.concatenate([indice, np.resize(indice, num_extra)])
+            batches.append(indice.reshape(-1, self.samples_per_gpu))
+        batches = np.concatenate(batches)
+        if self.shuffle:
+            batches = batches[torch.randperm(len(batches),
+                                             generator=g).numpy()]
+        batches = np.resize(batches, (self.num_batches, self.samples_per_gpu))
+        assert batches.size == self.total_size
+
+        # subsample
+        batches = batches[self.rank::self.num_replicas]
+        assert batches.size == self.num_samples
+
+        self.padding_fraction = self.measure_padding(batches)
+        print_log(
+            f'Padding fraction of the batches of epoch {self.epoch}: '
+            f'{self.padding_fraction:.3f}',
+            logger=get_root_logger())
+        self.epoch += 1
+        return iter(batches.reshape(-1).tolist())
+
+    def measure_padding(self, batches):
+        """Measure the fraction of the padded area of batches.
+
+        Args:
+            batches (ndarray): (num_batches, samples_per_gpu) indices of the
+                images of each batch.
+
+        Returns:
+            float: Fraction of the area of the padded batches that is padding.
+        """
+        shapes = self.img_shapes[batches]
+        img_area = shapes.prod(axis=2).sum()
+        batch_area = (shapes.max(axis=1).prod(axis=1) *
+                      self.samples_per_gpu).sum()
+        return float(1 - img_area / max(batch_area, 1))
+
+    def __len__(self):
+        return self.num_samples
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
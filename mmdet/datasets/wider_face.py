@@ -29,6 +29,11 @@ class WIDERFaceDataset(XMLDataset):
             list[dict]: Annotation info from XML file.
         """
 
+        if self.ann_index is not None:
+            return [
+                self.ann_index.get_data_info(row)
+                for row in range(len(self.ann_index))
+            ]
         data_infos = []
         img_ids = mmcv.list_from_file(ann_file)
         for img_id in img_ids:
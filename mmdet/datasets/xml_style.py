@@ -1,3 +1,4 @@
+import os
 import os.path as osp
 import xml.etree.ElementTree as ET
 
@@ -20,9 +21,14 @@ class XMLDataset(CustomDataset):
     """
 
     def __init__(self, min_size=None, **kwargs):
-        super(XMLDataset, self).__init__(**kwargs)
-        self.cat2label = {cat: i for i, cat in enumerate(self.CLASSES)}
+        # the annotations may be parsed in CustomDataset.__init__ to build
+        # the annotation index
+        self.cat2label = {
+            cat: i
+            for i, cat in enumerate(self.get_classes(kwargs.get('classes')))
+        }
         self.min_size = min_size
+        super(XMLDataset, self).__init__(**kwargs)
 
     def load_annotations(self, ann_file):
         """Load annotation from XML style ann_file.
@@ -34,6 +40,11 @@ class XMLDataset(CustomDataset):
             list[dict]: Annotation info from XML file.
         """
 
+        if self.ann_index is not None:
+            return [
+                self.ann_index.get_data_info(row)
+                for row in range(len(self.ann_index))
+            ]
         data_infos = []
         img_ids = mmcv.list_from_file(ann_file)
         for img_id in img_ids:
@@ -60,6 +71,15 @@ class XMLDataset(CustomDataset):
 
     def get_subset_by_classes(self):
         """Filter imgs by user-defined categories."""
+        if self.ann_index is not None:
+            rows = self.ann_index.find(
+                [self._ann_index_key(info) for info in self.data_infos])
+            num_cat_ids = self.ann_index.num_cat_ids(rows)
+            return [
+                data_info
+                for data_info, num in zip(self.data_infos, num_cat_ids)
+                if num > 0
+            ]
         subset_data_infos = []
         for data_info in self.data_infos:
             img_id = data_info['id']
@@ -85,6 +105,8 @@ class XMLDataset(CustomDataset):
             dict: Annotation info of specified index.
         """
 
+        if self.ann_index is not None:
+            return self.ann_index.get_ann_info(self.ann_index_rows[idx])
         img_id = self.data_infos[idx]['id']
         xml_path = osp.join(self.img_prefix, 'Annotations', f'{img_id}.xml')
         tree = ET.parse(xml_path)
@@ -150,6 +172,8 @@ class XMLDataset(CustomDataset):
             list[int]: All categories in the image of specified index.
         """
 
+        if self.ann_index is not None:
+            return self.ann_index.get_cat_ids(self.ann_index_rows[idx])
         cat_ids = []
         img_id = self.data_infos[idx]['id']
         xml_path = osp.join(self.img_prefix, 'Annotations', f'{img_id}.xml')
@@ -163,3 +187,13 @@ class XMLDataset(CustomDataset):
             cat_ids.append(label)
 
         return cat_ids
+
+    def _ann_index_signature(self):
+        """The annotations also depend on the XML files and ``min_size``."""
+        signature = super(XMLDataset, self)._ann_index_signature()
+        ann_dir = osp.join(self.img_prefix, 'Annotations')
+        signature.update(
+            img_prefix=osp.abspath(self.img_prefix),
+            ann_dir_mtime=os.stat(ann_dir).st_mtime_ns,
+            min_size=self.min_size)
+        return signature
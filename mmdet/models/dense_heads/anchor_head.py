@@ -1,11 +1,12 @@
+import numpy as np
 import torch
 import torch.nn as nn
 from mmcv.cnn import normal_init
 
-from mmdet.core import (anchor_inside_flags, build_anchor_generator,
-                        build_assigner, build_bbox_coder, build_sampler,
-                        force_fp32, images_to_levels, multi_apply,
-                        multiclass_nms, unmap)
+from mmdet.core import (anchor_inside_flags, batched_multiclass_nms,
+                        build_anchor_generator, build_assigner,
+                        build_bbox_coder, build_sampler, force_fp32,
+                        images_to_levels, multi_apply, multiclass_nms, unmap)
 from ..builder import HEADS, build_loss
 from .base_dense_head import BaseDenseHead
 
@@ -185,7 +186,8 @@ class AnchorHead(BaseDenseHead):
                             gt_labels,
                             img_meta,
                             label_channels=1,
-                            unmap_outputs=True):
+                            unmap_outputs=True,
+                            assign_result=None):
         """Compute regression and classification targets for anchors in a
         single image.
 
@@ -206,6 +208,9 @@ class AnchorHead(BaseDenseHead):
             label_channels (int): Channel of label.
             unmap_outputs (bool): Whether to map outputs back to the original
                 set of anchors.
+            assign_result (:obj:`AssignResult`, optional): Assign result of
+                the anchors inside the image, computed beforehand by the
+                batched assignment. Default: None.
 
         Returns:
             tuple:
@@ -224,9 +229,10 @@ class AnchorHead(BaseDenseHead):
         # assign gt and sample anchors
         anchors = flat_anchors[inside_flags, :]
 
-        assign_result = self.assigner.assign(
-            anchors, gt_bboxes, gt_bboxes_ignore,
-            None if self.sampling else gt_labels)
+        if assign_result is None:
+            assign_result = self.assigner.assign(
+                anchors, gt_bboxes, gt_bboxes_ignore,
+                None if self.sampling else gt_labels)
         sampling_result = self.sampler.sample(assign_result, anchors,
                                               gt_bboxes)
 
@@ -343,16 +349,29 @@ class AnchorHead(BaseDenseHead):
             gt_bboxes_ignore_list = [None for _ in range(num_imgs)]
         if gt_labels_list is None:
             gt_labels_list = [None for _ in range(num_imgs)]
-        results = multi_apply(
-            self._get_targets_single,
-            concat_anchor_list,
-            concat_valid_flag_list,
-            gt_bboxes_list,
-            gt_bboxes_ignore_list,
-            gt_labels_list,
-            img_metas,
-            label_channels=label_channels,
-            unmap_outputs=unmap_outputs)
+        if self.train_cfg.get('batched_assign', False):
+            self._check_batched_assign()
+            assign_results = self._assign_batch(concat_anchor_list,
+                                                concat_valid_flag_list,
+                                                gt_bboxes_list,
+                                                gt_bboxes_ignore_list,
+                                                gt_labels_list, img_metas)
+            results = multi_apply(self._get_targets_single, concat_anchor_list,
+                                  concat_valid_flag_list, gt_bboxes_list,
+                                  gt_bboxes_ignore_list, gt_labels_list,
+                                  img_metas, [label_channels] * num_imgs,
+                                  [unmap_outputs] * num_imgs, assign_results)
+        else:
+            results = multi_apply(
+                self._get_targets_single,
+                concat_anchor_list,
+                concat_valid_flag_list,
+                gt_bboxes_list,
+                gt_bboxes_ignore_list,
+                gt_labels_list,
+                img_metas,
+                label_channels=label_channels,
+                unmap_outputs=unmap_outputs)
         (all_labels, all_label_weights, all_bbox_targets, all_bbox_weights,
          pos_inds_list, neg_inds_list, sampling_results_list) = results[:7]
         rest_results = list(results[7:])  # user-added return values
@@ -379,6 +398,68 @@ class AnchorHead(BaseDenseHead):
 
         return res + tuple(rest_results)
 
+    def _check_batched_assign(self, targets_single='_get_targets_single'):
+        """Check that the batched assignment is supported by the head.
+
+        Heads that customize the method computing the targets of an image
+        must also implement :meth:`_assign_batch`, and the assigner must
+        implement ``assign_batch``.
+
+        Args:
+            targets_single (str): Name of the method computing the targets
+                of an image. Default: '_get_targets_single'.
+        """
+        owners = []
+        for name in [targets_single, '_assign_batch']:
+            owners.append(
+                next(cls for cls in type(self).__mro__
+                     if name in cls.__dict__))
+        if (not issubclass(owners[1], owners[0])
+                or not hasattr(self.assigner, 'assign_batch')):
+            raise NotImplementedError(
+                f'{self.__class__.__name__} with '
+                f'{self.assigner.__class__.__name__} does not support batched '
+                'assignment, set batched_assign=False in the train config')
+
+    def _assign_batch(self, concat_anchor_list, concat_valid_flag_list,
+                      gt_bboxes_list, gt_bboxes_ignore_list, gt_labels_list,
+                      img_metas):
+        """Assign the anchors inside all images at once.
+
+        It is enabled by ``batched_assign=True`` in the train config. The
+        batched assignment replaces the small kernels launched for each image
+        by a few large ones, which pays off on GPU. On CPU the per-image
+        assignment is usually as fast or faster.
+
+        Args:
+            concat_anchor_list (list[Tensor]): Anchors of each image, which
+                are concatenated into a tensor of shape (num_anchors ,4).
+            concat_valid_flag_list (list[Tensor]): Valid flags of each image,
+                which are concatenated into a tensor of shape (num_anchors,).
+            gt_bboxes_list (list[Tensor]): Ground truth bboxes of each image.
+            gt_bboxes_ignore_list (list[Tensor]): Ground truth bboxes to be
+                ignored of each image.
+            gt_labels_list (list[Tensor]): Ground truth labels of each image.
+            img_metas (list[dict]): Meta info of each image.
+
+        Returns:
+            list[:obj:`AssignResult`]: Assign results of the anchors inside
+                each image.
+        """
+        inside_flags = torch.stack([
+            anchor_inside_flags(flat_anchors, valid_flags,
+                                img_meta['img_shape'][:2],
+                                self.train_cfg.allowed_border)
+            for flat_anchors, valid_flags, img_meta in zip(
+                concat_anchor_list, concat_valid_flag_list, img_metas)
+        ])
+        return self.assigner.assign_batch(
+            torch.stack(concat_anchor_list),
+            gt_bboxes_list,
+            gt_bboxes_ignore_list,
+            None if self.sampling else gt_labels_list,
+            valid_flags=inside_flags)
+
     def loss_single(self, cls_score, bbox_pred, anchors, labels, label_weights,
                     bbox_targets, bbox_weights, num_total_samples):
         """Compute loss of a single scale level.
@@ -505,6 +586,11 @@ class AnchorHead(BaseDenseHead):
                    rescale=False):
         """Transform network output for a batch into bbox predictions.
 
+        By default the images are post-processed one by one. If ``batched``
+        is True in the test config, all the images are post-processed at once
+        by :meth:`_get_bboxes_batched`, with a single NMS for the whole batch
+        as long as it has fewer boxes than ``nms.split_thr``.
+
         Args:
             cls_scores (list[Tensor]): Box scores for each scale level
                 Has shape (N, num_anchors * num_classes, H, W)
@@ -559,6 +645,15 @@ class AnchorHead(BaseDenseHead):
         mlvl_anchors = self.anchor_generator.grid_anchors(
             featmap_sizes, device=device)
 
+        cfg = self.test_cfg if cfg is None else cfg
+        if cfg.get('batched', False):
+            self._check_batched_bboxes()
+            cls_score_list = [cls_score.detach() for cls_score in cls_scores]
+            bbox_pred_list = [bbox_pred.detach() for bbox_pred in bbox_preds]
+            return self._get_bboxes_batched(cls_score_list, bbox_pred_list,
+                                            mlvl_anchors, img_metas, cfg,
+                                            rescale)
+
         result_list = []
         for img_id in range(len(img_metas)):
             cls_score_list = [
@@ -575,6 +670,129 @@ class AnchorHead(BaseDenseHead):
             result_list.append(proposals)
         return result_list
 
+    def _check_batched_bboxes(self):
+        """Check that the batched post-processing matches the single one.
+
+        Heads that customize :meth:`_get_bboxes_single` must also implement
+        :meth:`_get_bboxes_batched` to support the batched post-processing.
+        """
+        owners = []
+        for name in ['_get_bboxes_single', '_get_bboxes_batched']:
+            owners.append(
+                next(cls for cls in type(self).__mro__
+                     if name in cls.__dict__))
+        if not issubclass(owners[1], owners[0]):
+            raise NotImplementedError(
+                f'{self.__class__.__name__} does not support batched '
+                'post-processing, set batched=False in the test config')
+
+    def _decode_batched(self, anchors, bbox_preds, img_metas):
+        """Decode the boxes of multiple images.
+
+        Images of the same shape are decoded together.
+
+        Args:
+            anchors (Tensor): Anchors with shape (N, num_anchors, 4).
+            bbox_preds (Tensor): Box deltas with shape (N, num_anchors, 4).
+            img_metas (list[dict]): Meta information of each image.
+
+        Returns:
+            Tensor: Decoded boxes with shape (N, num_anchors, 4).
+        """
+        num_imgs = bbox_preds.size(0)
+        img_groups = dict()
+        for img_id, img_meta in enumerate(img_metas):
+            img_groups.setdefault(tuple(img_meta['img_shape']),
+                                  []).append(img_id)
+        if len(img_groups) == 1:
+            return self.bbox_coder.decode(
+                anchors.reshape(-1, 4),
+                bbox_preds.reshape(-1, 4),
+                max_shape=img_metas[0]['img_shape']).view(num_imgs, -1, 4)
+        bboxes = bbox_preds.new_empty(bbox_preds.shape)
+        for img_shape, img_ids in img_groups.items():
+            img_ids = bbox_preds.new_tensor(img_ids, dtype=torch.long)
+            bboxes[img_ids] = self.bbox_coder.decode(
+                anchors[img_ids].reshape(-1, 4),
+                bbox_preds[img_ids].reshape(-1, 4),
+                max_shape=img_shape).view(len(img_ids), -1, 4)
+        return bboxes
+
+    def _get_bboxes_batched(self,
+                            cls_scores,
+                            bbox_preds,
+                            mlvl_anchors,
+                            img_metas,
+                            cfg,
+                            rescale=False):
+        """Transform outputs of all the images into bbox predictions at once.
+
+        This is the batched counterpart of :meth:`_get_bboxes_single`. The
+        top-k selection and box decoding are done on the whole batch, and
+        the boxes of all the images go through
+        :func:`batched_multiclass_nms` together.
+
+        Args:
+            cls_scores (list[Tensor]): Box scores for each scale level
+                Has shape (N, num_anchors * num_classes, H, W).
+            bbox_preds (list[Tensor]): Box energies / deltas for each scale
+                level with shape (N, num_anchors * 4, H, W).
+            mlvl_anchors (list[Tensor]): Box reference for each scale level
+                with shape (num_total_anchors, 4).
+            img_metas (list[dict]): Meta information of each image.
+            cfg (mmcv.Config): Test / postprocessing configuration.
+            rescale (bool): If True, return boxes in original image space.
+
+        Returns:
+            list[tuple[Tensor, Tensor]]: Labeled boxes of shape (n, 5) and
+                labels of shape (n, ) of each image.
+        """
+        assert len(cls_scores) == len(bbox_preds) == len(mlvl_anchors)
+        num_imgs = len(img_metas)
+        nms_pre = cfg.get('nms_pre', -1)
+        mlvl_bboxes = []
+        mlvl_scores = []
+        for cls_score, bbox_pred, anchors in zip(cls_scores, bbox_preds,
+                                                 mlvl_anchors):
+            assert cls_score.size()[-2:] == bbox_pred.size()[-2:]
+            cls_score = cls_score.permute(0, 2, 3, 1).reshape(
+                num_imgs, -1, self.cls_out_channels)
+            if self.use_sigmoid_cls:
+                scores = cls_score.sigmoid()
+            else:
+                scores = cls_score.softmax(-1)
+            bbox_pred = bbox_pred.permute(0, 2, 3,
+                                          1).reshape(num_imgs, -1, 4)
+            anchors = anchors.expand(num_imgs, -1, -1)
+            if nms_pre > 0 and scores.shape[1] > nms_pre:
+                if self.use_sigmoid_cls:
+                    max_scores, _ = scores.max(dim=-1)
+                else:
+                    max_scores, _ = scores[..., :-1].max(dim=-1)
+                _, topk_inds = max_scores.topk(nms_pre, dim=1)
+                img_inds = torch.arange(
+                    num_imgs, device=topk_inds.device)[:, None]
+                anchors = anchors[img_inds, topk_inds]
+                bbox_pred = bbox_pred[img_inds, topk_inds]
+                scores = scores[img_inds, topk_inds]
+            mlvl_bboxes.append(
+                self._decode_batched(anchors, bbox_pred, img_metas))
+            mlvl_scores.append(scores)
+        mlvl_bboxes = torch.cat(mlvl_bboxes, dim=1)
+        if rescale:
+            scale_factors = np.array(
+                [img_meta['scale_factor'] for img_meta in img_metas],
+                dtype=np.float32)
+            mlvl_bboxes /= mlvl_bboxes.new_tensor(scale_factors).view(
+                num_imgs, 1, -1)
+        mlvl_scores = torch.cat(mlvl_scores, dim=1)
+        if self.use_sigmoid_cls:
+            # Add a dummy background class to the backend when using sigmoid
+            padding = mlvl_scores.new_zeros(num_imgs, mlvl_scores.shape[1], 1)
+            mlvl_scores = torch.cat([mlvl_scores, padding], dim=-1)
+        return batched_multiclass_nms(mlvl_bboxes, mlvl_scores, cfg.score_thr,
+                                      cfg.nms, cfg.max_per_img)
+
     def _get_bboxes_single(self,
                            cls_score_list,
                            bbox_pred_list,
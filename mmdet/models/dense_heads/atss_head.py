@@ -476,7 +476,9 @@ class ATSSHead(AnchorHead):
 
         This method is almost the same as `AnchorHead.get_targets()`. Besides
         returning the targets as the parent method does, it also returns the
-        anchors as the first element of the returned tuple.
+        anchors as the first element of the returned tuple. Setting
+        ``batched_assign=True`` in the train config assigns all images at once
+        with ``ATSSAssigner.assign_batch()``.
         """
         num_imgs = len(img_metas)
         assert len(anchor_list) == len(valid_flag_list) == num_imgs
@@ -496,18 +498,32 @@ class ATSSHead(AnchorHead):
             gt_bboxes_ignore_list = [None for _ in range(num_imgs)]
         if gt_labels_list is None:
             gt_labels_list = [None for _ in range(num_imgs)]
-        (all_anchors, all_labels, all_label_weights, all_bbox_targets,
-         all_bbox_weights, pos_inds_list, neg_inds_list) = multi_apply(
-             self._get_target_single,
-             anchor_list,
-             valid_flag_list,
-             num_level_anchors_list,
-             gt_bboxes_list,
-             gt_bboxes_ignore_list,
-             gt_labels_list,
-             img_metas,
-             label_channels=label_channels,
-             unmap_outputs=unmap_outputs)
+        if self.train_cfg.get('batched_assign', False):
+            self._check_batched_assign('_get_target_single')
+            assign_results = self._assign_batch(anchor_list, valid_flag_list,
+                                                num_level_anchors,
+                                                gt_bboxes_list,
+                                                gt_bboxes_ignore_list,
+                                                gt_labels_list, img_metas)
+            (all_anchors, all_labels, all_label_weights, all_bbox_targets,
+             all_bbox_weights, pos_inds_list, neg_inds_list) = multi_apply(
+                 self._get_target_single, anchor_list, valid_flag_list,
+                 num_level_anchors_list, gt_bboxes_list, gt_bboxes_ignore_list,
+                 gt_labels_list, img_metas, [label_channels] * num_imgs,
+                 [unmap_outputs] * num_imgs, assign_results)
+        else:
+            (all_anchors, all_labels, all_label_weights, all_bbox_targets,
+             all_bbox_weights, pos_inds_list, neg_inds_list) = multi_apply(
+                 self._get_target_single,
+                 anchor_list,
+                 valid_flag_list,
+                 num_level_anchors_list,
+                 gt_bboxes_list,
+                 gt_bboxes_ignore_list,
+                 gt_labels_list,
+                 img_metas,
+                 label_channels=label_channels,
+                 unmap_outputs=unmap_outputs)
         # no valid anchors
         if any([labels is None for labels in all_labels]):
             return None
@@ -527,6 +543,45 @@ class ATSSHead(AnchorHead):
                 bbox_targets_list, bbox_weights_list, num_total_pos,
                 num_total_neg)
 
+    def _assign_batch(self, concat_anchor_list, concat_valid_flag_list,
+                      num_level_anchors, gt_bboxes_list, gt_bboxes_ignore_list,
+                      gt_labels_list, img_metas):
+        """Assign the anchors inside all images at once.
+
+        Same as :meth:`AnchorHead._assign_batch`, except that the number of
+        anchors of each level is also given to ``ATSSAssigner.assign_batch``.
+
+        Args:
+            concat_anchor_list (list[Tensor]): Anchors of each image, which
+                are concatenated into a tensor of shape (num_anchors ,4).
+            concat_valid_flag_list (list[Tensor]): Valid flags of each image,
+                which are concatenated into a tensor of shape (num_anchors,).
+            num_level_anchors (list[int]): Number of anchors of each level.
+            gt_bboxes_list (list[Tensor]): Ground truth bboxes of each image.
+            gt_bboxes_ignore_list (list[Tensor]): Ground truth bboxes to be
+                ignored of each image.
+            gt_labels_list (list[Tensor]): Ground truth labels of each image.
+            img_metas (list[dict]): Meta info of each image.
+
+        Returns:
+            list[:obj:`AssignResult`]: Assign results of the anchors inside
+                each image.
+        """
+        inside_flags = torch.stack([
+            anchor_inside_flags(flat_anchors, valid_flags,
+                                img_meta['img_shape'][:2],
+                                self.train_cfg.allowed_border)
+            for flat_anchors, valid_flags, img_meta in zip(
+                concat_anchor_list, concat_valid_flag_list, img_metas)
+        ])
+        return self.assigner.assign_batch(
+            torch.stack(concat_anchor_list),
+            num_level_anchors,
+            gt_bboxes_list,
+            gt_bboxes_ignore_list,
+            gt_labels_list,
+            valid_flags=inside_flags)
+
     def _get_target_single(self,
                            flat_anchors,
                            valid_flags,
@@ -536,7 +591,8 @@ class ATSSHead(AnchorHead):
                            gt_labels,
                            img_meta,
                            label_channels=1,
-                           unmap_outputs=True):
+                           unmap_outputs=True,
+                           assign_result=None):
         """Compute regression, classification targets for anchors in a single
         image.
 
@@ -557,6 +613,9 @@ class ATSSHead(AnchorHead):
             label_channels (int): Channel of label.
             unmap_outputs (bool): Whether to map outputs back to the original
                 set of anchors.
+            assign_result (:obj:`AssignResult`, optional): Assign result of
+                the anchors inside the image, computed beforehand by the
+                batched assignment. Default: None.
 
         Returns:
             tuple: N is the number of total anchors in the image.
@@ -581,11 +640,13 @@ class ATSSHead(AnchorHead):
         # assign gt and sample anchors
         anchors = flat_anchors[inside_flags, :]
 
-        num_level_anchors_inside = self.get_num_level_anchors_inside(
-            num_level_anchors, inside_flags)
-        assign_result = self.assigner.assign(anchors, num_level_anchors_inside,
-                                             gt_bboxes, gt_bboxes_ignore,
-                                             gt_labels)
+        if assign_result is None:
+            num_level_anchors_inside = self.get_num_level_anchors_inside(
+                num_level_anchors, inside_flags)
+            assign_result = self.assigner.assign(anchors,
+                                                 num_level_anchors_inside,
+                                                 gt_bboxes, gt_bboxes_ignore,
+                                                 gt_labels)
 
         sampling_result = self.sampler.sample(assign_result, anchors,
                                               gt_bboxes)
@@ -8,10 +8,25 @@ from mmcv.ops import CornerPool, batched_nms
 
 from mmdet.core import multi_apply
 from ..builder import HEADS, build_loss
-from ..utils import gaussian_radius, gen_gaussian_target
+from ..utils import (batched_gaussian_radius, batched_gen_gaussian_target,
+                     gaussian_radius, gen_gaussian_target)
 from .base_dense_head import BaseDenseHead
 
 
+def _last_occurrences(inds):
+    """Positions of the last occurrence of each value in ``inds``.
+
+    Writing the values at these positions only gives the same result as
+    writing all of them one by one in order.
+    """
+    num = inds.numel()
+    order = (inds * num + torch.arange(num, device=inds.device)).argsort()
+    sorted_inds = inds[order]
+    is_last = torch.ones_like(sorted_inds, dtype=torch.bool)
+    is_last[:-1] = sorted_inds[1:] != sorted_inds[:-1]
+    return order[is_last]
+
+
 class BiCornerPool(nn.Module):
     """Bidirectional Corner Pooling Module (TopLeft, BottomRight, etc.)
 
@@ -313,7 +328,8 @@ class CornerHead(BaseDenseHead):
                     img_shape,
                     with_corner_emb=False,
                     with_guiding_shift=False,
-                    with_centripetal_shift=False):
+                    with_centripetal_shift=False,
+                    batched=True):
         """Generate corner targets.
 
         Including corner heatmap, corner offset.
@@ -341,6 +357,10 @@ class CornerHead(BaseDenseHead):
                 Default: False.
             with_centripetal_shift (bool): Generate centripetal shift target or
                 not. Default: False.
+            batched (bool): Generate the targets of all the gts of the batch
+                at once with tensor ops, or one gt after another. Both give
+                the same targets, except that the batched corner embedding of
+                each image is a Tensor of shape (num_gt, 2, 2). Default: True.
 
         Returns:
             dict: Ground truth of corner heatmap, corner offset, corner
@@ -365,6 +385,11 @@ class CornerHead(BaseDenseHead):
                 - bottomright_centripetal_shift (Tensor): Ground truth
                   bottom-right corner centripetal shift. Not must have.
         """
+        if batched:
+            return self._get_targets_batched(gt_bboxes, gt_labels, feat_shape,
+                                             img_shape, with_corner_emb,
+                                             with_guiding_shift,
+                                             with_centripetal_shift)
         batch_size, _, height, width = feat_shape
         img_h, img_w = img_shape[:2]
 
@@ -494,6 +519,132 @@ class CornerHead(BaseDenseHead):
 
         return target_result
 
+    def _get_targets_batched(self, gt_bboxes, gt_labels, feat_shape, img_shape,
+                             with_corner_emb, with_guiding_shift,
+                             with_centripetal_shift):
+        """Generate corner targets of all the gts of the batch at once.
+
+        See :meth:`get_targets` for the arguments and the returns.
+        """
+        batch_size, _, height, width = feat_shape
+        img_h, img_w = img_shape[:2]
+
+        width_ratio = float(width / img_w)
+        height_ratio = float(height / img_h)
+
+        gt_tl_heatmap = gt_bboxes[-1].new_zeros(
+            [batch_size, self.num_classes, height, width])
+        gt_br_heatmap = gt_bboxes[-1].new_zeros(
+            [batch_size, self.num_classes, height, width])
+        gt_tl_offset = gt_bboxes[-1].new_zeros([batch_size, 2, height, width])
+        gt_br_offset = gt_bboxes[-1].new_zeros([batch_size, 2, height, width])
+
+        num_gts = [len(labels) for labels in gt_labels]
+        labels = torch.cat(gt_labels).long()
+        img_inds = torch.cat([
+            labels.new_full((num_gt, ), batch_id)
+            for batch_id, num_gt in enumerate(num_gts)
+        ])
+        left, top, right, bottom = torch.cat(gt_bboxes).view(-1, 4).t()
+        center_x = (left + right) / 2.0
+        center_y = (top + bottom) / 2.0
+
+        # Use coords in the feature level to generate ground truth
+        scale_left = left * width_ratio
+        scale_right = right * width_ratio
+        scale_top = top * height_ratio
+        scale_bottom = bottom * height_ratio
+        scale_center_x = center_x * width_ratio
+        scale_center_y = center_y * height_ratio
+
+        # Int coords on feature map/ground truth tensor
+        left_idx = scale_left.clamp(max=width - 1).long()
+        right_idx = scale_right.clamp(max=width - 1).long()
+        top_idx = scale_top.clamp(max=height - 1).long()
+        bottom_idx = scale_bottom.clamp(max=height - 1).long()
+
+        # Generate gaussian heatmap
+        scale_box_width = (scale_right - scale_left).ceil()
+        scale_box_height = (scale_bottom - scale_top).ceil()
+        radii = batched_gaussian_radius(
+            torch.stack([scale_box_height, scale_box_width], dim=1),
+            min_overlap=0.3)
+        radii = radii.long().clamp(min=0)
+        heatmap_inds = img_inds * self.num_classes + labels
+        batched_gen_gaussian_target(
+            gt_tl_heatmap.view(-1, height, width), heatmap_inds,
+            torch.stack([left_idx, top_idx], dim=1), radii)
+        batched_gen_gaussian_target(
+            gt_br_heatmap.view(-1, height, width), heatmap_inds,
+            torch.stack([right_idx, bottom_idx], dim=1), radii)
+
+        # When several gts share a corner, the last one is written as in the
+        # per gt loop
+        tl_keep = _last_occurrences((img_inds * height + top_idx) * width +
+                                    left_idx)
+        br_keep = _last_occurrences((img_inds * height + bottom_idx) * width +
+                                    right_idx)
+        tl_pos = (img_inds[tl_keep], slice(None), top_idx[tl_keep],
+                  left_idx[tl_keep])
+        br_pos = (img_inds[br_keep], slice(None), bottom_idx[br_keep],
+                  right_idx[br_keep])
+
+        # Generate corner offset
+        gt_tl_offset[tl_pos] = torch.stack(
+            [scale_left - left_idx, scale_top - top_idx], dim=1)[tl_keep]
+        gt_br_offset[br_pos] = torch.stack(
+            [scale_right - right_idx, scale_bottom - bottom_idx],
+            dim=1)[br_keep]
+
+        target_result = dict(
+            topleft_heatmap=gt_tl_heatmap,
+            topleft_offset=gt_tl_offset,
+            bottomright_heatmap=gt_br_heatmap,
+            bottomright_offset=gt_br_offset)
+
+        # Generate corner embedding
+        if with_corner_emb:
+            match = torch.stack([top_idx, left_idx, bottom_idx, right_idx],
+                                dim=1).view(-1, 2, 2)
+            target_result.update(corner_embedding=list(match.split(num_gts)))
+        # Generate guiding shift
+        if with_guiding_shift:
+            gt_tl_guiding_shift = gt_bboxes[-1].new_zeros(
+                [batch_size, 2, height, width])
+            gt_br_guiding_shift = gt_bboxes[-1].new_zeros(
+                [batch_size, 2, height, width])
+            gt_tl_guiding_shift[tl_pos] = torch.stack(
+                [scale_center_x - left_idx, scale_center_y - top_idx],
+                dim=1)[tl_keep]
+            gt_br_guiding_shift[br_pos] = torch.stack(
+                [right_idx - scale_center_x, bottom_idx - scale_center_y],
+                dim=1)[br_keep]
+            target_result.update(
+                topleft_guiding_shift=gt_tl_guiding_shift,
+                bottomright_guiding_shift=gt_br_guiding_shift)
+        # Generate centripetal shift, the logs are taken in float64 as the
+        # Python floats of the per gt loop
+        if with_centripetal_shift:
+            gt_tl_centripetal_shift = gt_bboxes[-1].new_zeros(
+                [batch_size, 2, height, width])
+            gt_br_centripetal_shift = gt_bboxes[-1].new_zeros(
+                [batch_size, 2, height, width])
+            tl_shift = torch.stack(
+                [scale_center_x - scale_left, scale_center_y - scale_top],
+                dim=1)[tl_keep]
+            br_shift = torch.stack(
+                [scale_right - scale_center_x, scale_bottom - scale_center_y],
+                dim=1)[br_keep]
+            gt_tl_centripetal_shift[tl_pos] = tl_shift.double().log().to(
+                gt_tl_centripetal_shift.dtype)
+            gt_br_centripetal_shift[br_pos] = br_shift.double().log().to(
+                gt_br_centripetal_shift.dtype)
+            target_result.update(
+                topleft_centripetal_shift=gt_tl_centripetal_shift,
+                bottomright_centripetal_shift=gt_br_centripetal_shift)
+
+        return target_result
+
     def loss(self,
              tl_heats,
              br_heats,
@@ -40,6 +40,76 @@ def levels_to_images(mlvl_tensor):
     return [torch.cat(item, 0) for item in batch_list]
 
 
+def fit_gmm_1d(samples, valid, max_iter=100, tol=1e-3, reg_covar=1e-6):
+    """Fit two-component 1-D Gaussian mixtures to many sets of samples.
+
+    Each row of ``samples`` is fitted independently by EM, all rows at once
+    on their device. The initialization and the stopping criterion follow
+    ``sklearn.mixture.GaussianMixture`` as used by PAA: equal weights, unit
+    variances and means at the min and max of the row. The rows are float64
+    during the fit, as in sklearn.
+
+    Args:
+        samples (Tensor): Samples of shape (N, M), each row is padded to M.
+        valid (Tensor): Bool mask of the non-padded samples, shape (N, M).
+            Each row must have at least 2 valid samples.
+        max_iter (int): Maximum number of EM iterations. Default: 100.
+        tol (float): A row converges when the gain of its mean log-likelihood
+            is below this threshold. Default: 1e-3.
+        reg_covar (float): Value added to the variances. Default: 1e-6.
+
+    Returns:
+        tuple[Tensor]: The component (0 for the one initialized at the min)
+            of each sample and its log-likelihood under the mixture, both of
+            shape (N, M).
+    """
+    x = samples.double()
+    valid = valid.to(x.dtype)
+    num_valid = valid.sum(dim=1)
+    means = torch.stack([
+        x.masked_fill(valid == 0, float('inf')).min(dim=1)[0],
+        x.masked_fill(valid == 0, -float('inf')).max(dim=1)[0]
+    ],
+                        dim=1)
+    weights = torch.full_like(means, 0.5)
+    variances = torch.ones_like(means)
+    x = x.masked_fill(valid == 0, 0)[..., None]
+    eps = 10 * torch.finfo(x.dtype).eps
+
+    def weighted_log_prob(weights, means, variances):
+        precisions_chol = variances.rsqrt()[:, None, :]
+        y = x * precisions_chol - means[:, None, :] * precisions_chol
+        return (-0.5 * (np.log(2 * np.pi) + y.pow(2)) + precisions_chol.log() +
+                weights.log()[:, None, :])
+
+    lower_bound = torch.full_like(num_valid, -float('inf'))
+    converged = torch.zeros_like(num_valid, dtype=torch.bool)
+    for _ in range(max_iter):
+        # E-step
+        log_prob = weighted_log_prob(weights, means, variances)
+        log_prob_norm = log_prob.logsumexp(dim=2)
+        resp = (log_prob - log_prob_norm[..., None]).exp() * valid[..., None]
+        # M-step, converged rows keep their parameters
+        nk = resp.sum(dim=1) + eps
+        new_means = (resp * x).sum(dim=1) / nk
+        new_variances = (resp * (x - new_means[:, None, :]).pow(2)).sum(
+            dim=1) / nk + reg_covar
+        active = ~converged[:, None]
+        weights = torch.where(active, nk / nk.sum(dim=1, keepdim=True),
+                              weights)
+        means = torch.where(active, new_means, means)
+        variances = torch.where(active, new_variances, variances)
+        # convergence of the mean log-likelihood before the M-step
+        new_lower_bound = (log_prob_norm * valid).sum(dim=1) / num_valid
+        converged |= (new_lower_bound - lower_bound).abs() < tol
+        lower_bound = new_lower_bound
+        if converged.all():
+            break
+
+    log_prob = weighted_log_prob(weights, means, variances)
+    return log_prob.argmax(dim=2), log_prob.logsumexp(dim=2)
+
+
 @HEADS.register_module()
 class PAAHead(ATSSHead):
     """Head of PAAAssignment: Probabilistic Anchor Assignment with IoU
@@ -56,12 +126,24 @@ class PAAHead(ATSSHead):
         topk (int): Select topk samples with smallest loss in
             each level.
         score_voting (bool): Whether to use score voting in post-process.
+        gmm_backend (str): Backend fitting the GMMs of the paa reassign
+            process. "sklearn" fits one ``sklearn.mixture.GaussianMixture``
+            per gt on the CPU, "torch" fits the GMMs of all the gts of the
+            batch at once on the current device with :func:`fit_gmm_1d`.
+            Default: "sklearn".
     """
 
-    def __init__(self, *args, topk=9, score_voting=True, **kwargs):
+    def __init__(self,
+                 *args,
+                 topk=9,
+                 score_voting=True,
+                 gmm_backend='sklearn',
+                 **kwargs):
+        assert gmm_backend in ['sklearn', 'torch']
         # topk used in paa reassign process
         self.topk = topk
         self.with_score_voting = score_voting
+        self.gmm_backend = gmm_backend
         super(PAAHead, self).__init__(*args, **kwargs)
 
     @force_fp32(apply_to=('cls_scores', 'bbox_preds', 'iou_preds'))
@@ -127,16 +209,23 @@ class PAAHead(ATSSHead):
                                        bboxes_weight, pos_inds)
 
         with torch.no_grad():
-            labels, label_weights, bbox_weights, num_pos = multi_apply(
-                self.paa_reassign,
-                pos_losses_list,
-                labels,
-                labels_weight,
-                bboxes_weight,
-                pos_inds,
-                pos_gt_index,
-                anchor_list,
-            )
+            if self.gmm_backend == 'torch':
+                labels, label_weights, bbox_weights, num_pos = \
+                    self.paa_reassign_batched(pos_losses_list, labels,
+                                              labels_weight, bboxes_weight,
+                                              pos_inds, pos_gt_index,
+                                              anchor_list)
+            else:
+                labels, label_weights, bbox_weights, num_pos = multi_apply(
+                    self.paa_reassign,
+                    pos_losses_list,
+                    labels,
+                    labels_weight,
+                    bboxes_weight,
+                    pos_inds,
+                    pos_gt_index,
+                    anchor_list,
+                )
             num_pos = sum(num_pos)
         # convert all tensor list to a flatten tensor
         cls_scores = torch.cat(cls_scores, 0).view(-1, cls_scores[0].size(-1))
@@ -332,6 +421,133 @@ class PAAHead(ATSSHead):
         num_pos = len(pos_inds_after_paa)
         return label, label_weight, bbox_weight, num_pos
 
+    def paa_reassign_batched(self, pos_losses_list, labels, label_weights,
+                             bbox_weights, pos_inds_list, pos_gt_inds_list,
+                             anchor_list):
+        """Batched version of :meth:`paa_reassign` for all images.
+
+        The topk candidates of each gt and level are selected for all the gts
+        of all images at once, and their GMMs are fitted together by
+        :func:`fit_gmm_1d`, without moving the losses to the CPU.
+
+        Args:
+            pos_losses_list (list[Tensor]): Losses of all positive samples of
+                each image.
+            labels (list[Tensor]): Classification target of each anchor of
+                each image.
+            label_weights (list[Tensor]): Classification loss weight of each
+                anchor of each image.
+            bbox_weights (list[Tensor]): Bbox weight of each anchor of each
+                image.
+            pos_inds_list (list[Tensor]): Index of all positive samples of
+                each image got from first assign process.
+            pos_gt_inds_list (list[Tensor]): Gt_index of all positive samples
+                of each image got from first assign process.
+            anchor_list (list[list[Tensor]]): Anchors of each scale of each
+                image.
+
+        Returns:
+            tuple: The same as :meth:`paa_reassign` but with a list of each
+                element, one per image.
+        """
+        num_imgs = len(pos_inds_list)
+        num_pos_list = [len(pos_inds) for pos_inds in pos_inds_list]
+        if sum(num_pos_list) == 0:
+            return labels, label_weights, bbox_weights, [0] * num_imgs
+        pos_inds = torch.cat(pos_inds_list)
+        pos_losses = torch.cat(pos_losses_list)
+        img_ids = torch.cat([
+            torch.full_like(pos_gt_inds, i)
+            for i, pos_gt_inds in enumerate(pos_gt_inds_list)
+        ])
+        # give the gts of different images different indices
+        num_gts_max = max(
+            int(pos_gt_inds.max()) + 1 for pos_gt_inds in pos_gt_inds_list
+            if len(pos_gt_inds))
+        gt_ids = img_ids * num_gts_max + torch.cat(pos_gt_inds_list)
+
+        num_level = len(anchor_list[0])
+        level_ends = pos_inds.new_tensor(
+            np.cumsum([item.size(0) for item in anchor_list[0]]))
+        levels = (pos_inds[:, None] >= level_ends).sum(dim=1)
+
+        # select the topk samples with the smallest losses of each gt and
+        # each level as the candidates of the gt
+        level_ranks, _ = self._rank_in_groups(gt_ids * num_level + levels,
+                                              pos_losses)
+        cand_inds = (level_ranks < self.topk).nonzero(as_tuple=False).view(-1)
+        cand_gt_ids = gt_ids[cand_inds]
+        # sort the candidates of each gt by their losses
+        cand_ranks, order = self._rank_in_groups(cand_gt_ids,
+                                                 pos_losses[cand_inds])
+        _, gt_rows, num_cands = torch.unique(
+            cand_gt_ids, return_inverse=True, return_counts=True)
+        gmm_inds = cand_inds.new_full((num_cands.size(0), num_cands.max()), -1)
+        gmm_inds[gt_rows, cand_ranks] = cand_inds
+        # fix gmm need at least two sample
+        gmm_inds = gmm_inds[num_cands >= 2]
+
+        keep = pos_inds.new_zeros(pos_inds.shape, dtype=torch.bool)
+        ignore_inds_after_paa = [[] for _ in range(num_imgs)]
+        if gmm_inds.size(0) > 0:
+            valid = gmm_inds >= 0
+            gmm_inds = gmm_inds.clamp(min=0)
+            gmm_assignment, scores = fit_gmm_1d(pos_losses[gmm_inds], valid)
+            if (type(self).gmm_separation_scheme
+                    is PAAHead.gmm_separation_scheme):
+                # vectorized version of the default separation scheme
+                fgs = (gmm_assignment == 0) & valid
+                pos_thr_ind = scores.masked_fill(~fgs, -float('inf')).argmax(
+                    dim=1, keepdim=True)
+                cols = torch.arange(gmm_inds.size(1), device=gmm_inds.device)
+                keep[gmm_inds[fgs & (cols <= pos_thr_ind)]] = True
+            else:
+                for row, row_valid in enumerate(valid):
+                    row_inds = gmm_inds[row][row_valid]
+                    pos_inds_temp, ignore_inds_temp = \
+                        self.gmm_separation_scheme(
+                            gmm_assignment[row][row_valid],
+                            scores[row][row_valid], pos_inds[row_inds])
+                    img_id = int(img_ids[row_inds[0]])
+                    img_mask = img_ids == img_id
+                    is_pos = pos_inds[img_mask, None] == pos_inds_temp
+                    keep[img_mask] |= is_pos.any(dim=1)
+                    ignore_inds_after_paa[img_id].append(ignore_inds_temp)
+
+        num_pos = []
+        for i, img_keep in enumerate(keep.split(num_pos_list)):
+            reassign_ids = pos_inds_list[i][~img_keep]
+            labels[i][reassign_ids] = self.background_label
+            bbox_weights[i][reassign_ids] = 0
+            for ignore_inds in ignore_inds_after_paa[i]:
+                label_weights[i][ignore_inds.long()] = 0
+            num_pos.append(int(img_keep.sum()))
+        return labels, label_weights, bbox_weights, num_pos
+
+    @staticmethod
+    def _rank_in_groups(groups, values):
+        """Rank the values in ascending order within each group.
+
+        Args:
+            groups (Tensor): Group of each value, non-negative integers.
+            values (Tensor): Values to be ranked.
+
+        Returns:
+            tuple[Tensor]: The rank of each value in its group, and the
+                indices sorting the values by group and then by value.
+        """
+        num = values.size(0)
+        order = values.argsort()
+        # a stable sort of the groups keeps the values sorted in each group
+        order = order[(groups[order] * num +
+                       torch.arange(num, device=values.device)).argsort()]
+        sorted_groups = groups[order]
+        _, counts = torch.unique_consecutive(sorted_groups, return_counts=True)
+        starts = (counts.cumsum(0) - counts).repeat_interleave(counts)
+        ranks = torch.empty_like(order)
+        ranks[order] = torch.arange(num, device=values.device) - starts
+        return ranks, order
+
     def gmm_separation_scheme(self, gmm_assignment, scores, pos_inds_gmm):
         """A general separation scheme for gmm model.
 
@@ -557,6 +773,10 @@ class PAAHead(ATSSHead):
         """Implementation of score voting method works on each remaining boxes
         after NMS procedure.
 
+        The votes of all the remaining boxes are computed at once from the IoU
+        matrix between them and all the boxes, masked by the scores of their
+        classes.
+
         Args:
             det_bboxes (Tensor): Remaining boxes after NMS procedure,
                 with shape (k, 5), each dimension means
@@ -580,41 +800,22 @@ class PAAHead(ATSSHead):
                 - det_labels_voted (Tensor): Label of remaining bboxes
                     after voting, with shape (num_anchors,).
         """
-        candidate_mask = mlvl_nms_scores > score_thr
-        candidate_mask_nozeros = candidate_mask.nonzero()
-        candidate_inds = candidate_mask_nozeros[:, 0]
-        candidate_labels = candidate_mask_nozeros[:, 1]
-        candidate_bboxes = mlvl_bboxes[candidate_inds]
-        candidate_scores = mlvl_nms_scores[candidate_mask]
-        det_bboxes_voted = []
-        det_labels_voted = []
-        for cls in range(self.cls_out_channels):
-            candidate_cls_mask = candidate_labels == cls
-            if not candidate_cls_mask.any():
-                continue
-            candidate_cls_scores = candidate_scores[candidate_cls_mask]
-            candidate_cls_bboxes = candidate_bboxes[candidate_cls_mask]
-            det_cls_mask = det_labels == cls
-            det_cls_bboxes = det_bboxes[det_cls_mask].view(
-                -1, det_bboxes.size(-1))
-            det_candidate_ious = bbox_overlaps(det_cls_bboxes[:, :4],
-                                               candidate_cls_bboxes)
-            for det_ind in range(len(det_cls_bboxes)):
-                single_det_ious = det_candidate_ious[det_ind]
-                pos_ious_mask = single_det_ious > 0.01
-                pos_ious = single_det_ious[pos_ious_mask]
-                pos_bboxes = candidate_cls_bboxes[pos_ious_mask]
-                pos_scores = candidate_cls_scores[pos_ious_mask]
-                pis = (torch.exp(-(1 - pos_ious)**2 / 0.025) *
-                       pos_scores)[:, None]
-                voted_box = torch.sum(
-                    pis * pos_bboxes, dim=0) / torch.sum(
-                        pis, dim=0)
-                voted_score = det_cls_bboxes[det_ind][-1:][None, :]
-                det_bboxes_voted.append(
-                    torch.cat((voted_box[None, :], voted_score), dim=1))
-                det_labels_voted.append(cls)
-
-        det_bboxes_voted = torch.cat(det_bboxes_voted, dim=0)
-        det_labels_voted = det_labels.new_tensor(det_labels_voted)
+        # the voted boxes are grouped by class, in the order of the classes
+        num_dets = det_labels.size(0)
+        order = (det_labels * num_dets +
+                 torch.arange(num_dets, device=det_labels.device)).argsort()
+        det_bboxes = det_bboxes[order]
+        det_labels = det_labels[order]
+        # the boxes of all classes are shared, so the ious are computed once
+        # and each det only votes with the boxes whose score of its class is
+        # above the threshold
+        det_candidate_ious = bbox_overlaps(det_bboxes[:, :4], mlvl_bboxes)
+        candidate_scores = mlvl_nms_scores[:, det_labels].t()
+        pos_ious_mask = (det_candidate_ious > 0.01) & (
+            candidate_scores > score_thr)
+        pis = torch.exp(-(1 - det_candidate_ious)**2 / 0.025) * (
+            candidate_scores * pos_ious_mask)
+        voted_bboxes = pis.mm(mlvl_bboxes) / pis.sum(dim=1, keepdim=True)
+        det_bboxes_voted = torch.cat((voted_bboxes, det_bboxes[:, -1:]), dim=1)
+        det_labels_voted = det_labels
         return det_bboxes_voted, det_labels_voted
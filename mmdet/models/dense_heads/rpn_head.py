@@ -4,6 +4,7 @@ import torch.nn.functional as F
 from mmcv.cnn import normal_init
 from mmcv.ops import batched_nms
 
+from mmdet.core import multi_image_nms
 from ..builder import HEADS
 from .anchor_head import AnchorHead
 from .rpn_test_mixin import RPNTestMixin
@@ -166,3 +167,77 @@ class RPNHead(RPNTestMixin, AnchorHead):
         nms_cfg = dict(type='nms', iou_threshold=cfg.nms_thr)
         dets, keep = batched_nms(proposals, scores, ids, nms_cfg)
         return dets[:cfg.nms_post]
+
+    def _get_bboxes_batched(self,
+                            cls_scores,
+                            bbox_preds,
+                            mlvl_anchors,
+                            img_metas,
+                            cfg,
+                            rescale=False):
+        """Transform outputs of all the images into proposals at once.
+
+        This is the batched counterpart of :meth:`_get_bboxes_single`, see
+        :meth:`AnchorHead._get_bboxes_batched`.
+
+        Args:
+            cls_scores (list[Tensor]): Box scores for each scale level
+                Has shape (N, num_anchors * num_classes, H, W).
+            bbox_preds (list[Tensor]): Box energies / deltas for each scale
+                level with shape (N, num_anchors * 4, H, W).
+            mlvl_anchors (list[Tensor]): Box reference for each scale level
+                with shape (num_total_anchors, 4).
+            img_metas (list[dict]): Meta information of each image.
+            cfg (mmcv.Config): Test / postprocessing configuration.
+            rescale (bool): If True, return boxes in original image space.
+
+        Returns:
+            list[Tensor]: Proposals of shape (n, 5) of each image.
+        """
+        num_imgs = len(img_metas)
+        level_ids = []
+        mlvl_scores = []
+        mlvl_proposals = []
+        for idx in range(len(cls_scores)):
+            rpn_cls_score = cls_scores[idx]
+            rpn_bbox_pred = bbox_preds[idx]
+            assert rpn_cls_score.size()[-2:] == rpn_bbox_pred.size()[-2:]
+            rpn_cls_score = rpn_cls_score.permute(0, 2, 3, 1)
+            if self.use_sigmoid_cls:
+                scores = rpn_cls_score.reshape(num_imgs, -1).sigmoid()
+            else:
+                rpn_cls_score = rpn_cls_score.reshape(num_imgs, -1, 2)
+                scores = rpn_cls_score.softmax(dim=-1)[..., 1]
+            rpn_bbox_pred = rpn_bbox_pred.permute(0, 2, 3,
+                                                  1).reshape(num_imgs, -1, 4)
+            anchors = mlvl_anchors[idx].expand(num_imgs, -1, -1)
+            if cfg.nms_pre > 0 and scores.shape[1] > cfg.nms_pre:
+                scores, topk_inds = scores.topk(cfg.nms_pre, dim=1)
+                img_inds = torch.arange(
+                    num_imgs, device=topk_inds.device)[:, None]
+                rpn_bbox_pred = rpn_bbox_pred[img_inds, topk_inds]
+                anchors = anchors[img_inds, topk_inds]
+            mlvl_scores.append(scores)
+            mlvl_proposals.append(
+                self._decode_batched(anchors, rpn_bbox_pred, img_metas))
+            level_ids.append(
+                scores.new_full(scores.shape, idx, dtype=torch.long))
+
+        scores = torch.cat(mlvl_scores, dim=1)
+        proposals = torch.cat(mlvl_proposals, dim=1)
+        ids = torch.cat(level_ids, dim=1)
+
+        if cfg.min_bbox_size > 0:
+            w = proposals[..., 2] - proposals[..., 0]
+            h = proposals[..., 3] - proposals[..., 1]
+            valid_mask = (w >= cfg.min_bbox_size) & (h >= cfg.min_bbox_size)
+        else:
+            valid_mask = scores.new_ones(scores.shape, dtype=torch.bool)
+        img_inds, box_inds = valid_mask.nonzero(as_tuple=True)
+
+        # TODO: remove the hard coded nms type
+        nms_cfg = dict(type='nms', iou_threshold=cfg.nms_thr)
+        results = multi_image_nms(proposals[img_inds, box_inds],
+                                  scores[img_inds, box_inds], img_inds,
+                                  ids[img_inds, box_inds], num_imgs, nms_cfg)
+        return [dets[:cfg.nms_post] for dets, _ in results]
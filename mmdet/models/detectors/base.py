@@ -8,7 +8,7 @@ import torch.distributed as dist
 import torch.nn as nn
 from mmcv.utils import print_log
 
-from mmdet.core import auto_fp16
+from mmdet.core import CroppedMask, auto_fp16
 from mmdet.utils import get_root_logger
 
 
@@ -316,6 +316,14 @@ class BaseDetector(nn.Module, metaclass=ABCMeta):
                 i = int(i)
                 color_mask = color_masks[labels[i]]
                 mask = segms[i]
+                if isinstance(mask, CroppedMask):
+                    # only draw the region of the crop
+                    x, y = mask.offset
+                    h, w = mask.mask.shape
+                    region = img[y:y + h, x:x + w]
+                    mask = mask.mask.astype(bool)
+                    region[mask] = region[mask] * 0.5 + color_mask * 0.5
+                    continue
                 img[mask] = img[mask] * 0.5 + color_mask * 0.5
         # if out_file specified, do not show image in window
         if out_file is not None:
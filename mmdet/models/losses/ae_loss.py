@@ -25,25 +25,23 @@ def ae_loss_per_image(tl_preds, br_preds, match):
     Args:
         tl_preds (tensor): Embedding feature map of left-top corner.
         br_preds (tensor): Embedding feature map of bottim-right corner.
-        match (list): Downsampled coordinates pair of each ground truth box.
+        match (list | Tensor): Downsampled coordinates pair of each ground
+            truth box, as [[tl_y, tl_x], [br_y, br_x]] lists or a Tensor of
+            shape (num_gt, 2, 2).
     """
 
-    tl_list, br_list, me_list = [], [], []
     if len(match) == 0:  # no object in image
         pull_loss = tl_preds.sum() * 0.
         push_loss = tl_preds.sum() * 0.
     else:
-        for m in match:
-            [tl_y, tl_x], [br_y, br_x] = m
-            tl_e = tl_preds[:, tl_y, tl_x].view(-1, 1)
-            br_e = br_preds[:, br_y, br_x].view(-1, 1)
-            tl_list.append(tl_e)
-            br_list.append(br_e)
-            me_list.append((tl_e + br_e) / 2.0)
-
-        tl_list = torch.cat(tl_list)
-        br_list = torch.cat(br_list)
-        me_list = torch.cat(me_list)
+        match = torch.as_tensor(
+            match, dtype=torch.long, device=tl_preds.device)
+        (tl_y, tl_x), (br_y, br_x) = match.permute(1, 2, 0)
+        # gather the embeddings of all the corners at once, the channels of
+        # each object are consecutive
+        tl_list = tl_preds[:, tl_y, tl_x].t().reshape(-1, 1)
+        br_list = br_preds[:, br_y, br_x].t().reshape(-1, 1)
+        me_list = (tl_list + br_list) / 2.0
 
         assert tl_list.size() == br_list.size()
 
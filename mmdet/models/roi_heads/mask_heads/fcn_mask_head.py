@@ -7,7 +7,7 @@ from mmcv.ops import Conv2d
 from mmcv.ops.carafe import CARAFEPack
 from torch.nn.modules.utils import _pair
 
-from mmdet.core import auto_fp16, force_fp32, mask_target
+from mmdet.core import CroppedMask, auto_fp16, force_fp32, mask_target
 from mmdet.models.builder import HEADS, build_loss
 
 BYTES_PER_FLOAT = 4
@@ -160,7 +160,10 @@ class FCNMaskHead(nn.Module):
             det_bboxes (Tensor): shape (n, 4/5)
             det_labels (Tensor): shape (n, )
             img_shape (Tensor): shape (3, )
-            rcnn_test_cfg (dict): rcnn testing config
+            rcnn_test_cfg (dict): rcnn testing config. If ``crop_masks`` is
+                True in it, the masks are pasted only in the region of their
+                boxes and returned as :obj:`CroppedMask`, which saves the
+                full image bitmap of every instance.
             ori_shape: original image size
 
         Returns:
@@ -213,6 +216,12 @@ class FCNMaskHead(nn.Module):
         chunks = torch.chunk(torch.arange(N, device=device), num_chunks)
 
         threshold = rcnn_test_cfg.mask_thr_binary
+        if rcnn_test_cfg.get('crop_masks', False):
+            if not self.class_agnostic:
+                mask_pred = mask_pred[range(N), labels][:, None]
+            return self._get_cropped_masks(mask_pred, bboxes, labels, img_h,
+                                           img_w, threshold)
+
         im_mask = torch.zeros(
             N,
             img_h,
@@ -243,6 +252,64 @@ class FCNMaskHead(nn.Module):
             cls_segms[labels[i]].append(im_mask[i].cpu().numpy())
         return cls_segms
 
+    def _get_cropped_masks(self, mask_pred, bboxes, labels, img_h, img_w,
+                           threshold):
+        """Paste masks in the regions of their boxes.
+
+        Args:
+            mask_pred (Tensor): shape (n, 1, h, w).
+            bboxes (Tensor): shape (n, 4), in the image space.
+            labels (Tensor): shape (n, )
+            img_h (int): Height of the image to be pasted.
+            img_w (int): Width of the image to be pasted.
+            threshold (float): Threshold to binarize the masks. If negative,
+                the masks are scaled to uint8 instead.
+
+        Returns:
+            list[list[:obj:`CroppedMask`]]: Masks of each class.
+        """
+        cls_segms = [[] for _ in range(self.num_classes)]
+        N = len(mask_pred)
+        if N == 0:
+            return cls_segms
+        device = mask_pred.device
+        # same margins as _do_paste_mask with skip_empty=True
+        x0_int = torch.clamp(bboxes[:, 0].floor() - 1, min=0).long()
+        y0_int = torch.clamp(bboxes[:, 1].floor() - 1, min=0).long()
+        x1_int = torch.clamp(bboxes[:, 2].ceil() + 1, max=img_w).long()
+        y1_int = torch.clamp(bboxes[:, 3].ceil() + 1, max=img_h).long()
+        x0_int = torch.min(x0_int, x1_int)
+        y0_int = torch.min(y0_int, y1_int)
+        offsets = torch.stack([x0_int, y0_int], dim=1).tolist()
+        widths = (x1_int - x0_int).tolist()
+        heights = (y1_int - y0_int).tolist()
+
+        # every chunk is pasted in a canvas as large as its largest box
+        if device.type == 'cpu':
+            num_chunks = N
+        else:
+            num_chunks = int(
+                np.ceil(N * max(heights) * max(widths) * BYTES_PER_FLOAT /
+                        GPU_MEM_LIMIT))
+        for inds in torch.chunk(
+                torch.arange(N, device=device), max(num_chunks, 1)):
+            inds_list = inds.tolist()
+            masks_chunk = _do_paste_mask_cropped(
+                mask_pred[inds], bboxes[inds], x0_int[inds], y0_int[inds],
+                max(heights[i] for i in inds_list),
+                max(widths[i] for i in inds_list))
+            if threshold >= 0:
+                masks_chunk = masks_chunk >= threshold
+            else:
+                # for visualization and debugging
+                masks_chunk = (masks_chunk * 255).to(dtype=torch.uint8)
+            masks_chunk = masks_chunk.cpu().numpy()
+            for i, mask in zip(inds_list, masks_chunk):
+                cls_segms[labels[i]].append(
+                    CroppedMask(mask[:heights[i], :widths[i]].copy(),
+                                offsets[i], (img_h, img_w)))
+        return cls_segms
+
 
 def _do_paste_mask(masks, boxes, img_h, img_w, skip_empty=True):
     """Paste instance masks acoording to boxes.
@@ -313,3 +380,44 @@ def _do_paste_mask(masks, boxes, img_h, img_w, skip_empty=True):
         return img_masks[:, 0], (slice(y0_int, y1_int), slice(x0_int, x1_int))
     else:
         return img_masks[:, 0], ()
+
+
+def _do_paste_mask_cropped(masks, boxes, x0_int, y0_int, crop_h, crop_w):
+    """Paste instance masks in crops starting at their own offsets.
+
+    Unlike :func:`_do_paste_mask`, where all the masks are pasted in a region
+    shared by the whole chunk, every mask is sampled in its own region, so
+    the output only needs to be as large as the largest box.
+
+    Args:
+        masks (Tensor): N, 1, H, W
+        boxes (Tensor): N, 4
+        x0_int (Tensor): N, left offsets of the crops in the image.
+        y0_int (Tensor): N, top offsets of the crops in the image.
+        crop_h (int): Height of the crops.
+        crop_w (int): Width of the crops.
+
+    Returns:
+        Tensor: The pasted crops of shape (N, crop_h, crop_w).
+    """
+    device = masks.device
+    x0, y0, x1, y1 = torch.split(boxes, 1, dim=1)  # each is Nx1
+    N = masks.shape[0]
+
+    img_y = y0_int[:, None].to(torch.float32) + torch.arange(
+        crop_h, device=device, dtype=torch.float32) + 0.5
+    img_x = x0_int[:, None].to(torch.float32) + torch.arange(
+        crop_w, device=device, dtype=torch.float32) + 0.5
+    img_y = (img_y - y0) / (y1 - y0) * 2 - 1
+    img_x = (img_x - x0) / (x1 - x0) * 2 - 1
+    # img_x, img_y have shapes (N, w), (N, h)
+    img_x[torch.isinf(img_x)] = 0
+    img_y[torch.isinf(img_y)] = 0
+
+    gx = img_x[:, None, :].expand(N, crop_h, crop_w)
+    gy = img_y[:, :, None].expand(N, crop_h, crop_w)
+    grid = torch.stack([gx, gy], dim=3)
+
+    img_masks = F.grid_sample(
+        masks.to(dtype=torch.float32), grid, align_corners=False)
+    return img_masks[:, 0]
@@ -1,4 +1,9 @@
-from .gaussian_target import gaussian_radius, gen_gaussian_target
+from .gaussian_target import (batched_gaussian_radius,
+                              batched_gen_gaussian_target, gaussian_radius,
+                              gen_gaussian_target)
 from .res_layer import ResLayer
 
-__all__ = ['ResLayer', 'gaussian_radius', 'gen_gaussian_target']
+__all__ = [
+    'ResLayer', 'gaussian_radius', 'gen_gaussian_target',
+    'batched_gaussian_radius', 'batched_gen_gaussian_target'
+]
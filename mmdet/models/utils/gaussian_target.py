@@ -183,3 +183,100 @@ def gaussian_radius(det_size, min_overlap):
     sq3 = sqrt(b3**2 - 4 * a3 * c3)
     r3 = (b3 + sq3) / (2 * a3)
     return min(r1, r2, r3)
+
+
+def batched_gaussian_radius(det_sizes, min_overlap):
+    """Generate 2D gaussian radii of many objects at once.
+
+    This is the vectorized version of :func:`gaussian_radius`, the radii are
+    computed in float64 as the Python floats of :func:`gaussian_radius`.
+
+    Args:
+        det_sizes (Tensor): Shapes (height, width) of the objects, with shape
+            (n, 2).
+        min_overlap (float): Min IoU with ground truth for boxes generated by
+            keypoints inside the gaussian kernel.
+
+    Returns:
+        radii (Tensor): Radii of the gaussian kernels, with shape (n, ).
+    """
+    height, width = det_sizes.double().unbind(dim=-1)
+
+    a1 = 1
+    b1 = (height + width)
+    c1 = width * height * (1 - min_overlap) / (1 + min_overlap)
+    sq1 = (b1**2 - 4 * a1 * c1).sqrt()
+    r1 = (b1 - sq1) / (2 * a1)
+
+    a2 = 4
+    b2 = 2 * (height + width)
+    c2 = (1 - min_overlap) * width * height
+    sq2 = (b2**2 - 4 * a2 * c2).sqrt()
+    r2 = (b2 - sq2) / (2 * a2)
+
+    a3 = 4 * min_overlap
+    b3 = -2 * min_overlap * (height + width)
+    c3 = (min_overlap - 1) * width * height
+    sq3 = (b3**2 - 4 * a3 * c3).sqrt()
+    r3 = (b3 + sq3) / (2 * a3)
+    return torch.min(torch.min(r1, r2), r3)
+
+
+def batched_gen_gaussian_target(heatmap, inds, centers, radii, k=1):
+    """Generate the 2D gaussian heatmaps of many objects at once.
+
+    This is the vectorized version of :func:`gen_gaussian_target`. The
+    gaussian kernels of all the objects are laid out on a common window of
+    the largest radius and max-scattered into the heatmaps, so that the
+    result does not depend on the order of the objects.
+
+    Args:
+        heatmap (Tensor): Input heatmaps of shape (num_maps, H, W), it is
+            updated in place.
+        inds (Tensor): Index of the heatmap of each object, shape (n, ).
+        centers (Tensor): Int coords (x, y) of the gaussian kernel's center
+            of each object, shape (n, 2).
+        radii (Tensor): Int radius of the gaussian kernel of each object,
+            shape (n, ).
+        k (int): Coefficient of gaussian kernel. Default: 1.
+
+    Returns:
+        out_heatmap (Tensor): Updated heatmaps covered by gaussian kernels.
+    """
+    if radii.numel() == 0:
+        return heatmap
+    height, width = heatmap.shape[-2:]
+    max_radius = int(radii.max())
+    offsets = torch.arange(
+        -max_radius, max_radius + 1, dtype=heatmap.dtype, device=radii.device)
+    x = offsets.view(1, 1, -1)
+    y = offsets.view(1, -1, 1)
+    # sigma is a Python float in gen_gaussian_target, hence the float64
+    sigma = (2 * radii + 1).double() / 6
+    two_sigma_sq = (2 * sigma * sigma).to(heatmap.dtype).view(-1, 1, 1)
+    gaussian_kernels = (-(x * x + y * y) / two_sigma_sq).exp()
+
+    radii = radii.view(-1, 1, 1)
+    x, y = x.long(), y.long()
+    xs = centers[:, 0].view(-1, 1, 1) + x
+    ys = centers[:, 1].view(-1, 1, 1) + y
+    valid = (x.abs() <= radii) & (y.abs() <= radii)
+    valid &= (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    # the same threshold as gaussian2D, the max of each kernel is 1
+    valid &= gaussian_kernels >= torch.finfo(heatmap.dtype).eps
+    flat_inds = ((inds.view(-1, 1, 1) * height + ys) * width + xs)[valid]
+    values = gaussian_kernels[valid] * k
+
+    # keep the max value of each position: sort the values by position and
+    # then by value, and take the last one of each position
+    _, value_ranks = torch.unique(values, return_inverse=True)
+    order = (flat_inds * (int(value_ranks.max()) + 1) + value_ranks).argsort()
+    flat_inds = flat_inds[order]
+    values = values[order]
+    is_last = torch.ones_like(flat_inds, dtype=torch.bool)
+    is_last[:-1] = flat_inds[1:] != flat_inds[:-1]
+    flat_inds = flat_inds[is_last]
+    flat_heatmap = heatmap.view(-1)
+    flat_heatmap[flat_inds] = torch.max(flat_heatmap[flat_inds],
+                                        values[is_last])
+    return heatmap
@@ -10,7 +10,11 @@ from mmcv.image import tensor2imgs
 from mmcv.runner import get_dist_info
 
 
-def single_gpu_test(model, data_loader, show=False, out_dir=None):
+def single_gpu_test(model,
+                    data_loader,
+                    show=False,
+                    out_dir=None,
+                    accumulate=False):
     """Test with single GPU.
 
     Args:
@@ -19,19 +23,30 @@ def single_gpu_test(model, data_loader, show=False, out_dir=None):
         show (bool): Whether show results during infernece. Default: False.
         out_dir (str, optional): If specified, the results will be dumped
         into the directory to save output results.
+        accumulate (bool): Whether to compare each prediction with its ground
+            truth right away and only keep an :obj:`IoUAccumulator` instead
+            of all prediction maps. Default: False.
 
     Returns:
-        list: The prediction results.
+        list | :obj:`IoUAccumulator`: The prediction results, or the
+            accumulator updated with them if ``accumulate`` is True.
     """
 
     model.eval()
     results = []
     dataset = data_loader.dataset
+    if accumulate:
+        accumulator = dataset.build_accumulator()
+        sample_indices = iter(data_loader.sampler)
     prog_bar = mmcv.ProgressBar(len(dataset))
     for i, data in enumerate(data_loader):
         with torch.no_grad():
             result = model(return_loss=False, **data)
-        if isinstance(result, list):
+        if accumulate:
+            for seg_pred in _as_list(result):
+                idx = next(sample_indices)
+                accumulator.update(seg_pred, dataset.get_gt_seg_map(idx))
+        elif isinstance(result, list):
             results.extend(result)
         else:
             results.append(result)
@@ -64,10 +79,16 @@ def single_gpu_test(model, data_loader, show=False, out_dir=None):
         batch_size = data['img'][0].size(0)
         for _ in range(batch_size):
             prog_bar.update()
+    if accumulate:
+        return accumulator
     return results
 
 
-def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
+def multi_gpu_test(model,
+                   data_loader,
+                   tmpdir=None,
+                   gpu_collect=False,
+                   accumulate=False):
     """Test model with multiple gpus.
 
     This method tests model with multiple gpus and collects the results
@@ -82,21 +103,38 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
         tmpdir (str): Path of directory to save the temporary results from
             different gpus under cpu mode.
         gpu_collect (bool): Option to use either gpu or cpu to collect results.
+        accumulate (bool): Whether to update an :obj:`IoUAccumulator` on each
+            rank instead of keeping the prediction maps. Only the confusion
+            matrices are reduced across ranks in this mode, ``tmpdir`` and
+            ``gpu_collect`` are not used. Default: False.
 
     Returns:
-        list: The prediction results.
+        list | :obj:`IoUAccumulator`: The prediction results, or the reduced
+            accumulator if ``accumulate`` is True.
     """
 
     model.eval()
     results = []
     dataset = data_loader.dataset
     rank, world_size = get_dist_info()
+    if accumulate:
+        accumulator = dataset.build_accumulator()
+        sample_indices = iter(data_loader.sampler)
+        num_samples = 0
     if rank == 0:
         prog_bar = mmcv.ProgressBar(len(dataset))
     for i, data in enumerate(data_loader):
         with torch.no_grad():
             result = model(return_loss=False, rescale=True, **data)
-        if isinstance(result, list):
+        if accumulate:
+            for seg_pred in _as_list(result):
+                idx = next(sample_indices)
+                # the sampler pads some samples to make the dataset evenly
+                # divisible, skip them as collect_results_* would do
+                if num_samples * world_size + rank < len(dataset):
+                    accumulator.update(seg_pred, dataset.get_gt_seg_map(idx))
+                num_samples += 1
+        elif isinstance(result, list):
             results.extend(result)
         else:
             results.append(result)
@@ -107,6 +145,9 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
                 prog_bar.update()
 
     # collect results from all ranks
+    if accumulate:
+        accumulator.all_reduce()
+        return accumulator
     if gpu_collect:
         results = collect_results_gpu(results, len(dataset))
     else:
@@ -114,6 +155,11 @@ def multi_gpu_test(model, data_loader, tmpdir=None, gpu_collect=False):
     return results
 
 
+def _as_list(result):
+    """Wrap a single result into a list."""
+    return result if isinstance(result, list) else [result]
+
+
 def collect_results_cpu(result_part, size, tmpdir=None):
     """Collect results with CPU."""
     rank, world_size = get_dist_info()
@@ -10,14 +10,18 @@ class EvalHook(Hook):
     Attributes:
         dataloader (DataLoader): A PyTorch dataloader.
         interval (int): Evaluation interval (by epochs). Default: 1.
+        accumulate (bool): Whether to accumulate the metrics during testing
+            instead of keeping all predictions. Default: False.
     """
 
-    def __init__(self, dataloader, interval=1, **eval_kwargs):
+    def __init__(self, dataloader, interval=1, accumulate=False,
+                 **eval_kwargs):
         if not isinstance(dataloader, DataLoader):
             raise TypeError('dataloader must be a pytorch DataLoader, but got '
                             f'{type(dataloader)}')
         self.dataloader = dataloader
         self.interval = interval
+        self.accumulate = accumulate
         self.eval_kwargs = eval_kwargs
 
     def after_train_iter(self, runner):
@@ -26,7 +30,11 @@ class EvalHook(Hook):
             return
         from mmseg.apis import single_gpu_test
         runner.log_buffer.clear()
-        results = single_gpu_test(runner.model, self.dataloader, show=False)
+        results = single_gpu_test(
+            runner.model,
+            self.dataloader,
+            show=False,
+            accumulate=self.accumulate)
         self.evaluate(runner, results)
 
     def evaluate(self, runner, results):
@@ -48,12 +56,16 @@ class DistEvalHook(EvalHook):
             processes. Default: None.
         gpu_collect (bool): Whether to use gpu or cpu to collect results.
             Default: False.
+        accumulate (bool): Whether to accumulate the metrics on each process
+            and only reduce them instead of collecting all predictions.
+            Default: False.
     """
 
     def __init__(self,
                  dataloader,
                  interval=1,
                  gpu_collect=False,
+                 accumulate=False,
                  **eval_kwargs):
         if not isinstance(dataloader, DataLoader):
             raise TypeError(
@@ -62,6 +74,7 @@ class DistEvalHook(EvalHook):
         self.dataloader = dataloader
         self.interval = interval
         self.gpu_collect = gpu_collect
+        self.accumulate = accumulate
         self.eval_kwargs = eval_kwargs
 
     def after_train_iter(self, runner):
@@ -74,7 +87,8 @@ class DistEvalHook(EvalHook):
             runner.model,
             self.dataloader,
             tmpdir=osp.join(runner.work_dir, '.eval_hook'),
-            gpu_collect=self.gpu_collect)
+            gpu_collect=self.gpu_collect,
+            accumulate=self.accumulate)
         if runner.rank == 0:
             print('\n')
             self.evaluate(runner, results)
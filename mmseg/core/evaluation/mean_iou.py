@@ -1,4 +1,6 @@
 import numpy as np
+import torch
+import torch.distributed as dist
 
 
 def intersect_and_union(pred_label, label, num_classes, ignore_index):
@@ -68,3 +70,91 @@ def mean_iou(results, gt_seg_maps, num_classes, ignore_index):
     iou = total_area_intersect / total_area_union
 
     return all_acc, acc, iou
+
+
+class IoUAccumulator(object):
+    """Incrementally accumulate a confusion matrix for IoU evaluation.
+
+    Unlike :func:`mean_iou`, which needs the prediction and ground truth maps
+    of all images at once, the accumulator is updated image by image and only
+    keeps a ``(num_classes + 1)^2`` matrix, so predictions do not have to be
+    retained. Each update uses a single ``np.bincount`` over
+    ``(num_classes + 1) * label + pred``. The labels and predictions outside
+    ``[0, num_classes)`` are counted in an extra last row and column: as in
+    :func:`mean_iou`, they belong to no class, but the prediction (or label)
+    of their pixels still does. The metrics are the same as :func:`mean_iou`,
+    except for the values equal to ``num_classes``, which ``np.histogram``
+    counts in the last class in :func:`mean_iou`.
+
+    Args:
+        num_classes (int): Number of categories.
+        ignore_index (int): Index that will be ignored in evaluation.
+
+    Example:
+        >>> accumulator = IoUAccumulator(num_classes=3, ignore_index=255)
+        >>> accumulator.update(np.array([[0, 1], [2, 2]]),
+        >>>                    np.array([[0, 1], [1, 255]]))
+        >>> all_acc, acc, iou = accumulator.evaluate()
+        >>> assert np.allclose(iou, [1, 0.5, 0])
+    """
+
+    def __init__(self, num_classes, ignore_index):
+        self.num_classes = num_classes
+        self.ignore_index = ignore_index
+        # rows are ground truth labels and columns are predicted labels, the
+        # last row and column are the labels outside [0, num_classes)
+        self.confusion_matrix = np.zeros((num_classes + 1, num_classes + 1),
+                                         dtype=np.int64)
+
+    def update(self, pred_label, label):
+        """Add the statistics of one image.
+
+        Args:
+            pred_label (ndarray): Prediction segmentation map.
+            label (ndarray): Ground truth segmentation map.
+        """
+        num_classes = self.num_classes
+        mask = (label != self.ignore_index)
+        pred_label = pred_label[mask].astype(np.int64)
+        label = label[mask].astype(np.int64)
+        label[(label < 0) | (label >= num_classes)] = num_classes
+        pred_label[(pred_label < 0)
+                   | (pred_label >= num_classes)] = num_classes
+        self.confusion_matrix += np.bincount(
+            (num_classes + 1) * label + pred_label,
+            minlength=(num_classes + 1)**2).reshape(num_classes + 1,
+                                                    num_classes + 1)
+
+    def all_reduce(self):
+        """Sum the confusion matrices of all ranks.
+
+        Only a ``(num_classes + 1)^2`` tensor is communicated. Nothing
+        is done if the default process group is not initialized.
+        """
+        if not (dist.is_available() and dist.is_initialized()):
+            return
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        matrix = torch.from_numpy(self.confusion_matrix).to(device)
+        dist.all_reduce(matrix)
+        self.confusion_matrix = matrix.cpu().numpy()
+
+    def evaluate(self):
+        """Calculate metrics from the accumulated confusion matrix.
+
+        Returns:
+            float: Overall accuracy on all images.
+            ndarray: Per category accuracy, shape (num_classes, )
+            ndarray: Per category IoU, shape (num_classes, )
+        """
+        num_classes = self.num_classes
+        confusion_matrix = self.confusion_matrix.astype(np.float64)
+        total_area_intersect = np.diag(confusion_matrix)[:num_classes]
+        total_area_label = confusion_matrix[:num_classes].sum(axis=1)
+        total_area_pred_label = confusion_matrix[:, :num_classes].sum(axis=0)
+        total_area_union = (
+            total_area_pred_label + total_area_label - total_area_intersect)
+        all_acc = total_area_intersect.sum() / total_area_label.sum()
+        acc = total_area_intersect / total_area_label
+        iou = total_area_intersect / total_area_union
+
+        return all_acc, acc, iou
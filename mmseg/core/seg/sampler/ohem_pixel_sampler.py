@@ -37,40 +37,86 @@ class OHEMPixelSampler(BasePixelSampler):
         Returns:
             torch.Tensor: segmentation weight, shape (N, H, W)
         """
+        scores = self.pixel_scores(seg_logit, seg_label)
+        return self.sample_from_scores(scores, seg_label)
+
+    def pixel_scores(self, seg_logit, seg_label):
+        """Compute the scores the pixels are sampled from.
+
+        The scores of each pixel only depend on its logits, so they can be
+        computed on chunks of pixels and concatenated.
+
+        Args:
+            seg_logit (torch.Tensor): segmentation logits, shape (N, C, H, W)
+            seg_label (torch.Tensor): segmentation label, shape (N, 1, H, W)
+
+        Returns:
+            torch.Tensor: the predicted probability of the label if
+                ``thresh`` is specified, the loss otherwise, shape (N, H, W)
+        """
         with torch.no_grad():
             assert seg_logit.shape[2:] == seg_label.shape[2:]
             assert seg_label.shape[1] == 1
             seg_label = seg_label.squeeze(1).long()
-            batch_kept = self.min_kept * seg_label.size(0)
-            valid_mask = seg_label != self.context.ignore_index
-            seg_weight = seg_logit.new_zeros(size=seg_label.size())
-            valid_seg_weight = seg_weight[valid_mask]
             if self.thresh is not None:
                 seg_prob = F.softmax(seg_logit, dim=1)
 
                 tmp_seg_label = seg_label.clone().unsqueeze(1)
                 tmp_seg_label[tmp_seg_label == self.context.ignore_index] = 0
-                seg_prob = seg_prob.gather(1, tmp_seg_label).squeeze(1)
-                sort_prob, sort_indices = seg_prob[valid_mask].sort()
-
-                if sort_prob.numel() > 0:
-                    min_threshold = sort_prob[min(batch_kept,
-                                                  sort_prob.numel() - 1)]
-                else:
-                    min_threshold = 0.0
-                threshold = max(min_threshold, self.thresh)
-                valid_seg_weight[seg_prob[valid_mask] < threshold] = 1.
+                return seg_prob.gather(1, tmp_seg_label).squeeze(1)
             else:
-                losses = self.context.loss_decode(
+                return self.context.loss_decode(
                     seg_logit,
                     seg_label,
                     weight=None,
                     ignore_index=self.context.ignore_index,
                     reduction_override='none')
-                # faster than topk according to https://github.com/pytorch/pytorch/issues/22812  # noqa
-                _, sort_indices = losses[valid_mask].sort(descending=True)
-                valid_seg_weight[sort_indices[:batch_kept]] = 1.
 
-            seg_weight[valid_mask] = valid_seg_weight
+    def sample_from_scores(self, scores, seg_label):
+        """Sample pixels from the scores given by :meth:`pixel_scores`.
+
+        The threshold of the scores is selected with ``kthvalue`` instead of
+        sorting all the scores. When the hard examples are the pixels of top
+        ``min_kept`` loss, exactly ``min_kept`` times the batch size pixels
+        are kept (or all the valid pixels if there are fewer). The pixels
+        whose loss equals the threshold are kept in index order, as with a
+        stable sort.
+
+        Args:
+            scores (torch.Tensor): scores of the pixels, shape (N, H, W)
+            seg_label (torch.Tensor): segmentation label, shape (N, 1, H, W)
+
+        Returns:
+            torch.Tensor: segmentation weight, shape (N, H, W)
+        """
+        with torch.no_grad():
+            assert scores.shape[1:] == seg_label.shape[2:]
+            assert seg_label.shape[1] == 1
+            seg_label = seg_label.squeeze(1).long()
+            batch_kept = self.min_kept * seg_label.size(0)
+            valid_mask = seg_label != self.context.ignore_index
+            num_valid = int(valid_mask.sum())
+            if self.thresh is not None:
+                # the ignored pixels are never below the threshold
+                seg_prob = scores.masked_fill(~valid_mask, float('inf'))
+                if num_valid > 0:
+                    min_threshold = seg_prob.view(-1).kthvalue(
+                        min(batch_kept, num_valid - 1) + 1)[0]
+                else:
+                    min_threshold = 0.0
+                threshold = max(min_threshold, self.thresh)
+                seg_weight = seg_prob < threshold
+            elif batch_kept >= num_valid:
+                seg_weight = valid_mask
+            else:
+                # the ignored pixels are never above the threshold
+                losses = scores.masked_fill(~valid_mask, -float('inf'))
+                threshold = losses.view(-1).kthvalue(losses.numel() -
+                                                     batch_kept + 1)[0]
+                seg_weight = losses > threshold
+                # fill up with the first pixels tying with the threshold
+                num_ties = batch_kept - int(seg_weight.sum())
+                ties = (losses == threshold).view(-1).nonzero(as_tuple=False)
+                seg_weight.view(-1)[ties[:num_ties, 0]] = True
 
-            return seg_weight
+            return seg_weight.to(scores.dtype)
@@ -3,10 +3,13 @@ from .builder import DATASETS, PIPELINES, build_dataloader, build_dataset
 from .cityscapes import CityscapesDataset
 from .custom import CustomDataset
 from .dataset_wrappers import ConcatDataset, RepeatDataset
+from .landcover import DGLandcoverDataset
+from .samplers import TileGroupSampler
 from .voc import PascalVOCDataset
 
 __all__ = [
     'CustomDataset', 'build_dataloader', 'ConcatDataset', 'RepeatDataset',
     'DATASETS', 'build_dataset', 'PIPELINES', 'CityscapesDataset',
-    'PascalVOCDataset', 'ADE20KDataset'
+    'PascalVOCDataset', 'ADE20KDataset', 'DGLandcoverDataset',
+    'TileGroupSampler'
 ]
@@ -10,6 +10,8 @@ from mmcv.utils import Registry, build_from_cfg
 from mmcv.utils.parrots_wrapper import DataLoader, PoolDataLoader
 from torch.utils.data import DistributedSampler
 
+from .samplers import TileGroupSampler
+
 if platform.system() != 'Windows':
     # https://github.com/pytorch/pytorch/issues/973
     import resource
@@ -99,8 +101,9 @@ def build_dataloader(dataset,
             for each GPU.
         num_gpus (int): Number of GPUs. Only used in non-distributed training.
         dist (bool): Distributed training/test or not. Default: True.
-        shuffle (bool): Whether to shuffle the data at every epoch.
-            Default: True.
+        shuffle (bool): Whether to shuffle the data at every epoch. Datasets
+            with a ``tile_groups`` attribute are shuffled by
+            :obj:`TileGroupSampler`. Default: True.
         seed (int | None): Seed to be used. Default: None.
         drop_last (bool): Whether to drop the last incomplete batch in epoch.
             Default: False
@@ -113,7 +116,19 @@ def build_dataloader(dataset,
         DataLoader: A PyTorch dataloader.
     """
     rank, world_size = get_dist_info()
-    if dist:
+    if shuffle and hasattr(dataset, 'tile_groups'):
+        # keep the tiles of a large source image in the same worker
+        batch_size = samples_per_gpu if dist else num_gpus * samples_per_gpu
+        num_workers = workers_per_gpu if dist else num_gpus * workers_per_gpu
+        sampler = TileGroupSampler(
+            dataset,
+            batch_size,
+            num_workers,
+            num_replicas=world_size if dist else 1,
+            rank=rank if dist else 0,
+            seed=seed)
+        shuffle = False
+    elif dist:
         sampler = DistributedSampler(
             dataset, world_size, rank, shuffle=shuffle)
         shuffle = False
@@ -4,7 +4,7 @@ from functools import reduce
 import mmcv
 import numpy as np
 from mmcv.utils import print_log
-from mmseg.core import mean_iou
+from mmseg.core import IoUAccumulator, mean_iou
 from mmseg.utils import get_root_logger
 from torch.utils.data import Dataset
 
@@ -214,27 +214,51 @@ class CustomDataset(Dataset):
         """Place holder to format result to dataset specific output."""
         pass
 
+    def get_gt_seg_map(self, idx):
+        """Get the ground truth segmentation map of one image.
+
+        Args:
+            idx (int): Index of data.
+
+        Returns:
+            ndarray: Ground truth segmentation map.
+        """
+        gt_seg_map = mmcv.imread(
+            self.img_infos[idx]['ann']['seg_map'],
+            flag='unchanged',
+            backend='pillow')
+        if self.reduce_zero_label:
+            # avoid using underflow conversion
+            gt_seg_map[gt_seg_map == 0] = 255
+            gt_seg_map = gt_seg_map - 1
+            gt_seg_map[gt_seg_map == 254] = 255
+        return gt_seg_map
+
     def get_gt_seg_maps(self):
         """Get ground truth segmentation maps for evaluation."""
         gt_seg_maps = []
-        for img_info in self.img_infos:
-            gt_seg_map = mmcv.imread(
-                img_info['ann']['seg_map'], flag='unchanged', backend='pillow')
-            if self.reduce_zero_label:
-                # avoid using underflow conversion
-                gt_seg_map[gt_seg_map == 0] = 255
-                gt_seg_map = gt_seg_map - 1
-                gt_seg_map[gt_seg_map == 254] = 255
-
-            gt_seg_maps.append(gt_seg_map)
+        for idx in range(len(self)):
+            gt_seg_maps.append(self.get_gt_seg_map(idx))
 
         return gt_seg_maps
 
+    def build_accumulator(self):
+        """Build an :obj:`IoUAccumulator` for streaming evaluation.
+
+        Returns:
+            :obj:`IoUAccumulator`: An empty accumulator of this dataset.
+        """
+        assert self.CLASSES is not None, \
+            'CLASSES must be known to accumulate results incrementally'
+        return IoUAccumulator(len(self.CLASSES), self.ignore_index)
+
     def evaluate(self, results, metric='mIoU', logger=None, **kwargs):
         """Evaluate the dataset.
 
         Args:
-            results (list): Testing results of the dataset.
+            results (list | :obj:`IoUAccumulator`): Testing results of the
+                dataset, or an accumulator already updated with them, see
+                :meth:`build_accumulator`.
             metric (str | list[str]): Metrics to be evaluated.
             logger (logging.Logger | None | str): Logger used for printing
                 related information during evaluation. Default: None.
@@ -251,15 +275,22 @@ class CustomDataset(Dataset):
             raise KeyError('metric {} is not supported'.format(metric))
 
         eval_results = {}
-        gt_seg_maps = self.get_gt_seg_maps()
-        if self.CLASSES is None:
-            num_classes = len(
-                reduce(np.union1d, [np.unique(_) for _ in gt_seg_maps]))
+        if isinstance(results, IoUAccumulator):
+            num_classes = results.num_classes
+            all_acc, acc, iou = results.evaluate()
         else:
-            num_classes = len(self.CLASSES)
-
-        all_acc, acc, iou = mean_iou(
-            results, gt_seg_maps, num_classes, ignore_index=self.ignore_index)
+            gt_seg_maps = self.get_gt_seg_maps()
+            if self.CLASSES is None:
+                num_classes = len(
+                    reduce(np.union1d, [np.unique(_) for _ in gt_seg_maps]))
+            else:
+                num_classes = len(self.CLASSES)
+
+            all_acc, acc, iou = mean_iou(
+                results,
+                gt_seg_maps,
+                num_classes,
+                ignore_index=self.ignore_index)
         summary_str = ''
         summary_str += 'per class results:\n'
 
@@ -6,10 +6,14 @@ from torch.utils.data import Dataset
 
 from .builder import DATASETS
 from .pipelines import Compose
-from .utils.utils import inv_mapping
 
 
-@DATASETS.register_module
+def inv_mapping(mapping):
+    """Invert a label to color mapping into a color tuple to label dict."""
+    return {tuple(color): label for label, color in mapping.items()}
+
+
+@DATASETS.register_module()
 class DGLandcoverDataset(Dataset):
     """A generic data loader where the images are arranged in this way: ::
 
@@ -80,6 +84,10 @@ class DGLandcoverDataset(Dataset):
 
         # load annotations (and proposals)
         self.data_infos = self.load_annotations(self.ann_file)
+        # source image of each tile, used by TileGroupSampler so that every
+        # source is decoded once per worker, see LoadTileFromFile
+        _, self.tile_groups = np.unique(
+            [info['id'] for info in self.data_infos], return_inverse=True)
         # set group flag for the sampler
         if not self.test_mode:
             self._set_group_flag()
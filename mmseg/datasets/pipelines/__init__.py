@@ -1,7 +1,8 @@
 from .compose import Compose
 from .formating import (Collect, ImageToTensor, ToDataContainer, ToTensor,
                         Transpose, to_tensor)
-from .loading import LoadAnnotations, LoadImageFromFile
+from .loading import (LoadAnnotations, LoadImageFromFile, LoadTileAnnotations,
+                      LoadTileFromFile, TileSourceCache)
 from .test_time_aug import MultiScaleFlipAug
 from .transforms import (Normalize, Pad, PhotoMetricDistortion, RandomCrop,
                          RandomFlip, Resize, SegRescale)
@@ -10,5 +11,6 @@ __all__ = [
     'Compose', 'to_tensor', 'ToTensor', 'ImageToTensor', 'ToDataContainer',
     'Transpose', 'Collect', 'LoadAnnotations', 'LoadImageFromFile',
     'MultiScaleFlipAug', 'Resize', 'RandomFlip', 'Pad', 'RandomCrop',
-    'Normalize', 'SegRescale', 'PhotoMetricDistortion'
+    'Normalize', 'SegRescale', 'PhotoMetricDistortion', 'LoadTileFromFile',
+    'LoadTileAnnotations', 'TileSourceCache'
 ]
@@ -1,4 +1,5 @@
 import os.path as osp
+from collections import OrderedDict
 
 import mmcv
 import numpy as np
@@ -147,3 +148,225 @@ class LoadAnnotations(object):
         repr_str += f'(reduce_zero_label={self.reduce_zero_label},'
         repr_str += f"imdecode_backend='{self.imdecode_backend}')"
         return repr_str
+
+
+class TileSourceCache(object):
+    """LRU cache of decoded full-size images, bounded by bytes.
+
+    Transforms are copied into every dataloader worker, so each worker owns
+    its own cache. It is used by the tile loading transforms to decode a
+    large source image once and crop all its tiles from memory.
+
+    Args:
+        max_bytes (int): Maximum total size of the cached arrays. An array
+            larger than this is returned without being cached.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._arrays = OrderedDict()
+
+    def get(self, key, load_func):
+        """Get a cached array, or load and cache it with ``load_func()``."""
+        if key in self._arrays:
+            self.hits += 1
+            self._arrays.move_to_end(key)
+            return self._arrays[key]
+        self.misses += 1
+        array = load_func()
+        if array.nbytes <= self.max_bytes:
+            self._arrays[key] = array
+            self.num_bytes += array.nbytes
+            while self.num_bytes > self.max_bytes:
+                _, evicted = self._arrays.popitem(last=False)
+                self.num_bytes -= evicted.nbytes
+        return array
+
+    def __len__(self):
+        return len(self._arrays)
+
+
+def _crop_tile(array, results):
+    """Crop the tile described by ``results`` from a full-size array.
+
+    The offsets follow :meth:`DGLandcoverDataset.load_annotations`, where
+    ``w`` is the offset along the first axis and ``h`` along the second one.
+    A copy is returned so that later transforms never modify the cache.
+    """
+    tile_size = results['tile_size']
+    top, left = results['w'], results['h']
+    return array[top:top + tile_size, left:left + tile_size].copy()
+
+
+@PIPELINES.register_module()
+class LoadTileFromFile(object):
+    """Load a tile of a large image, decoding each source image only once.
+
+    Required keys are "img_path", "tile_size", "w" and "h", as given by
+    :obj:`DGLandcoverDataset`. The full image is decoded into a per-worker
+    :obj:`TileSourceCache` and the tile is cropped from it. Added or updated
+    keys are the same as :obj:`LoadImageFromFile`.
+
+    Args:
+        to_float32 (bool): Whether to convert the loaded image to a float32
+            numpy array. If set to False, the loaded image is an uint8 array.
+            Defaults to False.
+        color_type (str): The flag argument for :func:`mmcv.imfrombytes`.
+            Defaults to 'color'.
+        max_cache_bytes (int): Size of the cache of decoded source images.
+            Defaults to 512 MB.
+        file_client_args (dict): Arguments to instantiate a FileClient.
+            See :class:`mmcv.fileio.FileClient` for details.
+            Defaults to ``dict(backend='disk')``.
+        imdecode_backend (str): Backend for :func:`mmcv.imdecode`. Default:
+            'cv2'
+    """
+
+    def __init__(self,
+                 to_float32=False,
+                 color_type='color',
+                 max_cache_bytes=512 * 1024**2,
+                 file_client_args=dict(backend='disk'),
+                 imdecode_backend='cv2'):
+        self.to_float32 = to_float32
+        self.color_type = color_type
+        self.max_cache_bytes = max_cache_bytes
+        self.file_client_args = file_client_args.copy()
+        self.file_client = None
+        self.imdecode_backend = imdecode_backend
+        self.cache = TileSourceCache(max_cache_bytes)
+
+    def _load(self, filename):
+        img_bytes = self.file_client.get(filename)
+        return mmcv.imfrombytes(
+            img_bytes, flag=self.color_type, backend=self.imdecode_backend)
+
+    def __call__(self, results):
+        """Call functions to load the tile and get image meta information.
+
+        Args:
+            results (dict): Result dict from :obj:`DGLandcoverDataset`.
+
+        Returns:
+            dict: The dict contains loaded image and meta information.
+        """
+
+        if self.file_client is None:
+            self.file_client = mmcv.FileClient(**self.file_client_args)
+
+        filename = results['img_path']
+        img = self.cache.get(filename, lambda: self._load(filename))
+        img = _crop_tile(img, results)
+        if self.to_float32:
+            img = img.astype(np.float32)
+
+        results['filename'] = filename
+        results['ori_filename'] = osp.basename(filename)
+        results['img'] = img
+        results['img_shape'] = img.shape
+        results['ori_shape'] = img.shape
+        # Set initial values for default meta_keys
+        results['pad_shape'] = img.shape
+        results['scale_factor'] = 1.0
+        num_channels = 1 if len(img.shape) < 3 else img.shape[2]
+        results['img_norm_cfg'] = dict(
+            mean=np.zeros(num_channels, dtype=np.float32),
+            std=np.ones(num_channels, dtype=np.float32),
+            to_rgb=False)
+        return results
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += f'(to_float32={self.to_float32},'
+        repr_str += f"color_type='{self.color_type}',"
+        repr_str += f'max_cache_bytes={self.max_cache_bytes},'
+        repr_str += f"imdecode_backend='{self.imdecode_backend}')"
+        return repr_str
+
+
+@PIPELINES.register_module()
+class LoadTileAnnotations(object):
+    """Load the segmentation map of a tile from a large color-coded mask.
+
+    Required keys are "label_path", "tile_size", "w" and "h". If
+    "rgb2label" (a dict from RGB tuples to labels) is given, the mask is read
+    as an RGB image and converted to labels, colors that are not in the
+    mapping become ``ignore_index``. The converted full-size label map is
+    cached, so the color conversion also runs once per source image. Nothing
+    is loaded if "label_path" is None.
+
+    Args:
+        ignore_index (int): Label of colors not in "rgb2label". Default: 255.
+        max_cache_bytes (int): Size of the cache of decoded label maps.
+            Defaults to 256 MB.
+        file_client_args (dict): Arguments to instantiate a FileClient.
+            See :class:`mmcv.fileio.FileClient` for details.
+            Defaults to ``dict(backend='disk')``.
+        imdecode_backend (str): Backend for :func:`mmcv.imdecode`. Default:
+            'pillow'
+    """
+
+    def __init__(self,
+                 ignore_index=255,
+                 max_cache_bytes=256 * 1024**2,
+                 file_client_args=dict(backend='disk'),
+                 imdecode_backend='pillow'):
+        self.ignore_index = ignore_index
+        self.max_cache_bytes = max_cache_bytes
+        self.file_client_args = file_client_args.copy()
+        self.file_client = None
+        self.imdecode_backend = imdecode_backend
+        self.cache = TileSourceCache(max_cache_bytes)
+
+    def _load(self, filename, rgb2label):
+        img_bytes = self.file_client.get(filename)
+        if rgb2label is None:
+            return mmcv.imfrombytes(
+                img_bytes, flag='unchanged',
+                backend=self.imdecode_backend).squeeze().astype(np.uint8)
+        mask = mmcv.imfrombytes(
+            img_bytes,
+            flag='color',
+            channel_order='rgb',
+            backend=self.imdecode_backend).astype(np.int32)
+        codes = (mask[..., 0] << 16) | (mask[..., 1] << 8) | mask[..., 2]
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        lut = np.array([
+            rgb2label.get(((code >> 16) & 255, (code >> 8) & 255, code & 255),
+                          self.ignore_index) for code in unique_codes
+        ],
+                       dtype=np.uint8)
+        return lut[inverse].reshape(codes.shape)
+
+    def __call__(self, results):
+        """Call function to load the segmentation map of a tile.
+
+        Args:
+            results (dict): Result dict from :obj:`DGLandcoverDataset`.
+
+        Returns:
+            dict: The dict contains loaded semantic segmentation annotations.
+        """
+
+        if results.get('label_path') is None:
+            return results
+        if self.file_client is None:
+            self.file_client = mmcv.FileClient(**self.file_client_args)
+
+        filename = results['label_path']
+        rgb2label = results.get('rgb2label')
+        gt_semantic_seg = self.cache.get(
+            filename, lambda: self._load(filename, rgb2label))
+        results['gt_semantic_seg'] = _crop_tile(gt_semantic_seg, results)
+        results['seg_fields'].append('gt_semantic_seg')
+        return results
+
+    def __repr__(self):
+        repr_str = self.__class__.__name__
+        repr_str += f'(ignore_index={self.ignore_index},'
+        repr_str += f'max_cache_bytes={self.max_cache_bytes},'
+        repr_str += f"imdecode_backend='{self.imdecode_backend}')"
+        return repr_str
@@ -0,0 +1,3 @@
+from .tile_group_sampler import TileGroupSampler
+
+__all__ = ['TileGroupSampler']
@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+import torch
+from mmcv.runner import get_dist_info
+from torch.utils.data import Sampler
+
+
+class TileGroupSampler(Sampler):
+    """Sampler that keeps the tiles of a source image in one worker.
+
+    The dataset must have a ``tile_groups`` attribute giving the source image
+    of every sample. Source images are shuffled and their tiles are split
+    into contiguous parts among the processes, so only the sources at the
+    boundaries of the parts are shared by two processes. As in
+    :class:`torch.utils.data.DistributedSampler`, the tiles are padded by
+    repeating the first ones, so every tile is sampled at least once per
+    epoch. The sources of a process are then assigned to dataloader
+    workers. The indices are interleaved so that the batches a
+    :class:`torch.utils.data.DataLoader` sends to each worker (in round-robin
+    order) contain the tiles of the sources assigned to that worker one
+    source after another. With a per-worker cache of decoded sources, e.g.
+    :obj:`LoadTileFromFile`, each source image is then decoded once per epoch
+    instead of once per tile.
+
+    Shuffling is deterministic given ``seed`` and the epoch, which is set by
+    the runner through :meth:`set_epoch`.
+
+    Args:
+        dataset (Dataset): Dataset with a ``tile_groups`` attribute.
+        samples_per_gpu (int): Batch size of the dataloader. Default: 1.
+        workers_per_gpu (int): Number of workers of the dataloader.
+            Default: 1.
+        num_replicas (int, optional): Number of processes participating in
+            distributed training. Default: world size.
+        rank (int, optional): Rank of the current process. Default: current
+            rank.
+        shuffle (bool): Whether to shuffle the sources and the tiles of each
+            source. Default: True.
+        seed (int): Random seed used to shuffle. Default: 0.
+    """
+
+    def __init__(self,
+                 dataset,
+                 samples_per_gpu=1,
+                 workers_per_gpu=1,
+                 num_replicas=None,
+                 rank=None,
+                 shuffle=True,
+                 seed=0):
+        _rank, _num_replicas = get_dist_info()
+        if num_replicas is None:
+            num_replicas = _num_replicas
+        if rank is None:
+            rank = _rank
+        assert hasattr(dataset, 'tile_groups')
+        self.dataset = dataset
+        self.samples_per_gpu = samples_per_gpu
+        self.num_workers = max(workers_per_gpu, 1)
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.shuffle = shuffle
+        self.seed = seed if seed is not None else 0
+        self.epoch = 0
+
+        self.tile_groups = np.asarray(dataset.tile_groups, dtype=np.int64)
+        self.num_samples = int(
+            math.ceil(len(self.tile_groups) * 1.0 / self.num_replicas))
+
+    def _permutation(self, num, generator):
+        if self.shuffle:
+            return torch.randperm(num, generator=generator).numpy()
+        return np.arange(num)
+
+    def __iter__(self):
+        # deterministically shuffle based on epoch
+        g = torch.Generator()
+        g.manual_seed(self.seed + self.epoch)
+
+        # tiles of each source, in (shuffled) tile order
+        order = np.argsort(self.tile_groups, kind='stable')
+        sources, starts = np.unique(self.tile_groups[order], return_index=True)
+        groups = np.split(order, starts[1:])
+        groups = [
+            group[self._permutation(len(group), g)] for group in groups
+        ]
+
+        # concatenate the tiles of the shuffled sources and pad them to make
+        # them evenly divisible, as DistributedSampler does
+        source_order = self._permutation(len(sources), g)
+        indices = np.concatenate([groups[i] for i in source_order]).tolist()
+        total_size = self.num_samples * self.num_replicas
+        padding_size = total_size - len(indices)
+        indices += (indices * int(math.ceil(padding_size / len(indices))))[
+            :padding_size]
+        assert len(indices) == total_size
+
+        # each process takes contiguous tiles, so only the sources at the
+        # boundaries are split between processes
+        offset = self.num_samples * self.rank
+        indices = np.array(indices[offset:offset + self.num_samples])
+        bounds = np.flatnonzero(np.diff(self.tile_groups[indices])) + 1
+        rank_groups = np.split(indices, bounds)
+
+        # greedily assign sources to the worker with the fewest tiles
+        streams = [[] for _ in range(self.num_workers)]
+        for group in rank_groups:
+            worker = min(
+                range(self.num_workers), key=lambda i: len(streams[i]))
+            streams[worker].extend(group.tolist())
+        streams = [stream[::-1] for stream in streams]
+
+        # batch k is loaded by worker k % num_workers, a batch is completed
+        # from the longest stream if the stream of its worker runs out
+        indices = []
+        batch_id = 0
+        while any(streams):
+            stream = streams[batch_id % self.num_workers]
+            for _ in range(self.samples_per_gpu):
+                if not stream:
+                    stream = max(streams, key=len)
+                    if not stream:
+                        break
+                indices.append(stream.pop())
+            batch_id += 1
+        assert len(indices) == self.num_samples
+
+        return iter(indices)
+
+    def __len__(self):
+        return self.num_samples
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
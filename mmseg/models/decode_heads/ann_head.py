@@ -47,11 +47,22 @@ class SelfAttentionBlock(_SelfAttentionBlock):
         conv_cfg (dict|None): Config of conv layers.
         norm_cfg (dict|None): Config of norm layers.
         act_cfg (dict|None): Config of activation layers.
+        chunk_size (int|None): Number of queries and keys per block of the
+            chunked attention, None means no chunking. Default: None.
     """
 
-    def __init__(self, low_in_channels, high_in_channels, channels,
-                 out_channels, share_key_query, query_scale, key_pool_scales,
-                 conv_cfg, norm_cfg, act_cfg):
+    def __init__(self,
+                 low_in_channels,
+                 high_in_channels,
+                 channels,
+                 out_channels,
+                 share_key_query,
+                 query_scale,
+                 key_pool_scales,
+                 conv_cfg,
+                 norm_cfg,
+                 act_cfg,
+                 chunk_size=None):
         key_psp = PPMConcat(key_pool_scales)
         if query_scale > 1:
             query_downsample = nn.MaxPool2d(kernel_size=query_scale)
@@ -73,7 +84,8 @@ class SelfAttentionBlock(_SelfAttentionBlock):
             with_out=True,
             conv_cfg=conv_cfg,
             norm_cfg=norm_cfg,
-            act_cfg=act_cfg)
+            act_cfg=act_cfg,
+            chunk_size=chunk_size)
 
 
 class AFNB(nn.Module):
@@ -94,11 +106,21 @@ class AFNB(nn.Module):
         conv_cfg (dict|None): Config of conv layers.
         norm_cfg (dict|None): Config of norm layers.
         act_cfg (dict|None): Config of activation layers.
+        chunk_size (int|None): Number of queries and keys per block of the
+            chunked attention, None means no chunking. Default: None.
     """
 
-    def __init__(self, low_in_channels, high_in_channels, channels,
-                 out_channels, query_scales, key_pool_scales, conv_cfg,
-                 norm_cfg, act_cfg):
+    def __init__(self,
+                 low_in_channels,
+                 high_in_channels,
+                 channels,
+                 out_channels,
+                 query_scales,
+                 key_pool_scales,
+                 conv_cfg,
+                 norm_cfg,
+                 act_cfg,
+                 chunk_size=None):
         super(AFNB, self).__init__()
         self.stages = nn.ModuleList()
         for query_scale in query_scales:
@@ -113,7 +135,8 @@ class AFNB(nn.Module):
                     key_pool_scales=key_pool_scales,
                     conv_cfg=conv_cfg,
                     norm_cfg=norm_cfg,
-                    act_cfg=act_cfg))
+                    act_cfg=act_cfg,
+                    chunk_size=chunk_size))
         self.bottleneck = ConvModule(
             out_channels + high_in_channels,
             out_channels,
@@ -145,10 +168,20 @@ class APNB(nn.Module):
         conv_cfg (dict|None): Config of conv layers.
         norm_cfg (dict|None): Config of norm layers.
         act_cfg (dict|None): Config of activation layers.
+        chunk_size (int|None): Number of queries and keys per block of the
+            chunked attention, None means no chunking. Default: None.
     """
 
-    def __init__(self, in_channels, channels, out_channels, query_scales,
-                 key_pool_scales, conv_cfg, norm_cfg, act_cfg):
+    def __init__(self,
+                 in_channels,
+                 channels,
+                 out_channels,
+                 query_scales,
+                 key_pool_scales,
+                 conv_cfg,
+                 norm_cfg,
+                 act_cfg,
+                 chunk_size=None):
         super(APNB, self).__init__()
         self.stages = nn.ModuleList()
         for query_scale in query_scales:
@@ -163,7 +196,8 @@ class APNB(nn.Module):
                     key_pool_scales=key_pool_scales,
                     conv_cfg=conv_cfg,
                     norm_cfg=norm_cfg,
-                    act_cfg=act_cfg))
+                    act_cfg=act_cfg,
+                    chunk_size=chunk_size))
         self.bottleneck = ConvModule(
             2 * in_channels,
             out_channels,
@@ -193,12 +227,16 @@ class ANNHead(BaseDecodeHead):
             Default: (1,)
         key_pool_scales (tuple[int]): The pooling scales of key feature map.
             Default: (1, 3, 6, 8).
+        attention_chunk_size (int|None): Number of queries and keys per block
+            of the chunked attention of AFNB and APNB, None means no
+            chunking. Default: None.
     """
 
     def __init__(self,
                  project_channels,
                  query_scales=(1, ),
                  key_pool_scales=(1, 3, 6, 8),
+                 attention_chunk_size=None,
                  **kwargs):
         super(ANNHead, self).__init__(
             input_transform='multiple_select', **kwargs)
@@ -214,7 +252,8 @@ class ANNHead(BaseDecodeHead):
             key_pool_scales=key_pool_scales,
             conv_cfg=self.conv_cfg,
             norm_cfg=self.norm_cfg,
-            act_cfg=self.act_cfg)
+            act_cfg=self.act_cfg,
+            chunk_size=attention_chunk_size)
         self.bottleneck = ConvModule(
             high_in_channels,
             self.channels,
@@ -231,7 +270,8 @@ class ANNHead(BaseDecodeHead):
             key_pool_scales=key_pool_scales,
             conv_cfg=self.conv_cfg,
             norm_cfg=self.norm_cfg,
-            act_cfg=self.act_cfg)
+            act_cfg=self.act_cfg,
+            chunk_size=attention_chunk_size)
 
     def forward(self, inputs):
         """Forward function."""
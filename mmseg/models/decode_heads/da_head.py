@@ -15,9 +15,11 @@ class PAM(_SelfAttentionBlock):
     Args:
         in_channels (int): Input channels of key/query feature.
         channels (int): Output channels of key/query transform.
+        chunk_size (int|None): Number of queries and keys per block of the
+            chunked attention, None means no chunking. Default: None.
     """
 
-    def __init__(self, in_channels, channels):
+    def __init__(self, in_channels, channels, chunk_size=None):
         super(PAM, self).__init__(
             key_in_channels=in_channels,
             query_in_channels=in_channels,
@@ -34,7 +36,8 @@ class PAM(_SelfAttentionBlock):
             with_out=False,
             conv_cfg=None,
             norm_cfg=None,
-            act_cfg=None)
+            act_cfg=None,
+            chunk_size=chunk_size)
 
         self.gamma = Scale(0)
 
@@ -80,9 +83,12 @@ class DAHead(BaseDecodeHead):
 
     Args:
         pam_channels (int): The channels of Position Attention Module(PAM).
+        attention_chunk_size (int|None): Number of queries and keys per block
+            of the chunked attention of PAM, None means no chunking.
+            Default: None.
     """
 
-    def __init__(self, pam_channels, **kwargs):
+    def __init__(self, pam_channels, attention_chunk_size=None, **kwargs):
         super(DAHead, self).__init__(**kwargs)
         self.pam_channels = pam_channels
         self.pam_in_conv = ConvModule(
@@ -93,7 +99,7 @@ class DAHead(BaseDecodeHead):
             conv_cfg=self.conv_cfg,
             norm_cfg=self.norm_cfg,
             act_cfg=self.act_cfg)
-        self.pam = PAM(self.channels, pam_channels)
+        self.pam = PAM(self.channels, pam_channels, attention_chunk_size)
         self.pam_out_conv = ConvModule(
             self.channels,
             self.channels,
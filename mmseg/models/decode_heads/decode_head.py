@@ -1,11 +1,13 @@
 from abc import ABCMeta, abstractmethod
+from functools import partial
 
 import torch
 import torch.nn as nn
+import torch.utils.checkpoint as cp
 from mmcv.cnn import normal_init
 from mmcv.runner import auto_fp16, force_fp32
 from mmseg.core import build_pixel_sampler
-from mmseg.ops import resize
+from mmseg.ops import resize, resize_rows
 
 from ..builder import build_loss
 from ..losses import accuracy
@@ -40,6 +42,15 @@ class BaseDecodeHead(nn.Module, metaclass=ABCMeta):
             Default: None.
         align_corners (bool): align_corners argument of F.interpolate.
             Default: False.
+        loss_resize_cfg (dict|None): How the logits are matched with the
+            labels in the loss. None means the logits are upsampled to the
+            labels. ``dict(mode='chunked', chunk_size=64)`` computes the same
+            loss on chunks of ``chunk_size`` rows of the upsampled logits,
+            which are upsampled again in backward, so the upsampled logits
+            are never stored. ``dict(mode='downsample', scale=None)``
+            downsamples the labels to ``scale`` times their size, or to the
+            size of the logits if ``scale`` is None, with nearest sampling.
+            Default: None.
     """
 
     def __init__(self,
@@ -59,7 +70,8 @@ class BaseDecodeHead(nn.Module, metaclass=ABCMeta):
                      loss_weight=1.0),
                  ignore_index=255,
                  sampler=None,
-                 align_corners=False):
+                 align_corners=False,
+                 loss_resize_cfg=None):
         super(BaseDecodeHead, self).__init__()
         self._init_inputs(in_channels, in_index, input_transform)
         self.channels = channels
@@ -76,6 +88,14 @@ class BaseDecodeHead(nn.Module, metaclass=ABCMeta):
             self.sampler = build_pixel_sampler(sampler, context=self)
         else:
             self.sampler = None
+        if loss_resize_cfg is not None:
+            assert loss_resize_cfg['mode'] in ['chunked', 'downsample']
+            if loss_resize_cfg['mode'] == 'chunked':
+                assert self.loss_decode.reduction in ['mean', 'sum']
+                assert self.sampler is None or hasattr(
+                    self.sampler, 'pixel_scores'), \
+                    'the chunked loss needs a sampler with pixel_scores'
+        self.loss_resize_cfg = loss_resize_cfg
 
         self.conv_seg = nn.Conv2d(channels, num_classes, kernel_size=1)
         if dropout_ratio > 0:
@@ -213,12 +233,28 @@ class BaseDecodeHead(nn.Module, metaclass=ABCMeta):
     @force_fp32(apply_to=('seg_logit', ))
     def losses(self, seg_logit, seg_label):
         """Compute segmentation loss."""
+        resize_mode = None
+        if self.loss_resize_cfg is not None:
+            resize_mode = self.loss_resize_cfg['mode']
+        if resize_mode == 'chunked':
+            return self._chunked_losses(seg_logit, seg_label)
         loss = dict()
-        seg_logit = resize(
-            input=seg_logit,
-            size=seg_label.shape[2:],
-            mode='bilinear',
-            align_corners=self.align_corners)
+        if resize_mode == 'downsample':
+            scale = self.loss_resize_cfg.get('scale')
+            if scale is None:
+                label_size = seg_logit.shape[2:]
+            else:
+                label_size = tuple(
+                    int(size * scale + 0.5) for size in seg_label.shape[2:])
+            seg_label = resize(
+                input=seg_label.float(), size=label_size,
+                mode='nearest').to(seg_label.dtype)
+        if seg_logit.shape[2:] != seg_label.shape[2:]:
+            seg_logit = resize(
+                input=seg_logit,
+                size=seg_label.shape[2:],
+                mode='bilinear',
+                align_corners=self.align_corners)
         if self.sampler is not None:
             seg_weight = self.sampler.sample(seg_logit, seg_label)
         else:
@@ -231,3 +267,63 @@ class BaseDecodeHead(nn.Module, metaclass=ABCMeta):
             ignore_index=self.ignore_index)
         loss['acc_seg'] = accuracy(seg_logit, seg_label)
         return loss
+
+    def _chunk_loss(self, seg_logit, rows, size, seg_label, seg_weight):
+        """Sum of the loss of some rows of the upsampled logits."""
+        chunk_logit = resize_rows(seg_logit, rows, size, self.align_corners)
+        return self.loss_decode(
+            chunk_logit,
+            seg_label,
+            weight=seg_weight,
+            ignore_index=self.ignore_index,
+            reduction_override='sum')
+
+    def _chunked_losses(self, seg_logit, seg_label):
+        """Compute segmentation loss on chunks of rows of the upsampled
+        logits."""
+        loss = dict()
+        size = seg_label.shape[2:]
+        chunk_size = self.loss_resize_cfg.get('chunk_size', 64)
+        chunks = [
+            slice(i, min(i + chunk_size, size[0]))
+            for i in range(0, size[0], chunk_size)
+        ]
+
+        # the accuracy and the sampled pixels do not need gradients
+        num_correct = 0
+        scores = []
+        with torch.no_grad():
+            for rows in chunks:
+                chunk_logit = resize_rows(seg_logit, rows, size,
+                                          self.align_corners)
+                chunk_label = seg_label[:, :, rows]
+                chunk_pred = chunk_logit.argmax(dim=1)
+                num_correct += (chunk_pred == chunk_label[:, 0]).sum()
+                if self.sampler is not None:
+                    scores.append(
+                        self.sampler.pixel_scores(chunk_logit, chunk_label))
+        if self.sampler is not None:
+            seg_weight = self.sampler.sample_from_scores(
+                torch.cat(scores, dim=1), seg_label)
+        else:
+            seg_weight = None
+
+        seg_label = seg_label.squeeze(1)
+        loss_seg = 0
+        for rows in chunks:
+            chunk_loss = partial(
+                self._chunk_loss,
+                rows=rows,
+                size=size,
+                seg_label=seg_label[:, rows],
+                seg_weight=None if seg_weight is None else seg_weight[:, rows])
+            if seg_logit.requires_grad:
+                loss_seg = loss_seg + cp.checkpoint(chunk_loss, seg_logit)
+            else:
+                loss_seg = loss_seg + chunk_loss(seg_logit)
+        if self.loss_decode.reduction == 'mean':
+            loss_seg = loss_seg / seg_label.numel()
+        loss['loss_seg'] = loss_seg
+        loss['acc_seg'] = (num_correct.float() *
+                           (100.0 / seg_label.numel())).view(1)
+        return loss
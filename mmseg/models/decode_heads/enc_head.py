@@ -17,9 +17,17 @@ class EncModule(nn.Module):
         conv_cfg (dict|None): Config of conv layers.
         norm_cfg (dict|None): Config of norm layers.
         act_cfg (dict): Config of activation layers.
+        memory_efficient (bool): Whether to use the memory efficient
+            implementation of the encoding layer. Default: False.
     """
 
-    def __init__(self, in_channels, num_codes, conv_cfg, norm_cfg, act_cfg):
+    def __init__(self,
+                 in_channels,
+                 num_codes,
+                 conv_cfg,
+                 norm_cfg,
+                 act_cfg,
+                 memory_efficient=False):
         super(EncModule, self).__init__()
         self.encoding_project = ConvModule(
             in_channels,
@@ -41,7 +49,10 @@ class EncModule(nn.Module):
             # fallback to BN1d
             encoding_norm_cfg = dict(type='BN1d')
         self.encoding = nn.Sequential(
-            Encoding(channels=in_channels, num_codes=num_codes),
+            Encoding(
+                channels=in_channels,
+                num_codes=num_codes,
+                memory_efficient=memory_efficient),
             build_norm_layer(encoding_norm_cfg, num_codes)[1],
             nn.ReLU(inplace=True))
         self.fc = nn.Sequential(
@@ -73,6 +84,10 @@ class EncHead(BaseDecodeHead):
             Default: False.
         loss_se_decode (dict): Config of decode loss.
             Default: dict(type='CrossEntropyLoss', use_sigmoid=True).
+        memory_efficient_encoding (bool): Whether to use the memory efficient
+            implementation of the encoding layer, which avoids the
+            (batch_size, height x width, num_codes, channels) intermediate
+            tensors. Default: False.
     """
 
     def __init__(self,
@@ -83,6 +98,7 @@ class EncHead(BaseDecodeHead):
                      type='CrossEntropyLoss',
                      use_sigmoid=True,
                      loss_weight=0.2),
+                 memory_efficient_encoding=False,
                  **kwargs):
         super(EncHead, self).__init__(
             input_transform='multiple_select', **kwargs)
@@ -121,7 +137,8 @@ class EncHead(BaseDecodeHead):
             num_codes=num_codes,
             conv_cfg=self.conv_cfg,
             norm_cfg=self.norm_cfg,
-            act_cfg=self.act_cfg)
+            act_cfg=self.act_cfg,
+            memory_efficient=memory_efficient_encoding)
         if self.use_se_loss:
             self.loss_se_decode = build_loss(loss_se_decode)
             self.se_layer = nn.Linear(self.channels, self.num_classes)
@@ -39,8 +39,14 @@ class SpatialGatherModule(nn.Module):
 class ObjectAttentionBlock(_SelfAttentionBlock):
     """Make a OCR used SelfAttentionBlock."""
 
-    def __init__(self, in_channels, channels, scale, conv_cfg, norm_cfg,
-                 act_cfg):
+    def __init__(self,
+                 in_channels,
+                 channels,
+                 scale,
+                 conv_cfg,
+                 norm_cfg,
+                 act_cfg,
+                 chunk_size=None):
         if scale > 1:
             query_downsample = nn.MaxPool2d(kernel_size=scale)
         else:
@@ -61,7 +67,8 @@ class ObjectAttentionBlock(_SelfAttentionBlock):
             with_out=True,
             conv_cfg=conv_cfg,
             norm_cfg=norm_cfg,
-            act_cfg=act_cfg)
+            act_cfg=act_cfg,
+            chunk_size=chunk_size)
         self.bottleneck = ConvModule(
             in_channels * 2,
             in_channels,
@@ -92,9 +99,16 @@ class OCRHead(BaseCascadeDecodeHead):
         ocr_channels (int): The intermediate channels of OCR block.
         scale (int): The scale of probability map in SpatialGatherModule in
             Default: 1.
+        attention_chunk_size (int|None): Number of queries and keys per block
+            of the chunked attention of the object context block, None means
+            no chunking. Default: None.
     """
 
-    def __init__(self, ocr_channels, scale=1, **kwargs):
+    def __init__(self,
+                 ocr_channels,
+                 scale=1,
+                 attention_chunk_size=None,
+                 **kwargs):
         super(OCRHead, self).__init__(**kwargs)
         self.ocr_channels = ocr_channels
         self.scale = scale
@@ -104,7 +118,8 @@ class OCRHead(BaseCascadeDecodeHead):
             self.scale,
             conv_cfg=self.conv_cfg,
             norm_cfg=self.norm_cfg,
-            act_cfg=self.act_cfg)
+            act_cfg=self.act_cfg,
+            chunk_size=attention_chunk_size)
         self.spatial_gather_module = SpatialGatherModule(self.scale)
 
         self.bottleneck = ConvModule(
@@ -1,14 +1,78 @@
+import math
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 from mmseg.core import add_prefix
-from mmseg.ops import resize
+from mmseg.ops import bilinear_rows, resize
 
 from .. import builder
 from ..builder import SEGMENTORS
 from .base import BaseSegmentor
 
 
+class _RowRescaler(object):
+    """Bilinear rescaling of an image given as consecutive strips of rows.
+
+    Each output row is computed as soon as the input rows it is interpolated
+    from are pushed, with the same sampling as ``F.interpolate`` in bilinear
+    mode, see :func:`bilinear_rows`. Only the last pushed row is kept.
+
+    Args:
+        h_in (int): Height of the input image.
+        h_out (int): Height of the output image.
+        w_out (int): Width of the output image.
+        align_corners (bool): align_corners argument of ``F.interpolate``.
+    """
+
+    def __init__(self, h_in, h_out, w_out, align_corners):
+        self.h_in = h_in
+        self.h_out = h_out
+        self.w_out = w_out
+        self.align_corners = align_corners
+        self.y0, self.y1, lambda1 = bilinear_rows(h_in, h_out, align_corners)
+        self.lambda1 = lambda1.float()
+        self.last_row = None
+        self.num_in = 0
+        self.num_out = 0
+
+    def push(self, rows):
+        """Push the next rows of the input.
+
+        Args:
+            rows (Tensor): The next rows of shape (N, C, n, W).
+
+        Returns:
+            tuple[Tensor, slice]: The output rows that can be computed with
+                the rows pushed so far, and their indices.
+        """
+        num_rows = rows.size(2)
+        if rows.size(3) != self.w_out:
+            rows = F.interpolate(
+                rows,
+                size=(num_rows, self.w_out),
+                mode='bilinear',
+                align_corners=self.align_corners)
+        if self.h_in == self.h_out:
+            out_rows = slice(self.num_in, self.num_in + num_rows)
+            self.num_in += num_rows
+            return rows, out_rows
+
+        start = self.num_in
+        if self.last_row is not None:
+            rows = torch.cat([self.last_row, rows], dim=2)
+            start -= 1
+        self.num_in += num_rows
+        self.last_row = rows[:, :, -1:]
+        num_out = int((self.y1 < self.num_in).sum())
+        out_rows = slice(self.num_out, num_out)
+        self.num_out = num_out
+        lambda1 = self.lambda1[out_rows].to(rows.device)[:, None]
+        top = rows[:, :, self.y0[out_rows] - start]
+        bottom = rows[:, :, self.y1[out_rows] - start]
+        return top * (1 - lambda1) + bottom * lambda1, out_rows
+
+
 @SEGMENTORS.register_module()
 class EncoderDecoder(BaseSegmentor):
     """Encoder Decoder segmentors.
@@ -165,20 +229,23 @@ class EncoderDecoder(BaseSegmentor):
 
         return losses
 
-    # TODO refactor
-    def slide_inference(self, img, img_meta, rescale):
-        """Inference by sliding-window with overlap."""
+    def _slide_windows(self, h_img, w_img):
+        """Get the sliding windows of an image row by row.
+
+        Args:
+            h_img (int): Height of the image.
+            w_img (int): Width of the image.
 
+        Returns:
+            list[tuple[int]]: (y1, y2, x1, x2) of each window.
+        """
         h_stride, w_stride = self.test_cfg.stride
         h_crop, w_crop = self.test_cfg.crop_size
-        batch_size, _, h_img, w_img = img.size()
         assert h_crop <= h_img and w_crop <= w_img, (
             'crop size should not greater than image size')
-        num_classes = self.num_classes
         h_grids = max(h_img - h_crop + h_stride - 1, 0) // h_stride + 1
         w_grids = max(w_img - w_crop + w_stride - 1, 0) // w_stride + 1
-        preds = img.new_zeros((batch_size, num_classes, h_img, w_img))
-        count_mat = img.new_zeros((batch_size, 1, h_img, w_img))
+        windows = []
         for h_idx in range(h_grids):
             for w_idx in range(w_grids):
                 y1 = h_idx * h_stride
@@ -187,13 +254,86 @@ class EncoderDecoder(BaseSegmentor):
                 x2 = min(x1 + w_crop, w_img)
                 y1 = max(y2 - h_crop, 0)
                 x1 = max(x2 - w_crop, 0)
-                crop_img = img[:, :, y1:y2, x1:x2]
-                crop_seg_logit = self.encode_decode(crop_img, img_meta)
+                windows.append((y1, y2, x1, x2))
+        return windows
+
+    def _slide_window_weight(self, device):
+        """Get the blending weight of the logits of a window.
+
+        ``test_cfg.window`` can be 'gaussian', whose sigma is 1/8 of the crop
+        size, or 'cosine'. Both are positive everywhere, so that every pixel
+        gets a non-zero weight.
+
+        Returns:
+            Tensor | None: Weight of shape (h_crop, w_crop), None if the
+                windows are not weighted.
+        """
+        window = self.test_cfg.get('window', None)
+        if window is None:
+            return None
+        assert window in ['gaussian', 'cosine']
+        weights = []
+        for size in self.test_cfg.crop_size:
+            coord = torch.arange(size, dtype=torch.float32, device=device)
+            if window == 'gaussian':
+                sigma = size / 8
+                weight = torch.exp(-(coord - (size - 1) / 2)**2 /
+                                   (2 * sigma**2))
+            else:
+                weight = 0.5 - 0.5 * torch.cos(2 * math.pi *
+                                               (coord + 0.5) / size)
+            weights.append(weight)
+        return weights[0][:, None] * weights[1][None, :]
+
+    def _forward_slide_windows(self, img, img_meta, windows):
+        """Forward the crops of sliding windows in mini-batches.
+
+        The crops of ``test_cfg.batch_size`` windows (default 1) of all the
+        images are forwarded at once.
+
+        Yields:
+            tuple[tuple[int], Tensor]: The window and the logits of its crops.
+        """
+        crop_batch_size = self.test_cfg.get('batch_size', 1)
+        batch_size = img.size(0)
+        for i in range(0, len(windows), crop_batch_size):
+            batch_windows = windows[i:i + crop_batch_size]
+            crop_imgs = torch.cat(
+                [img[:, :, y1:y2, x1:x2] for y1, y2, x1, x2 in batch_windows])
+            crop_seg_logits = self.encode_decode(crop_imgs, img_meta)
+            yield from zip(batch_windows, crop_seg_logits.split(batch_size))
+
+    def slide_inference(self, img, img_meta, rescale):
+        """Inference by sliding-window with overlap.
+
+        The logits of the windows are averaged, or blended with the weight
+        given by ``test_cfg.window``. If ``test_cfg.accumulator`` is 'cpu',
+        the logits of the whole image are accumulated on CPU instead of the
+        device of the image. The 'argmax' accumulator is only used by
+        :meth:`simple_test`, the logits are accumulated on the device here.
+        """
+
+        batch_size, _, h_img, w_img = img.size()
+        windows = self._slide_windows(h_img, w_img)
+        weight = self._slide_window_weight(img.device)
+        device = img.device
+        if self.test_cfg.get('accumulator', 'device') == 'cpu':
+            device = torch.device('cpu')
+        count = 1 if weight is None else weight.to(device)
+        preds = img.new_zeros((batch_size, self.num_classes, h_img, w_img),
+                              device=device)
+        count_mat = img.new_zeros((batch_size, 1, h_img, w_img), device=device)
+        for (y1, y2, x1, x2), crop_seg_logit in self._forward_slide_windows(
+                img, img_meta, windows):
+            if weight is not None:
+                crop_seg_logit = crop_seg_logit * weight
+            if torch.onnx.is_in_onnx_export():
                 preds += F.pad(crop_seg_logit,
                                (int(x1), int(preds.shape[3] - x2), int(y1),
                                 int(preds.shape[2] - y2)))
-
-                count_mat[:, :, y1:y2, x1:x2] += 1
+            else:
+                preds[:, :, y1:y2, x1:x2] += crop_seg_logit.to(device)
+            count_mat[:, :, y1:y2, x1:x2] += count
         assert (count_mat == 0).sum() == 0
         if torch.onnx.is_in_onnx_export():
             # cast count_mat to constant while exporting to ONNX
@@ -209,6 +349,64 @@ class EncoderDecoder(BaseSegmentor):
                 warning=False)
         return preds
 
+    def slide_argmax_inference(self, img, img_meta, rescale):
+        """Inference by sliding-window with a running argmax.
+
+        The windows are processed row by row. Once the windows covering a
+        row of pixels are all processed, the row is final: its logits are
+        rescaled, reduced to labels and released. Only the logits of a strip
+        of about ``crop_size[0] + stride[0]`` rows are kept, on the device
+        of the image. The rows are rescaled separately from the columns, so
+        the labels match the argmax of :meth:`slide_inference` up to float
+        ties.
+
+        Returns:
+            Tensor: The labels of shape (N, H, W), on CPU.
+        """
+
+        batch_size, _, h_img, w_img = img.size()
+        windows = self._slide_windows(h_img, w_img)
+        weight = self._slide_window_weight(img.device)
+        count = 1 if weight is None else weight
+        if rescale:
+            h_out, w_out = img_meta[0]['ori_shape'][:2]
+        else:
+            h_out, w_out = h_img, w_img
+        rescaler = _RowRescaler(h_img, h_out, w_out, self.align_corners)
+        seg_pred = torch.zeros((batch_size, h_out, w_out), dtype=torch.long)
+
+        # accumulated logits of the rows [base, base + h_crop)
+        base = 0
+        h_crop = self.test_cfg.crop_size[0]
+        preds = img.new_zeros((batch_size, self.num_classes, h_crop, w_img))
+        count_mat = img.new_zeros((batch_size, 1, h_crop, w_img))
+        for (y1, y2, x1, x2), crop_seg_logit in self._forward_slide_windows(
+                img, img_meta, windows):
+            if y1 > base:
+                # the rows above y1 are not covered by any other window
+                num_rows = y1 - base
+                # the rows must all be covered by the windows
+                assert num_rows <= h_crop
+                assert (count_mat[:, :, :num_rows] == 0).sum() == 0
+                rows, out_rows = rescaler.push(preds[:, :, :num_rows] /
+                                               count_mat[:, :, :num_rows])
+                seg_pred[:, out_rows] = rows.argmax(dim=1).cpu()
+                preds = preds.roll(-num_rows, dims=2)
+                preds[:, :, -num_rows:] = 0
+                count_mat = count_mat.roll(-num_rows, dims=2)
+                count_mat[:, :, -num_rows:] = 0
+                base = y1
+            if weight is not None:
+                crop_seg_logit = crop_seg_logit * weight
+            preds[:, :, :y2 - y1, x1:x2] += crop_seg_logit
+            count_mat[:, :, :y2 - y1, x1:x2] += count
+        preds = preds[:, :, :h_img - base]
+        count_mat = count_mat[:, :, :h_img - base]
+        assert (count_mat == 0).sum() == 0
+        rows, out_rows = rescaler.push(preds / count_mat)
+        seg_pred[:, out_rows] = rows.argmax(dim=1).cpu()
+        return seg_pred
+
     def whole_inference(self, img, img_meta, rescale):
         """Inference with full image."""
 
@@ -223,7 +421,7 @@ class EncoderDecoder(BaseSegmentor):
 
         return seg_logit
 
-    def inference(self, img, img_meta, rescale):
+    def inference(self, img, img_meta, rescale, out_shape=None):
         """Inference with slide/whole style.
 
         Args:
@@ -234,6 +432,9 @@ class EncoderDecoder(BaseSegmentor):
                 For details on the values of these keys see
                 `mmseg/datasets/pipelines/formatting.py:Collect`.
             rescale (bool): Whether rescale back to original shape.
+            out_shape (tuple[int], optional): If specified, the logits are
+                resized to this shape instead, ``rescale`` must be False.
+                Default: None.
 
         Returns:
             Tensor: The output segmentation map.
@@ -242,24 +443,56 @@ class EncoderDecoder(BaseSegmentor):
         assert self.test_cfg.mode in ['slide', 'whole']
         ori_shape = img_meta[0]['ori_shape']
         assert all(_['ori_shape'] == ori_shape for _ in img_meta)
+        assert out_shape is None or not rescale
         if self.test_cfg.mode == 'slide':
             seg_logit = self.slide_inference(img, img_meta, rescale)
         else:
             seg_logit = self.whole_inference(img, img_meta, rescale)
+        if out_shape is not None:
+            seg_logit = resize(
+                seg_logit,
+                size=out_shape,
+                mode='bilinear',
+                align_corners=self.align_corners,
+                warning=False)
         output = F.softmax(seg_logit, dim=1)
-        flip = img_meta[0]['flip']
+        flips = [(_['flip'], _.get('flip_direction')) for _ in img_meta]
+        if all(flip == flips[0] for flip in flips):
+            output = self._flip_back(output, img_meta[0])
+        else:
+            # the images of the batch are flipped differently
+            output = torch.cat([
+                self._flip_back(output[i:i + 1], meta)
+                for i, meta in enumerate(img_meta)
+            ])
+
+        return output
+
+    @staticmethod
+    def _flip_back(output, img_meta):
+        """Flip the output of a flipped image back."""
+        flip = img_meta['flip']
         if flip:
-            flip_direction = img_meta[0]['flip_direction']
+            flip_direction = img_meta['flip_direction']
             assert flip_direction in ['horizontal', 'vertical']
             if flip_direction == 'horizontal':
                 output = output.flip(dims=(3, ))
             elif flip_direction == 'vertical':
                 output = output.flip(dims=(2, ))
-
         return output
 
     def simple_test(self, img, img_meta, rescale=True):
         """Simple test with single image."""
+        if (self.test_cfg.mode == 'slide'
+                and self.test_cfg.get('accumulator', 'device') == 'argmax'
+                and not torch.onnx.is_in_onnx_export()):
+            seg_pred = self.slide_argmax_inference(img, img_meta, rescale)
+            if img_meta[0]['flip']:
+                flip_direction = img_meta[0]['flip_direction']
+                assert flip_direction in ['horizontal', 'vertical']
+                seg_pred = seg_pred.flip(
+                    dims=(2, ) if flip_direction == 'horizontal' else (1, ))
+            return list(seg_pred.numpy())
         seg_logit = self.inference(img, img_meta, rescale)
         seg_pred = seg_logit.argmax(dim=1)
         if torch.onnx.is_in_onnx_export():
@@ -273,16 +506,58 @@ class EncoderDecoder(BaseSegmentor):
         """Test with augmentations.
 
         Only rescale=True is supported.
+
+        The softmax outputs of the augmentations are averaged. The following
+        optional keys of ``test_cfg`` reduce the memory of the merge:
+
+        - aug_batch (bool): Forward the augmented images of the same shape,
+          e.g. the flipped pairs, as a single batch. Default: False.
+        - aug_merge_scale (float): The outputs are merged at ``ori_shape``
+          scaled by this factor, and upsampled once at the end, a few rows at
+          a time. Default: 1.
+        - aug_merge_fp16 (bool): Merge the outputs in fp16. Default: False.
         """
         # aug_test rescale all imgs back to ori_shape for now
         assert rescale
-        # to save memory, we get augmented seg logit inplace
-        seg_logit = self.inference(imgs[0], img_metas[0], rescale)
+        aug_batch = self.test_cfg.get('aug_batch', False)
+        merge_scale = self.test_cfg.get('aug_merge_scale', 1)
+        merge_dtype = torch.float16 if self.test_cfg.get(
+            'aug_merge_fp16', False) else torch.float32
+        ori_h, ori_w = img_metas[0][0]['ori_shape'][:2]
+        merge_shape = (int(ori_h * merge_scale + 0.5),
+                       int(ori_w * merge_scale + 0.5))
+
+        # group the augmented images forwarded together
+        groups = [[0]]
         for i in range(1, len(imgs)):
-            cur_seg_logit = self.inference(imgs[i], img_metas[i], rescale)
-            seg_logit += cur_seg_logit
+            if aug_batch and imgs[i].shape == imgs[groups[-1][0]].shape:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+
+        # to save memory, we get augmented seg logit inplace
+        seg_logit = None
+        for group in groups:
+            group_seg_logits = self.inference(
+                torch.cat([imgs[i] for i in group]),
+                sum([img_metas[i] for i in group], []),
+                rescale=False,
+                out_shape=merge_shape)
+            for cur_seg_logit in group_seg_logits.split(imgs[0].size(0)):
+                if seg_logit is None:
+                    seg_logit = cur_seg_logit.to(merge_dtype)
+                else:
+                    seg_logit += cur_seg_logit.to(merge_dtype)
         seg_logit /= len(imgs)
-        seg_pred = seg_logit.argmax(dim=1)
+
+        # upsample to ori_shape and reduce to labels a few rows at a time
+        rescaler = _RowRescaler(merge_shape[0], ori_h, ori_w,
+                                self.align_corners)
+        seg_pred = seg_logit.new_zeros((seg_logit.size(0), ori_h, ori_w),
+                                       dtype=torch.long)
+        for rows in seg_logit.split(64, dim=2):
+            out, out_rows = rescaler.push(rows.float())
+            seg_pred[:, out_rows] = out.argmax(dim=1)
         seg_pred = seg_pred.cpu().numpy()
         # unravel batch dim
         seg_pred = list(seg_pred)
@@ -1,4 +1,5 @@
 import torch
+import torch.utils.checkpoint as cp
 from mmcv.cnn import ConvModule, constant_init
 from torch import nn as nn
 from torch.nn import functional as F
@@ -27,13 +28,30 @@ class SelfAttentionBlock(nn.Module):
         conv_cfg (dict|None): Config of conv layers.
         norm_cfg (dict|None): Config of norm layers.
         act_cfg (dict|None): Config of activation layers.
+        chunk_size (int|None): If specified, the attention is computed on
+            blocks of ``chunk_size`` queries and keys with a streaming
+            softmax, so the whole similarity map is never stored, and each
+            block of queries is recomputed in backward. Default: None.
     """
 
-    def __init__(self, key_in_channels, query_in_channels, channels,
-                 out_channels, share_key_query, query_downsample,
-                 key_downsample, key_query_num_convs, value_out_num_convs,
-                 key_query_norm, value_out_norm, matmul_norm, with_out,
-                 conv_cfg, norm_cfg, act_cfg):
+    def __init__(self,
+                 key_in_channels,
+                 query_in_channels,
+                 channels,
+                 out_channels,
+                 share_key_query,
+                 query_downsample,
+                 key_downsample,
+                 key_query_num_convs,
+                 value_out_num_convs,
+                 key_query_norm,
+                 value_out_norm,
+                 matmul_norm,
+                 with_out,
+                 conv_cfg,
+                 norm_cfg,
+                 act_cfg,
+                 chunk_size=None):
         super(SelfAttentionBlock, self).__init__()
         if share_key_query:
             assert key_in_channels == query_in_channels
@@ -87,6 +105,7 @@ class SelfAttentionBlock(nn.Module):
         self.query_downsample = query_downsample
         self.key_downsample = key_downsample
         self.matmul_norm = matmul_norm
+        self.chunk_size = chunk_size
 
         self.init_weights()
 
@@ -146,14 +165,68 @@ class SelfAttentionBlock(nn.Module):
         value = value.reshape(*value.shape[:2], -1)
         value = value.permute(0, 2, 1).contiguous()
 
-        sim_map = torch.matmul(query, key)
-        if self.matmul_norm:
-            sim_map = (self.channels**-.5) * sim_map
-        sim_map = F.softmax(sim_map, dim=-1)
+        if self.chunk_size is not None:
+            context = self.chunked_attention(query, key, value)
+        else:
+            sim_map = torch.matmul(query, key)
+            if self.matmul_norm:
+                sim_map = (self.channels**-.5) * sim_map
+            sim_map = F.softmax(sim_map, dim=-1)
 
-        context = torch.matmul(sim_map, value)
+            context = torch.matmul(sim_map, value)
         context = context.permute(0, 2, 1).contiguous()
         context = context.reshape(batch_size, -1, *query_feats.shape[2:])
         if self.out_project is not None:
             context = self.out_project(context)
         return context
+
+    def chunked_attention(self, query, key, value):
+        """Attention computed on blocks of queries.
+
+        Args:
+            query (Tensor): The query of shape (N, HW_q, C).
+            key (Tensor): The key of shape (N, C, HW_k).
+            value (Tensor): The value of shape (N, HW_k, C_v).
+
+        Returns:
+            Tensor: The context of shape (N, HW_q, C_v).
+        """
+        with_cp = torch.is_grad_enabled() and any(
+            x.requires_grad for x in (query, key, value))
+        contexts = []
+        for query_chunk in query.split(self.chunk_size, dim=1):
+            if with_cp:
+                context = cp.checkpoint(self._streaming_attention, query_chunk,
+                                        key, value)
+            else:
+                context = self._streaming_attention(query_chunk, key, value)
+            contexts.append(context)
+        return torch.cat(contexts, dim=1)
+
+    def _streaming_attention(self, query, key, value):
+        """Attention of some queries with the softmax accumulated over blocks
+        of keys, rescaling the partial sums whenever the running maximum of
+        the similarities increases."""
+        max_sim = None
+        for key_chunk, value_chunk in zip(
+                key.split(self.chunk_size, dim=2),
+                value.split(self.chunk_size, dim=1)):
+            sim_map = torch.matmul(query, key_chunk)
+            if self.matmul_norm:
+                sim_map = (self.channels**-.5) * sim_map
+            chunk_max = sim_map.max(dim=-1, keepdim=True)[0]
+            if max_sim is None:
+                max_sim = chunk_max
+                exp_sim = torch.exp(sim_map - max_sim)
+                sum_exp = exp_sim.sum(dim=-1, keepdim=True)
+                context = torch.matmul(exp_sim, value_chunk)
+            else:
+                new_max_sim = torch.max(max_sim, chunk_max)
+                correction = torch.exp(max_sim - new_max_sim)
+                exp_sim = torch.exp(sim_map - new_max_sim)
+                sum_exp = sum_exp * correction + exp_sim.sum(
+                    dim=-1, keepdim=True)
+                context = context * correction + torch.matmul(
+                    exp_sim, value_chunk)
+                max_sim = new_max_sim
+        return context / sum_exp
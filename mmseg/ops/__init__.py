@@ -1,5 +1,8 @@
 from .encoding import Encoding
 from .separable_conv_module import DepthwiseSeparableConvModule
-from .wrappers import resize
+from .wrappers import bilinear_rows, resize, resize_rows
 
-__all__ = ['resize', 'DepthwiseSeparableConvModule', 'Encoding']
+__all__ = [
+    'resize', 'resize_rows', 'bilinear_rows', 'DepthwiseSeparableConvModule',
+    'Encoding'
+]
@@ -12,12 +12,18 @@ class Encoding(nn.Module):
     Args:
         channels: dimension of the features or feature channels
         num_codes: number of code words
+        memory_efficient (bool): Whether to compute the scaled L2 distances
+            and the aggregation with matrix multiplications instead of
+            expanding the features to (batch_size, height x width, num_codes,
+            channels). It gives the same results with much less memory.
+            Default: False.
     """
 
-    def __init__(self, channels, num_codes):
+    def __init__(self, channels, num_codes, memory_efficient=False):
         super(Encoding, self).__init__()
         # init codewords and smoothing factor
         self.channels, self.num_codes = channels, num_codes
+        self.memory_efficient = memory_efficient
         std = 1. / ((num_codes * channels)**0.5)
         # [num_codes, channels]
         self.codewords = nn.Parameter(
@@ -54,17 +60,49 @@ class Encoding(nn.Module):
                         (expanded_x - reshaped_codewords)).sum(dim=1)
         return encoded_feat
 
+    @staticmethod
+    def scaled_l2_matmul(x, codewords, scale):
+        """Memory efficient version of :meth:`scaled_l2`.
+
+        It uses the identity ||x - c||^2 = ||x||^2 - 2x.c + ||c||^2.
+        """
+        # [batch_size, height x width, num_codes]
+        l2_norm = torch.matmul(x, codewords.t()).mul_(-2)
+        l2_norm = l2_norm + x.pow(2).sum(dim=2, keepdim=True)
+        l2_norm = l2_norm + codewords.pow(2).sum(dim=1)
+        # remove the negative values caused by rounding errors
+        scaled_l2_norm = scale.view(
+            (1, 1, codewords.size(0))) * l2_norm.clamp(min=0)
+        return scaled_l2_norm
+
+    @staticmethod
+    def aggregate_matmul(assigment_weights, x, codewords):
+        """Memory efficient version of :meth:`aggregate`.
+
+        It uses the identity
+        sum_i(a_ik * (x_i - c_k)) = sum_i(a_ik * x_i) - sum_i(a_ik) * c_k.
+        """
+        # [batch_size, num_codes, channels]
+        encoded_feat = torch.bmm(assigment_weights.transpose(1, 2), x)
+        encoded_feat = encoded_feat - assigment_weights.sum(
+            dim=1).unsqueeze(2) * codewords.unsqueeze(0)
+        return encoded_feat
+
     def forward(self, x):
         assert x.dim() == 4 and x.size(1) == self.channels
         # [batch_size, channels, height, width]
         batch_size = x.size(0)
         # [batch_size, height x width, channels]
         x = x.view(batch_size, self.channels, -1).transpose(1, 2).contiguous()
+        if self.memory_efficient:
+            scaled_l2, aggregate = self.scaled_l2_matmul, self.aggregate_matmul
+        else:
+            scaled_l2, aggregate = self.scaled_l2, self.aggregate
         # assignment_weights: [batch_size, channels, num_codes]
         assigment_weights = F.softmax(
-            self.scaled_l2(x, self.codewords, self.scale), dim=2)
+            scaled_l2(x, self.codewords, self.scale), dim=2)
         # aggregate
-        encoded_feat = self.aggregate(assigment_weights, x, self.codewords)
+        encoded_feat = aggregate(assigment_weights, x, self.codewords)
         return encoded_feat
 
     def __repr__(self):
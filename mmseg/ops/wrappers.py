@@ -1,5 +1,6 @@
 import warnings
 
+import torch
 import torch.nn.functional as F
 
 
@@ -23,3 +24,63 @@ def resize(input,
                         f'input size {(input_h, input_w)} is `x+1` and '
                         f'out size {(output_h, output_w)} is `nx+1`')
     return F.interpolate(input, size, scale_factor, mode, align_corners)
+
+
+def bilinear_rows(h_in, h_out, align_corners=None):
+    """Get the input rows ``F.interpolate`` samples each output row from.
+
+    In bilinear mode, output row ``i`` is
+    ``input[y0[i]] * (1 - lambda1[i]) + input[y1[i]] * lambda1[i]``.
+
+    Args:
+        h_in (int): Height of the input.
+        h_out (int): Height of the output.
+        align_corners (bool): align_corners argument of ``F.interpolate``.
+            Default: None.
+
+    Returns:
+        tuple[Tensor]: ``y0`` and ``y1`` of shape (h_out, ), the indices of
+            the input rows, and ``lambda1`` of shape (h_out, ), the float64
+            weights of the ``y1`` rows.
+    """
+    dst = torch.arange(h_out, dtype=torch.float64)
+    if align_corners:
+        scale = (h_in - 1) / (h_out - 1) if h_out > 1 else 0
+        src = dst * scale
+    else:
+        src = ((dst + 0.5) * h_in / h_out - 0.5).clamp(min=0)
+    y0 = src.long()
+    y1 = (y0 + 1).clamp(max=h_in - 1)
+    return y0, y1, src - y0
+
+
+def resize_rows(input, rows, size, align_corners=None):
+    """Bilinearly resize the input and only compute some rows of the output.
+
+    The rows are interpolated with the same sampling as ``F.interpolate``,
+    see :func:`bilinear_rows`, only the input rows they are interpolated from
+    are gathered, so the memory is proportional to the number of output rows.
+
+    Args:
+        input (Tensor): The input of shape (N, C, H, W).
+        rows (slice): The rows of the output to compute.
+        size (tuple[int]): The (h, w) of the whole output.
+        align_corners (bool): align_corners argument of ``F.interpolate``.
+            Default: None.
+
+    Returns:
+        Tensor: The output rows of shape (N, C, len(rows), w).
+    """
+    h_out, w_out = size
+    y0, y1, lambda1 = bilinear_rows(input.size(2), h_out, align_corners)
+    lambda1 = lambda1[rows].to(input)[:, None]
+    top = input[:, :, y0[rows].to(input.device)]
+    bottom = input[:, :, y1[rows].to(input.device)]
+    output = top * (1 - lambda1) + bottom * lambda1
+    if output.size(3) != w_out:
+        output = F.interpolate(
+            output,
+            size=(output.size(2), w_out),
+            mode='bilinear',
+            align_corners=align_corners)
+    return output
@@ -188,6 +188,87 @@ def test_yolo_anchor_generator():
     assert len(anchors) == 3
 
 
+def test_anchor_generator_cache():
+    from mmdet.core.anchor import build_anchor_generator
+    anchor_generator_cfgs = [
+        dict(
+            type='AnchorGenerator',
+            octave_base_scale=4,
+            scales_per_octave=3,
+            ratios=[0.5, 1.0, 2.0],
+            strides=[8, 16]),
+        dict(
+            type='SSDAnchorGenerator',
+            scale_major=False,
+            input_size=300,
+            basesize_ratio_range=(0.15, 0.9),
+            strides=[8, 16, 32],
+            ratios=[[2], [2, 3], [2, 3]]),
+        dict(
+            type='LegacyAnchorGenerator',
+            scales=[8],
+            ratios=[0.5, 1.0, 2.0],
+            strides=[4, 8]),
+        dict(
+            type='YOLOAnchorGenerator',
+            strides=[32, 16],
+            base_sizes=[[(116, 90), (156, 198)], [(30, 61), (62, 45)]])
+    ]
+    for cfg in anchor_generator_cfgs:
+        anchor_generator = build_anchor_generator(cfg)
+        featmap_sizes = [(13 // 2**i, 17 // 2**i)
+                         for i in range(anchor_generator.num_levels)]
+        uncached = build_anchor_generator(dict(cfg, cache_size=0))
+
+        anchors = anchor_generator.grid_anchors(featmap_sizes, device='cpu')
+        cached_anchors = anchor_generator.grid_anchors(
+            featmap_sizes, device='cpu')
+        expected_anchors = uncached.grid_anchors(featmap_sizes, device='cpu')
+        for anchor, cached_anchor, expected_anchor in zip(
+                anchors, cached_anchors, expected_anchors):
+            assert cached_anchor is anchor
+            assert torch.equal(anchor, expected_anchor)
+        double_anchors = anchor_generator.grid_anchors(
+            featmap_sizes, device='cpu', dtype=torch.float64)
+        assert double_anchors[0].dtype == torch.float64
+        assert torch.allclose(double_anchors[0].float(), anchors[0])
+
+        flags = anchor_generator.valid_flags(featmap_sizes, (96, 100, 3),
+                                             'cpu')
+        cached_flags = anchor_generator.valid_flags(featmap_sizes, (96, 100),
+                                                    'cpu')
+        other_flags = anchor_generator.valid_flags(featmap_sizes, (64, 64, 3),
+                                                   'cpu')
+        expected_flags = uncached.valid_flags(featmap_sizes, (96, 100, 3),
+                                              'cpu')
+        for flag, cached_flag, expected_flag in zip(flags, cached_flags,
+                                                    expected_flags):
+            assert cached_flag is flag
+            assert torch.equal(flag, expected_flag)
+        assert not all(
+            torch.equal(flag, other_flag)
+            for flag, other_flag in zip(flags, other_flags))
+
+        assert anchor_generator.cache_info() == dict(
+            anchor_hits=1,
+            anchor_misses=2,
+            anchor_hit_rate=1 / 3,
+            flag_hits=1,
+            flag_misses=2,
+            flag_hit_rate=1 / 3)
+        assert uncached.cache_info()['anchor_hits'] == 0
+        assert len(uncached.anchor_cache) == 0
+
+    # the least recently used entry is evicted
+    anchor_generator = build_anchor_generator(
+        dict(anchor_generator_cfgs[0], cache_size=2))
+    for featmap_size in [(4, 4), (8, 8), (4, 4), (16, 16), (8, 8)]:
+        anchor_generator.grid_anchors([featmap_size, featmap_size], 'cpu')
+    assert len(anchor_generator.anchor_cache) == 2
+    assert anchor_generator.anchor_cache.hits == 1
+    assert anchor_generator.anchor_cache.misses == 4
+
+
 def test_retina_anchor():
     from mmdet.models import build_head
     if torch.cuda.is_available():
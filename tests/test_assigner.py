@@ -4,9 +4,10 @@ CommandLine:
     pytest tests/test_assigner.py
     xdoctest tests/test_assigner.py zero
 """
+import pytest
 import torch
 
-from mmdet.core.bbox.assigners import (ApproxMaxIoUAssigner,
+from mmdet.core.bbox.assigners import (ApproxMaxIoUAssigner, ATSSAssigner,
                                        CenterRegionAssigner, MaxIoUAssigner,
                                        PointAssigner)
 
@@ -376,3 +377,158 @@ def test_center_region_assigner_with_empty_gts():
     assert len(assign_result.gt_inds) == 2
     expected_gt_inds = torch.LongTensor([0, 0])
     assert torch.all(assign_result.gt_inds == expected_gt_inds)
+
+
+def _random_batch(num_imgs=3, seed=0):
+    """Multi-level grid anchors, with gts, ignored gts and valid flags."""
+    rng = torch.Generator().manual_seed(seed)
+    num_level_bboxes = []
+    anchors = []
+    for stride in [8, 16, 32]:
+        ys, xs = torch.meshgrid(
+            torch.arange(0, 128, stride), torch.arange(0, 128, stride))
+        centers = torch.stack([xs, ys], dim=-1).view(-1, 2).float()
+        anchors.append(
+            torch.cat([centers - stride * 2, centers + stride * 2], dim=1))
+        num_level_bboxes.append(centers.size(0))
+    bboxes = torch.cat(anchors)[None].repeat(num_imgs, 1, 1)
+    bboxes += torch.rand(bboxes.shape, generator=rng)
+
+    def _rand_bboxes(num):
+        xy = torch.rand(num, 2, generator=rng) * 100
+        wh = torch.rand(num, 2, generator=rng) * 60 + 2
+        return torch.cat([xy, xy + wh], dim=1)
+
+    # the last image has no gts at all
+    gt_bboxes_list = [_rand_bboxes(num) for num in [7, 2, 0][:num_imgs]]
+    gt_labels_list = [
+        torch.randint(0, 5, (gt_bboxes.size(0), ), generator=rng)
+        for gt_bboxes in gt_bboxes_list
+    ]
+    gt_bboxes_ignore_list = [_rand_bboxes(1), None, _rand_bboxes(2)]
+    valid_flags = torch.rand(bboxes.shape[:2], generator=rng) > 0.2
+    return (bboxes, num_level_bboxes, gt_bboxes_list, gt_labels_list,
+            gt_bboxes_ignore_list[:num_imgs], valid_flags)
+
+
+def _assert_same_assign_result(result, expected):
+    assert result.num_gts == expected.num_gts
+    assert torch.equal(result.gt_inds, expected.gt_inds)
+    assert torch.allclose(result.max_overlaps, expected.max_overlaps)
+    if expected.labels is None:
+        assert result.labels is None
+    else:
+        assert torch.equal(result.labels, expected.labels)
+
+
+@pytest.mark.parametrize('gt_max_assign_all', [True, False])
+@pytest.mark.parametrize('ignore_wrt_candidates', [True, False])
+def test_max_iou_assigner_batch(gt_max_assign_all, ignore_wrt_candidates):
+    self = MaxIoUAssigner(
+        pos_iou_thr=0.5,
+        neg_iou_thr=0.4,
+        min_pos_iou=0,
+        gt_max_assign_all=gt_max_assign_all,
+        ignore_iof_thr=0.5,
+        ignore_wrt_candidates=ignore_wrt_candidates)
+    (bboxes, _, gt_bboxes_list, gt_labels_list, gt_bboxes_ignore_list,
+     valid_flags) = _random_batch()
+    assign_results = self.assign_batch(bboxes, gt_bboxes_list,
+                                       gt_bboxes_ignore_list, gt_labels_list,
+                                       valid_flags)
+    assert len(assign_results) == 3
+    for i, assign_result in enumerate(assign_results):
+        _assert_same_assign_result(
+            assign_result,
+            self.assign(bboxes[i][valid_flags[i]], gt_bboxes_list[i],
+                        gt_bboxes_ignore_list[i], gt_labels_list[i]))
+
+    # no gts and no labels in the whole batch
+    assign_results = self.assign_batch(bboxes[:1], [torch.zeros((0, 4))])
+    assert torch.all(assign_results[0].gt_inds == 0)
+    assert assign_results[0].labels is None
+
+
+def test_max_iou_assigner_low_quality_match():
+    """The vectorized low-quality matching gives a bbox matched by several
+    gts to the last one, like matching the gts one after another."""
+    self = MaxIoUAssigner(pos_iou_thr=0.9, neg_iou_thr=0.1)
+    bboxes = torch.FloatTensor([
+        [0, 0, 10, 10],
+        [20, 20, 30, 30],
+    ])
+    gt_bboxes = torch.FloatTensor([
+        [0, 0, 10, 12],
+        [0, 0, 12, 10],
+        [21, 21, 30, 30],
+    ])
+    assign_result = self.assign(bboxes, gt_bboxes)
+    assert torch.equal(assign_result.gt_inds, torch.LongTensor([2, 3]))
+
+
+def test_atss_assigner_batch():
+    # topk is larger than the valid bboxes of the coarsest level
+    self = ATSSAssigner(topk=15, ignore_iof_thr=0.5)
+    (bboxes, num_level_bboxes, gt_bboxes_list, gt_labels_list,
+     gt_bboxes_ignore_list, valid_flags) = _random_batch()
+    assign_results = self.assign_batch(bboxes, num_level_bboxes,
+                                       gt_bboxes_list, gt_bboxes_ignore_list,
+                                       gt_labels_list, valid_flags)
+    assert len(assign_results) == 3
+    for i, assign_result in enumerate(assign_results):
+        num_level_bboxes_valid = [
+            int(flags.sum())
+            for flags in valid_flags[i].split(num_level_bboxes)
+        ]
+        _assert_same_assign_result(
+            assign_result,
+            self.assign(bboxes[i][valid_flags[i]], num_level_bboxes_valid,
+                        gt_bboxes_list[i], gt_bboxes_ignore_list[i],
+                        gt_labels_list[i]))
+    assert (assign_results[0].gt_inds > 0).any()
+
+
+@pytest.mark.parametrize('gt_max_assign_all', [True, False])
+@pytest.mark.parametrize('chunk_size', [1, 100, 10000])
+def test_max_iou_assigner_chunked(gt_max_assign_all, chunk_size):
+    (bboxes, _, gt_bboxes_list, gt_labels_list, gt_bboxes_ignore_list,
+     _) = _random_batch()
+    kwargs = dict(
+        pos_iou_thr=0.5,
+        neg_iou_thr=0.4,
+        min_pos_iou=0,
+        gt_max_assign_all=gt_max_assign_all,
+        ignore_iof_thr=0.5)
+    self = MaxIoUAssigner(**kwargs)
+    chunked = MaxIoUAssigner(chunk_size=chunk_size, **kwargs)
+    for i in range(bboxes.size(0)):
+        args = (bboxes[i], gt_bboxes_list[i], gt_bboxes_ignore_list[i],
+                gt_labels_list[i])
+        _assert_same_assign_result(chunked.assign(*args), self.assign(*args))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 100])
+def test_approx_iou_assigner_chunked(chunk_size):
+    (bboxes, _, gt_bboxes_list, gt_labels_list, gt_bboxes_ignore_list,
+     _) = _random_batch()
+    kwargs = dict(pos_iou_thr=0.5, neg_iou_thr=0.4, ignore_iof_thr=0.5)
+    self = ApproxMaxIoUAssigner(**kwargs)
+    chunked = ApproxMaxIoUAssigner(chunk_size=chunk_size, **kwargs)
+    squares = bboxes[0]
+    # 3 jittered approxs per square
+    approxs = squares[:, None, :] + torch.randn(squares.size(0), 3, 4)
+    args = (approxs.view(-1, 4), squares, 3, gt_bboxes_list[0],
+            gt_bboxes_ignore_list[0], gt_labels_list[0])
+    _assert_same_assign_result(chunked.assign(*args), self.assign(*args))
+
+
+@pytest.mark.parametrize('chunk_size', [5, 100, 10000])
+def test_atss_assigner_chunked(chunk_size):
+    (bboxes, num_level_bboxes, gt_bboxes_list, gt_labels_list,
+     gt_bboxes_ignore_list, _) = _random_batch()
+    self = ATSSAssigner(topk=9, ignore_iof_thr=0.5)
+    chunked = ATSSAssigner(topk=9, ignore_iof_thr=0.5, chunk_size=chunk_size)
+    for i in range(bboxes.size(0)):
+        args = (bboxes[i], num_level_bboxes, gt_bboxes_list[i],
+                gt_bboxes_ignore_list[i], gt_labels_list[i])
+        _assert_same_assign_result(chunked.assign(*args), self.assign(*args))
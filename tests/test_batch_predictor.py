@@ -0,0 +1,80 @@
+import asyncio
+import os.path as osp
+
+import mmcv
+import numpy as np
+import pytest
+
+from mmdet.apis import (BatchPredictor, MicroBatchInference,
+                        inference_detector, init_detector)
+
+
+@pytest.fixture(scope='module')
+def model():
+    project_dir = osp.abspath(osp.dirname(osp.dirname(__file__)))
+    config = mmcv.Config.fromfile(
+        osp.join(project_dir,
+                 'configs/retinanet/retinanet_r50_fpn_1x_coco.py'))
+    return init_detector(config, device='cpu')
+
+
+def test_batch_predictor(model):
+    predictor = BatchPredictor(model, num_workers=2)
+
+    # images of different sizes are padded into one batch
+    rng = np.random.RandomState(0)
+    imgs = [
+        rng.randint(0, 255, (200, 300, 3), dtype=np.uint8),
+        rng.randint(0, 255, (300, 200, 3), dtype=np.uint8),
+    ]
+    datas = [predictor.preprocess(img) for img in imgs]
+    data = predictor.collate(datas)
+    assert data['img'][0].shape[0] == 2
+    assert [meta['ori_shape'] for meta in data['img_metas'][0]] == \
+        [img.shape for img in imgs]
+
+    # a batch of same sized images gives the same results as one by one
+    imgs = [imgs[0], imgs[0][::-1].copy()]
+    results = predictor(imgs)
+    assert len(results) == 2
+    for img, result in zip(imgs, results):
+        expected = inference_detector(model, img)
+        assert len(result) == len(expected) == model.bbox_head.num_classes
+        for bboxes, expected_bboxes in zip(result, expected):
+            np.testing.assert_allclose(
+                bboxes, expected_bboxes, rtol=1e-4, atol=1e-3)
+
+    # a single image gives a single result
+    result = predictor(imgs[0])
+    assert len(result) == model.bbox_head.num_classes
+    assert predictor([]) == []
+    predictor.close()
+
+
+def test_micro_batch_inference(model):
+    rng = np.random.RandomState(0)
+    imgs = [
+        rng.randint(0, 255, (200, 300, 3), dtype=np.uint8) for _ in range(5)
+    ]
+
+    async def run():
+        server = MicroBatchInference(model, max_batch_size=4, max_wait_ms=2000)
+        async with server:
+            results = await asyncio.gather(
+                *[server.infer(img) for img in imgs])
+        server.close()
+        return server, results
+
+    loop = asyncio.new_event_loop()
+    try:
+        server, results = loop.run_until_complete(run())
+    finally:
+        loop.close()
+    # 4 images fill the first batch, the last one waits until the deadline
+    assert server.batch_sizes == [4, 1]
+    assert len(results) == len(imgs)
+    for img, result in zip(imgs, results):
+        expected = inference_detector(model, img)
+        for bboxes, expected_bboxes in zip(result, expected):
+            np.testing.assert_allclose(
+                bboxes, expected_bboxes, rtol=1e-4, atol=1e-3)
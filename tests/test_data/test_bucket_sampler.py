@@ -0,0 +1,108 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from mmdet.datasets import AspectRatioBucketSampler, build_dataloader
+from mmdet.datasets.samplers import get_img_shapes
+
+
+def _create_dataset(num_imgs=50, seed=0):
+    rng = np.random.RandomState(seed)
+    heights = rng.randint(200, 800, num_imgs)
+    ratios = rng.choice([0.5, 0.75, 4 / 3, 16 / 9, 21 / 9], num_imgs)
+    dataset = MagicMock(spec=['data_infos', '__len__'])
+    dataset.data_infos = [
+        dict(height=int(h), width=int(h * r)) for h, r in zip(heights, ratios)
+    ]
+    dataset.__len__.return_value = num_imgs
+    return dataset
+
+
+def test_get_img_shapes():
+    dataset = _create_dataset(10)
+    img_shapes = get_img_shapes(dataset)
+    assert img_shapes.shape == (10, 2)
+    assert img_shapes[3].tolist() == [
+        dataset.data_infos[3]['height'], dataset.data_infos[3]['width']
+    ]
+
+    concat_dataset = MagicMock(spec=['datasets'])
+    concat_dataset.datasets = [dataset, _create_dataset(5)]
+    assert get_img_shapes(concat_dataset).shape == (15, 2)
+
+    repeat_dataset = MagicMock(spec=['dataset', 'times'])
+    repeat_dataset.dataset = dataset
+    repeat_dataset.times = 3
+    assert np.array_equal(
+        get_img_shapes(repeat_dataset), np.tile(img_shapes, (3, 1)))
+
+    balanced_dataset = MagicMock(spec=['dataset', 'repeat_indices'])
+    balanced_dataset.dataset = dataset
+    balanced_dataset.repeat_indices = [0, 0, 4]
+    assert np.array_equal(
+        get_img_shapes(balanced_dataset), img_shapes[[0, 0, 4]])
+
+    with pytest.raises(AssertionError):
+        get_img_shapes(MagicMock(spec=[]))
+
+
+@pytest.mark.parametrize('num_replicas', [1, 3])
+@pytest.mark.parametrize('samples_per_gpu', [1, 4])
+def test_aspect_ratio_bucket_sampler(num_replicas, samples_per_gpu):
+    dataset = _create_dataset()
+    samplers = [
+        AspectRatioBucketSampler(
+            dataset, samples_per_gpu, num_replicas, rank, seed=1)
+        for rank in range(num_replicas)
+    ]
+    indices = [list(sampler) for sampler in samplers]
+    for sampler, rank_indices in zip(samplers, indices):
+        assert len(rank_indices) == len(sampler)
+        # the images of a batch are in the same bucket
+        batches = np.array(rank_indices).reshape(-1, samples_per_gpu)
+        assert (sampler.flag[batches] == sampler.flag[batches[:, :1]]).all()
+        assert 0 <= sampler.padding_fraction < 1
+    # all the images are sampled
+    assert set(sum(indices, [])) == set(range(len(dataset)))
+
+    # same seed and epoch give the same order, other epochs do not
+    sampler = AspectRatioBucketSampler(
+        dataset, samples_per_gpu, num_replicas, 0, seed=1)
+    assert list(sampler) == indices[0]
+    assert sampler.epoch == 1
+    assert list(sampler) != indices[0]
+    sampler.set_epoch(0)
+    assert list(sampler) == indices[0]
+
+
+def test_aspect_ratio_bucket_sampler_padding():
+    dataset = _create_dataset(200)
+    # a single bucket of aspect ratios is the same as no bucketing
+    coarse_sampler = AspectRatioBucketSampler(
+        dataset, 8, 1, 0, ratio_bounds=(), img_scale=(1333, 800))
+    fine_sampler = AspectRatioBucketSampler(
+        dataset, 8, 1, 0, img_scale=(1333, 800))
+    list(coarse_sampler)
+    list(fine_sampler)
+    assert fine_sampler.padding_fraction < coarse_sampler.padding_fraction
+    # the rescaled images fit in the scale
+    assert (fine_sampler.img_shapes.max(axis=1) <= 1333).all()
+    assert (fine_sampler.img_shapes.min(axis=1) <= 800).all()
+
+    # the size buckets split the aspect ratio buckets further
+    size_sampler = AspectRatioBucketSampler(
+        dataset, 8, 1, 0, size_bounds=(400, 600))
+    list(size_sampler)
+    assert size_sampler.group_sizes.size > fine_sampler.group_sizes.size
+
+    # measure_padding of batches of a single shape
+    assert fine_sampler.measure_padding(np.zeros((2, 8), dtype=int)) == 0
+
+
+def test_build_dataloader_with_bucket_sampler():
+    dataset = _create_dataset()
+    data_loader = build_dataloader(
+        dataset, 2, 0, dist=False, seed=0, bucket_cfg=dict(ratio_bounds=[1]))
+    assert isinstance(data_loader.sampler, AspectRatioBucketSampler)
+    assert data_loader.sampler.group_sizes.size == 2
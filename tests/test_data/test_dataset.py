@@ -1,6 +1,7 @@
 import bisect
 import logging
 import math
+import os
 import os.path as osp
 import tempfile
 from collections import defaultdict
@@ -17,7 +18,7 @@ from torch.utils.data import DataLoader
 from mmdet.core.evaluation import DistEvalHook, EvalHook
 from mmdet.datasets import (DATASETS, ClassBalancedDataset, CocoDataset,
                             ConcatDataset, CustomDataset, RepeatDataset,
-                            build_dataset)
+                            XMLDataset, build_dataset)
 
 
 def _create_dummy_coco_json(json_name):
@@ -204,6 +205,125 @@ def test_dataset_evaluation():
     tmp_dir.cleanup()
 
 
+def _assert_same_ann_info(ann_info, indexed_ann_info):
+    assert ann_info.keys() == indexed_ann_info.keys()
+    for key, value in ann_info.items():
+        if isinstance(value, np.ndarray):
+            assert value.dtype == indexed_ann_info[key].dtype
+            assert np.array_equal(value, indexed_ann_info[key])
+        else:
+            assert value == indexed_ann_info[key]
+
+
+def test_coco_dataset_ann_index():
+    tmp_dir = tempfile.TemporaryDirectory()
+    rng = np.random.RandomState(0)
+    images, annotations = [], []
+    for img_id in range(6):
+        images.append(
+            dict(id=img_id, width=640, height=480, file_name=f'{img_id}.jpg'))
+        for _ in range(rng.randint(0, 5)):
+            x, y, w, h = (rng.rand(4) * 200 + 2).tolist()
+            annotations.append(
+                dict(
+                    id=len(annotations) + 1,
+                    image_id=img_id,
+                    category_id=rng.randint(1, 4),
+                    area=w * h,
+                    bbox=[x, y, w, h],
+                    iscrowd=int(rng.rand() < 0.2),
+                    segmentation=[[x, y, x + w, y, x + w, y + h]] *
+                    rng.randint(1, 3)))
+    categories = [
+        dict(id=cat_id, name=name)
+        for cat_id, name in enumerate(['car', 'bus', 'bike'], 1)
+    ]
+    ann_file = osp.join(tmp_dir.name, 'ann.json')
+    mmcv.dump(
+        dict(images=images, annotations=annotations, categories=categories),
+        ann_file)
+    index_dir = osp.join(tmp_dir.name, 'index')
+
+    dataset = CocoDataset(ann_file, [], classes=('car', 'bus'))
+    # the first dataset builds the index and the second one loads it
+    for _ in range(2):
+        indexed_dataset = CocoDataset(
+            ann_file, [], classes=('car', 'bus'), ann_index_dir=index_dir)
+        assert indexed_dataset.ann_index is not None
+        assert len(indexed_dataset) == len(dataset)
+        for i in range(len(dataset)):
+            _assert_same_ann_info(
+                dataset.get_ann_info(i), indexed_dataset.get_ann_info(i))
+            assert dataset.get_cat_ids(i) == indexed_dataset.get_cat_ids(i)
+    assert len(os.listdir(index_dir)) == 1
+
+    # the index is rebuilt with other classes or a modified annotation file
+    CocoDataset(ann_file, [], classes=('car', ), ann_index_dir=index_dir)
+    assert len(os.listdir(index_dir)) == 2
+    mmcv.dump(
+        dict(
+            images=images, annotations=annotations[:-1],
+            categories=categories), ann_file)
+    os.utime(ann_file, ns=(0, 0))
+    CocoDataset(ann_file, [], classes=('car', ), ann_index_dir=index_dir)
+    assert len(os.listdir(index_dir)) == 3
+    tmp_dir.cleanup()
+
+
+def test_xml_dataset_ann_index():
+    tmp_dir = tempfile.TemporaryDirectory()
+    os.makedirs(osp.join(tmp_dir.name, 'Annotations'))
+    rng = np.random.RandomState(0)
+    img_ids = [f'{i:06d}' for i in range(8)]
+    for img_id in img_ids:
+        objs = []
+        for _ in range(rng.randint(0, 5)):
+            x1, y1 = rng.randint(0, 200, 2)
+            x2, y2 = x1 + rng.randint(1, 100), y1 + rng.randint(1, 100)
+            objs.append(f"""
+                <object>
+                    <name>{rng.choice(['car', 'bus', 'cat'])}</name>
+                    <difficult>{int(rng.rand() < 0.2)}</difficult>
+                    <bndbox>
+                        <xmin>{x1}</xmin><ymin>{y1}</ymin>
+                        <xmax>{x2}</xmax><ymax>{y2}</ymax>
+                    </bndbox>
+                </object>""")
+        with open(osp.join(tmp_dir.name, 'Annotations', f'{img_id}.xml'),
+                  'w') as f:
+            f.write(f"""<annotation>
+                <size><width>400</width><height>300</height></size>
+                {''.join(objs)}
+            </annotation>""")
+    ann_file = osp.join(tmp_dir.name, 'ImageSets.txt')
+    with open(ann_file, 'w') as f:
+        f.write('\n'.join(img_ids))
+    index_dir = osp.join(tmp_dir.name, 'index')
+
+    kwargs = dict(
+        ann_file=ann_file,
+        pipeline=[],
+        classes=('car', 'bus'),
+        img_prefix=tmp_dir.name,
+        min_size=20)
+    dataset = XMLDataset(**kwargs)
+    ann_infos = [dataset.get_ann_info(i) for i in range(len(dataset))]
+    cat_ids = [dataset.get_cat_ids(i) for i in range(len(dataset))]
+    repeat_indices = ClassBalancedDataset(dataset, 0.5).repeat_indices
+    XMLDataset(ann_index_dir=index_dir, **kwargs)
+    # once the index is built, the XML files are not parsed any more
+    with patch('xml.etree.ElementTree.parse', side_effect=AssertionError):
+        indexed_dataset = XMLDataset(ann_index_dir=index_dir, **kwargs)
+        assert indexed_dataset.data_infos == dataset.data_infos
+        for i in range(len(dataset)):
+            _assert_same_ann_info(ann_infos[i],
+                                  indexed_dataset.get_ann_info(i))
+            assert cat_ids[i] == indexed_dataset.get_cat_ids(i)
+        assert ClassBalancedDataset(indexed_dataset,
+                                    0.5).repeat_indices == repeat_indices
+    tmp_dir.cleanup()
+
+
 @pytest.mark.parametrize('dataset',
                          ['CocoDataset', 'VOCDataset', 'CityscapesDataset'])
 def test_custom_classes_override_default(dataset):
@@ -8,7 +8,9 @@ import torch
 from mmcv.utils import build_from_cfg
 
 from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
+from mmdet.core.mask import BitmapMasks
 from mmdet.datasets.builder import PIPELINES
+from mmdet.datasets.pipelines import ExpandMinIoURandomCrop
 
 
 def test_resize():
@@ -278,6 +280,87 @@ def test_min_iou_random_crop():
         assert (ious_ignore >= mode).all()
 
 
+def test_min_iou_random_crop_sample_patch():
+    crop_module = build_from_cfg(dict(type='MinIoURandomCrop'), PIPELINES)
+    h, w = 300, 400
+    boxes = np.array([[10, 20, 120, 150], [200, 100, 260, 240]],
+                     dtype=np.float32)
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+    np.random.seed(0)
+    for _ in range(100):
+        patch = crop_module._sample_patch(boxes, h, w)
+        if crop_module.mode == 1:
+            assert patch is None
+            continue
+        # all the constraints of the candidate patches are satisfied
+        patch_w, patch_h = patch[2] - patch[0], patch[3] - patch[1]
+        assert patch_w > 0 and patch_h > 0
+        assert patch_w >= 0.3 * w - 1 and patch_h >= 0.3 * h - 1
+        # the ratio is checked before the patch is truncated to integers
+        assert 0.49 <= patch_h / patch_w <= 2.03
+        ious = bbox_overlaps(patch[None], boxes)
+        assert (ious >= crop_module.mode).all()
+        assert ((centers > patch[:2]) & (centers < patch[2:])).all(1).any()
+
+    # any patch is valid without boxes
+    empty_boxes = np.zeros((0, 4), dtype=np.float32)
+    for _ in range(10):
+        patch = crop_module._sample_patch(empty_boxes, h, w)
+        assert patch is None or patch.shape == (4, )
+
+
+def test_expand_min_iou_random_crop():
+    img = mmcv.imread(
+        osp.join(osp.dirname(__file__), '../data/color.jpg'),
+        'color').astype(np.float32)
+    h, w, _ = img.shape
+    rng = np.random.RandomState(0)
+    gt_bboxes = np.array([[10, 20, 120, 150], [200, 100, 260, 240]],
+                         dtype=np.float32)
+    results = dict(
+        img=img,
+        img_shape=img.shape,
+        ori_shape=img.shape,
+        bbox_fields=['gt_bboxes', 'gt_bboxes_ignore'],
+        gt_bboxes=gt_bboxes,
+        gt_labels=np.array([1, 2]),
+        gt_bboxes_ignore=np.zeros((0, 4), dtype=np.float32),
+        mask_fields=['gt_masks'],
+        gt_masks=BitmapMasks(
+            rng.randint(0, 2, (2, h, w)).astype(np.uint8), h, w),
+        seg_fields=['gt_semantic_seg'],
+        gt_semantic_seg=rng.randint(0, 10, (h, w)).astype(np.uint8))
+    mean = (123.675, 116.28, 103.53)
+    expand = build_from_cfg(
+        dict(type='Expand', mean=mean, seg_ignore_label=255), PIPELINES)
+    crop = build_from_cfg(dict(type='MinIoURandomCrop'), PIPELINES)
+    fused = build_from_cfg(
+        dict(type='ExpandMinIoURandomCrop', mean=mean, seg_ignore_label=255),
+        PIPELINES)
+    assert 'ExpandMinIoURandomCrop' in repr(fused)
+
+    # the results are identical to Expand followed by MinIoURandomCrop
+    for seed in range(30):
+        np.random.seed(seed)
+        expected = crop(expand(copy.deepcopy(results)))
+        np.random.seed(seed)
+        fused_results = fused(copy.deepcopy(results))
+        assert fused_results.keys() == expected.keys()
+        for key in ['img', 'gt_bboxes', 'gt_labels', 'gt_semantic_seg']:
+            assert fused_results[key].dtype == expected[key].dtype
+            assert np.array_equal(fused_results[key], expected[key])
+        assert fused_results['img_shape'] == expected['img_shape']
+        assert np.array_equal(fused_results['gt_masks'].masks,
+                              expected['gt_masks'].masks)
+
+    # patches outside of the image are filled with the mean
+    patch = ExpandMinIoURandomCrop._crop_canvas(img, (4 * h, 4 * w),
+                                                (2 * w, 2 * h), (0, 0, w, h),
+                                                mean)
+    assert patch.shape == img.shape
+    assert (patch == np.array(mean, dtype=np.float32)).all()
+
+
 def test_pad():
     # test assertion if both size_divisor and size is None
     with pytest.raises(AssertionError):
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+import torch
+
+from mmdet.core.bbox import bbox_overlaps as torch_bbox_overlaps
+from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
+
+
+def _loop_bbox_overlaps(bboxes1, bboxes2, mode='iou', eps=1e-6):
+    """Row by row reference implementation."""
+    ious = np.zeros((bboxes1.shape[0], bboxes2.shape[0]), dtype=np.float32)
+    area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+    area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (bboxes2[:, 3] - bboxes2[:, 1])
+    for i in range(bboxes1.shape[0]):
+        x_start = np.maximum(bboxes1[i, 0], bboxes2[:, 0])
+        y_start = np.maximum(bboxes1[i, 1], bboxes2[:, 1])
+        x_end = np.minimum(bboxes1[i, 2], bboxes2[:, 2])
+        y_end = np.minimum(bboxes1[i, 3], bboxes2[:, 3])
+        overlap = np.maximum(x_end - x_start, 0) * np.maximum(
+            y_end - y_start, 0)
+        if mode == 'iof':
+            union = np.maximum(area1[i], eps)
+        else:
+            union = np.maximum(area1[i] + area2 - overlap, eps)
+        ious[i] = overlap / union
+        if mode == 'giou':
+            enclose_w = np.maximum(bboxes1[i, 2], bboxes2[:, 2]) - np.minimum(
+                bboxes1[i, 0], bboxes2[:, 0])
+            enclose_h = np.maximum(bboxes1[i, 3], bboxes2[:, 3]) - np.minimum(
+                bboxes1[i, 1], bboxes2[:, 1])
+            enclose_area = np.maximum(enclose_w * enclose_h, eps)
+            ious[i] -= (enclose_area - union) / enclose_area
+    return ious
+
+
+def _rand_bboxes(num, seed):
+    rng = np.random.RandomState(seed)
+    xy = rng.rand(num, 2) * 100
+    wh = rng.rand(num, 2) * 50
+    return np.hstack([xy, xy + wh]).astype(np.float32)
+
+
+@pytest.mark.parametrize('mode', ['iou', 'iof', 'giou'])
+@pytest.mark.parametrize('chunk_size', [None, 1, 7, 100])
+def test_bbox_overlaps(mode, chunk_size):
+    bboxes1 = _rand_bboxes(23, 0)
+    bboxes2 = _rand_bboxes(31, 1)
+    ious = bbox_overlaps(bboxes1, bboxes2, mode=mode, chunk_size=chunk_size)
+    assert ious.shape == (23, 31) and ious.dtype == np.float32
+    assert np.array_equal(ious,
+                          _loop_bbox_overlaps(bboxes1, bboxes2, mode=mode))
+
+    if mode != 'giou':
+        expected = torch_bbox_overlaps(
+            torch.from_numpy(bboxes1), torch.from_numpy(bboxes2), mode=mode)
+        assert np.allclose(ious, expected.numpy())
+    else:
+        assert ious.min() >= -1 and ious.max() <= 1
+        assert np.allclose(
+            np.diag(bbox_overlaps(bboxes1, bboxes1, mode=mode)), 1)
+
+    # integer inputs are upcast and empty inputs give empty outputs
+    assert bbox_overlaps(
+        bboxes1.astype(np.int64), bboxes2, mode=mode).dtype == np.float32
+    assert bbox_overlaps(
+        np.zeros((0, 4)), bboxes2, mode=mode,
+        chunk_size=chunk_size).shape == (0, 31)
+    assert bbox_overlaps(
+        bboxes1, np.zeros((0, 4)), mode=mode,
+        chunk_size=chunk_size).shape == (23, 0)
@@ -1,8 +1,11 @@
+import mmcv
 import numpy as np
+import pycocotools.mask as maskUtils
 import pytest
 import torch
 
-from mmdet.core import BitmapMasks, PolygonMasks
+from mmdet.core import (BitmapMasks, CroppedMask, PolygonMasks,
+                        encode_mask_results)
 
 
 def dummy_raw_bitmap_masks(size):
@@ -628,3 +631,63 @@ def test_polygon_mask_iter():
     polygon_masks = PolygonMasks(raw_masks, 28, 28)
     for i, polygon_mask in enumerate(polygon_masks):
         assert np.equal(polygon_mask, raw_masks[i]).all()
+
+
+def test_cropped_mask():
+    rng = np.random.RandomState(0)
+    for _ in range(50):
+        img_h, img_w = rng.randint(1, 30, 2)
+        h, w = rng.randint(0, img_h + 1), rng.randint(0, img_w + 1)
+        x, y = rng.randint(0, img_w - w + 1), rng.randint(0, img_h - h + 1)
+        raw_mask = rng.rand(h, w) > rng.choice([0., 0.5, 1.])
+        cropped_mask = CroppedMask(raw_mask, (x, y), (img_h, img_w))
+        full_mask = np.zeros((img_h, img_w), dtype=bool)
+        full_mask[y:y + h, x:x + w] = raw_mask
+        assert cropped_mask.shape == (img_h, img_w)
+        assert np.array_equal(cropped_mask.to_ndarray(), full_mask)
+        assert np.array_equal(np.asarray(cropped_mask), full_mask)
+        assert cropped_mask.encode() == maskUtils.encode(
+            np.asfortranarray(full_mask.astype(np.uint8)))
+
+    # encode mixed mask results
+    full_mask = np.zeros((8, 10), dtype=bool)
+    full_mask[2:5, 3:9] = True
+    mask_results = [[
+        full_mask,
+        CroppedMask(full_mask[2:5, 3:9], (3, 2), (8, 10))
+    ], []]
+    encoded = encode_mask_results(mask_results)
+    assert encoded[0][0] == encoded[0][1]
+    assert encoded[1] == []
+
+    with pytest.raises(AssertionError):
+        CroppedMask(full_mask, (1, 0), (8, 10))
+
+
+def test_fcn_mask_head_cropped_masks():
+    from mmdet.models.roi_heads.mask_heads import FCNMaskHead
+    self = FCNMaskHead(
+        num_classes=4, in_channels=1, conv_out_channels=1, num_convs=1)
+    num_dets = 20
+    xy = torch.rand(num_dets, 2) * 100
+    wh = torch.rand(num_dets, 2) * 60 + 1
+    det_bboxes = torch.cat(
+        [xy, (xy + wh).clamp(max=149),
+         torch.rand(num_dets, 1)], dim=1)
+    det_labels = torch.randint(0, 4, (num_dets, ))
+    mask_pred = torch.randn(num_dets, 4, 28, 28)
+    scale_factor = np.array([1.5, 1.5, 1.5, 1.5], dtype=np.float32)
+    for rescale in [True, False]:
+        segms = self.get_seg_masks(mask_pred, det_bboxes, det_labels,
+                                   mmcv.Config(dict(mask_thr_binary=0.5)),
+                                   (100, 150, 3), scale_factor, rescale)
+        cropped_segms = self.get_seg_masks(
+            mask_pred, det_bboxes, det_labels,
+            mmcv.Config(dict(mask_thr_binary=0.5, crop_masks=True)),
+            (100, 150, 3), scale_factor, rescale)
+        for cls_segms, cls_cropped_segms in zip(segms, cropped_segms):
+            assert len(cls_segms) == len(cls_cropped_segms)
+            for segm, cropped_segm in zip(cls_segms, cls_cropped_segms):
+                assert isinstance(cropped_segm, CroppedMask)
+                assert np.array_equal(segm, cropped_segm.to_ndarray())
+        assert encode_mask_results(segms) == encode_mask_results(cropped_segms)
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from mmdet.core.evaluation import eval_map
+from mmdet.core.evaluation.mean_ap import (get_cls_results, tpfp_batched,
+                                           tpfp_default, tpfp_imagenet)
+
+
+def _random_results(num_imgs=50, num_classes=3, seed=0):
+    rng = np.random.RandomState(seed)
+
+    def _rand_bboxes(num):
+        xy = rng.rand(num, 2) * 100
+        wh = rng.rand(num, 2) * 40 + 1
+        return np.hstack([xy, xy + wh]).astype(np.float32)
+
+    det_results = []
+    annotations = []
+    for _ in range(num_imgs):
+        num_gts = rng.randint(0, 8)
+        num_ignore = rng.randint(0, 3)
+        gt_bboxes = _rand_bboxes(num_gts)
+        gt_labels = rng.randint(0, num_classes, num_gts)
+        annotations.append(
+            dict(
+                bboxes=gt_bboxes,
+                labels=gt_labels,
+                bboxes_ignore=_rand_bboxes(num_ignore),
+                labels_ignore=rng.randint(0, num_classes, num_ignore)))
+        img_results = []
+        for cls_id in range(num_classes):
+            # jittered copies of the gts plus some random boxes, so that
+            # both tp, fp and duplicated matches occur
+            cls_gts = gt_bboxes[gt_labels == cls_id]
+            jittered = np.repeat(cls_gts, 2, axis=0) + rng.randn(
+                2 * cls_gts.shape[0], 4).astype(np.float32) * 3
+            bboxes = np.vstack([jittered, _rand_bboxes(rng.randint(0, 5))])
+            scores = rng.rand(bboxes.shape[0], 1).astype(np.float32)
+            img_results.append(np.hstack([bboxes, scores]))
+        det_results.append(img_results)
+    return det_results, annotations
+
+
+@pytest.mark.parametrize('imagenet', [False, True])
+@pytest.mark.parametrize('area_ranges', [None, [(0, 400), (400, 1e5)]])
+def test_tpfp_batched(imagenet, area_ranges):
+    det_results, annotations = _random_results()
+    tpfp_func = tpfp_imagenet if imagenet else tpfp_default
+    for cls_id in range(3):
+        cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
+            det_results, annotations, cls_id)
+        tpfp = [
+            tpfp_func(dets, gts, gts_ignore, 0.5, area_ranges)
+            for dets, gts, gts_ignore in zip(cls_dets, cls_gts,
+                                             cls_gts_ignore)
+        ]
+        tp, fp = tpfp_batched(
+            cls_dets,
+            cls_gts,
+            cls_gts_ignore,
+            0.5,
+            area_ranges,
+            imagenet=imagenet)
+        assert np.array_equal(tp, np.hstack([item[0] for item in tpfp]))
+        assert np.array_equal(fp, np.hstack([item[1] for item in tpfp]))
+
+    # no dets and no gts at all
+    tp, fp = tpfp_batched([np.zeros((0, 5), dtype=np.float32)],
+                          [np.zeros((0, 4), dtype=np.float32)],
+                          [np.zeros((0, 4), dtype=np.float32)],
+                          area_ranges=area_ranges,
+                          imagenet=imagenet)
+    assert tp.shape == fp.shape == (len(area_ranges or [None]), 0)
+
+
+@pytest.mark.parametrize('dataset', [None, 'det'])
+@pytest.mark.parametrize('scale_ranges', [None, [(0, 20), (20, 1e3)]])
+def test_eval_map_backend(dataset, scale_ranges):
+    det_results, annotations = _random_results()
+    mean_ap, results = eval_map(
+        det_results,
+        annotations,
+        scale_ranges=scale_ranges,
+        dataset=dataset,
+        logger='silent',
+        nproc=2)
+    batched_mean_ap, batched_results = eval_map(
+        det_results,
+        annotations,
+        scale_ranges=scale_ranges,
+        dataset=dataset,
+        logger='silent',
+        backend='batched')
+    assert np.array_equal(mean_ap, batched_mean_ap)
+    for result, batched_result in zip(results, batched_results):
+        for key in ['num_gts', 'num_dets', 'recall', 'precision', 'ap']:
+            assert np.array_equal(result[key], batched_result[key])
+
+    with pytest.raises(ValueError):
+        eval_map(det_results, annotations, backend='thread')
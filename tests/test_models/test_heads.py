@@ -1,13 +1,17 @@
 import mmcv
 import numpy as np
+import pytest
 import torch
 
-from mmdet.core import bbox2roi, build_assigner, build_sampler
+from mmdet.core import (bbox2roi, build_assigner, build_sampler,
+                        multiclass_nms)
+from mmdet.core.bbox import bbox_overlaps as torch_bbox_overlaps
 from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
-from mmdet.models.dense_heads import (AnchorHead, CornerHead, FCOSHead,
-                                      FSAFHead, GuidedAnchorHead, PAAHead,
-                                      SABLRetinaHead, paa_head)
-from mmdet.models.dense_heads.paa_head import levels_to_images
+from mmdet.models.dense_heads import (AnchorHead, ATSSHead, CornerHead,
+                                      FCOSHead, FSAFHead, GFLHead,
+                                      GuidedAnchorHead, PAAHead, RetinaHead,
+                                      RPNHead, SABLRetinaHead, paa_head)
+from mmdet.models.dense_heads.paa_head import fit_gmm_1d, levels_to_images
 from mmdet.models.roi_heads.bbox_heads import BBoxHead, SABLHead
 from mmdet.models.roi_heads.mask_heads import FCNMaskHead, MaskIoUHead
 
@@ -128,6 +132,121 @@ def test_paa_head_loss():
         rescale=rescale)
 
 
+def test_fit_gmm_1d():
+    skm = pytest.importorskip('sklearn.mixture')
+    rng = np.random.RandomState(0)
+    num_samples = [2, 5, 9, 20, 45]
+    samples = torch.zeros(len(num_samples), max(num_samples))
+    valid = torch.zeros_like(samples, dtype=torch.bool)
+    for i, num in enumerate(num_samples):
+        # a mixture of low losses and high losses as in paa
+        samples[i, :num] = torch.from_numpy(
+            np.concatenate(
+                [rng.rand(num // 2) * 0.5,
+                 rng.rand(num - num // 2) * 2 + 0.5]))
+        valid[i, :num] = True
+    gmm_assignment, scores = fit_gmm_1d(samples, valid)
+    for i, num in enumerate(num_samples):
+        row = samples[i, :num].view(-1, 1).double().numpy()
+        gmm = skm.GaussianMixture(
+            2,
+            weights_init=[0.5, 0.5],
+            means_init=[[row.min()], [row.max()]],
+            precisions_init=[[[1.0]], [[1.0]]])
+        gmm.fit(row)
+        assert np.array_equal(gmm_assignment[i, :num].numpy(),
+                              gmm.predict(row))
+        assert np.allclose(scores[i, :num].numpy(), gmm.score_samples(row))
+
+
+def test_paa_head_batched_reassign(monkeypatch):
+    skm = pytest.importorskip('sklearn.mixture')
+    monkeypatch.setattr(paa_head, 'skm', skm)
+    self = PAAHead(num_classes=4, in_channels=1, gmm_backend='torch')
+    num_anchors_each_level = [400, 100, 25]
+    num_anchors = sum(num_anchors_each_level)
+    anchors = [torch.zeros(num, 4) for num in num_anchors_each_level]
+    rng = torch.Generator().manual_seed(0)
+    inputs = []
+    for num_gts, num_pos in [(3, 60), (1, 4), (0, 0), (5, 150), (2, 6)]:
+        pos_inds = torch.randperm(
+            num_anchors, generator=rng)[:num_pos].sort()[0]
+        pos_gt_inds = torch.randint(
+            max(num_gts, 1), (num_pos, ), generator=rng)
+        label = torch.full((num_anchors, ), 4, dtype=torch.long)
+        label[pos_inds] = torch.randint(4, (num_pos, ), generator=rng)
+        pos_losses = torch.rand(num_pos, generator=rng) * 2
+        bbox_weight = torch.zeros(num_anchors, 4)
+        bbox_weight[pos_inds] = 1
+        inputs.append((pos_losses, label, torch.ones(num_anchors), bbox_weight,
+                       pos_inds, pos_gt_inds, anchors))
+
+    def clone_inputs():
+        # labels and weights are modified in place
+        return [[
+            item.clone() if isinstance(item, torch.Tensor) else item
+            for item in single_inputs
+        ] for single_inputs in inputs]
+
+    results = [
+        self.paa_reassign(*single_inputs) for single_inputs in clone_inputs()
+    ]
+    batched_results = self.paa_reassign_batched(
+        *[list(item) for item in zip(*clone_inputs())])
+    for i, result in enumerate(results):
+        for item, batched_item in zip(result[:3], batched_results[:3]):
+            assert torch.equal(item, batched_item[i])
+        assert result[3] == batched_results[3][i]
+    assert sum(batched_results[3]) > 0
+
+
+def test_paa_head_score_voting():
+    """Tests the vectorized score voting against a per box loop."""
+    self = PAAHead(num_classes=4, in_channels=1)
+    rng = torch.Generator().manual_seed(0)
+    xy = torch.rand(300, 2, generator=rng) * 200
+    wh = torch.rand(300, 2, generator=rng) * 50 + 1
+    mlvl_bboxes = torch.cat([xy, xy + wh], dim=1)
+    mlvl_nms_scores = torch.cat(
+        [torch.rand(300, 4, generator=rng),
+         torch.zeros(300, 1)], dim=1)
+    score_thr = 0.3
+    det_bboxes, det_labels = multiclass_nms(
+        mlvl_bboxes, mlvl_nms_scores, score_thr,
+        dict(type='nms', iou_threshold=0.5), 100)
+    assert len(set(det_labels.tolist())) > 1
+
+    voted_bboxes, voted_labels = self.score_voting(det_bboxes, det_labels,
+                                                   mlvl_bboxes,
+                                                   mlvl_nms_scores, score_thr)
+    assert voted_bboxes.shape == det_bboxes.shape
+    # grouped by class, keeping the order of the dets in each class
+    order = [
+        i for cls in range(4) for i in range(len(det_labels))
+        if det_labels[i] == cls
+    ]
+    assert torch.equal(voted_labels, det_labels[order])
+    assert torch.equal(voted_bboxes[:, 4], det_bboxes[order, 4])
+    for voted_bbox, det_bbox, label in zip(voted_bboxes, det_bboxes[order],
+                                           voted_labels):
+        cls_mask = mlvl_nms_scores[:, label] > score_thr
+        ious = torch_bbox_overlaps(det_bbox[None, :4],
+                                   mlvl_bboxes[cls_mask])[0]
+        pos_mask = ious > 0.01
+        pos_scores = mlvl_nms_scores[cls_mask, label][pos_mask]
+        pos_bboxes = mlvl_bboxes[cls_mask][pos_mask]
+        pis = torch.exp(-(1 - ious[pos_mask])**2 / 0.025) * pos_scores
+        expected = (pis[:, None] * pos_bboxes).sum(dim=0) / pis.sum()
+        assert torch.allclose(voted_bbox[:4], expected, atol=1e-4)
+
+    # no remaining boxes after nms
+    voted_bboxes, voted_labels = self.score_voting(det_bboxes[:0],
+                                                   det_labels[:0], mlvl_bboxes,
+                                                   mlvl_nms_scores, score_thr)
+    assert voted_bboxes.shape == (0, 5)
+    assert voted_labels.shape == (0, )
+
+
 def test_fcos_head_loss():
     """Tests fcos head loss when truth is empty and non-empty."""
     s = 256
@@ -252,6 +371,237 @@ def test_anchor_head_loss():
     assert onegt_box_loss.item() > 0, 'box loss should be non-zero'
 
 
+def _sorted_dets(dets):
+    # equal scores may be kept in any order
+    dets = dets.numpy()
+    return dets[np.lexsort(dets.T[::-1])]
+
+
+def test_anchor_head_batched_get_bboxes():
+    """Tests batched post-processing against the per image one."""
+    img_metas = [{
+        'img_shape': img_shape,
+        'scale_factor': np.array([1.5, 1.5, 1.5, 1.5], dtype=np.float32),
+        'pad_shape': (128, 160, 3)
+    } for img_shape in [(128, 160, 3), (120, 160, 3), (128, 150, 3)] * 2]
+    num_imgs = len(img_metas)
+    anchor_generator = dict(
+        type='AnchorGenerator',
+        octave_base_scale=4,
+        scales_per_octave=3,
+        ratios=[0.5, 1.0, 2.0],
+        strides=[8, 16, 32])
+    test_cfg = mmcv.Config(
+        dict(
+            nms_pre=300,
+            min_bbox_size=0,
+            score_thr=0.05,
+            nms=dict(type='nms', iou_threshold=0.5),
+            max_per_img=100))
+    self = RetinaHead(
+        num_classes=4,
+        in_channels=1,
+        feat_channels=4,
+        stacked_convs=1,
+        anchor_generator=anchor_generator,
+        test_cfg=test_cfg)
+    feat = [torch.rand(num_imgs, 1, 128 // s, 160 // s) for s in [8, 16, 32]]
+    cls_scores, bbox_preds = self.forward(feat)
+    # the last config has small groups of images in NMS
+    for batched_cfg in [
+            dict(test_cfg, batched=True),
+            dict(test_cfg, nms=dict(test_cfg.nms, split_thr=500), batched=True)
+    ]:
+        for rescale in [False, True]:
+            results = self.get_bboxes(
+                cls_scores, bbox_preds, img_metas, rescale=rescale)
+            batched_results = self.get_bboxes(
+                cls_scores,
+                bbox_preds,
+                img_metas,
+                cfg=mmcv.Config(batched_cfg),
+                rescale=rescale)
+            assert len(batched_results) == num_imgs
+            for (dets, labels), (batched_dets,
+                                 batched_labels) in zip(results,
+                                                        batched_results):
+                assert dets.shape == batched_dets.shape
+                assert torch.equal(labels.sort()[0],
+                                   batched_labels.sort()[0])
+                assert np.allclose(
+                    _sorted_dets(dets), _sorted_dets(batched_dets), atol=1e-4)
+
+    rpn_test_cfg = mmcv.Config(
+        dict(
+            nms_across_levels=False,
+            nms_pre=200,
+            nms_post=100,
+            max_num=100,
+            nms_thr=0.7,
+            min_bbox_size=2))
+    self = RPNHead(
+        in_channels=1,
+        anchor_generator=dict(
+            type='AnchorGenerator',
+            scales=[8],
+            ratios=[0.5, 1.0, 2.0],
+            strides=[8, 16, 32]),
+        test_cfg=rpn_test_cfg)
+    cls_scores, bbox_preds = self.forward(feat)
+    proposals = self.get_bboxes(cls_scores, bbox_preds, img_metas)
+    batched_proposals = self.get_bboxes(
+        cls_scores,
+        bbox_preds,
+        img_metas,
+        cfg=mmcv.Config(dict(rpn_test_cfg, batched=True)))
+    for dets, batched_dets in zip(proposals, batched_proposals):
+        assert dets.shape == batched_dets.shape
+        assert np.allclose(
+            _sorted_dets(dets), _sorted_dets(batched_dets), atol=1e-4)
+
+    # heads with a custom _get_bboxes_single do not support it
+    self = GFLHead(
+        num_classes=4,
+        in_channels=1,
+        feat_channels=32,
+        stacked_convs=1,
+        anchor_generator=dict(
+            type='AnchorGenerator',
+            ratios=[1.0],
+            octave_base_scale=8,
+            scales_per_octave=1,
+            strides=[8, 16, 32]))
+    cls_scores, bbox_preds = self.forward(feat)
+    with pytest.raises(NotImplementedError):
+        self.get_bboxes(
+            cls_scores,
+            bbox_preds,
+            img_metas,
+            cfg=mmcv.Config(dict(test_cfg, batched=True)))
+
+
+@pytest.mark.parametrize('head_type', ['retina', 'rpn', 'atss'])
+def test_anchor_head_batched_assign(head_type):
+    """Tests that the batched assignment gives the same targets."""
+    s = 256
+    img_metas = [{
+        'img_shape': (s, s, 3),
+        'scale_factor': 1,
+        'pad_shape': (s, s, 3)
+    }, {
+        'img_shape': (s - 60, s - 20, 3),
+        'scale_factor': 1,
+        'pad_shape': (s, s, 3)
+    }]
+    if head_type == 'atss':
+        assigner = dict(type='ATSSAssigner', topk=9)
+    else:
+        assigner = dict(
+            type='MaxIoUAssigner',
+            pos_iou_thr=0.5,
+            neg_iou_thr=0.4,
+            min_pos_iou=0,
+            ignore_iof_thr=0.5)
+    cfg = mmcv.Config(
+        dict(
+            assigner=assigner,
+            allowed_border=0 if head_type == 'rpn' else -1,
+            pos_weight=-1,
+            debug=False))
+    if head_type == 'retina':
+        self = RetinaHead(
+            num_classes=4, in_channels=1, feat_channels=1, train_cfg=cfg)
+    elif head_type == 'rpn':
+        # no sampler keeps the targets deterministic
+        self = RPNHead(in_channels=1, train_cfg=cfg)
+    else:
+        self = ATSSHead(
+            num_classes=4,
+            in_channels=1,
+            stacked_convs=1,
+            feat_channels=32,
+            anchor_generator=dict(
+                type='AnchorGenerator',
+                ratios=[1.0],
+                octave_base_scale=8,
+                scales_per_octave=1,
+                strides=[8, 16, 32, 64, 128]),
+            train_cfg=cfg)
+    featmap_sizes = [(s // stride_h, s // stride_w)
+                     for stride_w, stride_h in self.anchor_generator.strides]
+
+    gt_bboxes = [
+        torch.Tensor([[23.6667, 23.8757, 238.6326, 151.8874],
+                      [50.3, 40.1, 90.5, 82.7], [5.2, 120.4, 60.9, 170.8]]),
+        torch.empty((0, 4)),
+    ]
+    gt_labels = [torch.LongTensor([2, 0, 1]), torch.LongTensor([])]
+    gt_bboxes_ignore = [None, torch.Tensor([[100., 100., 180., 160.]])]
+
+    targets = []
+    for batched_assign in [False, True]:
+        self.train_cfg.batched_assign = batched_assign
+        anchor_list, valid_flag_list = self.get_anchors(
+            featmap_sizes, img_metas, device='cpu')
+        targets.append(
+            self.get_targets(anchor_list, valid_flag_list, gt_bboxes,
+                             img_metas, gt_bboxes_ignore, gt_labels))
+    for target, batched_target in zip(*targets):
+        if isinstance(target, list):
+            for level_target, level_batched_target in zip(
+                    target, batched_target):
+                assert torch.equal(level_target, level_batched_target)
+        else:
+            assert target == batched_target
+
+    # heads customizing the target computation do not support it
+    self = FSAFHead(
+        num_classes=4,
+        in_channels=1,
+        train_cfg=mmcv.Config(
+            dict(
+                assigner=dict(
+                    type='CenterRegionAssigner',
+                    pos_scale=0.2,
+                    neg_scale=0.2,
+                    min_pos_iof=0.01),
+                allowed_border=-1,
+                pos_weight=-1,
+                batched_assign=True,
+                debug=False)))
+    anchor_list, valid_flag_list = self.get_anchors(
+        featmap_sizes[:len(self.anchor_generator.strides)], img_metas,
+        device='cpu')
+    with pytest.raises(NotImplementedError):
+        self.get_targets(anchor_list, valid_flag_list, gt_bboxes, img_metas,
+                         gt_bboxes_ignore, gt_labels)
+
+    # nor do the ATSS heads customizing it
+    class CustomATSSHead(ATSSHead):
+
+        def _get_target_single(self, *args, **kwargs):
+            return super(CustomATSSHead,
+                         self)._get_target_single(*args, **kwargs)
+
+    self = CustomATSSHead(
+        num_classes=4,
+        in_channels=1,
+        stacked_convs=1,
+        feat_channels=32,
+        train_cfg=mmcv.Config(
+            dict(
+                assigner=dict(type='ATSSAssigner', topk=9),
+                allowed_border=-1,
+                pos_weight=-1,
+                batched_assign=True,
+                debug=False)))
+    anchor_list, valid_flag_list = self.get_anchors(
+        featmap_sizes, img_metas, device='cpu')
+    with pytest.raises(NotImplementedError):
+        self.get_targets(anchor_list, valid_flag_list, gt_bboxes, img_metas,
+                         gt_bboxes_ignore, gt_labels)
+
+
 def test_fsaf_head_loss():
     """Tests anchor head loss when truth is empty and non-empty."""
     s = 256
@@ -965,6 +1315,51 @@ def test_corner_head_loss():
     assert twogt_off_loss.item() > 0, 'off loss should be non-zero'
 
 
+def test_corner_head_batched_targets():
+    """Tests the batched corner targets against the per gt ones."""
+    self = CornerHead(num_classes=4, in_channels=1)
+    rng = torch.Generator().manual_seed(0)
+    gt_bboxes = []
+    gt_labels = []
+    for num_gts in [8, 0, 30]:
+        xy = torch.rand(num_gts, 2, generator=rng) * 200
+        wh = torch.rand(num_gts, 2, generator=rng) * 150 + 2
+        bboxes = torch.cat([xy, xy + wh], dim=1)
+        labels = torch.randint(4, (num_gts, ), generator=rng)
+        if num_gts:
+            # gts sharing a corner, and a gt exceeding the image
+            bboxes[1] = bboxes[0] + torch.tensor([0., 0., 10., 5.])
+            bboxes[2, 2:] = torch.tensor([300., 280.])
+        gt_bboxes.append(bboxes)
+        gt_labels.append(labels)
+
+    for feat_shape in [(3, 1, 64, 64), (3, 1, 32, 48)]:
+        targets = self.get_targets(
+            gt_bboxes,
+            gt_labels,
+            feat_shape, (256, 256, 3),
+            with_corner_emb=True,
+            with_guiding_shift=True,
+            with_centripetal_shift=True,
+            batched=False)
+        batched_targets = self.get_targets(
+            gt_bboxes,
+            gt_labels,
+            feat_shape, (256, 256, 3),
+            with_corner_emb=True,
+            with_guiding_shift=True,
+            with_centripetal_shift=True)
+        assert targets.keys() == batched_targets.keys()
+        for key, target in targets.items():
+            if key == 'corner_embedding':
+                assert [
+                    img_match.tolist()
+                    for img_match in batched_targets[key]
+                ] == target
+            else:
+                assert torch.allclose(batched_targets[key], target)
+
+
 def test_corner_head_encode_and_decode_heatmap():
     """Tests corner head generating and decoding the heatmap."""
     s = 256
@@ -87,3 +87,46 @@ def test_accuracy():
     with pytest.raises(AssertionError):
         accuracy = Accuracy()
         accuracy(pred[:, :, None], true_label)
+
+
+def test_ae_loss():
+    loss = build_loss(
+        dict(
+            type='AssociativeEmbeddingLoss',
+            pull_weight=0.25,
+            push_weight=0.25))
+    rng = torch.Generator().manual_seed(0)
+    # embeddings with 2 channels
+    tl_embs = torch.rand(3, 2, 16, 16, generator=rng)
+    br_embs = torch.rand(3, 2, 16, 16, generator=rng)
+    match = [
+        torch.randint(16, (num_gt, 2, 2), generator=rng)
+        for num_gt in [0, 1, 5]
+    ]
+    pull, push = loss(tl_embs, br_embs, match)
+
+    # the corner embeddings gathered object by object
+    expected_pull, expected_push = 0, 0
+    for tl_emb, br_emb, img_match in zip(tl_embs, br_embs, match):
+        if len(img_match) == 0:
+            continue
+        tl_list = torch.cat(
+            [tl_emb[:, tl_y, tl_x] for (tl_y, tl_x), _ in img_match])
+        br_list = torch.cat(
+            [br_emb[:, br_y, br_x] for _, (br_y, br_x) in img_match])
+        me_list = (tl_list + br_list) / 2
+        num = len(me_list)
+        expected_pull += 0.25 * ((tl_list - me_list).pow(2) +
+                                 (br_list - me_list).pow(2)).sum() / num
+        if num > 1:
+            conf_weight = 1 - torch.eye(num)
+            conf_mat = conf_weight * (1 - (me_list[:, None] - me_list).abs())
+            expected_push += 0.25 * conf_mat.relu().sum() / (num * (num - 1))
+    assert torch.allclose(pull, expected_pull)
+    assert torch.allclose(push, expected_push)
+
+    # the matches as lists of coords
+    list_pull, list_push = loss(tl_embs, br_embs,
+                                [img_match.tolist() for img_match in match])
+    assert torch.equal(list_pull, pull)
+    assert torch.equal(list_push, push)
@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+import torch
+import torch.nn.functional as F
+from mmcv import ConfigDict
+
+from mmseg.models import build_segmentor
+
+
+def _build_segmentor(test_cfg):
+    torch.manual_seed(0)
+    model = build_segmentor(
+        ConfigDict(
+            type='EncoderDecoder',
+            backbone=dict(
+                type='ResNetV1c',
+                depth=18,
+                base_channels=8,
+                out_indices=(3, ),
+                strides=(1, 2, 2, 2),
+                dilations=(1, 1, 1, 1)),
+            decode_head=dict(
+                type='FCNHead',
+                in_channels=64,
+                channels=8,
+                num_convs=1,
+                num_classes=5,
+                loss_decode=dict(type='CrossEntropyLoss')),
+            test_cfg=test_cfg))
+    # sharpen the near uniform probabilities of the random weights
+    model.decode_head.conv_seg.weight.data.mul_(100)
+    return model.eval()
+
+
+def _aug_inputs(ori_shape=(90, 120), ratios=(0.5, 0.75, 1.0)):
+    """Augmented images as given by MultiScaleFlipAug, each scale is
+    followed by its horizontally flipped image."""
+    torch.manual_seed(1)
+    imgs, img_metas = [], []
+    for ratio in ratios:
+        h, w = int(ori_shape[0] * ratio), int(ori_shape[1] * ratio)
+        img = torch.randn(1, 3, h, w)
+        for flip in [False, True]:
+            imgs.append(img.flip(3) if flip else img)
+            img_metas.append([
+                dict(
+                    ori_shape=ori_shape + (3, ),
+                    img_shape=(h, w, 3),
+                    flip=flip,
+                    flip_direction='horizontal')
+            ])
+    return imgs, img_metas
+
+
+def _former_aug_test(model, imgs, img_metas):
+    """The probabilities merged by the former aug_test, which rescaled the
+    outputs of all the augmentations to ori_shape in fp32."""
+    seg_logit = model.inference(imgs[0], img_metas[0], True)
+    for i in range(1, len(imgs)):
+        seg_logit += model.inference(imgs[i], img_metas[i], True)
+    return seg_logit / len(imgs)
+
+
+def _check_labels(seg_pred, seg_prob, max_gap, max_mismatch):
+    """Check that the labels only differ from the argmax of the
+    probabilities where the probabilities of the two labels are within
+    ``max_gap``, and at less than ``max_mismatch`` of the pixels."""
+    seg_pred = torch.from_numpy(np.stack(seg_pred))
+    assert seg_pred.shape == seg_prob.argmax(dim=1).shape
+    mismatch = seg_pred != seg_prob.argmax(dim=1)
+    max_prob = seg_prob.max(dim=1)[0]
+    pred_prob = seg_prob.gather(1, seg_pred[:, None])[:, 0]
+    assert (max_prob - pred_prob)[mismatch].le(max_gap).all()
+    assert mismatch.float().mean() <= max_mismatch
+
+
+@pytest.mark.parametrize('mode', ['whole', 'slide'])
+def test_aug_test_default(mode):
+    test_cfg = dict(mode=mode)
+    if mode == 'slide':
+        test_cfg.update(crop_size=(40, 50), stride=(25, 30))
+    model = _build_segmentor(test_cfg)
+    imgs, img_metas = _aug_inputs()
+    with torch.no_grad():
+        seg_prob = _former_aug_test(model, imgs, img_metas)
+        seg_pred = model.aug_test(imgs, img_metas)
+    # the default settings reproduce the former labels exactly
+    assert len(seg_pred) == 1
+    np.testing.assert_array_equal(seg_pred[0], seg_prob.argmax(dim=1)[0])
+
+
+@pytest.mark.parametrize(
+    'test_cfg,max_gap,max_mismatch',
+    [
+        # the same computation batched, up to float rounding
+        (dict(aug_batch=True), 1e-5, 1e-3),
+        # the merged probabilities are rounded to fp16
+        (dict(aug_merge_fp16=True), 2e-3, 1e-2),
+        (dict(aug_batch=True, aug_merge_fp16=True), 2e-3, 1e-2),
+    ])
+def test_aug_test_options(test_cfg, max_gap, max_mismatch):
+    model = _build_segmentor(dict(mode='whole', **test_cfg))
+    imgs, img_metas = _aug_inputs()
+    with torch.no_grad():
+        seg_prob = _former_aug_test(model, imgs, img_metas)
+        seg_pred = model.aug_test(imgs, img_metas)
+    _check_labels(seg_pred, seg_prob, max_gap, max_mismatch)
+
+
+@pytest.mark.parametrize('merge_scale', [0.5, 0.75])
+def test_aug_test_merge_scale(merge_scale):
+    model = _build_segmentor(dict(mode='whole', aug_merge_scale=merge_scale))
+    imgs, img_metas = _aug_inputs()
+    with torch.no_grad():
+        seg_pred = model.aug_test(imgs, img_metas)
+        # the probabilities are merged at the merge scale, and then
+        # upsampled to ori_shape
+        merge_shape = (int(90 * merge_scale + 0.5),
+                       int(120 * merge_scale + 0.5))
+        seg_prob = 0
+        for img, img_meta in zip(imgs, img_metas):
+            seg_logit = F.interpolate(
+                model.encode_decode(img, img_meta),
+                merge_shape,
+                mode='bilinear',
+                align_corners=False)
+            seg_prob = seg_prob + F.softmax(seg_logit, dim=1).flip(
+                3 if img_meta[0]['flip'] else ())
+        merged_prob = F.interpolate(
+            seg_prob / len(imgs), (90, 120),
+            mode='bilinear',
+            align_corners=False)
+        former_prob = _former_aug_test(model, imgs, img_metas)
+    _check_labels(seg_pred, merged_prob, 1e-5, 1e-3)
+    # the merge at a lower resolution only changes uncertain pixels
+    _check_labels(seg_pred, former_prob, 0.05, 1e-2)
+
+
+@pytest.mark.parametrize('flip_direction', ['horizontal', 'vertical'])
+def test_inference_mixed_flips(flip_direction):
+    # each image of a batch is flipped back according to its own meta
+    model = _build_segmentor(dict(mode='whole'))
+    torch.manual_seed(1)
+    img = torch.randn(3, 3, 40, 60)
+    img_meta = [
+        dict(
+            ori_shape=(40, 60, 3),
+            flip=flip,
+            flip_direction=flip_direction) for flip in [False, True, True]
+    ]
+    with torch.no_grad():
+        output = model.inference(img, img_meta, True)
+        for i in range(3):
+            expected = model.inference(img[i:i + 1], img_meta[i:i + 1], True)
+            torch.testing.assert_allclose(output[i:i + 1], expected)
+    flip_dims = (3, ) if flip_direction == 'horizontal' else (2, )
+    with torch.no_grad():
+        unflipped = F.softmax(model.encode_decode(img, img_meta), dim=1)
+    torch.testing.assert_allclose(output[0], unflipped[0])
+    torch.testing.assert_allclose(output[1:], unflipped[1:].flip(flip_dims))
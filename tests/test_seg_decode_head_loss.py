@@ -0,0 +1,110 @@
+import copy
+
+import pytest
+import torch
+import torch.nn.functional as F
+
+from mmseg.models import build_head
+from mmseg.ops import resize_rows
+
+
+def _build_head(sampler, class_weight, align_corners, loss_resize_cfg=None):
+    return build_head(
+        dict(
+            type='FCNHead',
+            in_channels=8,
+            channels=8,
+            num_convs=1,
+            num_classes=5,
+            align_corners=align_corners,
+            sampler=sampler,
+            loss_decode=dict(
+                type='CrossEntropyLoss',
+                class_weight=class_weight,
+                loss_weight=0.4),
+            loss_resize_cfg=loss_resize_cfg))
+
+
+def _inputs():
+    torch.manual_seed(0)
+    seg_logit = torch.randn(2, 5, 9, 13)
+    seg_label = torch.randint(0, 5, (2, 1, 37, 50))
+    seg_label[:, :, 5:12, 20:40] = 255
+    return seg_logit, seg_label
+
+
+@pytest.mark.parametrize('align_corners', [False, True])
+@pytest.mark.parametrize('size', [(37, 50), (20, 7), (5, 13)])
+def test_resize_rows(align_corners, size):
+    seg_logit, _ = _inputs()
+    expected = F.interpolate(
+        seg_logit, size, mode='bilinear', align_corners=align_corners)
+    rows = torch.cat([
+        resize_rows(seg_logit, slice(i, i + 6), size, align_corners)
+        for i in range(0, size[0], 6)
+    ],
+                     dim=2)
+    torch.testing.assert_allclose(rows, expected, rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.parametrize('sampler', [
+    None,
+    dict(type='OHEMPixelSampler', min_kept=1000),
+    dict(type='OHEMPixelSampler', thresh=0.3, min_kept=1000)
+])
+@pytest.mark.parametrize('class_weight', [None, [0.5, 1.0, 2.0, 1.0, 0.8]])
+@pytest.mark.parametrize('align_corners', [False, True])
+@pytest.mark.parametrize('chunk_size', [1, 16, 64])
+def test_chunked_losses(sampler, class_weight, align_corners, chunk_size):
+    head = _build_head(sampler, class_weight, align_corners)
+    chunked_head = copy.deepcopy(head)
+    chunked_head.loss_resize_cfg = dict(mode='chunked', chunk_size=chunk_size)
+    seg_logit, seg_label = _inputs()
+
+    seg_logit.requires_grad_()
+    expected = head.losses(seg_logit, seg_label)
+    expected['loss_seg'].backward()
+    expected_grad = seg_logit.grad.clone()
+    seg_logit.grad = None
+    losses = chunked_head.losses(seg_logit, seg_label)
+    losses['loss_seg'].backward()
+
+    torch.testing.assert_allclose(
+        losses['loss_seg'], expected['loss_seg'], rtol=1e-5, atol=1e-7)
+    torch.testing.assert_allclose(
+        losses['acc_seg'], expected['acc_seg'], rtol=0, atol=1e-4)
+    torch.testing.assert_allclose(
+        seg_logit.grad, expected_grad, rtol=1e-4, atol=1e-8)
+
+    # without gradients the chunks are not checkpointed
+    with torch.no_grad():
+        losses = chunked_head.losses(seg_logit, seg_label)
+    torch.testing.assert_allclose(
+        losses['loss_seg'], expected['loss_seg'], rtol=1e-5, atol=1e-7)
+
+
+@pytest.mark.parametrize('scale', [None, 0.5])
+def test_downsampled_losses(scale):
+    head = _build_head(
+        None,
+        None,
+        False,
+        loss_resize_cfg=dict(mode='downsample', scale=scale))
+    seg_logit, seg_label = _inputs()
+    losses = head.losses(seg_logit, seg_label)
+
+    if scale is None:
+        label_size = seg_logit.shape[2:]
+    else:
+        label_size = (19, 25)
+    # nearest sampling keeps the ignored pixels out of the labels
+    expected_label = F.interpolate(
+        seg_label.float(), label_size, mode='nearest').long()
+    expected_logit = F.interpolate(
+        seg_logit, label_size, mode='bilinear', align_corners=False)
+    expected_loss = 0.4 * F.cross_entropy(
+        expected_logit,
+        expected_label[:, 0],
+        ignore_index=255,
+        reduction='none').mean()
+    torch.testing.assert_allclose(losses['loss_seg'], expected_loss)
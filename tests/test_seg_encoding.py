@@ -0,0 +1,36 @@
+import copy
+
+import pytest
+import torch
+
+from mmseg.ops import Encoding
+
+
+def _forward_backward(encoding, x):
+    x = x.clone().requires_grad_()
+    output = encoding(x)
+    # a loss that weights every output differently
+    weight = torch.linspace(-1, 1, output.numel()).view_as(output)
+    (output * weight.to(output)).sum().backward()
+    return (output.detach(), x.grad, encoding.codewords.grad,
+            encoding.scale.grad)
+
+
+@pytest.mark.parametrize('dtype,rtol,atol', [(torch.float32, 1e-4, 1e-5),
+                                             (torch.float64, 1e-10, 1e-12)])
+@pytest.mark.parametrize('shape', [(2, 16, 7, 9), (1, 64, 16, 16)])
+def test_memory_efficient_encoding(dtype, rtol, atol, shape):
+    torch.manual_seed(0)
+    encoding = Encoding(shape[1], num_codes=8).to(dtype)
+    # features after a ReLU, as in EncHead
+    x = torch.randn(shape, dtype=dtype).relu()
+    efficient_encoding = copy.deepcopy(encoding)
+    efficient_encoding.memory_efficient = True
+
+    expected = _forward_backward(encoding, x)
+    results = _forward_backward(efficient_encoding, x)
+    # output, grads of x, codewords and scale
+    for result, expected_result in zip(results, expected):
+        assert result.shape == expected_result.shape
+        torch.testing.assert_allclose(
+            result, expected_result, rtol=rtol, atol=atol)
@@ -0,0 +1,63 @@
+import numpy as np
+
+from mmseg.core.evaluation import IoUAccumulator, mean_iou
+
+
+def test_iou_accumulator():
+    rng = np.random.RandomState(0)
+    num_classes, ignore_index = 6, 255
+    results, gt_seg_maps = [], []
+    for _ in range(5):
+        shape = tuple(rng.randint(10, 30, 2))
+        # class 4 is predicted but never labeled, class 5 is neither
+        pred_label = rng.randint(0, 5, shape)
+        label = rng.randint(0, 4, shape)
+        label[rng.rand(*shape) < 0.2] = ignore_index
+        results.append(pred_label)
+        gt_seg_maps.append(label)
+
+    accumulator = IoUAccumulator(num_classes, ignore_index)
+    for pred_label, label in zip(results, gt_seg_maps):
+        accumulator.update(pred_label, label)
+    all_acc, acc, iou = accumulator.evaluate()
+    expected_all_acc, expected_acc, expected_iou = mean_iou(
+        results, gt_seg_maps, num_classes, ignore_index)
+
+    assert np.isclose(all_acc, expected_all_acc)
+    np.testing.assert_allclose(acc, expected_acc)
+    np.testing.assert_allclose(iou, expected_iou)
+    # the classes missing from the labels have no accuracy, the ones missing
+    # from both the predictions and the labels have no IoU
+    assert np.isnan(acc[4:]).all() and iou[4] == 0 and np.isnan(iou[5])
+    assert accumulator.confusion_matrix.sum() == sum(
+        (label != ignore_index).sum() for label in gt_seg_maps)
+
+    # all_reduce does nothing without a process group
+    accumulator.all_reduce()
+    assert np.isclose(accumulator.evaluate()[0], expected_all_acc)
+
+
+def test_iou_accumulator_labels_out_of_range():
+    rng = np.random.RandomState(0)
+    num_classes, ignore_index = 3, 255
+    results, gt_seg_maps = [], []
+    for _ in range(3):
+        pred_label = rng.randint(0, 3, (10, 12))
+        label = rng.randint(0, 3, (10, 12))
+        label[rng.rand(10, 12) < 0.1] = ignore_index
+        # labels and predictions outside [0, num_classes)
+        label[rng.rand(10, 12) < 0.1] = 5
+        pred_label[rng.rand(10, 12) < 0.1] = 7
+        results.append(pred_label)
+        gt_seg_maps.append(label)
+
+    accumulator = IoUAccumulator(num_classes, ignore_index)
+    for pred_label, label in zip(results, gt_seg_maps):
+        accumulator.update(pred_label, label)
+    all_acc, acc, iou = accumulator.evaluate()
+    expected_all_acc, expected_acc, expected_iou = mean_iou(
+        results, gt_seg_maps, num_classes, ignore_index)
+
+    assert np.isclose(all_acc, expected_all_acc)
+    np.testing.assert_allclose(acc, expected_acc)
+    np.testing.assert_allclose(iou, expected_iou)
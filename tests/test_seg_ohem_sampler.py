@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import torch
+
+from mmseg.models import build_head
+
+
+def _sort_sample_from_scores(sampler, scores, seg_label):
+    """The former selection which sorts the scores of all the valid pixels,
+    with a stable sort so that ties are broken in index order."""
+    seg_label = seg_label.squeeze(1).long()
+    batch_kept = sampler.min_kept * seg_label.size(0)
+    valid_mask = seg_label != sampler.context.ignore_index
+    seg_weight = scores.new_zeros(size=seg_label.size())
+    valid_seg_weight = seg_weight[valid_mask]
+    valid_scores = scores[valid_mask]
+    if sampler.thresh is not None:
+        sort_prob = valid_scores.sort()[0]
+        if sort_prob.numel() > 0:
+            min_threshold = sort_prob[min(batch_kept, sort_prob.numel() - 1)]
+        else:
+            min_threshold = 0.0
+        threshold = max(min_threshold, sampler.thresh)
+        valid_seg_weight[valid_scores < threshold] = 1.
+    else:
+        sort_indices = np.argsort(-valid_scores.numpy(), kind='stable')
+        valid_seg_weight[torch.from_numpy(sort_indices[:batch_kept])] = 1.
+    seg_weight[valid_mask] = valid_seg_weight
+    return seg_weight
+
+
+def _build_sampler(thresh, min_kept):
+    head = build_head(
+        dict(
+            type='FCNHead',
+            in_channels=8,
+            channels=8,
+            num_convs=1,
+            num_classes=5,
+            sampler=dict(
+                type='OHEMPixelSampler', thresh=thresh, min_kept=min_kept)))
+    return head.sampler
+
+
+def _inputs(ignored_ratio):
+    torch.manual_seed(0)
+    seg_label = torch.randint(0, 5, (2, 1, 20, 30))
+    seg_label[torch.rand(seg_label.shape) < ignored_ratio] = 255
+    # few distinct values, so many pixels tie with the threshold
+    scores = torch.randint(0, 8, (2, 20, 30)).float() / 8
+    return scores, seg_label
+
+
+@pytest.mark.parametrize('thresh', [None, 0.4, 0.9])
+@pytest.mark.parametrize('min_kept', [2, 100, 250, 600, 1000])
+@pytest.mark.parametrize('ignored_ratio', [0, 0.3, 1])
+def test_ohem_sample_from_scores(thresh, min_kept, ignored_ratio):
+    sampler = _build_sampler(thresh, min_kept)
+    scores, seg_label = _inputs(ignored_ratio)
+    seg_weight = sampler.sample_from_scores(scores, seg_label)
+    expected = _sort_sample_from_scores(sampler, scores, seg_label)
+    assert seg_weight.dtype == scores.dtype
+    assert torch.equal(seg_weight, expected)
+
+    num_valid = int((seg_label != 255).sum())
+    if thresh is None:
+        # exactly min_kept pixels per image are kept, if there are enough
+        assert seg_weight.sum() == min(2 * min_kept, num_valid)
+    # the ignored pixels are never kept
+    assert seg_weight[seg_label[:, 0] == 255].sum() == 0
+
+
+@pytest.mark.parametrize('thresh', [None, 0.7])
+def test_ohem_sample(thresh):
+    sampler = _build_sampler(thresh, 200)
+    torch.manual_seed(0)
+    seg_logit = torch.randn(2, 5, 20, 30)
+    seg_label = torch.randint(0, 5, (2, 1, 20, 30))
+    seg_label[:, :, :5] = 255
+    seg_weight = sampler.sample(seg_logit, seg_label)
+    scores = sampler.pixel_scores(seg_logit, seg_label)
+    expected = _sort_sample_from_scores(sampler, scores, seg_label)
+    assert torch.equal(seg_weight, expected)
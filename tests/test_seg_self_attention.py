@@ -0,0 +1,75 @@
+import copy
+
+import pytest
+import torch
+
+from mmseg.models.decode_heads.ann_head import \
+    SelfAttentionBlock as ANNSelfAttentionBlock
+from mmseg.models.decode_heads.da_head import PAM
+from mmseg.models.decode_heads.ocr_head import ObjectAttentionBlock
+
+
+def _build_block(block_type):
+    torch.manual_seed(0)
+    if block_type == 'pam':
+        block = PAM(in_channels=8, channels=4)
+        # gamma is initialized to 0, which hides the attention
+        block.gamma.scale.data.fill_(0.5)
+        inputs = [torch.randn(2, 8, 9, 11)]
+    elif block_type == 'ocr':
+        block = ObjectAttentionBlock(
+            in_channels=8,
+            channels=4,
+            scale=1,
+            conv_cfg=None,
+            norm_cfg=dict(type='BN'),
+            act_cfg=dict(type='ReLU'))
+        # the keys are the object regions
+        inputs = [torch.randn(2, 8, 9, 11), torch.randn(2, 8, 5, 1)]
+    else:
+        block = ANNSelfAttentionBlock(
+            low_in_channels=6,
+            high_in_channels=8,
+            channels=4,
+            out_channels=8,
+            share_key_query=False,
+            query_scale=1,
+            key_pool_scales=(1, 3, 6),
+            conv_cfg=None,
+            norm_cfg=dict(type='BN'),
+            act_cfg=dict(type='ReLU'))
+        # out_project is initialized to 0, which hides the attention
+        torch.nn.init.normal_(block.out_project.weight)
+        inputs = [torch.randn(2, 8, 9, 11), torch.randn(2, 6, 12, 10)]
+    return block, inputs
+
+
+def _forward_backward(block, inputs):
+    inputs = [x.clone().requires_grad_() for x in inputs]
+    output = block(*inputs)
+    # a loss whose gradient differs for each output element
+    weight = torch.linspace(-1, 1, output.numel()).view_as(output)
+    (output * weight).sum().backward()
+    grads = [x.grad for x in inputs]
+    grads += [param.grad for param in block.parameters()]
+    return output, grads
+
+
+@pytest.mark.parametrize('block_type', ['pam', 'ocr', 'ann'])
+@pytest.mark.parametrize('chunk_size', [1, 7, 1000])
+def test_chunked_attention(block_type, chunk_size):
+    block, inputs = _build_block(block_type)
+    chunked_block = copy.deepcopy(block)
+    chunked_block.chunk_size = chunk_size
+
+    output, grads = _forward_backward(block, inputs)
+    chunked_output, chunked_grads = _forward_backward(chunked_block, inputs)
+    assert torch.allclose(chunked_output, output, rtol=1e-4, atol=1e-5)
+    assert len(chunked_grads) == len(grads)
+    for chunked_grad, grad in zip(chunked_grads, grads):
+        assert torch.allclose(chunked_grad, grad, rtol=1e-4, atol=1e-5)
+
+    # the chunked attention without gradients
+    with torch.no_grad():
+        assert torch.allclose(
+            chunked_block(*inputs), output, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,64 @@
+import pytest
+import torch
+from mmcv import ConfigDict
+
+from mmseg.models import build_segmentor
+
+
+def _build_segmentor(align_corners, test_cfg):
+    torch.manual_seed(0)
+    model = build_segmentor(
+        ConfigDict(
+            type='EncoderDecoder',
+            backbone=dict(
+                type='ResNetV1c',
+                depth=18,
+                base_channels=8,
+                out_indices=(3, ),
+                strides=(1, 2, 2, 2),
+                dilations=(1, 1, 1, 1)),
+            decode_head=dict(
+                type='FCNHead',
+                in_channels=64,
+                channels=8,
+                num_convs=1,
+                num_classes=5,
+                align_corners=align_corners,
+                loss_decode=dict(type='CrossEntropyLoss')),
+            test_cfg=test_cfg))
+    return model.eval()
+
+
+@pytest.mark.parametrize('window', [None, 'cosine', 'gaussian'])
+@pytest.mark.parametrize('align_corners', [False, True])
+@pytest.mark.parametrize('rescale', [False, True])
+def test_slide_argmax_inference(window, align_corners, rescale):
+    test_cfg = dict(
+        mode='slide', crop_size=(40, 50), stride=(25, 30), batch_size=3)
+    if window is not None:
+        test_cfg['window'] = window
+    model = _build_segmentor(align_corners, test_cfg)
+    img = torch.randn(2, 3, 97, 113)
+    img_meta = [dict(ori_shape=(150, 170, 3), flip=False)] * 2
+    with torch.no_grad():
+        seg_logit = model.slide_inference(img, img_meta, rescale)
+        seg_pred = model.slide_argmax_inference(img, img_meta, rescale)
+    assert seg_pred.shape == seg_logit.argmax(dim=1).shape
+    # the labels may only differ where the logits of the two labels tie
+    # up to the rounding of the rescaling
+    mismatch = seg_pred != seg_logit.argmax(dim=1)
+    max_logit = seg_logit.max(dim=1)[0]
+    pred_logit = seg_logit.gather(1, seg_pred[:, None])[:, 0]
+    assert (max_logit - pred_logit)[mismatch].le(1e-5).all()
+    assert mismatch.float().mean() < 1e-3
+
+
+def test_slide_argmax_inference_uncovered_rows():
+    # a stride larger than the crop leaves rows out of all the windows
+    model = _build_segmentor(
+        False, dict(mode='slide', crop_size=(32, 32), stride=(40, 20)))
+    img = torch.randn(1, 3, 100, 100)
+    img_meta = [dict(ori_shape=(100, 100, 3), flip=False)]
+    with torch.no_grad():
+        with pytest.raises(AssertionError):
+            model.slide_argmax_inference(img, img_meta, False)
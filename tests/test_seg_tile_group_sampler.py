@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from mmseg.datasets.samplers import TileGroupSampler
+
+
+class TileDataset(object):
+
+    def __init__(self, tiles_per_source):
+        self.tile_groups = np.repeat(
+            np.arange(len(tiles_per_source)), tiles_per_source)
+
+    def __len__(self):
+        return len(self.tile_groups)
+
+
+@pytest.mark.parametrize('tiles_per_source', [[4] * 10, [1, 7, 3, 2, 9, 1]])
+@pytest.mark.parametrize('num_replicas', [1, 3, 4])
+@pytest.mark.parametrize('samples_per_gpu,workers_per_gpu', [(1, 1), (2, 3)])
+def test_tile_group_sampler(tiles_per_source, num_replicas, samples_per_gpu,
+                            workers_per_gpu):
+    dataset = TileDataset(tiles_per_source)
+    samplers = [
+        TileGroupSampler(
+            dataset,
+            samples_per_gpu=samples_per_gpu,
+            workers_per_gpu=workers_per_gpu,
+            num_replicas=num_replicas,
+            rank=rank) for rank in range(num_replicas)
+    ]
+    num_samples = int(np.ceil(len(dataset) / num_replicas))
+
+    epochs = []
+    for epoch in range(3):
+        indices = []
+        for sampler in samplers:
+            sampler.set_epoch(epoch)
+            rank_indices = list(sampler)
+            assert len(rank_indices) == len(sampler) == num_samples
+            # deterministic given the seed and the epoch
+            assert list(sampler) == rank_indices
+            indices.append(rank_indices)
+        # every tile is sampled at least once per epoch, only the padding
+        # is repeated
+        all_indices = np.concatenate(indices)
+        assert set(all_indices) == set(range(len(dataset)))
+        assert len(all_indices) - len(dataset) < num_replicas
+        # only the sources at the boundaries of the ranks are split
+        num_splits = sum(
+            len(set(dataset.tile_groups[rank_indices])) for rank_indices in
+            indices) - len(tiles_per_source)
+        assert num_splits <= 2 * (num_replicas - 1)
+        epochs.append(indices)
+    assert epochs[0] != epochs[1] != epochs[2]
+
+
+def test_tile_group_sampler_workers():
+    # the batches a dataloader sends to a worker (in round-robin order) hold
+    # the tiles of its sources back to back
+    dataset = TileDataset([4] * 10)
+    sampler = TileGroupSampler(
+        dataset, samples_per_gpu=2, workers_per_gpu=2, num_replicas=1, rank=0)
+    indices = np.array(list(sampler)).reshape(-1, 2)
+    for worker in range(2):
+        sources = dataset.tile_groups[indices[worker::2].ravel()]
+        changes = np.flatnonzero(np.diff(sources)) + 1
+        assert len(np.unique(sources)) == len(changes) + 1 == 5
+
+    sampler = TileGroupSampler(
+        dataset, shuffle=False, num_replicas=2, rank=1)
+    assert list(sampler) == list(range(20, 40))
@@ -0,0 +1,91 @@
+import os.path as osp
+
+import mmcv
+import numpy as np
+
+from mmseg.datasets.pipelines import (LoadImageFromFile, LoadTileAnnotations,
+                                      LoadTileFromFile)
+from mmseg.datasets.pipelines.loading import TileSourceCache
+
+
+def test_tile_source_cache():
+    arrays = {key: np.full((4, 4), i, np.uint8) for i, key in enumerate('abc')}
+    loaded = []
+
+    def load(key):
+        loaded.append(key)
+        return arrays[key]
+
+    # room for two arrays of 16 bytes
+    cache = TileSourceCache(max_bytes=40)
+    assert cache.get('a', lambda: load('a')) is arrays['a']
+    assert cache.get('b', lambda: load('b')) is arrays['b']
+    assert cache.get('a', lambda: load('a')) is arrays['a']
+    assert loaded == ['a', 'b']
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+
+    # 'b' is the least recently used one and is evicted
+    cache.get('c', lambda: load('c'))
+    assert len(cache) == 2 and cache.num_bytes == 32
+    cache.get('a', lambda: load('a'))
+    assert loaded == ['a', 'b', 'c']
+    cache.get('b', lambda: load('b'))
+    assert loaded == ['a', 'b', 'c', 'b']
+    assert (cache.hits, cache.misses) == (2, 4)
+
+    # an array larger than the cache is returned without being cached
+    large = np.zeros((8, 8), np.uint8)
+    assert cache.get('large', lambda: large) is large
+    assert len(cache) == 2 and 'large' not in cache._arrays
+
+
+def test_load_tile(tmpdir):
+    rng = np.random.RandomState(0)
+    img = rng.randint(0, 256, (40, 60, 3), dtype=np.uint8)
+    img_path = osp.join(tmpdir, 'sat.png')
+    mmcv.imwrite(img, img_path)
+    colors = {0: (0, 0, 0), 1: (0, 255, 255), 2: (255, 255, 0)}
+    rgb2label = {color: label for label, color in colors.items()}
+    labels = rng.randint(0, 4, (40, 60))
+    # label 3 has no color in rgb2label and becomes ignore_index
+    mask = np.array(list(colors.values()) + [(1, 2, 3)], np.uint8)[labels]
+    label_path = osp.join(tmpdir, 'mask.png')
+    mmcv.imwrite(mask[..., ::-1], label_path)
+
+    full = LoadImageFromFile()(
+        dict(img_prefix=None, img_info=dict(filename=img_path)))['img']
+    load_tile = LoadTileFromFile()
+    load_ann = LoadTileAnnotations()
+    # w is the offset along the first axis and h along the second one
+    for w, h in [(0, 0), (20, 0), (0, 40), (20, 40)]:
+        results = load_ann(
+            load_tile(
+                dict(
+                    img_path=img_path,
+                    label_path=label_path,
+                    rgb2label=rgb2label,
+                    tile_size=20,
+                    w=w,
+                    h=h,
+                    seg_fields=[])))
+        np.testing.assert_array_equal(results['img'],
+                                      full[w:w + 20, h:h + 20])
+        assert results['img_shape'] == (20, 20, 3)
+        expected_labels = np.where(labels == 3, 255, labels)
+        np.testing.assert_array_equal(results['gt_semantic_seg'],
+                                      expected_labels[w:w + 20, h:h + 20])
+        assert results['seg_fields'] == ['gt_semantic_seg']
+
+        # the tiles are copies, modifying them leaves the cache unchanged
+        results['img'][:] = 0
+        results['gt_semantic_seg'][:] = 0
+    # each source is decoded once
+    assert (load_tile.cache.misses, load_tile.cache.hits) == (1, 3)
+    assert (load_ann.cache.misses, load_ann.cache.hits) == (1, 3)
+    np.testing.assert_array_equal(
+        load_tile(dict(img_path=img_path, tile_size=20, w=20, h=40))['img'],
+        full[20:, 40:])
+
+    # the label map of a test tile is not loaded
+    results = load_ann(dict(label_path=None, seg_fields=[]))
+    assert 'gt_semantic_seg' not in results
@@ -0,0 +1,133 @@
+import os
+import os.path as osp
+import tempfile
+
+import mmcv
+import numpy as np
+import pytest
+import torch
+import torch.distributed as dist
+import torch.nn as nn
+
+from mmdet.apis import ShardedResults, multi_gpu_test
+from mmdet.core import encode_mask_results
+from mmdet.datasets import CocoDataset
+
+
+def test_sharded_results():
+    size, shard_size, world_size = 10, 2, 3
+    tmpdir = tempfile.mkdtemp()
+    # the sampler gives rank i the samples i, i + world_size, ... and pads
+    # the last ones with samples from the beginning
+    indices = list(range(size)) + list(range(12 - size))
+    for rank in range(world_size):
+        part = indices[rank::world_size]
+        for shard_id, start in enumerate(range(0, len(part), shard_size)):
+            mmcv.dump(part[start:start + shard_size],
+                      osp.join(tmpdir, f'part_{rank}_{shard_id}.pkl'))
+
+    results = ShardedResults(tmpdir, size, shard_size, world_size)
+    assert len(results) == size
+    assert list(results) == list(range(size))
+    assert [results[i] for i in range(size)] == list(range(size))
+    assert results[-1] == size - 1
+    assert results[3:8] == list(range(3, 8))
+    with pytest.raises(IndexError):
+        results[size]
+    results.cleanup()
+    assert not osp.exists(tmpdir)
+
+
+class ToyModel(nn.Module):
+
+    def forward(self, img, return_loss=False, rescale=True):
+        return [int(x) for x in img]
+
+
+@pytest.mark.parametrize('batch_size,shard_size,num_shards', [(2, 3, 3),
+                                                              (4, 2, 4)])
+def test_multi_gpu_test_shard_size(batch_size, shard_size, num_shards):
+    os.environ.setdefault('MASTER_ADDR', '127.0.0.1')
+    os.environ.setdefault('MASTER_PORT', '29531')
+    dist.init_process_group('gloo', rank=0, world_size=1)
+    try:
+        data_loader = torch.utils.data.DataLoader(
+            list(range(7)),
+            batch_size=batch_size,
+            collate_fn=lambda batch: dict(img=torch.tensor(batch)))
+        tmpdir = tempfile.mkdtemp()
+        results = multi_gpu_test(
+            ToyModel(), data_loader, tmpdir=tmpdir, shard_size=shard_size)
+        # a batch larger than shard_size is dumped in several shards
+        assert sorted(os.listdir(tmpdir)) == [
+            f'part_0_{i}.pkl' for i in range(num_shards)
+        ]
+        assert isinstance(results, ShardedResults)
+        assert list(results) == list(range(7))
+        results.cleanup()
+    finally:
+        dist.destroy_process_group()
+
+
+def _create_coco_json(json_name, num_imgs):
+    images, annotations = [], []
+    for i in range(num_imgs):
+        images.append(
+            dict(id=i, width=64, height=64, file_name=f'fake_{i}.jpg'))
+        x1, y1 = 4 * i, 2 * i
+        annotations.append(
+            dict(
+                id=i + 1,
+                image_id=i,
+                category_id=0,
+                area=400,
+                bbox=[x1, y1, 20, 20],
+                segmentation=[[
+                    x1, y1, x1 + 20, y1, x1 + 20, y1 + 20, x1, y1 + 20
+                ]],
+                iscrowd=0))
+    categories = [dict(id=0, name='car', supercategory='car')]
+    mmcv.dump(
+        dict(images=images, annotations=annotations, categories=categories),
+        json_name)
+
+
+def _create_mask_results(num_imgs):
+    results = []
+    for i in range(num_imgs):
+        x1, y1 = 4 * i, 2 * i
+        bboxes = np.array([[x1, y1, x1 + 20, y1 + 20, 0.9]], dtype=np.float32)
+        mask = np.zeros((64, 64), dtype=np.uint8)
+        mask[y1:y1 + 20, x1:x1 + 20] = 1
+        results.append(([bboxes], encode_mask_results([[mask]])))
+    return results
+
+
+def test_coco_evaluate_sharded_results():
+    num_imgs, shard_size, world_size = 5, 2, 2
+    tmpdir = tempfile.mkdtemp()
+    json_file = osp.join(tmpdir, 'fake_data.json')
+    _create_coco_json(json_file, num_imgs)
+    dataset = CocoDataset(ann_file=json_file, classes=('car', ), pipeline=[])
+
+    results = _create_mask_results(num_imgs)
+    # shard the results as multi_gpu_test does, padding the last samples
+    indices = list(range(num_imgs)) + [0]
+    shard_dir = osp.join(tmpdir, 'shards')
+    os.makedirs(shard_dir)
+    for rank in range(world_size):
+        part = [results[i] for i in indices[rank::world_size]]
+        for shard_id, start in enumerate(range(0, len(part), shard_size)):
+            mmcv.dump(part[start:start + shard_size],
+                      osp.join(shard_dir, f'part_{rank}_{shard_id}.pkl'))
+    sharded_results = ShardedResults(shard_dir, num_imgs, shard_size,
+                                     world_size)
+
+    eval_results = dataset.evaluate(sharded_results, metric=['bbox', 'segm'])
+    assert eval_results == dataset.evaluate(results, metric=['bbox', 'segm'])
+    assert eval_results['bbox_mAP'] == 1
+    assert eval_results['segm_mAP'] == 1
+    result_files, tmp_dir = dataset.format_results(sharded_results)
+    assert set(result_files) == {'bbox', 'proposal', 'segm'}
+    tmp_dir.cleanup()
+    sharded_results.cleanup()
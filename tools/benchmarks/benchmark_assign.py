@@ -0,0 +1,110 @@
+import argparse
+import time
+
+import mmcv
+import torch
+
+from mmdet.models import build_head
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the training step of a dense head with the '
+        'per-image and the batched label assignment')
+    parser.add_argument(
+        'configs',
+        nargs='+',
+        help='config files, e.g. configs/retinanet/retinanet_r50_fpn_1x_coco'
+        '.py and configs/atss/atss_r50_fpn_1x_coco.py')
+    parser.add_argument(
+        '--device', default='cuda:0', help='device used for the benchmark')
+    parser.add_argument(
+        '--img-size',
+        type=int,
+        nargs=2,
+        default=[800, 1216],
+        help='padded (height, width) of the batch')
+    parser.add_argument(
+        '--batch-size', type=int, default=4, help='number of images')
+    parser.add_argument(
+        '--num-gts', type=int, default=20, help='number of gts per image')
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='number of timed steps')
+    args = parser.parse_args()
+    return args
+
+
+def random_inputs(head, args):
+    """FPN features, gts and metas of a batch of images."""
+    img_h, img_w = args.img_size
+    feats = [
+        torch.rand(
+            args.batch_size,
+            head.in_channels,
+            img_h // stride_h,
+            img_w // stride_w,
+            device=args.device)
+        for stride_w, stride_h in head.anchor_generator.strides
+    ]
+    img_metas = []
+    gt_bboxes = []
+    gt_labels = []
+    for _ in range(args.batch_size):
+        # images of a batch are padded to the same size, but their shapes
+        # differ
+        h, w = int(img_h * (0.8 + 0.2 * torch.rand(1))), img_w
+        img_metas.append(
+            dict(img_shape=(h, w, 3), pad_shape=(img_h, img_w, 3)))
+        xy = torch.rand(args.num_gts, 2) * torch.tensor([w, h]) * 0.8
+        wh = torch.rand(args.num_gts, 2) * 300 + 8
+        bboxes = torch.cat([xy, xy + wh], dim=1)
+        bboxes[:, 2] = bboxes[:, 2].clamp(max=w - 1)
+        bboxes[:, 3] = bboxes[:, 3].clamp(max=h - 1)
+        gt_bboxes.append(bboxes.to(args.device))
+        gt_labels.append(
+            torch.randint(
+                0, head.num_classes, (args.num_gts, ), device=args.device))
+    return feats, gt_bboxes, gt_labels, img_metas
+
+
+def train_step(head, feats, gt_bboxes, gt_labels, img_metas):
+    losses = head.forward_train(feats, img_metas, gt_bboxes, gt_labels)
+    loss = sum(
+        sum(value) if isinstance(value, list) else value
+        for value in losses.values())
+    loss.backward()
+
+
+def timeit(func, args):
+    func()
+    if args.device.startswith('cuda'):
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        func()
+    if args.device.startswith('cuda'):
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / args.repeat * 1000
+
+
+def main():
+    args = parse_args()
+    print(f'{"config":>32} {"per-image (ms)":>15} {"batched (ms)":>13} '
+          f'{"speedup":>8}')
+    for config in args.configs:
+        cfg = mmcv.Config.fromfile(config)
+        head_cfg = cfg.model.bbox_head
+        head_cfg.update(train_cfg=cfg.train_cfg, test_cfg=cfg.test_cfg)
+        head = build_head(head_cfg).to(args.device)
+        inputs = random_inputs(head, args)
+        times = []
+        for batched_assign in [False, True]:
+            head.train_cfg.batched_assign = batched_assign
+            times.append(timeit(lambda: train_step(head, *inputs), args))
+        name = config.split('/')[-1].replace('.py', '')[:32]
+        print(f'{name:>32} {times[0]:>15.1f} {times[1]:>13.1f} '
+              f'{times[0] / times[1]:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
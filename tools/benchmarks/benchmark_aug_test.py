@@ -0,0 +1,106 @@
+import argparse
+
+import torch
+from mmcv import ConfigDict
+
+from mmseg.models import build_segmentor
+from tools.benchmarks.profiling import benchmark
+
+
+def loop_aug_test(self, imgs, img_metas):
+    """The former aug_test which rescales the outputs of all the
+    augmentations to ori_shape in fp32 before merging them, kept as the
+    baseline."""
+    seg_logit = self.inference(imgs[0], img_metas[0], True)
+    for i in range(1, len(imgs)):
+        cur_seg_logit = self.inference(imgs[i], img_metas[i], True)
+        seg_logit += cur_seg_logit
+    seg_logit /= len(imgs)
+    return seg_logit.argmax(dim=1).cpu().numpy()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the aug_test of EncoderDecoder with a '
+        'ResNet-18 FCN')
+    parser.add_argument(
+        '--ori-shape',
+        type=int,
+        nargs=2,
+        default=[1024, 2048],
+        help='original image size (h, w)')
+    parser.add_argument(
+        '--img-ratios',
+        type=float,
+        nargs='+',
+        default=[0.5, 0.75, 1.0],
+        help='ratios of the augmented images, each one is flipped too')
+    parser.add_argument(
+        '--num-classes', type=int, default=19, help='number of classes')
+    parser.add_argument(
+        '--device',
+        default='cuda' if torch.cuda.is_available() else 'cpu',
+        help='device used for benchmarking')
+    args = parser.parse_args()
+    return args
+
+
+@torch.no_grad()
+def main():
+    args = parse_args()
+    torch.manual_seed(0)
+    model = build_segmentor(
+        ConfigDict(
+            type='EncoderDecoder',
+            backbone=dict(
+                type='ResNetV1c',
+                depth=18,
+                out_indices=(3, ),
+                strides=(1, 2, 1, 1),
+                dilations=(1, 1, 2, 4)),
+            decode_head=dict(
+                type='FCNHead',
+                in_channels=512,
+                channels=128,
+                num_classes=args.num_classes,
+                loss_decode=dict(type='CrossEntropyLoss')),
+            test_cfg=dict(mode='whole'))).to(args.device).eval()
+    ori_h, ori_w = args.ori_shape
+    imgs, img_metas = [], []
+    for ratio in args.img_ratios:
+        img = torch.randn(
+            1, 3, int(ori_h * ratio), int(ori_w * ratio), device=args.device)
+        for flip in [False, True]:
+            imgs.append(img.flip(dims=(3, )) if flip else img)
+            img_metas.append([
+                dict(
+                    ori_shape=(ori_h, ori_w, 3),
+                    flip=flip,
+                    flip_direction='horizontal')
+            ])
+    # warm up
+    model.encode_decode(imgs[0], img_metas[0])
+
+    expected, elapsed, peak_memory = benchmark(
+        lambda: loop_aug_test(model, imgs, img_metas), args.device)
+    print(f'{"mode":>12} {"time (ms)":>10} {"peak memory (MB)":>17} '
+          f'{"mismatch":>9}')
+    print(f'{"former":>12} {elapsed:>10.1f} {peak_memory:>17.1f} '
+          f'{0:>9.4f}')
+    options = dict(
+        default=dict(),
+        batch=dict(aug_batch=True),
+        fp16=dict(aug_merge_fp16=True),
+        half_scale=dict(aug_merge_scale=0.5),
+        all=dict(aug_batch=True, aug_merge_scale=0.5, aug_merge_fp16=True))
+    for name, option in options.items():
+        model.test_cfg = ConfigDict(mode='whole', **option)
+        result, elapsed, peak_memory = benchmark(
+            lambda: model.aug_test(imgs, img_metas)[0], args.device)
+        mismatch = (result != expected[0]).mean()
+        print(f'{name:>12} {elapsed:>10.1f} {peak_memory:>17.1f} '
+              f'{mismatch:>9.4f}')
+
+
+if __name__ == '__main__':
+    main()
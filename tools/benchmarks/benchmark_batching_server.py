@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import time
+
+import mmcv
+import numpy as np
+
+from mmdet.apis import MicroBatchInference, init_detector
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Load test of the micro-batching inference server')
+    parser.add_argument('config', help='test config file path')
+    parser.add_argument('img', help='image file sent by every request')
+    parser.add_argument('--checkpoint', help='checkpoint file')
+    parser.add_argument(
+        '--device', default='cuda:0', help='device used for inference')
+    parser.add_argument(
+        '--num-requests', type=int, default=200, help='number of requests')
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=50,
+        help='mean request rate (requests/s) of the Poisson arrivals')
+    parser.add_argument(
+        '--max-batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1, 4, 8],
+        help='max batch sizes of the server to benchmark')
+    parser.add_argument(
+        '--max-wait-ms',
+        type=float,
+        default=10,
+        help='max time the first image of a batch waits for more images')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=4,
+        help='number of preprocessing threads')
+    args = parser.parse_args()
+    return args
+
+
+async def load_test(server, img, num_requests, rate, seed=0):
+    """Send requests with Poisson arrivals and return their latencies."""
+    rng = np.random.RandomState(seed)
+    latencies = []
+
+    async def request():
+        start = time.perf_counter()
+        await server.infer(img)
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    for interval in rng.exponential(1 / rate, num_requests):
+        tasks.append(asyncio.ensure_future(request()))
+        await asyncio.sleep(interval)
+    await asyncio.gather(*tasks)
+    return np.array(latencies) * 1000
+
+
+async def benchmark(model, img, args, max_batch_size):
+    server = MicroBatchInference(
+        model,
+        max_batch_size=max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        num_workers=args.num_workers)
+    async with server:
+        # warm up
+        await asyncio.gather(*[server.infer(img) for _ in range(2)])
+        server.batch_sizes.clear()
+        start = time.perf_counter()
+        latencies = await load_test(server, img, args.num_requests,
+                                    args.rate)
+        elapsed = time.perf_counter() - start
+    server.close()
+    print(f'{max_batch_size:>14} {np.percentile(latencies, 50):>9.1f} '
+          f'{np.percentile(latencies, 99):>9.1f} '
+          f'{args.num_requests / elapsed:>7.2f} '
+          f'{np.mean(server.batch_sizes):>10.2f}')
+
+
+def main():
+    args = parse_args()
+    model = init_detector(args.config, args.checkpoint, device=args.device)
+    img = mmcv.imread(args.img)
+    print(f'{"max batch size":>14} {"p50 (ms)":>9} {"p99 (ms)":>9} '
+          f'{"img/s":>7} {"mean batch":>10}')
+    loop = asyncio.get_event_loop()
+    for max_batch_size in args.max_batch_sizes:
+        loop.run_until_complete(benchmark(model, img, args, max_batch_size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import time
+
+import numpy as np
+
+from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
+
+
+def loop_bbox_overlaps(bboxes1, bboxes2, mode='iou', eps=1e-6):
+    """The former row by row implementation, kept as the baseline."""
+    bboxes1 = bboxes1.astype(np.float32)
+    bboxes2 = bboxes2.astype(np.float32)
+    rows = bboxes1.shape[0]
+    cols = bboxes2.shape[0]
+    ious = np.zeros((rows, cols), dtype=np.float32)
+    if rows * cols == 0:
+        return ious
+    exchange = False
+    if bboxes1.shape[0] > bboxes2.shape[0]:
+        bboxes1, bboxes2 = bboxes2, bboxes1
+        ious = np.zeros((cols, rows), dtype=np.float32)
+        exchange = True
+    area1 = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+    area2 = (bboxes2[:, 2] - bboxes2[:, 0]) * (bboxes2[:, 3] - bboxes2[:, 1])
+    for i in range(bboxes1.shape[0]):
+        x_start = np.maximum(bboxes1[i, 0], bboxes2[:, 0])
+        y_start = np.maximum(bboxes1[i, 1], bboxes2[:, 1])
+        x_end = np.minimum(bboxes1[i, 2], bboxes2[:, 2])
+        y_end = np.minimum(bboxes1[i, 3], bboxes2[:, 3])
+        overlap = np.maximum(x_end - x_start, 0) * np.maximum(
+            y_end - y_start, 0)
+        if mode == 'iou':
+            union = area1[i] + area2 - overlap
+        else:
+            union = area1[i] if not exchange else area2
+        union = np.maximum(union, eps)
+        ious[i, :] = overlap / union
+    if exchange:
+        ious = ious.T
+    return ious
+
+
+def random_bboxes(num, rng):
+    xy = rng.rand(num, 2) * 1000
+    wh = rng.rand(num, 2) * 300
+    return np.hstack([xy, xy + wh]).astype(np.float32)
+
+
+def timeit(func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the numpy bbox_overlaps used in evaluation')
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[10, 100, 1000, 5000],
+        help='numbers of boxes, each size is benchmarked as an NxN and an '
+        'Nx10 problem')
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=None,
+        help='chunk size passed to the broadcasted implementation')
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='repeat times of each case')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    rng = np.random.RandomState(0)
+    print(f'{"shape":>14} {"loop (ms)":>12} {"broadcast (ms)":>15} '
+          f'{"speedup":>8}')
+    for size in args.sizes:
+        for num_cols in [size, 10]:
+            bboxes1 = random_bboxes(size, rng)
+            bboxes2 = random_bboxes(num_cols, rng)
+            assert np.allclose(
+                loop_bbox_overlaps(bboxes1, bboxes2),
+                bbox_overlaps(bboxes1, bboxes2, chunk_size=args.chunk_size))
+            loop_time = timeit(lambda: loop_bbox_overlaps(bboxes1, bboxes2),
+                               args.repeat)
+            broadcast_time = timeit(
+                lambda: bbox_overlaps(
+                    bboxes1, bboxes2, chunk_size=args.chunk_size),
+                args.repeat)
+            shape = f'{size}x{num_cols}'
+            print(f'{shape:>14} {loop_time:>12.3f} {broadcast_time:>15.3f} '
+                  f'{loop_time / broadcast_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
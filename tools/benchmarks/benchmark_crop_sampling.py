@@ -0,0 +1,170 @@
+import argparse
+import time
+
+import numpy as np
+from numpy import random
+
+from mmdet.core.evaluation.bbox_overlaps import bbox_overlaps
+from mmdet.datasets.pipelines import MinIoURandomCrop, RandomCenterCropPad
+
+
+def loop_sample_patch(self, boxes, h, w):
+    """The former MinIoURandomCrop sampling which tries the candidate patches
+    one by one, kept as the baseline."""
+    while True:
+        mode = random.choice(self.sample_mode)
+        self.mode = mode
+        if mode == 1:
+            return None
+
+        min_iou = mode
+        for i in range(50):
+            new_w = random.uniform(self.min_crop_size * w, w)
+            new_h = random.uniform(self.min_crop_size * h, h)
+
+            # h / w in [0.5, 2]
+            if new_h / new_w < 0.5 or new_h / new_w > 2:
+                continue
+
+            left = random.uniform(w - new_w)
+            top = random.uniform(h - new_h)
+
+            patch = np.array(
+                (int(left), int(top), int(left + new_w), int(top + new_h)))
+            # Line or point crop is not allowed
+            if patch[2] == patch[0] or patch[3] == patch[1]:
+                continue
+            overlaps = bbox_overlaps(
+                patch.reshape(-1, 4), boxes.reshape(-1, 4)).reshape(-1)
+            if len(overlaps) > 0 and overlaps.min() < min_iou:
+                continue
+
+            # center of boxes should inside the crop img
+            if len(overlaps) > 0:
+                mask = self._is_center_of_bboxes_in_patch(boxes, patch)
+                if not mask.any():
+                    continue
+            return patch
+
+
+def loop_train_aug(self, results):
+    """The former RandomCenterCropPad sampling which crops and pastes the
+    image for each candidate center before checking it, kept as the
+    baseline. Only the gt_bboxes are cropped."""
+    img = results['img']
+    h, w, c = img.shape
+    boxes = results['gt_bboxes']
+    while True:
+        scale = random.choice(self.ratios)
+        new_h = int(self.crop_size[0] * scale)
+        new_w = int(self.crop_size[1] * scale)
+        h_border = self._get_border(self.border, h)
+        w_border = self._get_border(self.border, w)
+
+        for i in range(50):
+            center_x = random.randint(low=w_border, high=w - w_border)
+            center_y = random.randint(low=h_border, high=h - h_border)
+
+            cropped_img, border, patch = self._crop_image_and_paste(
+                img, [center_y, center_x], [new_h, new_w])
+
+            mask = self._filter_boxes(patch, boxes)
+            # if image do not have valid bbox, any crop patch is valid.
+            if not mask.any() and len(boxes) > 0:
+                continue
+
+            results['img'] = cropped_img
+            results['gt_bboxes'] = boxes[mask]
+            return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the sampling of MinIoURandomCrop and '
+        'RandomCenterCropPad')
+    parser.add_argument(
+        '--num-boxes',
+        type=int,
+        nargs='+',
+        default=[1, 5, 20],
+        help='numbers of boxes per image, each one is benchmarked')
+    parser.add_argument(
+        '--num-samples',
+        type=int,
+        default=500,
+        help='number of sampled patches per benchmark')
+    args = parser.parse_args()
+    return args
+
+
+def random_boxes(num_boxes, h, w):
+    xy = random.uniform(0, 0.7, (num_boxes, 2)) * (w, h)
+    wh = random.uniform(0.05, 0.3, (num_boxes, 2)) * (w, h)
+    return np.concatenate([xy, xy + wh], axis=1).astype(np.float32)
+
+
+def benchmark(func, boxes_list):
+    """Time in ms per sample and mean statistic of the samples."""
+    stats = []
+    start = time.perf_counter()
+    for boxes in boxes_list:
+        stats.append(func(boxes))
+    latency = (time.perf_counter() - start) / len(boxes_list) * 1000
+    return latency, np.mean([stat for stat in stats if stat is not None])
+
+
+def main():
+    args = parse_args()
+    random.seed(0)
+    h, w = 480, 640
+    img = random.uniform(0, 255, (h, w, 3)).astype(np.float32)
+    min_iou_crop = MinIoURandomCrop()
+    center_crop = RandomCenterCropPad(
+        crop_size=(511, 511),
+        ratios=(0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3),
+        border=128,
+        mean=[0, 0, 0],
+        std=[1, 1, 1],
+        to_rgb=True,
+        test_pad_mode=None)
+
+    def loop_min_iou_crop(boxes):
+        patch = loop_sample_patch(min_iou_crop, boxes, h, w)
+        return None if patch is None else np.prod(patch[2:] - patch[:2])
+
+    def vectorized_min_iou_crop(boxes):
+        patch = min_iou_crop._sample_patch(boxes, h, w)
+        return None if patch is None else np.prod(patch[2:] - patch[:2])
+
+    def loop_center_crop(boxes):
+        results = dict(img=img, gt_bboxes=boxes)
+        return len(loop_train_aug(center_crop, results)['gt_bboxes'])
+
+    def vectorized_center_crop(boxes):
+        results = dict(img=img, gt_bboxes=boxes, bbox_fields=['gt_bboxes'])
+        return len(center_crop._train_aug(results)['gt_bboxes'])
+
+    # the statistics of the samples should be close for both
+    samplers = dict(
+        MinIoURandomCrop=('patch area', loop_min_iou_crop,
+                          vectorized_min_iou_crop),
+        RandomCenterCropPad=('kept boxes', loop_center_crop,
+                             vectorized_center_crop))
+    print(f'{"transform":>20} {"boxes":>6} {"loop (ms)":>10} '
+          f'{"vectorized (ms)":>16} {"speedup":>8} {"statistic":>11} '
+          f'{"loop":>9} {"vectorized":>11}')
+    for name, (stat_name, loop_func, vectorized_func) in samplers.items():
+        for num_boxes in args.num_boxes:
+            boxes_list = [
+                random_boxes(num_boxes, h, w) for _ in range(args.num_samples)
+            ]
+            loop_time, loop_stat = benchmark(loop_func, boxes_list)
+            vectorized_time, stat = benchmark(vectorized_func, boxes_list)
+            print(f'{name:>20} {num_boxes:>6} {loop_time:>10.3f} '
+                  f'{vectorized_time:>16.3f} '
+                  f'{loop_time / vectorized_time:>7.1f}x {stat_name:>11} '
+                  f'{loop_stat:>9.1f} {stat:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
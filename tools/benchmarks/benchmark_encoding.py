@@ -0,0 +1,67 @@
+import argparse
+
+import torch
+
+from mmseg.ops import Encoding
+from tools.benchmarks.profiling import benchmark
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the memory efficient Encoding layer')
+    parser.add_argument(
+        '--shape',
+        type=int,
+        nargs=2,
+        default=[512, 1024],
+        help='input image size (h, w)')
+    parser.add_argument(
+        '--stride',
+        type=int,
+        default=8,
+        help='output stride of the features fed to the encoding layer')
+    parser.add_argument(
+        '--channels', type=int, default=512, help='feature channels')
+    parser.add_argument(
+        '--num-codes', type=int, default=32, help='number of code words')
+    parser.add_argument('--batch-size', type=int, default=2, help='batch size')
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='repeat times of each case')
+    parser.add_argument(
+        '--device',
+        default='cuda' if torch.cuda.is_available() else 'cpu',
+        help='device used for benchmarking')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    h, w = args.shape[0] // args.stride, args.shape[1] // args.stride
+    x = torch.randn(
+        args.batch_size,
+        args.channels,
+        h,
+        w,
+        device=args.device,
+        requires_grad=True)
+    print(f'input {args.batch_size}x{args.channels}x{h}x{w}, '
+          f'{args.num_codes} codes, {args.device}')
+    print(f'{"implementation":>16} {"fwd+bwd (ms)":>13} {"peak (MB)":>10}')
+    encoding = Encoding(args.channels, args.num_codes).to(args.device)
+    results = dict()
+    for memory_efficient in [False, True]:
+        encoding.memory_efficient = memory_efficient
+        results[memory_efficient] = encoding(x).detach()
+        # warm up
+        encoding(x).sum().backward()
+        _, elapsed, peak_memory = benchmark(
+            lambda: encoding(x).sum().backward(), args.device, args.repeat)
+        name = 'matmul' if memory_efficient else 'expand'
+        print(f'{name:>16} {elapsed:>13.2f} {peak_memory:>10.1f}')
+    max_diff = (results[True] - results[False]).abs().max().item()
+    print(f'max abs difference of the outputs: {max_diff:.3e}')
+
+
+if __name__ == '__main__':
+    main()
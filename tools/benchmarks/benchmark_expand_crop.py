@@ -0,0 +1,94 @@
+import argparse
+
+import numpy as np
+
+from mmdet.datasets.pipelines import (Expand, ExpandMinIoURandomCrop,
+                                      MinIoURandomCrop, Resize)
+from tools.benchmarks.profiling import benchmark
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark Expand + MinIoURandomCrop against the fused '
+        'ExpandMinIoURandomCrop of the SSD pipelines')
+    parser.add_argument(
+        '--img-sizes',
+        type=int,
+        nargs='+',
+        default=[640, 1333, 4000],
+        help='longer sides of the 4:3 images, each one is benchmarked')
+    parser.add_argument(
+        '--num-samples',
+        type=int,
+        default=50,
+        help='number of random samples per image size')
+    parser.add_argument(
+        '--expand-prob',
+        type=float,
+        default=1.0,
+        help='probability of expanding the images, the samples that are not '
+        'expanded are the same for both')
+    args = parser.parse_args()
+    return args
+
+
+def random_results(img_size, rng):
+    """Results of an image as given to Expand in the SSD pipelines, i.e.
+    after PhotoMetricDistortion."""
+    h, w = img_size * 3 // 4, img_size
+    xy = rng.uniform(0, 0.6, (5, 2)) * (w, h)
+    wh = rng.uniform(0.1, 0.4, (5, 2)) * (w, h)
+    return dict(
+        img=rng.uniform(0, 255, (h, w, 3)).astype(np.float32),
+        bbox_fields=['gt_bboxes'],
+        gt_bboxes=np.concatenate([xy, xy + wh], axis=1).astype(np.float32),
+        gt_labels=rng.randint(0, 80, 5))
+
+
+def apply(transforms, results, seed):
+    """Apply the transforms to a copy of the results with a fixed seed, so
+    that the benchmark can run it again."""
+    np.random.seed(seed)
+    # the transforms replace the arrays of the results instead of modifying
+    # them in place, so a shallow copy is enough
+    results = results.copy()
+    for transform in transforms:
+        results = transform(results)
+    return results
+
+
+def main():
+    args = parse_args()
+    mean = (123.675, 116.28, 103.53)
+    resize = Resize(img_scale=(300, 300), keep_ratio=False)
+    separate = [
+        Expand(mean=mean, prob=args.expand_prob),
+        MinIoURandomCrop(), resize
+    ]
+    fused = [ExpandMinIoURandomCrop(mean=mean, prob=args.expand_prob), resize]
+    rng = np.random.RandomState(0)
+    print(f'{"img size":>9} {"latency (ms)":>21} '
+          f'{"mean peak memory (MB)":>21}')
+    print(f'{"":>9} {"separate":>10} {"fused":>10} {"separate":>10} '
+          f'{"fused":>10}')
+    for img_size in args.img_sizes:
+        stats = []
+        for seed in range(args.num_samples):
+            results = random_results(img_size, rng)
+            expected, *separate_stats = benchmark(
+                lambda: apply(separate, results, seed), 'numpy')
+            fused_results, *fused_stats = benchmark(
+                lambda: apply(fused, results, seed), 'numpy')
+            assert np.array_equal(fused_results['img'], expected['img'])
+            assert np.array_equal(fused_results['gt_bboxes'],
+                                  expected['gt_bboxes'])
+            stats.append(separate_stats + fused_stats)
+        # the whole canvas is allocated when the crop keeps the expanded
+        # image, so the maximum peak is the same, compare the mean instead
+        latency, peak, fused_latency, fused_peak = np.mean(stats, axis=0)
+        print(f'{img_size:>9} {latency:>10.2f} {fused_latency:>10.2f} '
+              f'{peak:>10.1f} {fused_peak:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import mmcv
+import torch
+
+from mmdet.apis import BatchPredictor, inference_detector, init_detector
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark BatchPredictor against inference_detector')
+    parser.add_argument('config', help='test config file path')
+    parser.add_argument('img', help='image file used as every input')
+    parser.add_argument('--checkpoint', help='checkpoint file')
+    parser.add_argument(
+        '--device', default='cuda:0', help='device used for inference')
+    parser.add_argument(
+        '--num-imgs', type=int, default=64, help='number of images to infer')
+    parser.add_argument(
+        '--batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, 8],
+        help='batch sizes of the batched predictor')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=4,
+        help='number of preprocessing threads of the batched predictor')
+    parser.add_argument(
+        '--array',
+        action='store_true',
+        help='feed loaded arrays instead of file names')
+    args = parser.parse_args()
+    return args
+
+
+def measure(func, imgs, batch_size, device):
+    """Return the throughput (img/s) of inferring ``imgs`` in batches."""
+    # warm up
+    func(imgs[:batch_size])
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for i in range(0, len(imgs), batch_size):
+        func(imgs[i:i + batch_size])
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+    return len(imgs) / (time.perf_counter() - start)
+
+
+def main():
+    args = parse_args()
+    model = init_detector(args.config, args.checkpoint, device=args.device)
+    img = mmcv.imread(args.img) if args.array else args.img
+    imgs = [img] * args.num_imgs
+
+    fps = measure(lambda batch: [inference_detector(model, x) for x in batch],
+                  imgs, 1, args.device)
+    print(f'{"inference_detector":>24}: {fps:8.2f} img/s')
+    predictor = BatchPredictor(model, num_workers=args.num_workers)
+    for batch_size in args.batch_sizes:
+        batch_fps = measure(predictor, imgs, batch_size, args.device)
+        name = f'BatchPredictor (bs={batch_size})'
+        print(f'{name:>24}: {batch_fps:8.2f} img/s '
+              f'({batch_fps / fps:.2f}x)')
+    predictor.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import argparse
+from unittest.mock import MagicMock
+
+import torch
+
+from mmseg.core import build_pixel_sampler
+from tools.benchmarks.profiling import benchmark
+
+
+def sort_sample_from_scores(self, scores, seg_label):
+    """The former OHEMPixelSampler selection which sorts the scores of all the
+    valid pixels, kept as the baseline."""
+    seg_label = seg_label.squeeze(1).long()
+    batch_kept = self.min_kept * seg_label.size(0)
+    valid_mask = seg_label != self.context.ignore_index
+    seg_weight = scores.new_zeros(size=seg_label.size())
+    valid_seg_weight = seg_weight[valid_mask]
+    if self.thresh is not None:
+        seg_prob = scores
+        sort_prob, sort_indices = seg_prob[valid_mask].sort()
+
+        if sort_prob.numel() > 0:
+            min_threshold = sort_prob[min(batch_kept, sort_prob.numel() - 1)]
+        else:
+            min_threshold = 0.0
+        threshold = max(min_threshold, self.thresh)
+        valid_seg_weight[seg_prob[valid_mask] < threshold] = 1.
+    else:
+        _, sort_indices = scores[valid_mask].sort(descending=True)
+        valid_seg_weight[sort_indices[:batch_kept]] = 1.
+    seg_weight[valid_mask] = valid_seg_weight
+    return seg_weight
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the pixel selection of OHEMPixelSampler')
+    parser.add_argument(
+        '--batch-size', type=int, default=8, help='number of crops')
+    parser.add_argument(
+        '--shape',
+        type=int,
+        nargs=2,
+        default=[1024, 2048],
+        help='crop size (h, w)')
+    parser.add_argument(
+        '--min-kept', type=int, default=100000, help='min_kept of the sampler')
+    parser.add_argument(
+        '--repeat', type=int, default=5, help='number of timed iterations')
+    parser.add_argument(
+        '--device',
+        default='cuda' if torch.cuda.is_available() else 'cpu',
+        help='device used for benchmarking')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    torch.manual_seed(0)
+    context = MagicMock(ignore_index=255)
+    seg_label = torch.randint(
+        0, 19, (args.batch_size, 1, *args.shape), device=args.device)
+    # about 10% of the pixels are ignored, as in Cityscapes
+    ignored = torch.rand(seg_label.shape, device=args.device) < 0.1
+    seg_label[ignored] = 255
+    modes = dict(
+        prob=(0.7, torch.rand(seg_label.squeeze(1).shape, device=args.device)),
+        loss=(None,
+              torch.rand(seg_label.squeeze(1).shape, device=args.device) * 5))
+
+    print(f'{"mode":>6} {"sort (ms)":>10} {"select (ms)":>12} '
+          f'{"speedup":>8} {"sort (MB)":>10} {"select (MB)":>12} '
+          f'{"kept":>9} {"same":>5}')
+    for name, (thresh, scores) in modes.items():
+        sampler = build_pixel_sampler(
+            dict(
+                type='OHEMPixelSampler', thresh=thresh,
+                min_kept=args.min_kept),
+            context=context)
+
+        def sort_func():
+            return sort_sample_from_scores(sampler, scores, seg_label)
+
+        def select_func():
+            return sampler.sample_from_scores(scores, seg_label)
+
+        # warm up
+        sort_func()
+        select_func()
+        expected, sort_time, sort_memory = benchmark(sort_func, args.device,
+                                                     args.repeat)
+        result, select_time, select_memory = benchmark(
+            select_func, args.device, args.repeat)
+        same = bool((result == expected).all())
+        print(f'{name:>6} {sort_time:>10.1f} {select_time:>12.1f} '
+              f'{sort_time / select_time:>7.1f}x {sort_memory:>10.1f} '
+              f'{select_memory:>12.1f} {int(result.sum()):>9} '
+              f'{str(same):>5}')
+
+
+if __name__ == '__main__':
+    main()
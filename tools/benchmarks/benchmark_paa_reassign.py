@@ -0,0 +1,96 @@
+import argparse
+import time
+
+import torch
+
+from mmdet.core import multi_apply
+from mmdet.models.dense_heads import PAAHead
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the paa reassign step with the sklearn and '
+        'the torch GMM backends')
+    parser.add_argument(
+        '--device', default='cuda:0', help='device used for the benchmark')
+    parser.add_argument(
+        '--batch-size', type=int, default=4, help='number of images')
+    parser.add_argument(
+        '--num-gts',
+        type=int,
+        nargs='+',
+        default=[5, 20, 50],
+        help='numbers of gts per image, each one is benchmarked')
+    parser.add_argument(
+        '--pos-per-gt',
+        type=int,
+        default=60,
+        help='number of positive anchors of each gt before the reassign')
+    parser.add_argument(
+        '--repeat', type=int, default=5, help='number of timed iterations')
+    args = parser.parse_args()
+    return args
+
+
+def random_inputs(num_gts, args):
+    """Inputs of ``paa_reassign`` for a batch of images with the anchors of
+    a 800x1216 image."""
+    num_anchors_each_level = [(800 // stride) * (1216 // stride)
+                              for stride in [8, 16, 32, 64, 128]]
+    num_anchors = sum(num_anchors_each_level)
+    anchors = [
+        torch.zeros(num, 4, device=args.device)
+        for num in num_anchors_each_level
+    ]
+    inputs = []
+    for _ in range(args.batch_size):
+        num_pos = num_gts * args.pos_per_gt
+        pos_inds = torch.randperm(
+            num_anchors, device=args.device)[:num_pos].sort()[0]
+        pos_gt_inds = torch.randint(num_gts, (num_pos, ), device=args.device)
+        label = torch.full((num_anchors, ),
+                           80,
+                           dtype=torch.long,
+                           device=args.device)
+        label[pos_inds] = torch.randint(80, (num_pos, ), device=args.device)
+        bbox_weight = torch.zeros(num_anchors, 4, device=args.device)
+        bbox_weight[pos_inds] = 1
+        pos_losses = torch.rand(num_pos, device=args.device) * 2
+        inputs.append([
+            pos_losses, label,
+            torch.ones(num_anchors, device=args.device), bbox_weight, pos_inds,
+            pos_gt_inds, anchors
+        ])
+    return [list(item) for item in zip(*inputs)]
+
+
+def timeit(func, repeat, device):
+    func()
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    args = parse_args()
+    torch.manual_seed(0)
+    head = PAAHead(num_classes=80, in_channels=1)
+    print(f'{"gts/img":>8} {"sklearn (ms)":>13} {"torch (ms)":>11} '
+          f'{"speedup":>8}')
+    for num_gts in args.num_gts:
+        inputs = random_inputs(num_gts, args)
+        sklearn_time = timeit(lambda: multi_apply(head.paa_reassign, *inputs),
+                              args.repeat, args.device)
+        torch_time = timeit(lambda: head.paa_reassign_batched(*inputs),
+                            args.repeat, args.device)
+        print(f'{num_gts:>8} {sklearn_time:>13.1f} {torch_time:>11.1f} '
+              f'{sklearn_time / torch_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import time
+
+import mmcv
+import torch
+
+from mmdet.core import bbox_overlaps, multiclass_nms
+from mmdet.models import build_head
+
+
+def loop_score_voting(self, det_bboxes, det_labels, mlvl_bboxes,
+                      mlvl_nms_scores, score_thr):
+    """The former per class and per box implementation, kept as the
+    baseline."""
+    candidate_mask = mlvl_nms_scores > score_thr
+    candidate_mask_nozeros = candidate_mask.nonzero()
+    candidate_inds = candidate_mask_nozeros[:, 0]
+    candidate_labels = candidate_mask_nozeros[:, 1]
+    candidate_bboxes = mlvl_bboxes[candidate_inds]
+    candidate_scores = mlvl_nms_scores[candidate_mask]
+    det_bboxes_voted = []
+    det_labels_voted = []
+    for cls in range(self.cls_out_channels):
+        candidate_cls_mask = candidate_labels == cls
+        if not candidate_cls_mask.any():
+            continue
+        candidate_cls_scores = candidate_scores[candidate_cls_mask]
+        candidate_cls_bboxes = candidate_bboxes[candidate_cls_mask]
+        det_cls_mask = det_labels == cls
+        det_cls_bboxes = det_bboxes[det_cls_mask].view(-1, det_bboxes.size(-1))
+        det_candidate_ious = bbox_overlaps(det_cls_bboxes[:, :4],
+                                           candidate_cls_bboxes)
+        for det_ind in range(len(det_cls_bboxes)):
+            single_det_ious = det_candidate_ious[det_ind]
+            pos_ious_mask = single_det_ious > 0.01
+            pos_ious = single_det_ious[pos_ious_mask]
+            pos_bboxes = candidate_cls_bboxes[pos_ious_mask]
+            pos_scores = candidate_cls_scores[pos_ious_mask]
+            pis = (torch.exp(-(1 - pos_ious)**2 / 0.025) * pos_scores)[:, None]
+            voted_box = torch.sum(
+                pis * pos_bboxes, dim=0) / torch.sum(
+                    pis, dim=0)
+            voted_score = det_cls_bboxes[det_ind][-1:][None, :]
+            det_bboxes_voted.append(
+                torch.cat((voted_box[None, :], voted_score), dim=1))
+            det_labels_voted.append(cls)
+
+    det_bboxes_voted = torch.cat(det_bboxes_voted, dim=0)
+    det_labels_voted = det_labels.new_tensor(det_labels_voted)
+    return det_bboxes_voted, det_labels_voted
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the score voting of PAAHead')
+    parser.add_argument(
+        'config', help='config file, e.g. configs/paa/paa_r50_fpn_1x_coco.py')
+    parser.add_argument(
+        '--device', default='cuda:0', help='device used for the benchmark')
+    parser.add_argument(
+        '--num-objects',
+        type=int,
+        nargs='+',
+        default=[5, 20, 50],
+        help='numbers of objects per image, each one is benchmarked')
+    parser.add_argument(
+        '--repeat', type=int, default=20, help='number of timed iterations')
+    args = parser.parse_args()
+    return args
+
+
+def random_inputs(head, test_cfg, num_objects, device):
+    """Boxes and scores of an 800x1216 image as given to the score voting,
+    with clusters of boxes around each object."""
+    num_candidates = test_cfg.nms_pre * 5
+    num_classes = head.cls_out_channels
+    xy = torch.rand(num_objects, 2, device=device) * 900
+    wh = torch.rand(num_objects, 2, device=device) * 300 + 16
+    objects = torch.cat([xy, xy + wh], dim=1)
+    inds = torch.randint(num_objects, (num_candidates, ), device=device)
+    mlvl_bboxes = objects[inds] + torch.randn(
+        num_candidates, 4, device=device) * wh[inds].repeat(1, 2) * 0.1
+    mlvl_scores = torch.rand(num_candidates, num_classes, device=device)**8
+    obj_labels = torch.randint(num_classes, (num_objects, ), device=device)
+    mlvl_scores[torch.arange(num_candidates), obj_labels[inds]] = torch.rand(
+        num_candidates, device=device)
+    padding = mlvl_scores.new_zeros(num_candidates, 1)
+    mlvl_nms_scores = torch.cat([mlvl_scores, padding], dim=1)
+    det_bboxes, det_labels = multiclass_nms(mlvl_bboxes, mlvl_nms_scores,
+                                            test_cfg.score_thr, test_cfg.nms,
+                                            test_cfg.max_per_img)
+    return (det_bboxes, det_labels, mlvl_bboxes, mlvl_nms_scores,
+            test_cfg.score_thr)
+
+
+def timeit(func, repeat, device):
+    func()
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    args = parse_args()
+    torch.manual_seed(0)
+    cfg = mmcv.Config.fromfile(args.config)
+    head = build_head(dict(cfg.model.bbox_head,
+                           test_cfg=cfg.test_cfg)).to(args.device)
+    print(f'{"objects":>8} {"dets":>5} {"loop (ms)":>10} '
+          f'{"vectorized (ms)":>16} {"speedup":>8}')
+    for num_objects in args.num_objects:
+        inputs = random_inputs(head, cfg.test_cfg, num_objects, args.device)
+        for result, expected in zip(
+                head.score_voting(*inputs), loop_score_voting(head, *inputs)):
+            assert torch.allclose(result, expected, atol=1e-3)
+        loop_time = timeit(lambda: loop_score_voting(head, *inputs),
+                           args.repeat, args.device)
+        vectorized_time = timeit(lambda: head.score_voting(*inputs),
+                                 args.repeat, args.device)
+        print(f'{num_objects:>8} {inputs[0].size(0):>5} {loop_time:>10.2f} '
+              f'{vectorized_time:>16.2f} '
+              f'{loop_time / vectorized_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import argparse
+
+import torch
+from mmcv import ConfigDict
+
+from mmseg.models import build_head
+from tools.benchmarks.profiling import benchmark
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the loss modes of the decode heads')
+    parser.add_argument(
+        '--batch-size', type=int, default=16, help='number of images')
+    parser.add_argument(
+        '--shape',
+        type=int,
+        nargs=2,
+        default=[512, 512],
+        help='label size (h, w)')
+    parser.add_argument(
+        '--output-stride',
+        type=int,
+        default=8,
+        help='ratio of the label size to the logit size')
+    parser.add_argument(
+        '--num-classes', type=int, default=150, help='number of classes')
+    parser.add_argument(
+        '--ohem', action='store_true', help='use the OHEMPixelSampler')
+    parser.add_argument(
+        '--device',
+        default='cuda' if torch.cuda.is_available() else 'cpu',
+        help='device used for benchmarking')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    torch.manual_seed(0)
+    h, w = args.shape
+    seg_logit = torch.randn(
+        args.batch_size,
+        args.num_classes,
+        h // args.output_stride,
+        w // args.output_stride,
+        device=args.device)
+    seg_label = torch.randint(
+        0, args.num_classes, (args.batch_size, 1, h, w), device=args.device)
+    sampler = dict(type='OHEMPixelSampler') if args.ohem else None
+    loss_resize_cfgs = dict(
+        full=None,
+        chunked=dict(mode='chunked', chunk_size=64),
+        downsample=dict(mode='downsample'))
+
+    print(f'{"mode":>12} {"time (ms)":>10} {"peak memory (MB)":>17} '
+          f'{"loss":>8}')
+    for name, loss_resize_cfg in loss_resize_cfgs.items():
+        head = build_head(
+            ConfigDict(
+                type='FCNHead',
+                in_channels=8,
+                channels=8,
+                num_classes=args.num_classes,
+                sampler=sampler,
+                loss_resize_cfg=loss_resize_cfg)).to(args.device)
+
+        def forward_backward():
+            logit = seg_logit.clone().requires_grad_()
+            loss = head.losses(logit, seg_label)['loss_seg']
+            loss.backward()
+            return loss.item()
+
+        # warm up
+        forward_backward()
+        loss, elapsed, peak_memory = benchmark(forward_backward, args.device)
+        print(f'{name:>12} {elapsed:>10.1f} {peak_memory:>17.1f} '
+              f'{loss:>8.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import argparse
+
+import torch
+
+from mmseg.models.utils import SelfAttentionBlock
+from tools.benchmarks.profiling import benchmark
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the chunked attention of SelfAttentionBlock '
+        'configured as the PAM of DANet')
+    parser.add_argument(
+        '--shape',
+        type=int,
+        nargs=2,
+        default=[128, 256],
+        help='feature size (h, w), 1/8 of the input size')
+    parser.add_argument(
+        '--channels', type=int, default=512, help='channels of the features')
+    parser.add_argument(
+        '--chunk-sizes',
+        type=int,
+        nargs='+',
+        default=[1024, 4096],
+        help='chunk sizes, each one is benchmarked')
+    parser.add_argument(
+        '--backward',
+        action='store_true',
+        help='benchmark forward and backward instead of forward only')
+    parser.add_argument(
+        '--device',
+        default='cuda' if torch.cuda.is_available() else 'cpu',
+        help='device used for benchmarking')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    torch.manual_seed(0)
+    block = SelfAttentionBlock(
+        key_in_channels=args.channels,
+        query_in_channels=args.channels,
+        channels=args.channels // 8,
+        out_channels=args.channels,
+        share_key_query=False,
+        query_downsample=None,
+        key_downsample=None,
+        key_query_num_convs=1,
+        key_query_norm=False,
+        value_out_num_convs=1,
+        value_out_norm=False,
+        matmul_norm=False,
+        with_out=False,
+        conv_cfg=None,
+        norm_cfg=None,
+        act_cfg=None).to(args.device)
+    feats = torch.randn(1, args.channels, *args.shape, device=args.device)
+
+    def forward():
+        if not args.backward:
+            with torch.no_grad():
+                return block(feats, feats)
+        x = feats.clone().requires_grad_()
+        out = block(x, x)
+        out.sum().backward()
+        return x.grad
+
+    num_positions = args.shape[0] * args.shape[1]
+    print(f'similarity map: {num_positions}x{num_positions}, '
+          f'{num_positions**2 * 4 / 1024**2:.0f} MB in fp32')
+    print(f'{"chunk size":>10} {"time (ms)":>10} {"peak memory (MB)":>17} '
+          f'{"max error":>10}')
+    # warm up
+    forward()
+    expected, elapsed, peak_memory = benchmark(forward, args.device)
+    print(f'{"none":>10} {elapsed:>10.1f} {peak_memory:>17.1f} {0:>10.2e}')
+    for chunk_size in args.chunk_sizes:
+        block.chunk_size = chunk_size
+        result, elapsed, peak_memory = benchmark(forward, args.device)
+        error = (result - expected).abs().max().item()
+        print(f'{chunk_size:>10} {elapsed:>10.1f} {peak_memory:>17.1f} '
+              f'{error:>10.2e}')
+        block.chunk_size = None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import argparse
+
+import torch
+import torch.nn.functional as F
+from mmcv import ConfigDict
+
+from mmseg.models import build_segmentor
+from tools.benchmarks.profiling import benchmark
+
+
+def pad_slide_inference(self, img, img_meta, rescale):
+    """The former sliding-window inference which forwards one crop at a time
+    and pads the logits of each crop to the full image, kept as the
+    baseline."""
+    h_stride, w_stride = self.test_cfg.stride
+    h_crop, w_crop = self.test_cfg.crop_size
+    batch_size, _, h_img, w_img = img.size()
+    num_classes = self.num_classes
+    h_grids = max(h_img - h_crop + h_stride - 1, 0) // h_stride + 1
+    w_grids = max(w_img - w_crop + w_stride - 1, 0) // w_stride + 1
+    preds = img.new_zeros((batch_size, num_classes, h_img, w_img))
+    count_mat = img.new_zeros((batch_size, 1, h_img, w_img))
+    for h_idx in range(h_grids):
+        for w_idx in range(w_grids):
+            y1 = h_idx * h_stride
+            x1 = w_idx * w_stride
+            y2 = min(y1 + h_crop, h_img)
+            x2 = min(x1 + w_crop, w_img)
+            y1 = max(y2 - h_crop, 0)
+            x1 = max(x2 - w_crop, 0)
+            crop_img = img[:, :, y1:y2, x1:x2]
+            crop_seg_logit = self.encode_decode(crop_img, img_meta)
+            preds += F.pad(crop_seg_logit, (int(x1), int(preds.shape[3] - x2),
+                                            int(y1), int(preds.shape[2] - y2)))
+            count_mat[:, :, y1:y2, x1:x2] += 1
+    return (preds / count_mat).argmax(dim=1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the sliding-window inference of '
+        'EncoderDecoder with a ResNet-18 FCN')
+    parser.add_argument(
+        '--shape',
+        type=int,
+        nargs=2,
+        default=[2048, 2048],
+        help='input image size (h, w)')
+    parser.add_argument(
+        '--crop-size', type=int, default=512, help='size of the windows')
+    parser.add_argument(
+        '--stride', type=int, default=341, help='stride of the windows')
+    parser.add_argument(
+        '--num-classes', type=int, default=20, help='number of classes')
+    parser.add_argument(
+        '--batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1, 4, 8],
+        help='numbers of windows per forward, each one is benchmarked')
+    parser.add_argument(
+        '--device',
+        default='cuda' if torch.cuda.is_available() else 'cpu',
+        help='device used for benchmarking')
+    args = parser.parse_args()
+    return args
+
+
+@torch.no_grad()
+def main():
+    args = parse_args()
+    torch.manual_seed(0)
+    test_cfg = dict(
+        mode='slide',
+        crop_size=(args.crop_size, args.crop_size),
+        stride=(args.stride, args.stride))
+    model = build_segmentor(
+        ConfigDict(
+            type='EncoderDecoder',
+            backbone=dict(
+                type='ResNetV1c',
+                depth=18,
+                out_indices=(3, ),
+                strides=(1, 2, 1, 1),
+                dilations=(1, 1, 2, 4)),
+            decode_head=dict(
+                type='FCNHead',
+                in_channels=512,
+                channels=128,
+                num_classes=args.num_classes,
+                loss_decode=dict(type='CrossEntropyLoss')),
+            test_cfg=test_cfg)).to(args.device).eval()
+    img = torch.randn(1, 3, *args.shape, device=args.device)
+    img_meta = [dict(ori_shape=(*args.shape, 3), flip=False)]
+    # warm up
+    model.encode_decode(img[:, :, :args.crop_size, :args.crop_size], img_meta)
+
+    expected, elapsed, peak_memory = benchmark(
+        lambda: pad_slide_inference(model, img, img_meta, False), args.device)
+    print(f'{"mode":>24} {"time (ms)":>10} {"peak memory (MB)":>17}')
+    print(f'{"padded, batch 1":>24} {elapsed:>10.1f} {peak_memory:>17.1f}')
+    for batch_size in args.batch_sizes:
+        for accumulator in ['device', 'cpu', 'argmax']:
+            model.test_cfg = ConfigDict(
+                test_cfg, batch_size=batch_size, accumulator=accumulator)
+            if accumulator == 'argmax':
+                func = lambda: model.slide_argmax_inference(  # noqa: E731
+                    img, img_meta, False)
+            else:
+                func = lambda: model.slide_inference(  # noqa: E731
+                    img, img_meta, False).argmax(dim=1)
+            result, elapsed, peak_memory = benchmark(func, args.device)
+            assert (result.cpu() == expected.cpu()).float().mean() > 0.999
+            name = f'{accumulator}, batch {batch_size}'
+            print(f'{name:>24} {elapsed:>10.1f} {peak_memory:>17.1f}')
+
+
+if __name__ == '__main__':
+    main()
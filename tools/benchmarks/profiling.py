@@ -0,0 +1,77 @@
+"""Time and peak memory measurement shared by the benchmarks.
+
+The benchmarks import this module as ``tools.benchmarks.profiling``, so run
+them from the root of the repository, e.g.
+``python -m tools.benchmarks.benchmark_aug_test``.
+"""
+import time
+import tracemalloc
+
+import torch
+
+
+def cpu_peak_memory(func):
+    """Return the result and the peak memory (MB) allocated by torch on CPU
+    while running a function.
+
+    The memory is measured with the autograd profiler, which records the
+    memory allocated and freed by each operator. The memory of an operator
+    is counted from its start, so temporaries allocated and freed within an
+    operator are missed.
+    """
+    with torch.autograd.profiler.profile(profile_memory=True) as prof:
+        result = func()
+    memory = peak_memory = 0
+    for event in sorted(
+            prof.function_events, key=lambda event: event.time_range.start):
+        memory += event.self_cpu_memory_usage
+        peak_memory = max(peak_memory, memory)
+    return result, peak_memory / 1024**2
+
+
+def numpy_peak_memory(func):
+    """Return the result and the peak memory (MB) allocated through the
+    Python memory allocators while running a function, which covers the
+    numpy arrays."""
+    tracemalloc.start()
+    try:
+        result = func()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, peak_memory / 1024**2
+
+
+def benchmark(func, device, repeat=1):
+    """Return the result, mean time (ms) and peak memory (MB) of a function.
+
+    Args:
+        func (callable): The function to benchmark, called without
+            arguments. It must give the same result when called again.
+        device (str): ``'cuda'`` or ``'cpu'`` for torch code, ``'numpy'``
+            for numpy code. On CUDA the peak memory is given by
+            ``torch.cuda``. Otherwise the function is run once more to
+            measure its peak memory with :func:`cpu_peak_memory` or
+            :func:`numpy_peak_memory`, so that the profiling does not slow
+            down the timed runs.
+        repeat (int): Number of timed runs. Default: 1.
+    """
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+        torch.cuda.empty_cache()
+        torch.cuda.reset_peak_memory_stats()
+        base_memory = torch.cuda.memory_allocated()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    if device.startswith('cuda'):
+        torch.cuda.synchronize()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    if device.startswith('cuda'):
+        peak_memory = (torch.cuda.max_memory_allocated() -
+                       base_memory) / 1024**2
+    elif device == 'numpy':
+        _, peak_memory = numpy_peak_memory(func)
+    else:
+        _, peak_memory = cpu_peak_memory(func)
+    return result, elapsed, peak_memory